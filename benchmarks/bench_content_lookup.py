@@ -0,0 +1,54 @@
+"""
+Benchmark: ContentManager.get_text lookups per second when the content
+files are stat()ed on every lookup (check_interval=0, the old behaviour)
+vs. the snapshot checked once per interval, and get_text(...).format(...)
+vs. render() on the precompiled template.
+
+Usage:
+    python -m benchmarks.bench_content_lookup [--lookups 200000]
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+from services.content import ContentManager
+
+
+KEYS = ("greeting.start", "system.not_authorized", "system.content_reloaded")
+
+
+def _lookups_per_second(manager: ContentManager, lookups: int) -> float:
+    manager.load()
+    started = time.perf_counter()
+    for index in range(lookups):
+        manager.get_text(KEYS[index % len(KEYS)])
+    return lookups / (time.perf_counter() - started)
+
+
+def _renders_per_second(manager: ContentManager, lookups: int, precompiled: bool) -> float:
+    manager.load()
+    started = time.perf_counter()
+    for index in range(lookups):
+        if precompiled:
+            manager.render("tickets.created_confirmation", ticket_id=index)
+        else:
+            manager.get_text("tickets.created_confirmation").format(ticket_id=index)
+    return lookups / (time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lookups", type=int, default=200_000)
+    args = parser.parse_args()
+
+    for label, interval in (("stat per call", 0.0), ("snapshot", 2.0)):
+        rate = _lookups_per_second(ContentManager(check_interval=interval), args.lookups)
+        print(f"{label:>14}: {rate:12,.0f} get_text/s")
+    for label, precompiled in (("str.format", False), ("render", True)):
+        rate = _renders_per_second(ContentManager(check_interval=2.0), args.lookups, precompiled)
+        print(f"{label:>14}: {rate:12,.0f} renders/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Benchmark: ContentManager.load() at process start, parsing the YAML files
+vs. reading the hash-keyed marshal cache next to them.
+
+Usage:
+    python -m benchmarks.bench_content_startup [--repeat 20]
+"""
+from __future__ import annotations
+
+import argparse
+import shutil
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from services.content import MENUS_FILE, TEXTS_FILE, ContentManager, _cache_path
+
+
+CONTENT_DIR = Path(__file__).resolve().parent.parent / "content"
+
+
+def _load_ms(base: Path, cache: bool, keep_cache: bool) -> float:
+    if not keep_cache:
+        for filename in (TEXTS_FILE, MENUS_FILE):
+            _cache_path(base / filename).unlink(missing_ok=True)
+    started = time.perf_counter()
+    ContentManager(base_path=base, cache=cache).load()
+    return (time.perf_counter() - started) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        base = Path(tmp)
+        for filename in (TEXTS_FILE, MENUS_FILE):
+            shutil.copy(CONTENT_DIR / filename, base / filename)
+
+        runs = {
+            "yaml (no cache)": [_load_ms(base, cache=False, keep_cache=False) for _ in range(args.repeat)],
+            "cache miss": [_load_ms(base, cache=True, keep_cache=False) for _ in range(args.repeat)],
+            "cache hit": [_load_ms(base, cache=True, keep_cache=True) for _ in range(args.repeat)],
+        }
+        for label, timings in runs.items():
+            print(f"{label:>16}: median {statistics.median(timings):7.2f} ms, max {max(timings):7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
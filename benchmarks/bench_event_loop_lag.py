@@ -0,0 +1,114 @@
+"""
+Benchmark: event-loop lag while a burst of tickets is created from the
+asyncio loop, comparing the blocking create_ticket with create_ticket_async.
+
+Lag is sampled by a ticker that sleeps for a fixed interval and records how
+late it wakes up; with blocking SQLite calls every commit delays the ticker.
+
+Usage:
+    python -m benchmarks.bench_event_loop_lag [--tickets 300] [--concurrency 20]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import statistics
+import tempfile
+import time
+from dataclasses import replace
+from pathlib import Path
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+
+import services.tickets as tickets_service
+from config import get_settings
+from db.base import Base
+from db.models import TicketType
+from db.session import build_async_engine, build_engine
+
+SAMPLE_INTERVAL_SECONDS = 0.005
+
+
+def _ticket_kwargs(index: int) -> dict:
+    return {
+        "type_": TicketType.ROOM_SERVICE,
+        "guest_chat_id": str(100000 + index % 50),
+        "guest_name": "Bench Guest",
+        "room_number": str(100 + index % 30),
+        "payload": {"branch": "bench", "index": index},
+        "initial_message": "Benchmark ticket",
+        "rate_limit": False,
+    }
+
+
+async def _sample_lag(stop: asyncio.Event, samples: list[float]) -> None:
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(SAMPLE_INTERVAL_SECONDS)
+        samples.append(max(time.perf_counter() - started - SAMPLE_INTERVAL_SECONDS, 0.0))
+
+
+async def _burst(mode: str, tickets: int, concurrency: int) -> tuple[list[float], float]:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _create(index: int) -> None:
+        async with semaphore:
+            if mode == "sync":
+                tickets_service.create_ticket(**_ticket_kwargs(index))
+            else:
+                await tickets_service.create_ticket_async(**_ticket_kwargs(index))
+
+    samples: list[float] = []
+    stop = asyncio.Event()
+    sampler = asyncio.create_task(_sample_lag(stop, samples))
+    started = time.perf_counter()
+    await asyncio.gather(*(_create(index) for index in range(tickets)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await sampler
+    return samples, elapsed
+
+
+def _run_mode(mode: str, tickets: int, concurrency: int) -> tuple[list[float], float]:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "bench.db"
+        settings = replace(get_settings(), database_url=f"sqlite:///{db_path}")
+        engine = build_engine(settings)
+        async_engine = build_async_engine(settings)
+        Base.metadata.create_all(bind=engine)
+
+        original = (tickets_service.SessionLocal, tickets_service.AsyncSessionLocal)
+        tickets_service.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        tickets_service.AsyncSessionLocal = async_sessionmaker(
+            async_engine, autoflush=False, expire_on_commit=False
+        )
+        try:
+            return asyncio.run(_burst(mode, tickets, concurrency))
+        finally:
+            tickets_service.SessionLocal, tickets_service.AsyncSessionLocal = original
+            asyncio.run(async_engine.dispose())
+            engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tickets", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+    logging.getLogger("services.tickets").setLevel(logging.WARNING)
+
+    for mode in ("sync", "async"):
+        samples, elapsed = _run_mode(mode, args.tickets, args.concurrency)
+        samples_ms = sorted(sample * 1000 for sample in samples) or [0.0]
+        p99 = samples_ms[min(len(samples_ms) - 1, int(len(samples_ms) * 0.99))]
+        print(
+            f"{mode:>6}: {args.tickets / elapsed:7.1f} tickets/s, "
+            f"loop lag mean {statistics.fmean(samples_ms):6.2f} ms, "
+            f"p99 {p99:6.2f} ms, max {samples_ms[-1]:6.2f} ms ({len(samples)} samples)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Benchmark: reply-keyboard text messages per second through the full
+Dispatcher (every router from bot.handlers, memory FSM storage).
+
+Updates are fed with Dispatcher.feed_update to a Bot whose session answers
+every API call locally, so the numbers cover routing, filters and the
+handlers themselves but no network. The labels used only lead to handlers
+that answer from content (no per-message DB work).
+
+Usage:
+    python -m benchmarks.bench_label_routing [--messages 5000]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any
+
+from aiogram import Bot, Dispatcher
+from aiogram.client.session.base import BaseSession
+from aiogram.methods import SendMessage, TelegramMethod
+from aiogram.types import Chat, Message, Update, User
+
+from bot.handlers import register_handlers
+
+LABELS = (
+    "🏠 Главное меню",
+    "❓ Вопросы",
+    "📍 Как добраться",
+    "🌲 Об отеле",
+    "🍽 Ресторан",
+    "🍳 Завтрак",
+)
+CHAT = Chat(id=100500, type="private")
+USER = User(id=100500, is_bot=False, first_name="Bench")
+
+
+class LocalSession(BaseSession):
+    """Answers API calls without a network round-trip."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.calls = 0
+
+    async def make_request(self, bot: Bot, method: TelegramMethod[Any], timeout: int | None = None) -> Any:
+        self.calls += 1
+        if isinstance(method, SendMessage):
+            return Message(message_id=self.calls, date=datetime.now(), chat=CHAT, text=method.text)
+        return True
+
+    async def stream_content(self, *args: Any, **kwargs: Any):  # pragma: no cover
+        raise NotImplementedError
+        yield b""
+
+    async def close(self) -> None:
+        return None
+
+
+def _update(index: int) -> Update:
+    message = Message(
+        message_id=index,
+        date=datetime.now(),
+        chat=CHAT,
+        from_user=USER,
+        text=LABELS[index % len(LABELS)],
+    )
+    return Update(update_id=index, message=message)
+
+
+async def _run(messages: int) -> None:
+    logging.getLogger("aiogram.event").setLevel(logging.WARNING)
+    session = LocalSession()
+    bot = Bot("123456:BENCHMARK", session=session)
+    dp = Dispatcher()
+    register_handlers(dp)
+
+    updates = [_update(index) for index in range(messages)]
+    # Warm-up: content, keyboards and the label table are built on first use.
+    for update in updates[: len(LABELS)]:
+        await dp.feed_update(bot, update)
+
+    session.calls = 0
+    started = time.perf_counter()
+    for update in updates:
+        await dp.feed_update(bot, update)
+    elapsed = time.perf_counter() - started
+    print(f"{messages} messages in {elapsed:.3f}s: {messages / elapsed:,.0f} messages/s ({session.calls} API calls)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=5000)
+    args = parser.parse_args()
+    asyncio.run(_run(args.messages))
+
+
+if __name__ == "__main__":
+    main()
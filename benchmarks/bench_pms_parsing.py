@@ -0,0 +1,128 @@
+"""
+Benchmark: PMS reservation parsing throughput over one synthetic page, the
+old per-item ``or``-chains over every alternative key vs. the shape-cached
+parser (key mapping resolved once per payload shape, then direct lookups).
+
+Items use the PMS's "livedFrom"/"livedTo"/"roomNo" spelling, which sits late
+in the candidate lists, so the old parser misses several keys per field.
+
+Usage:
+    python -m benchmarks.bench_pms_parsing [--reservations 10000]
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from datetime import date, datetime, timedelta
+from typing import Any
+
+from services.shelter import (
+    PMSReservation,
+    _coerce_bool,
+    _coerce_str,
+    _extract_guest_items,
+    parse_reservation,
+)
+
+
+def _legacy_date(value: Any) -> date | None:
+    if value is None:
+        return None
+    text = str(value).strip()
+    if not text:
+        return None
+    normalized = text.replace("Z", "+00:00")
+    for candidate in (normalized, normalized.split("T")[0], normalized.split(" ")[0]):
+        try:
+            return datetime.fromisoformat(candidate).date()
+        except ValueError:
+            pass
+        try:
+            return datetime.strptime(candidate, "%Y-%m-%d").date()
+        except ValueError:
+            continue
+    return None
+
+
+def _legacy_room(item: dict[str, Any]) -> str | None:
+    direct = _coerce_str(item.get("roomNumber") or item.get("roomNo") or item.get("room_number") or item.get("number"))
+    if direct:
+        return direct
+    room_data = item.get("room")
+    if isinstance(room_data, dict):
+        return _coerce_str(
+            room_data.get("roomNumber") or room_data.get("roomNo") or room_data.get("number") or room_data.get("name")
+        )
+    return _coerce_str(room_data)
+
+
+def legacy_parse_reservation(item: dict[str, Any]) -> PMSReservation | None:
+    """The parser as it was before shape caching, kept for comparison."""
+
+    reservation_id = _coerce_str(item.get("id") or item.get("reservationId") or item.get("reservation_id") or item.get("Id"))
+    check_in = _legacy_date(
+        item.get("checkIn") or item.get("check_in") or item.get("arrivalDate")
+        or item.get("from") or item.get("livedFrom") or item.get("beginDate")
+    )
+    check_out = _legacy_date(
+        item.get("checkOut") or item.get("check_out") or item.get("departureDate")
+        or item.get("until") or item.get("livedTo") or item.get("endDate")
+    )
+    if not reservation_id or not check_in or not check_out:
+        return None
+    status = _coerce_str(item.get("status") or item.get("reservationStatus") or item.get("state")) or "UNKNOWN"
+    guest_name = _coerce_str(item.get("guestName") or item.get("customerName") or item.get("fullName") or item.get("name"))
+    is_annulled = _coerce_bool(
+        item.get("isAnnul") or item.get("is_annul") or item.get("annulled")
+        or item.get("isCanceled") or item.get("cancelled")
+    ) or any(token in status.lower() for token in ("annul", "cancel"))
+    return PMSReservation(
+        id=reservation_id,
+        status=status,
+        check_in=check_in,
+        check_out=check_out,
+        room_number=_legacy_room(item),
+        guest_name=guest_name,
+        is_annulled=is_annulled,
+        guests=_extract_guest_items(item),
+    )
+
+
+def synthetic_page(reservations: int) -> list[dict[str, Any]]:
+    start = date(2026, 1, 1)
+    page = []
+    for index in range(reservations):
+        lived_from = start + timedelta(days=index % 90)
+        page.append({
+            "reservationId": 100000 + index,
+            "livedFrom": f"{lived_from.isoformat()}T14:00:00",
+            "livedTo": f"{(lived_from + timedelta(days=1 + index % 7)).isoformat()}T12:00:00",
+            "reservationStatus": "Annulled" if index % 20 == 0 else "Confirmed",
+            "customerName": f"Guest {index}",
+            "isAnnul": index % 20 == 0,
+            "roomNo": str(100 + index % 60),
+        })
+    return page
+
+
+def _items_per_second(parse, page: list[dict[str, Any]]) -> float:
+    started = time.perf_counter()
+    for item in page:
+        parse(item)
+    return len(page) / (time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--reservations", type=int, default=10_000)
+    args = parser.parse_args()
+
+    page = synthetic_page(args.reservations)
+    assert [parse_reservation(item) for item in page] == [legacy_parse_reservation(item) for item in page]
+    for label, parse in (("or-chains", legacy_parse_reservation), ("shape cache", parse_reservation)):
+        rate = max(_items_per_second(parse, page) for _ in range(3))
+        print(f"{label:>12}: {rate:12,.0f} reservations/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Benchmark: wall time and peak memory of fetching a 90-day Reservations/ByFilter
+window from a local PMS stub, the old way (every page in sequence into one
+list, then the guest lookups) vs. streaming (next page prefetched while the
+current one is consumed, guest lookups started as reservations arrive).
+
+"full" looks up guests for every reservation; "incremental" is a sync where
+nothing changed, so the stream keeps only the content hashes. Peak memory is
+measured with tracemalloc in a separate run from the wall time.
+
+Usage:
+    python -m benchmarks.bench_pms_streaming [--reservations 10000] [--page-latency 0.01] [--guest-latency 0.002]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+from datetime import date, timedelta
+from typing import AsyncIterator
+
+from aiohttp import web
+
+from benchmarks.bench_pms_parsing import synthetic_page
+from services import shelter_http
+from services.shelter import PMSReservation, ShelterPMSClient
+from services.shelter_sync import SyncTimings, _fetch_guests, reservation_hash
+
+
+async def _start_stub(reservations: int, page_latency: float, guest_latency: float) -> tuple[web.AppRunner, str]:
+    items = synthetic_page(reservations)
+    size = ShelterPMSClient.PAGE_SIZE
+    # Rendered up front so the stub's own allocations stay out of the measurement.
+    pages = {
+        offset: json.dumps({"items": items[offset:offset + size], "count": len(items)}).encode()
+        for offset in range(0, len(items) + 1, size)
+    }
+    guests = json.dumps([{"id": "g", "firstName": "Guest", "phone": "+79990000000"}]).encode()
+
+    async def by_filter(request: web.Request) -> web.Response:
+        payload = await request.json()
+        await asyncio.sleep(page_latency)
+        body = b'{"items": [], "count": 0}' if payload["isAnnul"] else pages.get(payload["pagination"]["from"], pages[len(items) // size * size])
+        return web.Response(body=body, content_type="application/json")
+
+    async def reservation_guests(request: web.Request) -> web.Response:
+        await asyncio.sleep(guest_latency)
+        return web.Response(body=guests, content_type="application/json")
+
+    app = web.Application()
+    app.router.add_post("/api/Reservations/ByFilter", by_filter)
+    app.router.add_get("/api/Reservations/{rid}/Guests", reservation_guests)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    return runner, f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+
+
+async def _from_list(reservations: list[PMSReservation]) -> AsyncIterator[PMSReservation]:
+    for reservation in reservations:
+        yield reservation
+
+
+async def _run(client: ShelterPMSClient, streaming: bool, lookups: bool) -> int:
+    lived_from = date(2026, 1, 1)
+    lived_to = lived_from + timedelta(days=90)
+    timings = SyncTimings()
+    hashes: dict[str, str] = {}
+
+    if streaming:
+        async def changed(is_annul: bool) -> AsyncIterator[PMSReservation]:
+            async for reservation in client.iter_reservations_by_filter(lived_from, lived_to, is_annul=is_annul):
+                hashes[reservation.id] = reservation_hash(reservation)
+                if lookups:
+                    yield reservation
+
+        streams = [changed(False), changed(True)]
+    else:
+        fetched = []
+        for is_annul in (False, True):
+            fetched += [
+                reservation
+                async for reservation in client.iter_reservations_by_filter(lived_from, lived_to, is_annul=is_annul, prefetch=False)
+            ]
+        hashes = {reservation.id: reservation_hash(reservation) for reservation in fetched}
+        streams = [_from_list(fetched if lookups else [])]
+
+    await _fetch_guests(client, streams, concurrency=8, timings=timings)
+    return len(hashes)
+
+
+async def _measure(base_url: str, streaming: bool, lookups: bool, trace: bool) -> tuple[float, int]:
+    client = ShelterPMSClient(base_url=base_url, pms_token="token")
+    if trace:
+        tracemalloc.start()
+    started = time.perf_counter()
+    await _run(client, streaming, lookups)
+    elapsed = time.perf_counter() - started
+    peak = 0
+    if trace:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return elapsed, peak
+
+
+async def _main(args: argparse.Namespace) -> None:
+    runner, base_url = await _start_stub(args.reservations, args.page_latency, args.guest_latency)
+    try:
+        for scenario, lookups in (("full", True), ("incremental", False)):
+            for label, streaming in (("list", False), ("stream", True)):
+                elapsed, _ = await _measure(base_url, streaming, lookups, trace=False)
+                _, peak = await _measure(base_url, streaming, lookups, trace=True)
+                print(f"{scenario:>11} {label:>6}: {elapsed:8.2f}s wall, {peak / 1024 / 1024:8.2f} MiB peak")
+    finally:
+        await shelter_http.close_shelter_http()
+        await runner.cleanup()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--reservations", type=int, default=10_000)
+    parser.add_argument("--page-latency", type=float, default=0.01)
+    parser.add_argument("--guest-latency", type=float, default=0.002)
+    args = parser.parse_args()
+    asyncio.run(_main(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark: sync_reservations_once against the local Shelter simulator at
+100, 1k and 10k reservations: a full import, then an incremental sync with
+nothing changed. Every reservation falls in the sync window; a quarter of
+them belong to a bot user with a phone. The PMS client is pointed at the
+simulator through SHELTER_PMS_BASE_URL; the database is a temporary SQLite file.
+
+Usage:
+    python -m benchmarks.bench_shelter_sync [--sizes 100,1000,10000] [--latency 0.005] [--error-rate 0]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from dataclasses import replace
+from pathlib import Path
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.shelter_simulator import ShelterSimulator, SimulatorConfig, guest_phone
+from config import get_settings
+from db.base import Base
+from db.models import ShelterSyncState, User
+from db.session import build_async_engine, build_engine
+from services import shelter, shelter_http, shelter_sync
+from services.guest_context import get_local_today
+from services.shelter_sync import SYNC_WINDOW_FUTURE_DAYS, SYNC_WINDOW_PAST_DAYS
+
+
+async def _scenario(reservations: int, latency: float, error_rate: float, directory: Path) -> None:
+    simulator = ShelterSimulator(
+        SimulatorConfig(
+            reservations=reservations,
+            latency=latency,
+            error_rate=error_rate,
+            past_days=SYNC_WINDOW_PAST_DAYS,
+            window_days=SYNC_WINDOW_PAST_DAYS + SYNC_WINDOW_FUTURE_DAYS,
+        ),
+        today=get_local_today(),
+    )
+    runner, base_url = await simulator.start()
+    os.environ["SHELTER_PMS_BASE_URL"] = base_url
+    os.environ["SHELTER_PMS_TOKEN"] = "simulator"
+    shelter._shelter_pms_client = None
+
+    settings = replace(get_settings(), database_url=f"sqlite:///{directory / f'sync-{reservations}.db'}")
+    engine = build_engine(settings, profile="default")
+    Base.metadata.create_all(bind=engine)
+    with sessionmaker(bind=engine)() as db:
+        db.add_all(User(telegram_id=f"bench-{index}", phone=guest_phone(index)) for index in range(0, reservations, 4))
+        db.commit()
+    async_engine = build_async_engine(settings, profile="default")
+    shelter_sync.AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+
+    try:
+        for label, full in (("full", True), ("incremental", False)):
+            requests_before = sum(simulator.requests.values())
+            started = time.perf_counter()
+            matched = await shelter_sync.sync_reservations_once(full=full)
+            elapsed = time.perf_counter() - started
+            with sessionmaker(bind=engine)() as db:
+                state = db.get(ShelterSyncState, 1)
+                pages, guest_calls = state.last_sync_pages, state.last_sync_guest_calls
+            print(
+                f"{reservations:>6} {label:>11}: {elapsed:7.2f}s, {matched:5} matched, {pages:4} pages, "
+                f"{guest_calls:5} guest calls, {sum(simulator.requests.values()) - requests_before:5} requests"
+            )
+    finally:
+        await shelter_http.close_shelter_http()
+        await async_engine.dispose()
+        engine.dispose()
+        await runner.cleanup()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="100,1000,10000")
+    parser.add_argument("--latency", type=float, default=0.005)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        for size in (int(value) for value in args.sizes.split(",")):
+            asyncio.run(_scenario(size, args.latency, args.error_rate, Path(directory)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark: commit throughput of services.tickets.create_ticket
+with the bare SQLite engine vs. the tuned engine profile.
+
+Usage:
+    python -m benchmarks.bench_sqlite_profile [--tickets 500] [--threads 4]
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from pathlib import Path
+
+from sqlalchemy.orm import sessionmaker
+
+import services.tickets as tickets_service
+from config import get_settings
+from db.base import Base
+from db.models import TicketType
+from db.session import build_engine
+
+
+def _run_profile(profile: str, tickets: int, threads: int) -> float:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "bench.db"
+        settings = replace(get_settings(), database_url=f"sqlite:///{db_path}")
+        engine = build_engine(settings, profile=profile)
+        Base.metadata.create_all(bind=engine)
+
+        original_session_local = tickets_service.SessionLocal
+        tickets_service.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        try:
+            def _create(index: int) -> None:
+                tickets_service.create_ticket(
+                    type_=TicketType.ROOM_SERVICE,
+                    guest_chat_id=str(100000 + index % 50),
+                    guest_name="Bench Guest",
+                    room_number=str(100 + index % 30),
+                    payload={"branch": "bench", "index": index},
+                    initial_message="Benchmark ticket",
+                    rate_limit=False,
+                )
+
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=threads) as pool:
+                list(pool.map(_create, range(tickets)))
+            elapsed = time.perf_counter() - started
+        finally:
+            tickets_service.SessionLocal = original_session_local
+            engine.dispose()
+
+    return tickets / elapsed if elapsed > 0 else float("inf")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tickets", type=int, default=500)
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+    logging.getLogger("services.tickets").setLevel(logging.WARNING)
+
+    results = {}
+    for profile in ("default", "tuned"):
+        results[profile] = _run_profile(profile, args.tickets, args.threads)
+        print(f"{profile:>8}: {results[profile]:8.1f} tickets/s ({args.tickets} tickets, {args.threads} threads)")
+
+    if results["default"] > 0:
+        print(f"speedup: x{results['tuned'] / results['default']:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Benchmark: GET /api/tickets serialization for a large ticket history,
+loading every message (the old selectinload path) vs. reading the
+denormalized summary columns on Ticket.
+
+Usage:
+    python -m benchmarks.bench_ticket_list [--tickets 10000] [--messages 5]
+"""
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from dataclasses import replace
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import event
+from sqlalchemy.orm import selectinload, sessionmaker
+
+from config import get_settings
+from db.base import Base
+from db.models import Ticket, TicketMessage, TicketMessageSender, TicketStatus, TicketType
+from db.session import build_engine
+from services.tickets import record_ticket_message
+
+
+def _seed(Session, tickets: int, messages: int) -> None:
+    started = datetime.utcnow() - timedelta(days=30)
+    with Session() as db:
+        for index in range(tickets):
+            ticket = Ticket(
+                request_id=f"bench-{index}",
+                type=TicketType.ROOM_SERVICE,
+                status=TicketStatus.PENDING_ADMIN if index % 10 == 0 else TicketStatus.COMPLETED,
+                guest_chat_id=str(100000 + index % 500),
+                created_at=started,
+                updated_at=started + timedelta(minutes=index),
+            )
+            db.add(ticket)
+            for position in range(messages):
+                message = TicketMessage(
+                    ticket=ticket,
+                    request_id=f"bench-{index}",
+                    sender=TicketMessageSender.ADMIN if position % 2 else TicketMessageSender.GUEST,
+                    content="Benchmark message " * 10,
+                    created_at=started + timedelta(minutes=index, seconds=position),
+                )
+                db.add(message)
+                record_ticket_message(ticket, message)
+        db.commit()
+
+
+def _old_list(db) -> int:
+    tickets = db.query(Ticket).options(selectinload(Ticket.messages)).order_by(Ticket.updated_at.desc()).all()
+    for ticket in tickets:
+        sorted(ticket.messages, key=lambda message: message.created_at)
+    return len(tickets)
+
+
+def _new_list(db) -> int:
+    tickets = db.query(Ticket).order_by(Ticket.updated_at.desc()).all()
+    for ticket in tickets:
+        _ = (ticket.last_message_at or ticket.updated_at, ticket.unread_guest_count)
+    return len(tickets)
+
+
+def _measure(Session, engine, list_fn) -> tuple[float, int]:
+    statements = []
+
+    def _count(*_args) -> None:
+        statements.append(1)
+
+    event.listen(engine, "before_cursor_execute", _count)
+    try:
+        with Session() as db:
+            started = time.perf_counter()
+            list_fn(db)
+            elapsed = time.perf_counter() - started
+    finally:
+        event.remove(engine, "before_cursor_execute", _count)
+    return elapsed, len(statements)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tickets", type=int, default=10000)
+    parser.add_argument("--messages", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        settings = replace(get_settings(), database_url=f"sqlite:///{Path(tmp) / 'bench.db'}")
+        engine = build_engine(settings)
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine, autoflush=False)
+        _seed(Session, args.tickets, args.messages)
+
+        for label, list_fn in (("selectinload", _old_list), ("summary", _new_list)):
+            elapsed, statements = _measure(Session, engine, list_fn)
+            print(f"{label:>12}: {elapsed * 1000:8.1f} ms, {statements} SQL statements ({args.tickets} tickets)")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
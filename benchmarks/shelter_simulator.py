@@ -0,0 +1,269 @@
+"""
+Local stand-in for the Shelter PMS and booking-widget APIs, for load tests
+that must not hit cloud.shelter.ru.
+
+Serves the endpoints services/shelter.py calls, from one generated hotel:
+
+    POST /api/Reservations/ByFilter        livedFrom/livedTo/isAnnul, paginated
+    GET  /api/Reservations/{id}/Guests
+    GET  /api/Reservations/{id}
+    POST /api/online/getHotelParams
+    POST /api/online/getVariants           availability from the reservations
+
+The dataset is deterministic for a given seed: reservations check in between
+30 days ago and 90 days ahead (``past_days``, ``window_days``), and reservation ``n`` has guests with phones
+``+79{n:07d}{k:02d}`` (see :func:`guest_phone`). Every response can be delayed
+(``latency`` plus up to ``jitter``) and a share of requests (``error_rate``)
+answered with 503, which the clients treat as transient.
+
+Point the bot or web_admin at it with::
+
+    python -m benchmarks.shelter_simulator --reservations 10000 --latency 0.02
+    SHELTER_PMS_BASE_URL=http://127.0.0.1:8089 SHELTER_PMS_TOKEN=sim \\
+    SHELTER_WIDGET_BASE_URL=http://127.0.0.1:8089 SHELTER_WIDGET_TOKEN=sim python -m bot.main
+
+Usage:
+    python -m benchmarks.shelter_simulator [--port 8089] [--reservations 1000]
+        [--latency 0] [--jitter 0] [--error-rate 0] [--categories 6] [--seed 1]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+from collections import Counter
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Any
+
+from aiohttp import web
+
+from services.shelter_http import endpoint_key
+
+
+@dataclass
+class SimulatorConfig:
+    reservations: int = 1000
+    categories: int = 6
+    rooms_per_category: int = 40
+    guests_per_reservation: int = 2
+    # Check-ins are spread over this many days, starting past_days ago
+    past_days: int = 30
+    window_days: int = 120
+    # Share of reservations returned by ByFilter with isAnnul=true
+    annulled_ratio: float = 0.05
+    # Guests inline in ByFilter items, so the sync needs no per-reservation lookups
+    embed_guests: bool = False
+    latency: float = 0.0
+    jitter: float = 0.0
+    error_rate: float = 0.0
+    seed: int = 1
+
+
+def guest_phone(reservation: int, guest: int = 0) -> str:
+    return f"+79{reservation:07d}{guest:02d}"
+
+
+def _parse_day(value: Any) -> date:
+    return datetime.fromisoformat(str(value)).date()
+
+
+class ShelterSimulator:
+    def __init__(self, config: SimulatorConfig, today: date | None = None) -> None:
+        self.config = config
+        self.today = today or date.today()
+        self.requests: Counter = Counter()
+        self.errors = 0
+        self._random = random.Random(config.seed)
+        self.categories = [
+            {"id": index + 1, "name": f"Category {index + 1}", "capacity": 2 + index % 3}
+            for index in range(config.categories)
+        ]
+        self.reservations: dict[str, dict[str, Any]] = {}
+        self.guests: dict[str, list[dict[str, Any]]] = {}
+        # (category id, day) -> rooms taken
+        self.occupancy: Counter = Counter()
+        self._generate()
+        # ByFilter results and rendered pages; the dataset never changes while running.
+        self._matching: dict[tuple, list[dict[str, Any]]] = {}
+        self._pages: dict[tuple, bytes] = {}
+
+    def _generate(self) -> None:
+        rng = random.Random(self.config.seed)
+        first_day = self.today - timedelta(days=self.config.past_days)
+        for index in range(self.config.reservations):
+            check_in = first_day + timedelta(days=rng.randrange(self.config.window_days))
+            check_out = check_in + timedelta(days=rng.randint(1, 7))
+            category = self.categories[index % len(self.categories)]
+            annulled = rng.random() < self.config.annulled_ratio
+            reservation_id = str(100000 + index)
+            guests = [
+                {
+                    "id": f"{reservation_id}-{position}",
+                    "firstName": f"Guest{index}",
+                    "lastName": f"N{position}",
+                    "phone": guest_phone(index, position),
+                    "email": None,
+                }
+                for position in range(self.config.guests_per_reservation)
+            ]
+            self.guests[reservation_id] = guests
+            self.reservations[reservation_id] = {
+                "id": reservation_id,
+                "livedFrom": f"{check_in.isoformat()}T14:00:00",
+                "livedTo": f"{check_out.isoformat()}T12:00:00",
+                "status": "Annulled" if annulled else "Confirmed",
+                "isAnnul": annulled,
+                "roomNo": str(100 * category["id"] + index % self.config.rooms_per_category),
+                "customerName": f"Guest{index} N0",
+                "categoryId": category["id"],
+            }
+            if not annulled:
+                day = check_in
+                while day < check_out:
+                    self.occupancy[(category["id"], day)] += 1
+                    day += timedelta(days=1)
+
+    # -- middleware ---------------------------------------------------------
+
+    @web.middleware
+    async def _faults(self, request: web.Request, handler) -> web.StreamResponse:
+        self.requests[endpoint_key(request.path)] += 1
+        delay = self.config.latency + (self._random.uniform(0, self.config.jitter) if self.config.jitter else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if self.config.error_rate and self._random.random() < self.config.error_rate:
+            self.errors += 1
+            return web.json_response({"error": "simulated outage"}, status=503)
+        return await handler(request)
+
+    # -- PMS ----------------------------------------------------------------
+
+    async def by_filter(self, request: web.Request) -> web.Response:
+        payload = await request.json()
+        lived_from = _parse_day(payload["livedFrom"])
+        lived_to = _parse_day(payload["livedTo"])
+        is_annul = bool(payload.get("isAnnul"))
+        pagination = payload.get("pagination") or {}
+        offset = int(pagination.get("from", 0))
+        count = int(pagination.get("count", 50))
+
+        key = (lived_from, lived_to, is_annul, offset, count)
+        body = self._pages.get(key)
+        if body is None:
+            matching = self._matching.get(key[:3])
+            if matching is None:
+                matching = self._matching[key[:3]] = [
+                    item for item in self.reservations.values()
+                    if item["isAnnul"] == is_annul
+                    and _parse_day(item["livedFrom"]) <= lived_to
+                    and _parse_day(item["livedTo"]) >= lived_from
+                ]
+            page = matching[offset:offset + count]
+            if self.config.embed_guests:
+                page = [{**item, "guests": self.guests[item["id"]]} for item in page]
+            body = json.dumps({"items": page, "count": len(matching)}).encode()
+            self._pages[key] = body
+        return web.Response(body=body, content_type="application/json")
+
+    async def reservation(self, request: web.Request) -> web.Response:
+        item = self.reservations.get(request.match_info["rid"])
+        if item is None:
+            return web.json_response({"error": "not found"}, status=404)
+        return web.json_response(item)
+
+    async def reservation_guests(self, request: web.Request) -> web.Response:
+        guests = self.guests.get(request.match_info["rid"])
+        if guests is None:
+            return web.json_response({"error": "not found"}, status=404)
+        return web.json_response(guests)
+
+    # -- booking widget -----------------------------------------------------
+
+    async def hotel_params(self, request: web.Request) -> web.Response:
+        data = [
+            [{"currency": "RUB", "checkInTime": "14:00", "checkOutTime": "12:00"}],
+            [],
+            [{"code": "ru"}, {"code": "en"}],
+            [],
+            [{"id": 1, "name": "Standard rate"}],
+            [],
+            [{"id": category["id"], "name": category["name"], "capacity": category["capacity"]} for category in self.categories],
+            [{"name": "Simulated hotel"}],
+        ]
+        return web.json_response({"data": data})
+
+    async def variants(self, request: web.Request) -> web.Response:
+        payload = await request.json()
+        check_in = _parse_day(payload["checkIn"])
+        check_out = max(_parse_day(payload["checkOut"]), check_in + timedelta(days=1))
+        adults = int(payload.get("adults") or 1)
+        nights = (check_out - check_in).days
+        variants = []
+        for category in self.categories:
+            if category["capacity"] < adults:
+                continue
+            taken = max(self.occupancy[(category["id"], check_in + timedelta(days=day))] for day in range(nights))
+            variants.append({
+                "signatureId": f"sim-{category['id']}-{check_in.isoformat()}-{nights}",
+                "categoryId": category["id"],
+                "categoryName": category["name"],
+                "categoryDescription": "",
+                "price": (3000.0 + 500 * category["id"]) * nights,
+                "availableCount": max(self.config.rooms_per_category - taken, 0),
+                "capacity": category["capacity"],
+                "images": [],
+                "rateId": 1,
+                "rateName": "Standard rate",
+            })
+        return web.json_response({"data": variants})
+
+    def app(self) -> web.Application:
+        app = web.Application(middlewares=[self._faults])
+        app.router.add_post("/api/Reservations/ByFilter", self.by_filter)
+        app.router.add_get("/api/Reservations/{rid}/Guests", self.reservation_guests)
+        app.router.add_get("/api/Reservations/{rid}", self.reservation)
+        app.router.add_post("/api/online/getHotelParams", self.hotel_params)
+        app.router.add_post("/api/online/getVariants", self.variants)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> tuple[web.AppRunner, str]:
+        """Serve in the running loop; returns the runner (``cleanup()`` to stop) and the base URL."""
+
+        runner = web.AppRunner(self.app(), access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, host, port)
+        await site.start()
+        bound_port = site._server.sockets[0].getsockname()[1]
+        return runner, f"http://{host}:{bound_port}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--reservations", type=int, default=1000)
+    parser.add_argument("--categories", type=int, default=6)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--embed-guests", action="store_true")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    simulator = ShelterSimulator(SimulatorConfig(
+        reservations=args.reservations,
+        categories=args.categories,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        embed_guests=args.embed_guests,
+        seed=args.seed,
+    ))
+    print(f"SHELTER_PMS_BASE_URL=http://{args.host}:{args.port}")
+    web.run_app(simulator.app(), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,7 +7,7 @@ from aiogram.types import CallbackQuery, Message
 
 from bot.states import FlowState
 from services.content import content_manager
-from services.tickets import create_ticket, TicketRateLimitExceededError
+from services.tickets import create_ticket_async, TicketRateLimitExceededError
 from db.models import TicketType
 from services.admins import notify_admins_about_ticket
 from aiogram import Bot
@@ -92,7 +92,7 @@ async def confirm_service_booking(callback: CallbackQuery, state: FSMContext) ->
     summary = f"Запрос на бронирование услуги: {service_name}"
     
     try:
-        ticket = create_ticket(
+        ticket = await create_ticket_async(
             type_=TicketType.SERVICE_REQUEST,
             guest_chat_id=str(callback.from_user.id),
             guest_name=callback.from_user.full_name,
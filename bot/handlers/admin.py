@@ -106,6 +106,9 @@ async def cmd_room_availability(message: Message) -> None:
         
         if occupied:
             response_text += f"🔒 <b>Занято:</b> {len(occupied)} номеров\n\n"
+
+        if rooms[0].updated_at:
+            response_text += f"🕐 Обновлено: {rooms[0].updated_at.strftime('%d.%m.%Y %H:%M')}\n"
         
         # Add note for mock data
         if len(rooms) == 2 and rooms[0].room_name == "Стандарт":
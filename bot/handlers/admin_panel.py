@@ -3,6 +3,7 @@ Admin panel handlers for managing tickets and viewing statistics.
 """
 from __future__ import annotations
 
+import asyncio
 import logging
 from datetime import datetime, timedelta
 
@@ -17,16 +18,21 @@ from bot.keyboards.main_menu import (
     build_ticket_list_keyboard,
 )
 from bot.states import FlowState
-from db.models import TicketStatus, TicketType, TicketMessage, TicketMessageSender
-from db.session import SessionLocal
+from db.models import OutboxKind, TicketStatus, TicketType, TicketMessage, TicketMessageSender
+from sqlalchemy import select
+
+from db.session import AsyncSessionLocal
+from services import outbox
 from services.content import content_manager
 from services.tickets import (
-    close_dialog_ticket,
-    get_all_active_tickets,
-    get_pending_tickets,
-    get_ticket_by_id,
-    is_user_admin,
-    update_ticket_status,
+    close_dialog_ticket_async,
+    count_active_tickets_async,
+    get_all_active_tickets_async,
+    get_pending_tickets_async,
+    get_ticket_by_id_async,
+    is_user_admin_async,
+    record_ticket_message,
+    update_ticket_status_async,
 )
 
 
@@ -81,13 +87,14 @@ async def cmd_admin_panel(message: Message, state: FSMContext) -> None:
     
     user_id = str(message.from_user.id)
     
-    with SessionLocal() as session:
-        if not is_user_admin(session, user_id):
+    async with AsyncSessionLocal() as session:
+        if not await is_user_admin_async(session, user_id):
             await message.answer("❌ У вас нет доступа к админ-панели.")
             return
         
-        pending_count = len(get_pending_tickets(session))
-        all_count = len(get_all_active_tickets(session))
+        # Pending and active tickets share the same status filter.
+        all_count = await count_active_tickets_async(session)
+        pending_count = all_count
     
     welcome_text = (
         f"🔧 <b>Панель администратора</b>\n\n"
@@ -109,13 +116,14 @@ async def admin_refresh(callback: CallbackQuery, state: FSMContext) -> None:
     
     user_id = str(callback.from_user.id)
     
-    with SessionLocal() as session:
-        if not is_user_admin(session, user_id):
+    async with AsyncSessionLocal() as session:
+        if not await is_user_admin_async(session, user_id):
             await callback.answer("❌ Нет доступа", show_alert=True)
             return
         
-        pending_count = len(get_pending_tickets(session))
-        all_count = len(get_all_active_tickets(session))
+        # Pending and active tickets share the same status filter.
+        all_count = await count_active_tickets_async(session)
+        pending_count = all_count
     
     welcome_text = (
         f"🔧 <b>Панель администратора</b>\n\n"
@@ -138,12 +146,12 @@ async def admin_all_tickets(callback: CallbackQuery) -> None:
     """Show all active tickets."""
     user_id = str(callback.from_user.id)
     
-    with SessionLocal() as session:
-        if not is_user_admin(session, user_id):
+    async with AsyncSessionLocal() as session:
+        if not await is_user_admin_async(session, user_id):
             await callback.answer("❌ Нет доступа", show_alert=True)
             return
         
-        tickets = get_all_active_tickets(session)
+        tickets = await get_all_active_tickets_async(session)
         logger.info(f"Admin {user_id} requested all tickets. Found: {len(tickets)}")
         
         if not tickets:
@@ -177,12 +185,12 @@ async def admin_pending_tickets(callback: CallbackQuery, state: FSMContext) -> N
     
     user_id = str(callback.from_user.id)
     
-    with SessionLocal() as session:
-        if not is_user_admin(session, user_id):
+    async with AsyncSessionLocal() as session:
+        if not await is_user_admin_async(session, user_id):
             await callback.answer("❌ Нет доступа", show_alert=True)
             return
         
-        tickets = get_pending_tickets(session)
+        tickets = await get_pending_tickets_async(session)
         logger.info(f"Admin {user_id} requested pending tickets. Found: {len(tickets)}")
         
         if not tickets:
@@ -216,22 +224,25 @@ async def admin_completed_today(callback: CallbackQuery, state: FSMContext) -> N
     
     user_id = str(callback.from_user.id)
     
-    with SessionLocal() as session:
-        if not is_user_admin(session, user_id):
+    async with AsyncSessionLocal() as session:
+        if not await is_user_admin_async(session, user_id):
             await callback.answer("❌ Нет доступа", show_alert=True)
             return
         
         today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
         from db.models import Ticket
         
-        tickets = (
-            session.query(Ticket)
-            .filter(
-                Ticket.status == TicketStatus.COMPLETED,
-                Ticket.updated_at >= today_start
-            )
-            .order_by(Ticket.updated_at.desc())
-            .all()
+        tickets = list(
+            (
+                await session.scalars(
+                    select(Ticket)
+                    .where(
+                        Ticket.status == TicketStatus.COMPLETED,
+                        Ticket.updated_at >= today_start
+                    )
+                    .order_by(Ticket.updated_at.desc())
+                )
+            ).all()
         )
         
         if not tickets:
@@ -264,8 +275,8 @@ async def admin_hotel_status(callback: CallbackQuery, state: FSMContext) -> None
     
     user_id = str(callback.from_user.id)
     
-    with SessionLocal() as session:
-        if not is_user_admin(session, user_id):
+    async with AsyncSessionLocal() as session:
+        if not await is_user_admin_async(session, user_id):
             await callback.answer("❌ Нет доступа", show_alert=True)
             return
     
@@ -300,8 +311,8 @@ async def cmd_reset_state(message: Message, state: FSMContext) -> None:
     """Reset FSM state for admin."""
     user_id = str(message.from_user.id)
     
-    with SessionLocal() as session:
-        if not is_user_admin(session, user_id):
+    async with AsyncSessionLocal() as session:
+        if not await is_user_admin_async(session, user_id):
             await message.answer("❌ У вас нет доступа.")
             return
     
@@ -314,8 +325,8 @@ async def cmd_view_ticket(message: Message) -> None:
     """View detailed ticket information via command."""
     user_id = str(message.from_user.id)
     
-    with SessionLocal() as session:
-        if not is_user_admin(session, user_id):
+    async with AsyncSessionLocal() as session:
+        if not await is_user_admin_async(session, user_id):
             await message.answer("❌ У вас нет доступа к просмотру заявок.")
             return
         
@@ -338,8 +349,8 @@ async def admin_view_ticket_callback(callback: CallbackQuery) -> None:
     """View detailed ticket information via callback."""
     user_id = str(callback.from_user.id)
     
-    with SessionLocal() as session:
-        if not is_user_admin(session, user_id):
+    async with AsyncSessionLocal() as session:
+        if not await is_user_admin_async(session, user_id):
             await callback.answer("❌ Нет доступа", show_alert=True)
             return
         
@@ -350,8 +361,8 @@ async def admin_view_ticket_callback(callback: CallbackQuery) -> None:
 
 async def render_ticket_details(message: Message, ticket_id: int, is_callback: bool = False) -> None:
     """Helper to render ticket details."""
-    with SessionLocal() as session:
-        ticket = get_ticket_by_id(session, ticket_id)
+    async with AsyncSessionLocal() as session:
+        ticket = await get_ticket_by_id_async(session, ticket_id)
         
         if not ticket:
             text = f"❌ Заявка #{ticket_id} не найдена"
@@ -386,13 +397,13 @@ async def admin_complete_ticket(callback: CallbackQuery) -> None:
     """Mark ticket as completed."""
     user_id = str(callback.from_user.id)
     
-    with SessionLocal() as session:
-        if not is_user_admin(session, user_id):
+    async with AsyncSessionLocal() as session:
+        if not await is_user_admin_async(session, user_id):
             await callback.answer("❌ Нет доступа", show_alert=True)
             return
         
         ticket_id = int(callback.data.split("_")[-1])
-        ticket = get_ticket_by_id(session, ticket_id)
+        ticket = await get_ticket_by_id_async(session, ticket_id)
         
         if not ticket:
             await callback.answer("❌ Заявка не найдена", show_alert=True)
@@ -400,7 +411,7 @@ async def admin_complete_ticket(callback: CallbackQuery) -> None:
 
         guest_chat_id = ticket.guest_chat_id
         
-        if update_ticket_status(session, ticket_id, TicketStatus.COMPLETED):
+        if await update_ticket_status_async(session, ticket_id, TicketStatus.COMPLETED):
             # Notify user (only if valid Telegram ID)
             notification_status = ""
             if guest_chat_id and guest_chat_id.isdigit():
@@ -434,8 +445,8 @@ async def admin_reply_start(callback: CallbackQuery, state: FSMContext) -> None:
         await callback.answer("⚠️ Вы уже отвечаете на заявку. Введите сообщение.", show_alert=True)
         return
     
-    with SessionLocal() as session:
-        if not is_user_admin(session, user_id):
+    async with AsyncSessionLocal() as session:
+        if not await is_user_admin_async(session, user_id):
             await callback.answer("❌ Нет доступа", show_alert=True)
             return
         
@@ -468,13 +479,13 @@ async def admin_reply_process(message: Message, state: FSMContext) -> None:
         await message.answer("❌ Сообщение не может быть пустым.")
         return
 
-    with SessionLocal() as session:
-        if not is_user_admin(session, user_id):
+    async with AsyncSessionLocal() as session:
+        if not await is_user_admin_async(session, user_id):
             await message.answer("❌ Нет доступа.")
             await state.clear()
             return
             
-        ticket = get_ticket_by_id(session, ticket_id)
+        ticket = await get_ticket_by_id_async(session, ticket_id)
         if not ticket:
             await message.answer(f"❌ Заявка #{ticket_id} не найдена.")
             await state.clear()
@@ -491,21 +502,46 @@ async def admin_reply_process(message: Message, state: FSMContext) -> None:
             admin_name=message.from_user.full_name
         )
         session.add(new_msg)
-        session.commit()
+        record_ticket_message(ticket, new_msg)
+        guest_cid = ticket.guest_chat_id
+        outbox_entry = None
+        if outbox.is_telegram_chat_id(guest_cid):
+            # Queued with the message but held back while the direct send below runs;
+            # bot_api_bridge delivers it only if that send fails or never finishes.
+            await session.flush()
+            outbox_entry = outbox.enqueue(
+                session,
+                OutboxKind.TICKET_MESSAGE,
+                chat_id=guest_cid,
+                ticket_id=ticket_id,
+                ticket_message_id=new_msg.id,
+                available_at=datetime.utcnow() + timedelta(seconds=outbox.DIRECT_SEND_HOLD_SECONDS),
+            )
+        await session.commit()
         
         # Send to user (only if guest_chat_id is a valid Telegram ID)
-        guest_cid = ticket.guest_chat_id
-        if guest_cid and guest_cid.isdigit():
+        if outbox_entry is not None:
+            sent = False
             try:
                 admin_name = message.from_user.full_name or "Администратор"
                 user_notification = (
                     f"💬 Ответ от {admin_name} по заявке #{ticket_id}:\n\n"
                     f"{admin_content}"
                 )
-                await message.bot.send_message(chat_id=int(guest_cid), text=user_notification)
+                await asyncio.wait_for(
+                    message.bot.send_message(chat_id=int(guest_cid), text=user_notification),
+                    timeout=outbox.DIRECT_SEND_TIMEOUT_SECONDS,
+                )
+                sent = True
+                await outbox.mark_sent_async(session, outbox_entry.id)
+                await session.commit()
                 await message.answer(f"✅ Сообщение успешно отправлено гостю по заявке #{ticket_id}")
             except Exception as e:
                 logger.error(f"Failed to send admin reply to user {guest_cid}: {e}")
+                if not sent:
+                    # Hand it to bot_api_bridge now instead of after the hold.
+                    await outbox.release_async(session, outbox_entry.id)
+                    await session.commit()
                 await message.answer(f"⚠️ Сообщение сохранено в базе, но не удалось отправить в Telegram: {e}")
         else:
             await message.answer(f"✅ Сообщение сохранено (гость без Telegram ID, уведомление будет доставлено через панель)")
@@ -524,13 +560,13 @@ async def admin_decline_ticket(callback: CallbackQuery) -> None:
     """Decline ticket."""
     user_id = str(callback.from_user.id)
     
-    with SessionLocal() as session:
-        if not is_user_admin(session, user_id):
+    async with AsyncSessionLocal() as session:
+        if not await is_user_admin_async(session, user_id):
             await callback.answer("❌ Нет доступа", show_alert=True)
             return
         
         ticket_id = int(callback.data.split("_")[-1])
-        ticket = get_ticket_by_id(session, ticket_id)
+        ticket = await get_ticket_by_id_async(session, ticket_id)
         
         if not ticket:
             await callback.answer("❌ Заявка не найдена", show_alert=True)
@@ -538,7 +574,7 @@ async def admin_decline_ticket(callback: CallbackQuery) -> None:
 
         guest_chat_id = ticket.guest_chat_id
         
-        if update_ticket_status(session, ticket_id, TicketStatus.DECLINED):
+        if await update_ticket_status_async(session, ticket_id, TicketStatus.DECLINED):
             # Notify user (only if valid Telegram ID)
             notification_status = ""
             if guest_chat_id and guest_chat_id.isdigit():
@@ -565,13 +601,13 @@ async def admin_decline_ticket(callback: CallbackQuery) -> None:
 async def admin_close_dialog(callback: CallbackQuery) -> None:
     """Manually close an open guest-admin dialog."""
     user_id = str(callback.from_user.id)
-    with SessionLocal() as session:
-        if not is_user_admin(session, user_id):
+    async with AsyncSessionLocal() as session:
+        if not await is_user_admin_async(session, user_id):
             await callback.answer("❌ Нет доступа", show_alert=True)
             return
 
     ticket_id = int(callback.data.split("_")[-1])
-    if not close_dialog_ticket(ticket_id):
+    if not await close_dialog_ticket_async(ticket_id):
         await callback.answer("❌ Диалог не найден", show_alert=True)
         return
 
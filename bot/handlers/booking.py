@@ -9,6 +9,7 @@ from aiogram.types import CallbackQuery, Message, InlineKeyboardMarkup, InlineKe
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
 from bot.states import FlowState
+from services.availability_calendar import availability_calendar
 from services.shelter import get_shelter_client, ShelterAPIError
 from services.content import content_manager
 
@@ -22,6 +23,25 @@ def _build_children_age_keyboard() -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
+async def _availability_hint(check_in: date, check_out: date, adults: int) -> str | None:
+    """Free categories for the stay from the availability calendar; never waits on Shelter."""
+    try:
+        snapshot = await availability_calendar.current()
+    except Exception:
+        return None
+    offers = snapshot.stay(check_in, check_out, adults)
+    if offers is None:
+        return None
+    offers = sorted((offer for offer in offers if offer.available_count > 0), key=lambda offer: offer.price)
+    fetched_at = min((offer.fetched_at for offer in offers), default=snapshot.updated_at)
+    updated = f" (данные на {fetched_at.strftime('%d.%m %H:%M')})" if fetched_at else ""
+    if not offers:
+        return f"На выбранные даты свободных номеров нет{updated}."
+    lines = [f"Свободные категории на ваши даты{updated}:"]
+    lines += [f"• {offer.category_name} — от {offer.price:,.0f} ₽ за проживание".replace(",", " ") for offer in offers]
+    return "\n".join(lines)
+
+
 async def _send_booking_redirect(callback: CallbackQuery, state: FSMContext) -> None:
     data = await state.get_data()
     check_in = data["check_in"]
@@ -45,6 +65,10 @@ async def _send_booking_redirect(callback: CallbackQuery, state: FSMContext) ->
     })
     booking_url = f"https://gora-hotel.ru/book/?{query}"
 
+    hint = await _availability_hint(date.fromisoformat(check_in), date.fromisoformat(check_out), adults)
+    if hint:
+        await callback.message.answer(hint)
+
     keyboard = InlineKeyboardMarkup(inline_keyboard=[
         [InlineKeyboardButton(text="🏨 Перейти к бронированию", url=booking_url)]
     ])
@@ -5,16 +5,18 @@ from aiogram.types import CallbackQuery, Message, ReplyKeyboardRemove
 from aiogram.fsm.context import FSMContext
 from datetime import datetime, timedelta
 from config import get_settings
-from db.models import Ticket, TicketType, GuestBooking, User
-from db.session import SessionLocal
-from services.tickets import create_ticket
+from db.models import Ticket, TicketType, GuestBooking
+from sqlalchemy import update
+
+from db.session import AsyncSessionLocal
+from services.tickets import create_ticket_async
 from services.admins import notify_admins_about_ticket
 from services.guest_context import (
-    deactivate_expired_guest_bookings as _deactivate_expired_guest_bookings,
-    get_active_guest_booking,
+    deactivate_expired_guest_bookings_async,
+    get_active_guest_booking_async,
     get_local_today,
 )
-from services.shelter_sync import sync_reservations_once
+from services.shelter_sync import sync_guest_booking
 from bot.navigation import VIEW_IN_HOUSE, VIEW_PRE_ARRIVAL, VIEW_SEGMENT, nav_reset
 from bot.states import FlowState
 from services.content import content_manager
@@ -24,13 +26,13 @@ MAX_MANUAL_PAST_STAY_DAYS = 30
 logger = logging.getLogger(__name__)
 
 
-def deactivate_expired_guest_bookings() -> int:
-    return _deactivate_expired_guest_bookings()
+async def deactivate_expired_guest_bookings() -> int:
+    return await deactivate_expired_guest_bookings_async()
 
 
-def get_or_create_guest_booking(telegram_id: str) -> GuestBooking | None:
+async def get_or_create_guest_booking(telegram_id: str) -> GuestBooking | None:
     """Backward-compatible alias for active guest booking lookup."""
-    return get_active_guest_booking(telegram_id)
+    return await get_active_guest_booking_async(telegram_id)
 
 
 async def _sync_guest_booking_if_needed(telegram_id: str) -> None:
@@ -38,15 +40,8 @@ async def _sync_guest_booking_if_needed(telegram_id: str) -> None:
     if not settings.shelter_pms_token:
         return
 
-    with SessionLocal() as db:
-        user = db.query(User).filter(User.telegram_id == telegram_id).first()
-        has_phone = bool(user and (user.phone or "").strip())
-
-    if not has_phone:
-        return
-
     try:
-        await sync_reservations_once()
+        await sync_guest_booking(telegram_id)
     except Exception as exc:  # pragma: no cover
         logger.warning("Failed to refresh guest booking for %s: %s", telegram_id, exc)
 
@@ -89,7 +84,7 @@ async def welcome_in_house_text(message: Message, state: FSMContext):
 
 async def _handle_in_house_logic(message: Message, state: FSMContext, telegram_id: str):
     await _sync_guest_booking_if_needed(telegram_id)
-    existing_booking = get_or_create_guest_booking(telegram_id)
+    existing_booking = await get_or_create_guest_booking(telegram_id)
     await state.update_data(contact_admin_type="guest", preferred_segment="in_house")
     await nav_reset(state, VIEW_SEGMENT, VIEW_IN_HOUSE)
     
@@ -138,7 +133,7 @@ async def start_check_in(callback: CallbackQuery, state: FSMContext):
 
 @router.message(F.photo, F.state == "check_in_passport")
 async def handle_passport(message: Message, state: FSMContext):
-    ticket = create_ticket(
+    ticket = await create_ticket_async(
         type_=TicketType.CHECK_IN,
         guest_chat_id=str(message.from_user.id),
         guest_name=message.from_user.full_name,
@@ -223,11 +218,12 @@ async def handle_guest_check_out(message: Message, state: FSMContext):
     telegram_id = str(message.from_user.id)
     
     # Deactivate any existing bookings
-    with SessionLocal() as db:
-        db.query(GuestBooking).filter(
-            GuestBooking.telegram_id == telegram_id,
-            GuestBooking.is_active == True
-        ).update({"is_active": False})
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(GuestBooking)
+            .where(GuestBooking.telegram_id == telegram_id, GuestBooking.is_active == True)
+            .values(is_active=False)
+        )
         
         # Create new booking
         booking = GuestBooking(
@@ -240,7 +236,7 @@ async def handle_guest_check_out(message: Message, state: FSMContext):
             checkout_notified=False,
         )
         db.add(booking)
-        db.commit()
+        await db.commit()
     
     # Format dates for display
     check_in_display = check_in.strftime("%d.%m.%Y")
@@ -14,10 +14,12 @@ from aiogram.types import CallbackQuery, Message
 
 from bot.keyboards.main_menu import build_cleaning_time_keyboard, build_in_house_menu
 from bot.states import FlowState
+from sqlalchemy import select
+
 from db.models import GuestBooking, CleaningRequest, CleaningRequestStatus, TicketType
-from db.session import SessionLocal
+from db.session import AsyncSessionLocal
 from services.content import content_manager
-from services.tickets import create_ticket
+from services.tickets import create_ticket_async
 from services.admins import notify_admins_about_ticket
 
 
@@ -34,45 +36,53 @@ def set_bot_instance(bot: Bot) -> None:
     _bot_instance = bot
 
 
-def get_eligible_guests_for_cleaning() -> list[GuestBooking]:
+async def get_eligible_guests_for_cleaning() -> list[GuestBooking]:
     """
     Get guests who should receive cleaning prompts today.
     Criteria: today is NOT check-in date AND NOT check-out date.
     """
     today = date.today()
     
-    with SessionLocal() as db:
-        bookings = db.query(GuestBooking).filter(
-            GuestBooking.is_active == True,
-            GuestBooking.check_in_date < today,  # Already checked in
-            GuestBooking.check_out_date > today,  # Not checking out today
+    async with AsyncSessionLocal() as db:
+        bookings = (
+            await db.scalars(
+                select(GuestBooking).where(
+                    GuestBooking.is_active == True,
+                    GuestBooking.check_in_date < today,  # Already checked in
+                    GuestBooking.check_out_date > today,  # Not checking out today
+                )
+            )
         ).all()
         
         # Detach from session
         for booking in bookings:
             db.expunge(booking)
         
-        return bookings
+        return list(bookings)
 
 
-def has_cleaning_request_today(guest_booking_id: int) -> bool:
+async def has_cleaning_request_today(guest_booking_id: int) -> bool:
     """Check if guest already has a cleaning request for today."""
     today = date.today()
     
-    with SessionLocal() as db:
-        request = db.query(CleaningRequest).filter(
-            CleaningRequest.guest_booking_id == guest_booking_id,
-            CleaningRequest.requested_date == today,
-        ).first()
+    async with AsyncSessionLocal() as db:
+        request_id = await db.scalar(
+            select(CleaningRequest.id)
+            .where(
+                CleaningRequest.guest_booking_id == guest_booking_id,
+                CleaningRequest.requested_date == today,
+            )
+            .limit(1)
+        )
         
-        return request is not None
+        return request_id is not None
 
 
-def create_cleaning_request(guest_booking_id: int, time_slot: str | None, status: CleaningRequestStatus) -> CleaningRequest:
+async def create_cleaning_request(guest_booking_id: int, time_slot: str | None, status: CleaningRequestStatus) -> CleaningRequest:
     """Create a cleaning request record."""
     today = date.today()
     
-    with SessionLocal() as db:
+    async with AsyncSessionLocal() as db:
         request = CleaningRequest(
             guest_booking_id=guest_booking_id,
             requested_date=today,
@@ -80,8 +90,8 @@ def create_cleaning_request(guest_booking_id: int, time_slot: str | None, status
             status=status,
         )
         db.add(request)
-        db.commit()
-        db.refresh(request)
+        await db.commit()
+        await db.refresh(request)
         db.expunge(request)
         return request
 
@@ -94,12 +104,12 @@ async def send_cleaning_prompts() -> None:
         logger.warning("Bot instance not set, cannot send cleaning prompts")
         return
     
-    guests = get_eligible_guests_for_cleaning()
+    guests = await get_eligible_guests_for_cleaning()
     logger.info(f"Found {len(guests)} guests eligible for cleaning prompts")
     
     for guest in guests:
         # Skip if already has request today
-        if has_cleaning_request_today(guest.id):
+        if await has_cleaning_request_today(guest.id):
             logger.debug(f"Guest {guest.telegram_id} already has cleaning request today, skipping")
             continue
         
@@ -146,11 +156,15 @@ async def handle_cleaning_selection(callback: CallbackQuery, state: FSMContext)
     # Find guest booking for this user
     telegram_id = str(callback.from_user.id)
     
-    with SessionLocal() as db:
-        booking = db.query(GuestBooking).filter(
-            GuestBooking.telegram_id == telegram_id,
-            GuestBooking.is_active == True,
-        ).first()
+    async with AsyncSessionLocal() as db:
+        booking = await db.scalar(
+            select(GuestBooking)
+            .where(
+                GuestBooking.telegram_id == telegram_id,
+                GuestBooking.is_active == True,
+            )
+            .limit(1)
+        )
         
         if not booking:
             await callback.message.answer("Не найдена информация о вашем проживании.")
@@ -161,7 +175,7 @@ async def handle_cleaning_selection(callback: CallbackQuery, state: FSMContext)
     
     if action == "not_needed":
         # Guest doesn't need cleaning today
-        create_cleaning_request(booking_id, None, CleaningRequestStatus.DECLINED)
+        await create_cleaning_request(booking_id, None, CleaningRequestStatus.DECLINED)
         
         text = content_manager.get_text("cleaning.not_needed_confirmed")
         await callback.message.answer(text)
@@ -174,7 +188,7 @@ async def handle_cleaning_selection(callback: CallbackQuery, state: FSMContext)
             time_slot = action
         
         # Create cleaning request
-        request = create_cleaning_request(booking_id, time_slot, CleaningRequestStatus.CONFIRMED)
+        request = await create_cleaning_request(booking_id, time_slot, CleaningRequestStatus.CONFIRMED)
         
         # Send confirmation to guest
         text = content_manager.get_text("cleaning.time_confirmed").format(time_slot=time_slot)
@@ -184,7 +198,7 @@ async def handle_cleaning_selection(callback: CallbackQuery, state: FSMContext)
         summary = f"Уборка номера {room_number} запланирована на {time_slot}"
         
         try:
-            ticket = create_ticket(
+            ticket = await create_ticket_async(
                 type_=TicketType.CLEANING,
                 guest_chat_id=telegram_id,
                 guest_name=callback.from_user.full_name,
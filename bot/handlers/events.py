@@ -7,28 +7,34 @@ import html
 from aiogram import F, Router
 from aiogram.fsm.context import FSMContext
 from aiogram.types import CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup
-from sqlalchemy import or_
+from sqlalchemy import or_, select
 
 from bot.navigation import VIEW_EVENTS, nav_push
 from db.models import EventItem
-from db.session import SessionLocal
+from db.session import AsyncSessionLocal
 
 
 router = Router()
 PUBLIC_BASE_URL = "https://gora.ru.net"
 
 
-def _get_active_events() -> list[EventItem]:
+async def _get_active_events() -> list[EventItem]:
     now = datetime.utcnow()
-    with SessionLocal() as db:
-        items = db.query(EventItem).filter(
-            EventItem.is_active == True,
-            or_(EventItem.publish_from.is_(None), EventItem.publish_from <= now),
-            or_(EventItem.publish_until.is_(None), EventItem.publish_until >= now),
-        ).order_by(EventItem.starts_at.asc()).all()
+    async with AsyncSessionLocal() as db:
+        items = (
+            await db.scalars(
+                select(EventItem)
+                .where(
+                    EventItem.is_active == True,
+                    or_(EventItem.publish_from.is_(None), EventItem.publish_from <= now),
+                    or_(EventItem.publish_until.is_(None), EventItem.publish_until >= now),
+                )
+                .order_by(EventItem.starts_at.asc())
+            )
+        ).all()
         for item in items:
             db.expunge(item)
-        return items
+        return list(items)
 
 
 def _is_valid_url(url: str | None) -> bool:
@@ -55,7 +61,7 @@ async def show_events(callback: CallbackQuery, state: FSMContext | None = None)
     await callback.answer()
     if state is not None:
         await nav_push(state, VIEW_EVENTS)
-    events = _get_active_events()
+    events = await _get_active_events()
     if not events:
         await callback.message.answer("На данный момент нет никаких мероприятий.")
         return
@@ -70,8 +76,8 @@ async def show_events(callback: CallbackQuery, state: FSMContext | None = None)
 async def show_event_details(callback: CallbackQuery) -> None:
     await callback.answer()
     item_id = int((callback.data or "").split(":", 1)[1])
-    with SessionLocal() as db:
-        item = db.query(EventItem).filter(EventItem.id == item_id).first()
+    async with AsyncSessionLocal() as db:
+        item = await db.get(EventItem, item_id)
         if not item:
             await callback.message.answer("Мероприятие не найдено.")
             return
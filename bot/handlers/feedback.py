@@ -6,7 +6,7 @@ from aiogram.fsm.context import FSMContext
 from aiogram.types import CallbackQuery, Message, InlineKeyboardButton, InlineKeyboardMarkup
 
 from bot.states import FlowState
-from services.tickets import create_ticket, TicketRateLimitExceededError
+from services.tickets import create_ticket_async, TicketRateLimitExceededError
 from db.models import TicketType
 from services.admins import notify_admins_about_ticket
 from aiogram import Bot
@@ -103,7 +103,7 @@ async def handle_feedback_finalize(message: Message, state: FSMContext) -> None:
     
     ticket = None
     try:
-        ticket = create_ticket(
+        ticket = await create_ticket_async(
             type_=TicketType.FEEDBACK,
             guest_chat_id=str(message.from_user.id),
             guest_name=message.from_user.full_name,
@@ -1,6 +1,8 @@
 from aiogram import Router, F
 from aiogram.types import CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup
-from db.session import SessionLocal
+from sqlalchemy import select
+
+from db.session import AsyncSessionLocal
 from db.models import GuideItem
 
 router = Router()
@@ -23,8 +25,8 @@ async def show_guide_categories(callback: CallbackQuery):
 async def show_guide_items(callback: CallbackQuery):
     category = callback.data.replace("guide_cat_", "")
     
-    with SessionLocal() as db:
-        items = db.query(GuideItem).filter(GuideItem.category == category).all()
+    async with AsyncSessionLocal() as db:
+        items = (await db.scalars(select(GuideItem).where(GuideItem.category == category))).all()
         
         if not items:
             await callback.answer("В этой категории пока нет мест", show_alert=True)
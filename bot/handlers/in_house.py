@@ -18,7 +18,7 @@ from bot.keyboards.main_menu import (
 from bot.states import FlowState
 from bot.navigation import VIEW_ROOM_SERVICE, nav_push
 from services.content import content_manager
-from services.guest_context import get_active_room_number
+from services.guest_context import get_active_room_number_async
 
 
 router = Router()
@@ -104,7 +104,7 @@ async def handle_in_house_menu(callback: CallbackQuery, state: FSMContext) -> No
 
 
 async def _handle_in_room_service_logic(message: Message, state: FSMContext, telegram_id: str):
-    room_number = get_active_room_number(telegram_id)
+    room_number = await get_active_room_number_async(telegram_id)
 
     if not room_number:
         from bot.keyboards.main_menu import build_guest_booking_keyboard
@@ -140,7 +140,7 @@ async def _handle_in_restaurant_logic(message: Message):
             ]
         ]
     )
-    await message.answer(_build_breakfast_composition_from_menu(), parse_mode="HTML")
+    await message.answer(await _build_breakfast_composition_from_menu(), parse_mode="HTML")
     await message.answer(
         "Заказ доступен через визуальное меню.",
         reply_markup=visual_menu_kb,
@@ -151,15 +151,23 @@ async def _handle_in_restaurant_logic(message: Message):
     )
 
 
-def _build_breakfast_composition_from_menu() -> str:
-    from db.models import MenuItem, MenuCategory
-    from db.session import SessionLocal
+async def _build_breakfast_composition_from_menu() -> str:
+    from sqlalchemy import select
 
-    with SessionLocal() as db:
-        items = db.query(MenuItem).filter(
-            MenuItem.is_available == True,
-            (MenuItem.category == "breakfast") | (MenuItem.category_type == MenuCategory.BREAKFAST),
-        ).order_by(MenuItem.id.asc()).all()
+    from db.models import MenuItem, MenuCategory
+    from db.session import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as db:
+        items = (
+            await db.scalars(
+                select(MenuItem)
+                .where(
+                    MenuItem.is_available == True,
+                    (MenuItem.category == "breakfast") | (MenuItem.category_type == MenuCategory.BREAKFAST),
+                )
+                .order_by(MenuItem.id.asc())
+            )
+        ).all()
 
     if not items:
         return content_manager.get_text("breakfast.composition")
@@ -274,7 +282,7 @@ async def handle_breakfast_confirm(callback: CallbackQuery, state: FSMContext) -
 
     from db.models import TicketType
     from services.admins import notify_admins_about_ticket
-    from services.tickets import TicketRateLimitExceededError, create_ticket
+    from services.tickets import TicketRateLimitExceededError, create_ticket_async
 
     key = callback.data or ""
 
@@ -310,7 +318,7 @@ async def handle_breakfast_confirm(callback: CallbackQuery, state: FSMContext) -
     )
 
     try:
-        ticket = create_ticket(
+        ticket = await create_ticket_async(
             type_=TicketType.BREAKFAST,
             guest_chat_id=str(callback.from_user.id),
             guest_name=callback.from_user.full_name,
@@ -352,7 +360,7 @@ async def handle_contact_admin_type(callback: CallbackQuery, state: FSMContext)
     from aiogram import Bot
     from db.models import TicketType
     from services.admins import notify_admins_about_ticket
-    from services.tickets import TicketRateLimitExceededError, create_ticket
+    from services.tickets import TicketRateLimitExceededError, create_ticket_async
     
     key = callback.data or ""
     
@@ -375,14 +383,14 @@ async def handle_contact_admin_message(message: Message, state: FSMContext) -> N
     from aiogram import Bot
     from db.models import TicketType
     from services.admins import notify_admins_about_ticket
-    from services.tickets import TicketRateLimitExceededError, create_ticket
+    from services.tickets import TicketRateLimitExceededError, create_ticket_async
     
     user_message = message.text or ""
     data = await state.get_data()
     user_type = data.get("contact_admin_type", "guest")
     
     user_type_label = "Гость" if user_type == "guest" else "Ищу отель"
-    room_number = get_active_room_number(str(message.from_user.id))
+    room_number = await get_active_room_number_async(str(message.from_user.id))
     
     payload = {
         "branch": "contact_admin",
@@ -393,7 +401,7 @@ async def handle_contact_admin_message(message: Message, state: FSMContext) -> N
     summary = f"Запрос к администратору ({user_type_label}): {user_message}"
     
     try:
-        ticket = create_ticket(
+        ticket = await create_ticket_async(
             type_=TicketType.OTHER,
             guest_chat_id=str(message.from_user.id),
             guest_name=message.from_user.full_name,
@@ -433,7 +441,7 @@ async def handle_breakfast_after_deadline(callback: CallbackQuery, state: FSMCon
 
     from db.models import TicketType
     from services.admins import notify_admins_about_ticket
-    from services.tickets import TicketRateLimitExceededError, create_ticket
+    from services.tickets import TicketRateLimitExceededError, create_ticket_async
 
     key = callback.data or ""
 
@@ -454,10 +462,10 @@ async def handle_breakfast_after_deadline(callback: CallbackQuery, state: FSMCon
 
     summary_template = content_manager.get_text("breakfast.after_deadline_ticket_summary")
     summary = summary_template.format()
-    room_number = get_active_room_number(str(callback.from_user.id))
+    room_number = await get_active_room_number_async(str(callback.from_user.id))
 
     try:
-        ticket = create_ticket(
+        ticket = await create_ticket_async(
             type_=TicketType.ROOM_SERVICE,
             guest_chat_id=str(callback.from_user.id),
             guest_name=callback.from_user.full_name,
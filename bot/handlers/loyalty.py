@@ -1,6 +1,8 @@
 from aiogram import Router, F
 from aiogram.types import CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup
-from db.session import SessionLocal
+from sqlalchemy import select
+
+from db.session import AsyncSessionLocal
 from db.models import User
 
 router = Router()
@@ -9,15 +11,15 @@ router = Router()
 async def show_loyalty(callback: CallbackQuery):
     await callback.answer()  # Acknowledge immediately to prevent freezing
     
-    with SessionLocal() as db:
-        user = db.query(User).filter(User.telegram_id == str(callback.from_user.id)).first()
+    async with AsyncSessionLocal() as db:
+        user = await db.scalar(select(User).where(User.telegram_id == str(callback.from_user.id)).limit(1))
         
         if not user:
             # Создаем пользователя если нет
             user = User(telegram_id=str(callback.from_user.id), full_name=callback.from_user.full_name, loyalty_points=100)
             db.add(user)
-            db.commit()
-            db.refresh(user)
+            await db.commit()
+            await db.refresh(user)
         
         text = (
             f"👤 <b>Личный кабинет гостя</b>\n\n"
@@ -18,12 +18,14 @@ from bot.keyboards.main_menu import (
 )
 from bot.states import FlowState
 from bot.navigation import VIEW_MENU, nav_push
+from sqlalchemy import select
+
 from db.models import MenuItem, MenuCategory, MenuCategorySetting, TicketType
-from db.session import SessionLocal
+from db.session import AsyncSessionLocal
 from services.content import content_manager
 from services.admins import notify_admins_about_ticket
-from services.guest_context import get_active_room_number
-from services.tickets import TicketRateLimitExceededError, create_ticket, mark_order_guest_notified
+from services.guest_context import get_active_room_number_async
+from services.tickets import TicketRateLimitExceededError, create_ticket_async
 
 
 router = Router()
@@ -42,35 +44,41 @@ def is_breakfast_available() -> bool:
     return start <= now <= cutoff
 
 
-def get_menu_items_by_category(category: str) -> list[MenuItem]:
+async def get_menu_items_by_category(category: str) -> list[MenuItem]:
     """Get available menu items for a category."""
-    with SessionLocal() as db:
-        items = db.query(MenuItem).filter(
-            MenuItem.category == category,
-            MenuItem.is_available == True
+    async with AsyncSessionLocal() as db:
+        items = (
+            await db.scalars(
+                select(MenuItem).where(
+                    MenuItem.category == category,
+                    MenuItem.is_available == True
+                )
+            )
         ).all()
         # Detach from session
         for item in items:
             db.expunge(item)
-        return items
+        return list(items)
 
 
-def get_menu_item_by_id(item_id: int) -> MenuItem | None:
+async def get_menu_item_by_id(item_id: int) -> MenuItem | None:
     """Get menu item by ID."""
-    with SessionLocal() as db:
-        item = db.query(MenuItem).filter(MenuItem.id == item_id).first()
+    async with AsyncSessionLocal() as db:
+        item = await db.get(MenuItem, item_id)
         if item:
             db.expunge(item)
         return item
 
 
-def is_menu_category_enabled(category: str) -> bool:
+async def is_menu_category_enabled(category: str) -> bool:
     try:
         cat_value = MenuCategory(category).value
     except ValueError:
         return False
-    with SessionLocal() as db:
-        row = db.query(MenuCategorySetting).filter(MenuCategorySetting.category == cat_value).first()
+    async with AsyncSessionLocal() as db:
+        row = await db.scalar(
+            select(MenuCategorySetting).where(MenuCategorySetting.category == cat_value).limit(1)
+        )
         if row is None:
             return category == "breakfast"
         return bool(row.is_enabled)
@@ -78,7 +86,7 @@ def is_menu_category_enabled(category: str) -> bool:
 
 async def _show_category_menu(message: Message, state: FSMContext, category: str) -> None:
     """Render menu items for a specific category with cart controls."""
-    if not is_menu_category_enabled(category):
+    if not await is_menu_category_enabled(category):
         await message.answer(
             "Эта категория сейчас недоступна.",
             reply_markup=build_menu_categories_keyboard()
@@ -92,7 +100,7 @@ async def _show_category_menu(message: Message, state: FSMContext, category: str
         )
         return
 
-    items = get_menu_items_by_category(category)
+    items = await get_menu_items_by_category(category)
     if not items:
         await message.answer(
             content_manager.get_text("menu.no_items_in_category"),
@@ -173,7 +181,7 @@ async def handle_item_info(callback: CallbackQuery, state: FSMContext) -> None:
     await callback.answer()
     
     item_id = int(callback.data.replace("menu_item_info_", ""))
-    item = get_menu_item_by_id(item_id)
+    item = await get_menu_item_by_id(item_id)
     
     if not item:
         await callback.answer("Блюдо не найдено", show_alert=True)
@@ -227,7 +235,7 @@ async def handle_item_plus(callback: CallbackQuery, state: FSMContext) -> None:
     
     # Refresh the menu display
     category = data.get("current_category", "breakfast")
-    items = get_menu_items_by_category(category)
+    items = await get_menu_items_by_category(category)
     
     category_names = {
         "breakfast": "🍳 Завтрак",
@@ -265,7 +273,7 @@ async def handle_item_minus(callback: CallbackQuery, state: FSMContext) -> None:
     
     # Refresh the menu display
     category = data.get("current_category", "breakfast")
-    items = get_menu_items_by_category(category)
+    items = await get_menu_items_by_category(category)
     
     category_names = {
         "breakfast": "🍳 Завтрак",
@@ -301,7 +309,7 @@ async def handle_view_cart(callback: CallbackQuery, state: FSMContext) -> None:
             item_id = int(item_id)
         except ValueError:
             continue
-        item = get_menu_item_by_id(item_id)
+        item = await get_menu_item_by_id(item_id)
         if item:
             cart_items.append((item, qty))
             total += item.price * qty
@@ -369,7 +377,7 @@ async def handle_guest_name(message: Message, state: FSMContext) -> None:
     guest_name = message.text or ""
     await state.update_data(order_guest_name=guest_name)
 
-    room_number = get_active_room_number(str(message.from_user.id))
+    room_number = await get_active_room_number_async(str(message.from_user.id))
     if room_number:
         await state.update_data(order_room_number=room_number)
         await state.set_state(FlowState.menu_guest_comment)
@@ -417,7 +425,7 @@ async def handle_guest_comment(message: Message, state: FSMContext) -> None:
             item_id = int(item_id)
         except ValueError:
             continue
-        item = get_menu_item_by_id(item_id)
+        item = await get_menu_item_by_id(item_id)
         if item:
             cart_items.append((item, qty))
             total += item.price * qty
@@ -475,7 +483,7 @@ async def handle_order_confirm(callback: CallbackQuery, state: FSMContext) -> No
             item_id = int(item_id)
         except ValueError:
             continue
-        item = get_menu_item_by_id(item_id)
+        item = await get_menu_item_by_id(item_id)
         if item:
             cart_items.append((item, qty))
             total += item.price * qty
@@ -533,7 +541,7 @@ async def handle_order_confirm(callback: CallbackQuery, state: FSMContext) -> No
         summary += f"\n💬 Комментарий: {comment}"
     
     try:
-        ticket = create_ticket(
+        ticket = await create_ticket_async(
             type_=TicketType.MENU_ORDER,
             guest_chat_id=str(callback.from_user.id),
             guest_name=guest_name,
@@ -576,8 +584,6 @@ async def handle_order_confirm(callback: CallbackQuery, state: FSMContext) -> No
     confirmation += "\nМы свяжемся с вами для уточнения времени доставки."
     
     await callback.message.answer(confirmation, parse_mode="HTML")
-    # Помечаем как уведомлённого, чтобы bot_api_bridge не слал дубликат
-    mark_order_guest_notified(ticket.id)
 
     # Notify admins
     bot: Bot = callback.bot  # type: ignore
@@ -5,15 +5,15 @@ from aiogram.filters.state import StateFilter
 from aiogram.types import Message
 
 from db.models import TicketType
-from db.session import SessionLocal
+from db.session import AsyncSessionLocal
 from services.admins import notify_admins_about_ticket
-from services.guest_context import get_active_room_number
+from services.guest_context import get_active_room_number_async
 from services.tickets import (
     TicketRateLimitExceededError,
-    append_guest_message_to_ticket,
-    create_ticket,
-    get_open_dialog_ticket_for_guest,
-    is_user_admin,
+    append_guest_message_to_ticket_async,
+    create_ticket_async,
+    get_open_dialog_ticket_for_guest_async,
+    is_user_admin_async,
 )
 
 
@@ -27,13 +27,13 @@ async def append_message_to_open_dialog(message: Message) -> None:
         return
 
     user_id = str(message.from_user.id)
-    with SessionLocal() as session:
-        if is_user_admin(session, user_id):
+    async with AsyncSessionLocal() as session:
+        if await is_user_admin_async(session, user_id):
             return
-        ticket = get_open_dialog_ticket_for_guest(session, user_id)
+        ticket = await get_open_dialog_ticket_for_guest_async(session, user_id)
 
     if ticket:
-        updated_ticket = append_guest_message_to_ticket(ticket_id=ticket.id, content=text)
+        updated_ticket = await append_guest_message_to_ticket_async(ticket_id=ticket.id, content=text)
         if not updated_ticket:
             return
         summary = f"Новое сообщение в открытом диалоге #{updated_ticket.id}: {text}"
@@ -43,9 +43,9 @@ async def append_message_to_open_dialog(message: Message) -> None:
         return
 
     # Fallback: если у гостя нет открытого диалога — создаём новый, чтобы сообщение не терялось
-    room_number = get_active_room_number(user_id)
+    room_number = await get_active_room_number_async(user_id)
     try:
-        ticket = create_ticket(
+        ticket = await create_ticket_async(
             type_=TicketType.PRE_ARRIVAL,
             guest_chat_id=user_id,
             guest_name=message.from_user.full_name,
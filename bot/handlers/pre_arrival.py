@@ -77,14 +77,9 @@ async def _handle_pre_contact_admin_logic(message: Message, state: FSMContext, p
     data = await state.get_data()
     contact_type = "interested" if prefer_interested else data.get("contact_admin_type")
     if contact_type not in {"guest", "interested"}:
-        from db.models import GuestBooking
-        from db.session import SessionLocal
-
-        with SessionLocal() as db:
-            booking = db.query(GuestBooking).filter(
-                GuestBooking.telegram_id == str(message.from_user.id),
-                GuestBooking.is_active == True,
-            ).first()
+        from services.guest_context import get_active_guest_booking_async
+
+        booking = await get_active_guest_booking_async(str(message.from_user.id))
         contact_type = "guest" if booking else "interested"
     await state.update_data(contact_admin_type=contact_type)
 
@@ -122,14 +117,14 @@ async def handle_interested_admin_choice(callback: CallbackQuery, state: FSMCont
     from aiogram import Bot
     from db.models import TicketType
     from services.admins import notify_admins_about_ticket
-    from services.guest_context import get_active_room_number
-    from services.tickets import TicketRateLimitExceededError, create_ticket
+    from services.guest_context import get_active_room_number_async
+    from services.tickets import TicketRateLimitExceededError, create_ticket_async
 
     summary = "Запрос обратного звонка от гостя (Ищу отель)."
     payload = {"branch": "contact_admin_call_me", "user_type": "interested"}
-    room_number = get_active_room_number(str(callback.from_user.id))
+    room_number = await get_active_room_number_async(str(callback.from_user.id))
     try:
-        ticket = create_ticket(
+        ticket = await create_ticket_async(
             type_=TicketType.PRE_ARRIVAL,
             guest_chat_id=str(callback.from_user.id),
             guest_name=callback.from_user.full_name,
@@ -197,7 +192,7 @@ async def handle_contact_admin_type_pre_arrival(callback: CallbackQuery, state:
     from aiogram import Bot
     from db.models import TicketType
     from services.admins import notify_admins_about_ticket
-    from services.tickets import TicketRateLimitExceededError, create_ticket
+    from services.tickets import TicketRateLimitExceededError, create_ticket_async
     
     key = callback.data or ""
     
@@ -219,21 +214,21 @@ async def handle_contact_admin_message_pre_arrival(message: Message, state: FSMC
     """Create ticket for admin contact request (from pre-arrival menu)."""
     from aiogram import Bot
     from db.models import TicketType
-    from db.session import SessionLocal
+    from db.session import AsyncSessionLocal
     from services.admins import notify_admins_about_ticket
-    from services.guest_context import get_active_room_number
+    from services.guest_context import get_active_room_number_async
     from services.tickets import (
         TicketRateLimitExceededError,
-        append_guest_message_to_ticket,
-        create_ticket,
-        get_open_dialog_ticket_for_guest,
+        append_guest_message_to_ticket_async,
+        create_ticket_async,
+        get_open_dialog_ticket_for_guest_async,
     )
     
     user_message = message.text or ""
     data = await state.get_data()
     user_type = data.get("contact_admin_type", "guest")
     guest_chat_id = str(message.from_user.id)
-    room_number = get_active_room_number(guest_chat_id)
+    room_number = await get_active_room_number_async(guest_chat_id)
     
     user_type_label = "Гость" if user_type == "guest" else "Ищу отель"
     
@@ -246,10 +241,10 @@ async def handle_contact_admin_message_pre_arrival(message: Message, state: FSMC
     summary = f"Запрос к администратору ({user_type_label}): {user_message}"
     
     try:
-        with SessionLocal() as session:
-            open_ticket = get_open_dialog_ticket_for_guest(session, guest_chat_id)
+        async with AsyncSessionLocal() as session:
+            open_ticket = await get_open_dialog_ticket_for_guest_async(session, guest_chat_id)
         if open_ticket:
-            ticket = append_guest_message_to_ticket(ticket_id=open_ticket.id, content=summary)
+            ticket = await append_guest_message_to_ticket_async(ticket_id=open_ticket.id, content=summary)
             if ticket is not None:
                 confirmation = (
                     f"💬 Ваше сообщение добавлено в открытый диалог #{ticket.id}. "
@@ -259,7 +254,7 @@ async def handle_contact_admin_message_pre_arrival(message: Message, state: FSMC
             else:
                 open_ticket = None
         if not open_ticket:
-            ticket = create_ticket(
+            ticket = await create_ticket_async(
                 type_=TicketType.PRE_ARRIVAL,
                 guest_chat_id=guest_chat_id,
                 guest_name=message.from_user.full_name,
@@ -8,8 +8,8 @@ from bot.states import FlowState
 from db.models import TicketType
 from services.admins import notify_admins_about_ticket
 from services.content import content_manager
-from services.guest_context import get_active_room_number
-from services.tickets import TicketRateLimitExceededError, create_ticket
+from services.guest_context import get_active_room_number_async
+from services.tickets import TicketRateLimitExceededError, create_ticket_async
 from bot.keyboards.main_menu import build_room_service_cleaning_slots_keyboard
 
 
@@ -88,7 +88,7 @@ async def choose_room_service_branch(callback: CallbackQuery, state: FSMContext)
         return
 
     await state.update_data(service_branch=branch)
-    room_number = get_active_room_number(str(callback.from_user.id))
+    room_number = await get_active_room_number_async(str(callback.from_user.id))
     if room_number:
         await state.update_data(room_number=room_number)
         await _continue_room_service_flow(callback.message, state, branch)
@@ -137,7 +137,7 @@ async def room_service_technical_details(message: Message, state: FSMContext) ->
     summary = summary_template.format(category=category, details=details)
 
     try:
-        ticket = create_ticket(
+        ticket = await create_ticket_async(
             type_=TicketType.ROOM_SERVICE,
             guest_chat_id=str(message.from_user.id),
             guest_name=message.from_user.full_name,
@@ -197,7 +197,7 @@ async def room_service_extra_item(message: Message, state: FSMContext) -> None:
 
     summary = f"Дополнительно в номер: {', '.join(items)}."
 
-    ticket = create_ticket(
+    ticket = await create_ticket_async(
         type_=TicketType.ROOM_SERVICE,
         guest_chat_id=str(message.from_user.id),
         guest_name=message.from_user.full_name,
@@ -280,7 +280,7 @@ async def room_service_cleaning_comments(message: Message, state: FSMContext) ->
         comments=comments or "—",
     )
 
-    ticket = create_ticket(
+    ticket = await create_ticket_async(
         type_=TicketType.ROOM_SERVICE,
         guest_chat_id=str(message.from_user.id),
         guest_name=message.from_user.full_name,
@@ -323,7 +323,7 @@ async def room_service_pillow_choice(message: Message, state: FSMContext) -> Non
     summary_template = content_manager.get_text("room_service.pillow_menu.summary")
     summary = summary_template.format(choice=choice)
 
-    ticket = create_ticket(
+    ticket = await create_ticket_async(
         type_=TicketType.ROOM_SERVICE,
         guest_chat_id=str(message.from_user.id),
         guest_name=message.from_user.full_name,
@@ -362,7 +362,7 @@ async def room_service_other_text(message: Message, state: FSMContext) -> None:
     summary_template = content_manager.get_text("room_service.other.summary")
     summary = summary_template.format(text=text)
 
-    ticket = create_ticket(
+    ticket = await create_ticket_async(
         type_=TicketType.ROOM_SERVICE,
         guest_chat_id=str(message.from_user.id),
         guest_name=message.from_user.full_name,
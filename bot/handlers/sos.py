@@ -2,7 +2,7 @@ from aiogram import Router, F
 from aiogram.types import CallbackQuery, Message
 from aiogram.fsm.context import FSMContext
 from db.models import Ticket, TicketType, TicketStatus
-from services.tickets import create_ticket
+from services.tickets import create_ticket_async
 from services.admins import notify_admins_about_ticket
 
 router = Router()
@@ -22,7 +22,7 @@ async def start_sos(callback: CallbackQuery, state: FSMContext):
 async def handle_sos_message(message: Message, state: FSMContext):
     user_text = message.text or "Без описания"
     
-    ticket = create_ticket(
+    ticket = await create_ticket_async(
         type_=TicketType.SOS,
         guest_chat_id=str(message.from_user.id),
         guest_name=message.from_user.full_name,
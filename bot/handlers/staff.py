@@ -1,7 +1,9 @@
 from aiogram import Router, F
 from aiogram.fsm.context import FSMContext
 from aiogram.types import Message, ReplyKeyboardMarkup, KeyboardButton, InlineKeyboardMarkup, InlineKeyboardButton, CallbackQuery
-from db.session import SessionLocal
+from sqlalchemy import select
+
+from db.session import AsyncSessionLocal
 from db.models import StaffTask, Staff, User
 from services.phone_utils import normalize_phone, phones_match
 
@@ -40,8 +42,8 @@ async def staff_login_process_contact(message: Message, state: FSMContext):
 
     matched_staff_id = None
     matched_staff_name = None
-    with SessionLocal() as db:
-        user = db.query(User).filter(User.telegram_id == telegram_id).first()
+    async with AsyncSessionLocal() as db:
+        user = await db.scalar(select(User).where(User.telegram_id == telegram_id).limit(1))
         if not user:
             user = User(
                 telegram_id=telegram_id,
@@ -55,7 +57,7 @@ async def staff_login_process_contact(message: Message, state: FSMContext):
                 user.full_name = message.from_user.full_name
 
         if share_context == "staff_login":
-            staff_members = db.query(Staff).all()
+            staff_members = (await db.scalars(select(Staff))).all()
             matched_staff = None
             for staff_member in staff_members:
                 if staff_member.phone and phones_match(staff_member.phone, phone):
@@ -67,7 +69,7 @@ async def staff_login_process_contact(message: Message, state: FSMContext):
                 matched_staff_id = matched_staff.id
                 matched_staff_name = matched_staff.full_name
 
-        db.commit()
+        await db.commit()
 
     await state.update_data(phone_share_context=None)
 
@@ -77,9 +79,9 @@ async def staff_login_process_contact(message: Message, state: FSMContext):
             "Если на этот номер есть бронирование в Shelter, бот автоматически найдет его при синхронизации."
         )
         try:
-            from services.shelter_sync import sync_reservations_once
+            from services.shelter_sync import sync_guest_booking
 
-            await sync_reservations_once()
+            await sync_guest_booking(telegram_id)
         except Exception:
             pass
 
@@ -117,33 +119,27 @@ async def staff_login_process_contact(message: Message, state: FSMContext):
     )
 
     # Automatically show tasks
-    db = SessionLocal()
-    try:
+    async with AsyncSessionLocal() as db:
         await send_staff_tasks(message, db, matched_staff_id)
-    finally:
-        db.close()
 
 @router.message(F.text == "📋 Мои задачи")
 async def handle_my_tasks(message: Message):
-    db = SessionLocal()
-    staff = db.query(Staff).filter(Staff.telegram_id == str(message.from_user.id)).first()
-    if not staff:
-        from bot.keyboards.main_menu import build_main_reply_keyboard
-        await message.answer("Вы не авторизованы как сотрудник.", reply_markup=build_main_reply_keyboard())
-        db.close()
-        return
+    async with AsyncSessionLocal() as db:
+        staff = await db.scalar(select(Staff).where(Staff.telegram_id == str(message.from_user.id)).limit(1))
+        if not staff:
+            from bot.keyboards.main_menu import build_main_reply_keyboard
+            await message.answer("Вы не авторизованы как сотрудник.", reply_markup=build_main_reply_keyboard())
+            return
 
-    await send_staff_tasks(message, db, staff.id)
-    db.close()
+        await send_staff_tasks(message, db, staff.id)
 
 @router.message(F.text == "🚪 Выйти из профиля сотрудника")
 async def handle_staff_logout(message: Message):
-    db = SessionLocal()
-    staff = db.query(Staff).filter(Staff.telegram_id == str(message.from_user.id)).first()
-    if staff:
-        staff.telegram_id = None
-        db.commit()
-    db.close()
+    async with AsyncSessionLocal() as db:
+        staff = await db.scalar(select(Staff).where(Staff.telegram_id == str(message.from_user.id)).limit(1))
+        if staff:
+            staff.telegram_id = None
+            await db.commit()
 
     from bot.keyboards.main_menu import build_main_reply_keyboard
     await message.answer(
@@ -152,9 +148,13 @@ async def handle_staff_logout(message: Message):
     )
 
 async def send_staff_tasks(message: Message, db, staff_id: int):
-    tasks = db.query(StaffTask).filter(
-        StaffTask.status == "PENDING", 
-        StaffTask.assigned_to == str(staff_id)
+    tasks = (
+        await db.scalars(
+            select(StaffTask).where(
+                StaffTask.status == "PENDING",
+                StaffTask.assigned_to == str(staff_id)
+            )
+        )
     ).all()
     
     if not tasks:
@@ -173,33 +173,29 @@ async def send_staff_tasks(message: Message, db, staff_id: int):
 async def complete_staff_task(callback: CallbackQuery):
     task_id = int(callback.data.replace("complete_task_", ""))
     
-    db = SessionLocal()
-    task = db.query(StaffTask).filter(StaffTask.id == task_id).first()
-    
-    if not task:
-        await callback.answer("Задача не найдена.", show_alert=True)
-        db.close()
-        return
+    async with AsyncSessionLocal() as db:
+        task = await db.get(StaffTask, task_id)
+        
+        if not task:
+            await callback.answer("Задача не найдена.", show_alert=True)
+            return
 
-    if task.status != "PENDING":
-        await callback.answer("Эта задача уже закрыта.", show_alert=True)
-        await callback.message.edit_reply_markup(reply_markup=None)
-        db.close()
-        return
+        if task.status != "PENDING":
+            await callback.answer("Эта задача уже закрыта.", show_alert=True)
+            await callback.message.edit_reply_markup(reply_markup=None)
+            return
 
-    # Check if the user is the assigned staff member
-    staff = db.query(Staff).filter(Staff.telegram_id == str(callback.from_user.id)).first()
-    if not staff or task.assigned_to != str(staff.id):
-        await callback.answer("Вы не можете закрыть эту задачу.", show_alert=True)
-        db.close()
-        return
+        # Check if the user is the assigned staff member
+        staff = await db.scalar(select(Staff).where(Staff.telegram_id == str(callback.from_user.id)).limit(1))
+        if not staff or task.assigned_to != str(staff.id):
+            await callback.answer("Вы не можете закрыть эту задачу.", show_alert=True)
+            return
 
-    # Update task status
-    task.status = "COMPLETED"
-    from datetime import datetime
-    task.completed_at = datetime.utcnow()
-    db.commit()
-    db.close()
+        # Update task status
+        task.status = "COMPLETED"
+        from datetime import datetime
+        task.completed_at = datetime.utcnow()
+        await db.commit()
 
     await callback.message.edit_text(
         callback.message.html_text + "\n\n<b>✅ ВЫПОЛНЕНО</b>",
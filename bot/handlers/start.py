@@ -5,6 +5,7 @@ from aiogram.filters import Command, CommandStart
 from aiogram.fsm.context import FSMContext
 from aiogram.types import CallbackQuery, KeyboardButton, Message, ReplyKeyboardMarkup
 
+from bot.label_router import LabelRouter
 from bot.navigation import (
     VIEW_IN_HOUSE,
     VIEW_PRE_ARRIVAL,
@@ -18,12 +19,16 @@ from services.content import content_manager
 
 
 router = Router()
+# Reply-keyboard buttons handled in this module; see dispatch_reply_label.
+labels = LabelRouter()
 
 
 from datetime import datetime
 
+from sqlalchemy import select
+
 from db.models import User
-from db.session import SessionLocal
+from db.session import AsyncSessionLocal
 
 
 async def _show_segment_selection(message: Message, state: FSMContext) -> None:
@@ -92,12 +97,12 @@ def get_current_season() -> str:
 
 @router.message(CommandStart())
 async def cmd_start(message: Message, state: FSMContext) -> None:
-    from services.tickets import is_user_admin
+    from services.tickets import count_active_tickets_async, is_user_admin_async
     from bot.keyboards.main_menu import build_admin_panel_menu, build_main_reply_keyboard
     
     user_id = str(message.from_user.id)
-    with SessionLocal() as session:
-        user = session.query(User).filter(User.telegram_id == user_id).first()
+    async with AsyncSessionLocal() as session:
+        user = await session.scalar(select(User).where(User.telegram_id == user_id).limit(1))
         if user is None:
             user = User(
                 telegram_id=user_id,
@@ -106,7 +111,7 @@ async def cmd_start(message: Message, state: FSMContext) -> None:
             session.add(user)
         elif not user.full_name:
             user.full_name = message.from_user.full_name
-        session.commit()
+        await session.commit()
         missing_phone = not bool((user.phone or "").strip())
     
     # 1. Always send the main menu (Persistent Reply Keyboard) to ensure it's installed
@@ -129,11 +134,11 @@ async def cmd_start(message: Message, state: FSMContext) -> None:
         await _show_segment_selection(message, state)
     
     # 2. Check if user is admin and show admin panel as a separate message
-    with SessionLocal() as session:
-        if is_user_admin(session, user_id):
-            from services.tickets import get_pending_tickets, get_all_active_tickets
-            pending_count = len(get_pending_tickets(session))
-            all_count = len(get_all_active_tickets(session))
+    async with AsyncSessionLocal() as session:
+        if await is_user_admin_async(session, user_id):
+            # Pending and active tickets share the same status filter.
+            all_count = await count_active_tickets_async(session)
+            pending_count = all_count
             
             admin_greeting = (
                 f"👨‍💼 <b>Добро пожаловать в админ-панель отеля GORA</b>\n\n"
@@ -145,7 +150,13 @@ async def cmd_start(message: Message, state: FSMContext) -> None:
             await message.answer(admin_greeting, reply_markup=build_admin_panel_menu(), parse_mode="HTML")
 
 
-@router.message(F.text == "Пропустить")
+@router.message(labels.match)
+async def dispatch_reply_label(message: Message, state: FSMContext, label_handler) -> None:
+    """Route a reply-keyboard press to the ``labels.route`` handler owning its label."""
+    await label_handler(message, state)
+
+
+@labels.route(lambda: {"Пропустить"})
 async def skip_phone_share(message: Message, state: FSMContext) -> None:
     await state.update_data(phone_share_context=None)
     await message.answer("Хорошо, вы сможете поделиться номером позже.")
@@ -173,72 +184,68 @@ async def nav_back_handler(callback: CallbackQuery, state: FSMContext) -> None:
     await _show_segment_selection(callback.message, state)
 
 
-@router.message(
-    F.text.func(
-        lambda text: (text or "") in {
-            _label(
-                _get_reply_rows(
-                    "reply_keyboards.segment",
-                    [["Я планирую поездку"], ["Я уже проживаю в отеле"], ["Визуальное меню 📱"], ["🏠 Главное меню"]],
-                ),
-                3,
-                0,
-                "🏠 Главное меню",
+@labels.route(
+    lambda: {
+        _label(
+            _get_reply_rows(
+                "reply_keyboards.segment",
+                [["Я планирую поездку"], ["Я уже проживаю в отеле"], ["Визуальное меню 📱"], ["🏠 Главное меню"]],
             ),
-            _label(
-                _get_reply_rows(
-                    "reply_keyboards.pre_arrival",
-                    [
-                        ["🏨 Забронировать номер"],
-                        ["🌲 Об отеле", "🎉 Мероприятия"],
-                        ["📍 Как добраться", "❓ Вопросы"],
-                        ["🍽 Ресторан", "📞 Администратор"],
-                        ["🏠 Главное меню"],
-                    ],
-                ),
-                4,
-                0,
-                "🏠 Главное меню",
+            3,
+            0,
+            "🏠 Главное меню",
+        ),
+        _label(
+            _get_reply_rows(
+                "reply_keyboards.pre_arrival",
+                [
+                    ["🏨 Забронировать номер"],
+                    ["🌲 Об отеле", "🎉 Мероприятия"],
+                    ["📍 Как добраться", "❓ Вопросы"],
+                    ["🍽 Ресторан", "📞 Администратор"],
+                    ["🏠 Главное меню"],
+                ],
             ),
-            _label(
-                _get_reply_rows(
-                    "reply_keyboards.room_service",
-                    [["🛠 Технические проблемы"], ["🚰 Дополнительно в номер"], ["🧹 Уборка номера"], ["💤 Меню подушек"], ["📝 Другое"], ["🏠 Главное меню"]],
-                ),
-                5,
-                0,
-                "🏠 Главное меню",
+            4,
+            0,
+            "🏠 Главное меню",
+        ),
+        _label(
+            _get_reply_rows(
+                "reply_keyboards.room_service",
+                [["🛠 Технические проблемы"], ["🚰 Дополнительно в номер"], ["🧹 Уборка номера"], ["💤 Меню подушек"], ["📝 Другое"], ["🏠 Главное меню"]],
             ),
-        }
-    )
+            5,
+            0,
+            "🏠 Главное меню",
+        ),
+    }
 )
 async def reply_main_menu(message: Message, state: FSMContext) -> None:
     await _show_segment_selection(message, state)
 
 
-@router.message(
-    F.text.func(
-        lambda text: (text or "") in {
-            _label(
-                _get_reply_rows(
-                    "reply_keyboards.admin_contact",
-                    [["🏠 Гость", "❓ Ищу отель"], ["🛎 Рум‑сервис", "🏠 Главное меню"]],
-                ),
-                0,
-                0,
-                "🏠 Гость",
+@labels.route(
+    lambda: {
+        _label(
+            _get_reply_rows(
+                "reply_keyboards.admin_contact",
+                [["🏠 Гость", "❓ Ищу отель"], ["🛎 Рум‑сервис", "🏠 Главное меню"]],
             ),
-            _label(
-                _get_reply_rows(
-                    "reply_keyboards.admin_contact",
-                    [["🏠 Гость", "❓ Ищу отель"], ["🛎 Рум‑сервис", "🏠 Главное меню"]],
-                ),
-                0,
-                1,
-                "❓ Ищу отель",
+            0,
+            0,
+            "🏠 Гость",
+        ),
+        _label(
+            _get_reply_rows(
+                "reply_keyboards.admin_contact",
+                [["🏠 Гость", "❓ Ищу отель"], ["🛎 Рум‑сервис", "🏠 Главное меню"]],
             ),
-        }
-    )
+            0,
+            1,
+            "❓ Ищу отель",
+        ),
+    }
 )
 async def reply_admin_type_selection(message: Message, state: FSMContext) -> None:
     """Handle admin type selection from reply keyboard."""
@@ -256,27 +263,24 @@ async def reply_admin_type_selection(message: Message, state: FSMContext) -> Non
     await message.answer(f"Вы выбрали: {user_type_label}\n\nНапишите ваш вопрос или запрос:")
 
 
-@router.message(
-    F.text.func(
-        lambda text: (text or "") in _labels_set(
-            "reply_keyboards.room_service",
-            [
-                ["🛠 Технические проблемы"],
-                ["🚰 Дополнительно в номер"],
-                ["🧹 Уборка номера"],
-                ["💤 Меню подушек"],
-                ["📝 Другое"],
-                ["🏠 Главное меню"],
-            ],
-        )
-        or (text or "") in {"➕ Дополнительно в номер", "Другое"}
-    )
+@labels.route(
+    lambda: _labels_set(
+        "reply_keyboards.room_service",
+        [
+            ["🛠 Технические проблемы"],
+            ["🚰 Дополнительно в номер"],
+            ["🧹 Уборка номера"],
+            ["💤 Меню подушек"],
+            ["📝 Другое"],
+            ["🏠 Главное меню"],
+        ],
+    ) | {"➕ Дополнительно в номер", "Другое"}
 )
 async def reply_room_service_selection(message: Message, state: FSMContext) -> None:
     """Handle room service selection from reply keyboard."""
-    from services.guest_context import get_active_room_number
+    from services.guest_context import get_active_room_number_async
 
-    room_number = get_active_room_number(str(message.from_user.id))
+    room_number = await get_active_room_number_async(str(message.from_user.id))
     if not room_number:
         from bot.keyboards.main_menu import build_guest_booking_keyboard
         await message.answer(
@@ -319,24 +323,21 @@ async def reply_room_service_selection(message: Message, state: FSMContext) -> N
         await message.answer("🏠 Укажите номер вашей комнаты:")
 
 
-@router.message(
-    F.text.func(
-        lambda text: (text or "") in _labels_set(
-            "reply_keyboards.in_house",
-            [
-                ["🛎 Рум‑сервис"],
-                ["🍳 Завтраки"],
-                ["🗺 Гид по Сортавала"],
-                ["🌤 Погода"],
-                ["🎉 Актуальные мероприятия"],
-                ["📷 Камеры"],
-                ["📱 Визуальное меню"],
-                ["📞 Администратор"],
-                ["↩️ Назад"],
-            ],
-        )
-        or (text or "") in {"🗺 Гид", "🆘 SOS", "👤 Личный кабинет"}
-    )
+@labels.route(
+    lambda: _labels_set(
+        "reply_keyboards.in_house",
+        [
+            ["🛎 Рум‑сервис"],
+            ["🍳 Завтраки"],
+            ["🗺 Гид по Сортавала"],
+            ["🌤 Погода"],
+            ["🎉 Актуальные мероприятия"],
+            ["📷 Камеры"],
+            ["📱 Визуальное меню"],
+            ["📞 Администратор"],
+            ["↩️ Назад"],
+        ],
+    ) | {"🗺 Гид", "🆘 SOS", "👤 Личный кабинет"}
 )
 async def reply_in_house_menu_selection(message: Message, state: FSMContext) -> None:
     """Handle in-house menu selection from reply keyboard."""
@@ -401,7 +402,7 @@ async def reply_in_house_menu_selection(message: Message, state: FSMContext) ->
         await _show_segment_selection(message, state)
 
 
-@router.message(F.text.in_({"🍳 Завтрак", "🍽 Обед", "🌙 Ужин", "🛒 Корзина"}))
+@labels.route(lambda: {"🍳 Завтрак", "🍽 Обед", "🌙 Ужин", "🛒 Корзина"})
 async def reply_menu_selection(message: Message, state: FSMContext) -> None:
     """Handle menu category selection from reply keyboard."""
     from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton, WebAppInfo
@@ -428,44 +429,40 @@ async def reply_menu_selection(message: Message, state: FSMContext) -> None:
         )
 
 
-@router.message(
-    F.text.func(
-        lambda text: (text or "") in {
-            _label(
-                _get_reply_rows(
-                    "reply_keyboards.main",
-                    [
-                        ["🏨 Забронировать номер"],
-                        ["🌲 Об отеле", "🎉 Мероприятия"],
-                        ["📍 Как добраться", "❓ Вопросы"],
-                        ["🍽 Ресторан", "📞 Администратор"],
-                        ["👷‍♂️ Вход для сотрудников"],
-                    ],
-                ),
-                0,
-                0,
-                "🏨 Забронировать номер",
-            )
-        }
-    )
+@labels.route(
+    lambda: {
+        _label(
+            _get_reply_rows(
+                "reply_keyboards.main",
+                [
+                    ["🏨 Забронировать номер"],
+                    ["🌲 Об отеле", "🎉 Мероприятия"],
+                    ["📍 Как добраться", "❓ Вопросы"],
+                    ["🍽 Ресторан", "📞 Администратор"],
+                    ["👷‍♂️ Вход для сотрудников"],
+                ],
+            ),
+            0,
+            0,
+            "🏨 Забронировать номер",
+        )
+    }
 )
 async def reply_book_room(message: Message, state: FSMContext) -> None:
     """Handle booking room from reply keyboard."""
     from bot.handlers.booking import _handle_booking_logic
     await _handle_booking_logic(message, state)
 
-@router.message(
-    F.text.func(
-        lambda text: (text or "") in _labels_set(
-            "reply_keyboards.pre_arrival",
-            [
-                ["🏨 Забронировать номер"],
-                ["🌲 Об отеле", "🎉 Мероприятия"],
-                ["📍 Как добраться", "❓ Вопросы"],
-                ["🍽 Ресторан", "📞 Администратор (до заезда)"],
-                ["🏠 Главное меню"],
-            ],
-        )
+@labels.route(
+    lambda: _labels_set(
+        "reply_keyboards.pre_arrival",
+        [
+            ["🏨 Забронировать номер"],
+            ["🌲 Об отеле", "🎉 Мероприятия"],
+            ["📍 Как добраться", "❓ Вопросы"],
+            ["🍽 Ресторан", "📞 Администратор (до заезда)"],
+            ["🏠 Главное меню"],
+        ],
     )
 )
 async def reply_pre_arrival_selection(message: Message, state: FSMContext) -> None:
@@ -527,39 +524,37 @@ async def reply_pre_arrival_selection(message: Message, state: FSMContext) -> No
         await show_events(MockCallback(message, "pre_events_banquets", message.from_user), state)
 
 
-@router.message(
-    F.text.func(
-        lambda text: (text or "") in {
-            _label(
-                _get_reply_rows(
-                    "reply_keyboards.main",
-                    [
-                        ["🏨 Забронировать номер"],
-                        ["🌲 Об отеле", "🎉 Мероприятия"],
-                        ["📍 Как добраться", "❓ Вопросы"],
-                        ["🍽 Ресторан", "📞 Администратор"],
-                        ["👷‍♂️ Вход для сотрудников"],
-                    ],
-                ),
-                3,
-                1,
-                "📞 Администратор",
-            )
-        }
-    )
+@labels.route(
+    lambda: {
+        _label(
+            _get_reply_rows(
+                "reply_keyboards.main",
+                [
+                    ["🏨 Забронировать номер"],
+                    ["🌲 Об отеле", "🎉 Мероприятия"],
+                    ["📍 Как добраться", "❓ Вопросы"],
+                    ["🍽 Ресторан", "📞 Администратор"],
+                    ["👷‍♂️ Вход для сотрудников"],
+                ],
+            ),
+            3,
+            1,
+            "📞 Администратор",
+        )
+    }
 )
 async def reply_admin_contact(message: Message, state: FSMContext) -> None:
     from bot.handlers.pre_arrival import _handle_pre_contact_admin_logic
     await _handle_pre_contact_admin_logic(message, state, prefer_interested=True)
 
 
-@router.message(F.text == "📞 Связаться с администратором")
+@labels.route(lambda: {"📞 Связаться с администратором"})
 async def reply_admin_contact_legacy_text(message: Message, state: FSMContext) -> None:
     from bot.handlers.pre_arrival import _handle_pre_contact_admin_logic
     await _handle_pre_contact_admin_logic(message, state, prefer_interested=True)
 
 
-@router.message(F.text == "📞 Администратор (до заезда)")
+@labels.route(lambda: {"📞 Администратор (до заезда)"})
 async def reply_admin_contact_pre_arrival_text(message: Message, state: FSMContext) -> None:
     from bot.handlers.pre_arrival import _handle_pre_contact_admin_logic
     await _handle_pre_contact_admin_logic(message, state, prefer_interested=True)
@@ -578,10 +573,10 @@ async def reply_admin_contact_fuzzy(message: Message, state: FSMContext) -> None
     await _handle_pre_contact_admin_logic(message, state, prefer_interested=True)
 
 
-@router.message(F.text == "🛎 Рум-сервис")
+@labels.route(lambda: {"🛎 Рум-сервис"})
 async def reply_room_service(message: Message, state: FSMContext) -> None:
-    from services.guest_context import get_active_room_number
-    room_number = get_active_room_number(str(message.from_user.id))
+    from services.guest_context import get_active_room_number_async
+    room_number = await get_active_room_number_async(str(message.from_user.id))
     if not room_number:
         from bot.keyboards.main_menu import build_guest_booking_keyboard
         await message.answer(
@@ -607,19 +602,14 @@ async def reply_room_service(message: Message, state: FSMContext) -> None:
 
 @router.message(Command("reload_content"))
 async def reload_content(message: Message) -> None:
-    from db.session import SessionLocal
-    from db.models import AdminUser
+    from services.tickets import is_user_admin_async
 
     user_id = str(message.from_user.id)
 
-    with SessionLocal() as session:
-        admin = (
-            session.query(AdminUser)
-            .filter(AdminUser.telegram_id == user_id, AdminUser.is_active == 1)
-            .first()
-        )
+    async with AsyncSessionLocal() as session:
+        is_admin = await is_user_admin_async(session, user_id)
 
-    if admin is None:
+    if not is_admin:
         text = content_manager.get_text("system.not_authorized")
         await message.answer(text)
         return
@@ -632,14 +622,13 @@ async def reload_content(message: Message) -> None:
 @router.message(Command("help"))
 async def cmd_help(message: Message) -> None:
     """Show available commands"""
-    from db.session import SessionLocal
-    from services.tickets import is_user_admin
+    from services.tickets import is_user_admin_async
     
     user_id = str(message.from_user.id)
     
     # Check if user is admin
-    with SessionLocal() as session:
-        is_admin = is_user_admin(session, user_id)
+    async with AsyncSessionLocal() as session:
+        is_admin = await is_user_admin_async(session, user_id)
     
     if is_admin:
         help_text = (
@@ -0,0 +1,258 @@
+"""Memoized keyboard markups.
+
+Keyboards are built from content YAML plus a little catalog data (are there
+published events, which menu categories are visible). Both inputs change
+rarely, so built markups are cached under ``(builder, locale, args)``:
+
+* each markup remembers the content keys its builder looked up; when the
+  content is reloaded only markups whose keys changed are dropped (see
+  ``ContentManager.changes_since``);
+* the data version is bumped whenever :class:`CatalogState` changes, which
+  drops every markup. The state is refreshed in the background (web_admin
+  edits menu/event rows in another process, and event visibility depends on
+  the clock), and as soon as an in-process write to those tables commits.
+  Until a refresh lands, builds keep using the state they have; only the
+  very first state is loaded synchronously.
+
+Cached markups are shared between updates and must not be mutated.
+"""
+from __future__ import annotations
+
+import asyncio
+import functools
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, TypeVar
+
+from sqlalchemy import event, or_, select
+from sqlalchemy.orm import Session, object_session
+
+from config import get_settings
+from db.models import EventItem, MenuCategory, MenuCategorySetting, MenuItem
+from db.session import AsyncSessionLocal, SessionLocal
+from services.content import (
+    ContentManager,
+    LocalizedContent,
+    content_manager,
+    current_locale,
+    keys_affected,
+    note_keys,
+    track_keys,
+)
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CATEGORY_VISIBILITY = {"breakfast": True}
+
+Markup = TypeVar("Markup")
+
+
+@dataclass(frozen=True)
+class CatalogState:
+    has_active_events: bool
+    visible_categories: frozenset[str]
+
+
+def load_catalog_state(db: Session) -> CatalogState:
+    now = datetime.utcnow()
+    has_active_events = db.execute(
+        select(EventItem.id)
+        .where(
+            EventItem.is_active == True,  # noqa: E712
+            or_(EventItem.publish_from.is_(None), EventItem.publish_from <= now),
+            or_(EventItem.publish_until.is_(None), EventItem.publish_until >= now),
+        )
+        .limit(1)
+    ).first() is not None
+
+    enabled = {category.value: DEFAULT_CATEGORY_VISIBILITY.get(category.value, False) for category in MenuCategory}
+    for category, is_enabled in db.execute(select(MenuCategorySetting.category, MenuCategorySetting.is_enabled)):
+        enabled[category] = bool(is_enabled)
+    with_items = set(
+        db.scalars(select(MenuItem.category).where(MenuItem.is_available == True).distinct())  # noqa: E712
+    )
+    visible = frozenset(category for category, is_enabled in enabled.items() if is_enabled and category in with_items)
+    return CatalogState(has_active_events=has_active_events, visible_categories=visible)
+
+
+class KeyboardCache:
+    def __init__(self, data_ttl: float = 30.0, content: ContentManager | LocalizedContent = content_manager) -> None:
+        self.data_ttl = data_ttl
+        self.content = content
+        # key -> (markup, content keys the builder looked up)
+        self._markups: dict[tuple, tuple[Any, frozenset[str]]] = {}
+        self._content_version: int | None = None
+        self._built_data_version: int | None = None
+        self._state: CatalogState | None = None
+        self._data_version = 0
+        self._data_expires = 0.0
+        self._refresh_task: asyncio.Task | None = None
+        self._refresh_again = False
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _set_state(self, state: CatalogState) -> None:
+        with self._lock:
+            if state != self._state:
+                self._state = state
+                self._data_version += 1
+            self._data_expires = time.monotonic() + self.data_ttl
+
+    def catalog_state(self) -> CatalogState:
+        """Current catalog state; loads synchronously only when it is missing.
+
+        A stale state is still returned while an async refresh is scheduled,
+        so navigation on the event loop does no DB work. Outside an event loop
+        there is nothing to block and a stale state is reloaded in place.
+        """
+
+        if self._state is None:
+            with SessionLocal() as db:
+                self._set_state(load_catalog_state(db))
+        elif time.monotonic() >= self._data_expires and not self._schedule_refresh():
+            with SessionLocal() as db:
+                self._set_state(load_catalog_state(db))
+        assert self._state is not None
+        return self._state
+
+    async def refresh(self) -> None:
+        async with AsyncSessionLocal() as session:
+            self._set_state(await session.run_sync(load_catalog_state))
+
+    def _schedule_refresh(self) -> bool:
+        """Start a background :meth:`refresh` unless one is running; False without a loop."""
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = loop.create_task(self._refresh_pending())
+        return True
+
+    async def _refresh_pending(self) -> None:
+        # Invalidations that arrive mid-refresh may not be in what it read: go again.
+        try:
+            while True:
+                self._refresh_again = False
+                await self.refresh()
+                if not self._refresh_again:
+                    return
+        except Exception as exc:
+            logger.warning("Keyboard catalog refresh failed: %s", exc)
+
+    def invalidate_data(self) -> None:
+        """Mark the catalog state stale and refresh it in the background.
+
+        Builds keep the current state until the refresh lands.
+        """
+
+        self._data_expires = 0.0
+        self._refresh_again = True
+        self._schedule_refresh()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._markups.clear()
+            self._content_version = None
+            self._built_data_version = None
+
+    def _sync_versions(self, content_version: int) -> None:
+        """Drop markups made stale by catalog or content changes (lock held)."""
+
+        if self._built_data_version != self._data_version:
+            self._markups.clear()
+            self._built_data_version = self._data_version
+        if content_version == self._content_version:
+            return
+        changed = None
+        if self._content_version is not None:
+            changed = self.content.changes_since(self._content_version)
+        if changed is None:
+            self._markups.clear()
+        elif changed:
+            stale = [key for key, (_, keys) in self._markups.items() if keys_affected(keys, changed)]
+            for key in stale:
+                del self._markups[key]
+            logger.debug("Content change dropped %s of %s keyboards", len(stale), len(self._markups) + len(stale))
+        self._content_version = content_version
+
+    def get_or_build(self, key: tuple, build: Callable[[], Markup]) -> Markup:
+        self.catalog_state()
+        content_version = self.content.version
+        with self._lock:
+            self._sync_versions(content_version)
+            versions = (self._content_version, self._built_data_version)
+            entry = self._markups.get(key)
+        if entry is not None:
+            self.hits += 1
+            # A builder may call other cached builders: report their keys too.
+            note_keys(entry[1])
+            return entry[0]
+
+        self.misses += 1
+        with track_keys() as keys:
+            markup = build()
+        note_keys(keys)
+        with self._lock:
+            if (self._content_version, self._built_data_version) == versions:
+                self._markups[key] = (markup, frozenset(keys))
+        return markup
+
+    async def refresh_loop(self) -> None:
+        """Keep the catalog state fresh off the hot path."""
+
+        while True:
+            try:
+                await self.refresh()
+            except Exception as exc:  # pragma: no cover
+                logger.warning("Keyboard catalog refresh failed: %s", exc)
+            await asyncio.sleep(max(self.data_ttl / 2, 1.0))
+
+
+keyboard_cache = KeyboardCache(data_ttl=get_settings().keyboard_data_ttl)
+
+
+def cached_keyboard(builder: Callable[..., Markup]) -> Callable[..., Markup]:
+    """Memoize a keyboard builder whose arguments are hashable (per content locale)."""
+
+    name = f"{builder.__module__}.{builder.__qualname__}"
+
+    @functools.wraps(builder)
+    def wrapper(*args: Any) -> Markup:
+        return keyboard_cache.get_or_build((name, current_locale(), args), lambda: builder(*args))
+
+    return wrapper
+
+
+_CATALOG_CHANGED = "keyboard_catalog_changed"
+
+
+def _on_catalog_change(_mapper: Any, _connection: Any, target: Any) -> None:
+    # Flush events fire before the commit; a refresh started now would read the old rows.
+    session = object_session(target)
+    if session is None:
+        keyboard_cache.invalidate_data()
+    else:
+        session.info[_CATALOG_CHANGED] = True
+
+
+def _on_commit(session: Session) -> None:
+    if session.info.pop(_CATALOG_CHANGED, False):
+        keyboard_cache.invalidate_data()
+
+
+def _on_rollback(session: Session) -> None:
+    session.info.pop(_CATALOG_CHANGED, None)
+
+
+for _model in (EventItem, MenuItem, MenuCategorySetting):
+    for _event_name in ("after_insert", "after_update", "after_delete"):
+        event.listen(_model, _event_name, _on_catalog_change)
+event.listen(Session, "after_commit", _on_commit)
+event.listen(Session, "after_rollback", _on_rollback)
@@ -1,15 +1,12 @@
 from __future__ import annotations
 
-from datetime import datetime
-
 from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup, WebAppInfo, ReplyKeyboardMarkup, KeyboardButton
-from sqlalchemy import or_
 
+from bot.keyboards.cache import cached_keyboard, keyboard_cache
 from services.content import content_manager
-from db.session import SessionLocal
-from db.models import EventItem, MenuCategory, MenuCategorySetting, MenuItem
 
 
+@cached_keyboard
 def build_segment_keyboard() -> InlineKeyboardMarkup:
     buttons = []
     menu = content_manager.get_menu("segment_menu")
@@ -36,6 +33,7 @@ def build_segment_keyboard() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
 
+@cached_keyboard
 def build_segment_reply_keyboard() -> ReplyKeyboardMarkup:
     """Build reply keyboard for segment selection (Plan trip / Already in hotel)."""
     fallback_rows = [
@@ -53,6 +51,7 @@ def build_segment_reply_keyboard() -> ReplyKeyboardMarkup:
 
 
 
+@cached_keyboard
 def _build_menu_from_key(menu_key: str) -> InlineKeyboardMarkup:
     buttons: list[list[InlineKeyboardButton]] = []
     menu = content_manager.get_menu(menu_key)
@@ -108,6 +107,7 @@ def build_breakfast_confirm_menu() -> InlineKeyboardMarkup:
     return _build_menu_from_key("breakfast.confirm_menu")
 
 
+@cached_keyboard
 def build_admin_panel_menu() -> InlineKeyboardMarkup:
     """Build admin panel main menu."""
     buttons = [
@@ -158,6 +158,7 @@ def build_ticket_action_menu(ticket_id: int) -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
 
+@cached_keyboard
 def build_contact_admin_type_menu() -> InlineKeyboardMarkup:
     """Build menu for selecting user type when contacting admin."""
     buttons = [
@@ -167,6 +168,7 @@ def build_contact_admin_type_menu() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
 
+@cached_keyboard
 def build_menu_categories_keyboard() -> InlineKeyboardMarkup:
     """Build menu category selection keyboard."""
     labels = {
@@ -248,6 +250,7 @@ def build_cart_keyboard(cart_items: list, total: float) -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
 
+@cached_keyboard
 def build_order_confirm_keyboard() -> InlineKeyboardMarkup:
     """Build order confirmation keyboard."""
     buttons = [
@@ -257,6 +260,7 @@ def build_order_confirm_keyboard() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
 
+@cached_keyboard
 def build_cleaning_time_keyboard() -> InlineKeyboardMarkup:
     """Build cleaning time selection keyboard."""
     buttons = [
@@ -270,6 +274,7 @@ def build_cleaning_time_keyboard() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
 
+@cached_keyboard
 def build_room_service_cleaning_slots_keyboard() -> InlineKeyboardMarkup:
     """Build cleaning slots for room-service requests."""
     buttons = [
@@ -282,6 +287,7 @@ def build_room_service_cleaning_slots_keyboard() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
 
+@cached_keyboard
 def build_guest_booking_keyboard() -> InlineKeyboardMarkup:
     """Build keyboard for guest booking flow start."""
     buttons = [
@@ -350,6 +356,7 @@ def _build_reply_keyboard_from_menu_key(
     )
 
 
+@cached_keyboard
 def build_main_reply_keyboard() -> ReplyKeyboardMarkup:
     """Build persistent reply keyboard for main menu."""
     fallback_rows = [
@@ -366,6 +373,7 @@ def build_main_reply_keyboard() -> ReplyKeyboardMarkup:
     )
 
 
+@cached_keyboard
 def build_admin_contact_reply_keyboard() -> ReplyKeyboardMarkup:
     """Build reply keyboard for admin contact section."""
     fallback_rows = [
@@ -379,6 +387,7 @@ def build_admin_contact_reply_keyboard() -> ReplyKeyboardMarkup:
     )
 
 
+@cached_keyboard
 def build_room_service_reply_keyboard() -> ReplyKeyboardMarkup:
     """Build reply keyboard for room service section."""
     fallback_rows = [
@@ -396,6 +405,7 @@ def build_room_service_reply_keyboard() -> ReplyKeyboardMarkup:
     )
 
 
+@cached_keyboard
 def build_in_house_reply_keyboard() -> ReplyKeyboardMarkup:
     """Build reply keyboard for in-house menu section."""
     fallback_rows = [
@@ -416,6 +426,7 @@ def build_in_house_reply_keyboard() -> ReplyKeyboardMarkup:
     )
 
 
+@cached_keyboard
 def build_pre_arrival_reply_keyboard() -> ReplyKeyboardMarkup:
     """Build reply keyboard for pre-arrival menu section."""
     fallback_rows = [
@@ -432,6 +443,7 @@ def build_pre_arrival_reply_keyboard() -> ReplyKeyboardMarkup:
     )
 
 
+@cached_keyboard
 def build_menu_reply_keyboard() -> ReplyKeyboardMarkup:
     """Build reply keyboard for menu/restaurant section."""
     fallback_rows = [
@@ -444,6 +456,7 @@ def build_menu_reply_keyboard() -> ReplyKeyboardMarkup:
         "Выберите категорию..."
     )
 
+@cached_keyboard
 def build_staff_reply_keyboard() -> ReplyKeyboardMarkup:
     """Build persistent reply keyboard for staff members."""
     fallback_rows = [
@@ -458,25 +471,8 @@ def build_staff_reply_keyboard() -> ReplyKeyboardMarkup:
 
 
 def _has_active_events() -> bool:
-    now = datetime.utcnow()
-    with SessionLocal() as db:
-        return db.query(EventItem).filter(
-            EventItem.is_active == True,
-            or_(EventItem.publish_from.is_(None), EventItem.publish_from <= now),
-            or_(EventItem.publish_until.is_(None), EventItem.publish_until >= now),
-        ).first() is not None
+    return keyboard_cache.catalog_state().has_active_events
 
 
 def _is_category_visible_for_guest(category: str) -> bool:
-    with SessionLocal() as db:
-        setting = db.query(MenuCategorySetting).filter(
-            MenuCategorySetting.category == MenuCategory(category).value
-        ).first()
-        enabled = bool(setting.is_enabled) if setting is not None else (category == "breakfast")
-        if not enabled:
-            return False
-        has_items = db.query(MenuItem).filter(
-            MenuItem.category == category,
-            MenuItem.is_available == True
-        ).first() is not None
-        return has_items
+    return category in keyboard_cache.catalog_state().visible_categories
@@ -0,0 +1,100 @@
+"""Route reply-keyboard button presses with one dict lookup.
+
+A reply keyboard button sends its label as a plain text message. Handlers
+declare which labels they accept (mostly read from ``menus.ru.yml``) with
+:meth:`LabelRouter.route`; the router compiles every route into a single
+``label -> handler`` table. One aiogram handler then dispatches text messages
+through :meth:`LabelRouter.match` instead of one filter per handler re-reading
+menus. Label sources are evaluated once per loaded content locale, so a
+button from an English keyboard routes like its Russian original. When the
+content changes, only routes whose label sources read a changed key are
+re-evaluated before the table is merged again.
+
+Routes keep their registration order: when several routes claim the same
+label the first one wins, exactly as with one aiogram handler per route.
+"""
+from __future__ import annotations
+
+import logging
+from typing import Any, Awaitable, Callable, Iterable
+
+from aiogram.fsm.context import FSMContext
+from aiogram.types import Message
+
+from services.content import (
+    ContentManager,
+    LocalizedContent,
+    content_manager,
+    keys_affected,
+    track_keys,
+    use_locale,
+)
+
+
+logger = logging.getLogger(__name__)
+
+LabelSource = Callable[[], Iterable[str]]
+LabelHandler = Callable[[Message, FSMContext], Awaitable[Any]]
+
+
+class LabelRouter:
+    def __init__(self, content: ContentManager | LocalizedContent = content_manager) -> None:
+        self.content = content
+        self._routes: list[tuple[LabelSource, LabelHandler]] = []
+        # Per route and locale: (labels, content keys read while computing them).
+        self._compiled: list[dict[str, tuple[frozenset[str], frozenset[str]]]] = []
+        self._table: dict[str, LabelHandler] = {}
+        self._version: int | None = None
+
+    def route(self, labels: LabelSource) -> Callable[[LabelHandler], LabelHandler]:
+        """Send messages whose text is one of ``labels()`` to the decorated handler.
+
+        ``labels`` is called once per content version, not per message.
+        """
+
+        def decorator(handler: LabelHandler) -> LabelHandler:
+            self._routes.append((labels, handler))
+            self._compiled.append({})
+            self._version = None
+            return handler
+
+        return decorator
+
+    def table(self) -> dict[str, LabelHandler]:
+        version = self.content.version
+        if version == self._version:
+            return self._table
+
+        changed = self.content.changes_since(self._version) if self._version is not None else None
+        locales = self.content.loaded_locales()
+        recompiled = 0
+        for (labels, _handler), per_locale in zip(self._routes, self._compiled):
+            for locale in locales:
+                compiled = per_locale.get(locale)
+                if compiled is None or changed is None or keys_affected(compiled[1], changed):
+                    with use_locale(locale), track_keys() as keys:
+                        per_locale[locale] = (frozenset(labels()), frozenset(keys))
+                    recompiled += 1
+        if recompiled:
+            table: dict[str, LabelHandler] = {}
+            for (_labels, handler), per_locale in zip(self._routes, self._compiled):
+                for locale in locales:
+                    for label in per_locale[locale][0]:
+                        table.setdefault(label, handler)
+            self._table = table
+            logger.debug("Recompiled %s label routes (%s labels) for content v%s", recompiled, len(table), version)
+        self._version = version
+        return self._table
+
+    def resolve(self, text: str | None) -> LabelHandler | None:
+        if not text:
+            return None
+        return self.table().get(text)
+
+    async def match(self, message: Message) -> bool | dict[str, Any]:
+        """aiogram filter: passes the routed handler on as ``label_handler``."""
+
+        handler = self.resolve(message.text)
+        if handler is None:
+            return False
+        return {"label_handler": handler}
@@ -10,14 +10,20 @@ from aiogram.fsm.storage.memory import MemoryStorage
 from aiogram.types import MenuButtonWebApp, WebAppInfo
 
 from config import get_settings
+from db import instrumentation
 from db.session import init_db
 from bot.handlers import register_handlers
-from bot.middleware import ThrottlingMiddleware, CallbackAnswerMiddleware
+from bot.keyboards.cache import keyboard_cache
+from bot.middleware import ThrottlingMiddleware, CallbackAnswerMiddleware, LocaleMiddleware, QueryStatsMiddleware
 from bot.handlers.cleaning_schedule import set_bot_instance, cleaning_scheduler_loop
 from services.bot_api_bridge import get_bot_bridge
 from services.guest_notifications import guest_notification_loop
+from services.shelter_http import close_shelter_http
+from services.availability_calendar import availability_calendar
+from services.occupancy_history import occupancy_collector_loop
 from services.shelter_sync import shelter_sync_loop
-from services.tickets import close_expired_open_dialogs
+from services.ticket_archive import ticket_archive_loop
+from services.tickets import close_expired_open_dialogs_async
 
 
 logger = logging.getLogger(__name__)
@@ -27,7 +33,7 @@ async def open_dialog_expiry_loop() -> None:
     """Close expired guest-admin dialogs periodically."""
     while True:
         try:
-            closed = close_expired_open_dialogs()
+            closed = await close_expired_open_dialogs_async()
             if closed:
                 logger.info("Auto-closed %s expired open dialogs", closed)
         except Exception as exc:  # pragma: no cover
@@ -44,11 +50,16 @@ async def main() -> None:
     bot = Bot(token=settings.bot_token, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
     dp = Dispatcher(storage=MemoryStorage())
     
+    # LocaleMiddleware: content texts/menus in the user's language (texts.<lang>.yml bundles)
+    dp.update.outer_middleware(LocaleMiddleware())
     # Register middleware for performance optimization
     # ThrottlingMiddleware: prevents duplicate rapid clicks (0.5s between clicks)
     # CallbackAnswerMiddleware: ensures all callbacks are answered to prevent "loading" spinner
     dp.callback_query.middleware(ThrottlingMiddleware(throttle_time=0.25))
     dp.callback_query.middleware(CallbackAnswerMiddleware())
+    # QueryStatsMiddleware: per-handler query count / DB time (db.instrumentation)
+    dp.message.middleware(QueryStatsMiddleware())
+    dp.callback_query.middleware(QueryStatsMiddleware())
 
     register_handlers(dp)
     
@@ -63,7 +74,12 @@ async def main() -> None:
     asyncio.create_task(cleaning_scheduler_loop())
     asyncio.create_task(guest_notification_loop(bot))
     asyncio.create_task(shelter_sync_loop(bot, interval_seconds=settings.shelter_sync_interval))
+    asyncio.create_task(availability_calendar.refresh_loop())
+    asyncio.create_task(occupancy_collector_loop(settings.occupancy_sample_interval))
     asyncio.create_task(open_dialog_expiry_loop())
+    asyncio.create_task(ticket_archive_loop())
+    asyncio.create_task(keyboard_cache.refresh_loop())
+    asyncio.create_task(instrumentation.summary_loop(settings.db_stats_log_interval))
     
     # Set Menu Button for Mini App
     # This button appears next to the message input field.
@@ -87,7 +103,10 @@ async def main() -> None:
     
     logger.info("Starting GORA Telegram bot")
     # Lower polling timeout to improve perceived responsiveness in unstable networks.
-    await dp.start_polling(bot, polling_timeout=3)
+    try:
+        await dp.start_polling(bot, polling_timeout=3)
+    finally:
+        await close_shelter_http()
 
 
 if __name__ == "__main__":
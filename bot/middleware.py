@@ -11,6 +11,9 @@ from typing import Any, Awaitable, Callable, Dict
 from aiogram import BaseMiddleware
 from aiogram.types import CallbackQuery, Message, TelegramObject
 
+from db import instrumentation
+from services.content import LocalizedContent, content_manager, use_locale
+
 
 class ThrottlingMiddleware(BaseMiddleware):
     """
@@ -105,3 +108,55 @@ class CallbackAnswerMiddleware(BaseMiddleware):
                 pass
         
         return result
+
+
+class QueryStatsMiddleware(BaseMiddleware):
+    """
+    Charge the SQL statements issued by a handler to that handler
+    (see db.instrumentation).
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        handler_object = data.get("handler")
+        callback = getattr(handler_object, "callback", None)
+        if callback is None:
+            name = type(event).__name__
+        else:
+            name = f"{callback.__module__}.{getattr(callback, '__qualname__', repr(callback))}"
+
+        with instrumentation.track(name):
+            return await handler(event, data)
+
+
+class LocaleMiddleware(BaseMiddleware):
+    """
+    Bind the user's content locale (from ``from_user.language_code``) for
+    the whole update. ``content_manager`` lookups made while the update is
+    handled - texts, menus, keyboards, reply-label routing - resolve in that
+    locale; handlers may also take it as the ``locale`` argument.
+
+    Register as an outer middleware on ``dp.update`` so filters see it too.
+    """
+
+    def __init__(self, content: LocalizedContent = content_manager):
+        super().__init__()
+        self.content = content
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        user = data.get("event_from_user")
+        locale = self.content.resolve_locale(getattr(user, "language_code", None))
+        # Load the bundle before routing, so its reply labels are routable.
+        self.content.bundle(locale)
+        data["locale"] = locale
+        with use_locale(locale):
+            return await handler(event, data)
@@ -12,6 +12,7 @@ from db.models import GuestBooking
 from db.session import SessionLocal
 from services.guest_context import get_local_now, get_local_today
 from services.shelter import ShelterAPIError, get_shelter_client
+from services.shelter_http import close_shelter_http
 
 if hasattr(sys.stdout, "reconfigure"):
     sys.stdout.reconfigure(encoding="utf-8")
@@ -193,6 +194,7 @@ def run_log_checks() -> bool:
 
 async def main() -> int:
     shelter_ok = await run_shelter_checks()
+    await close_shelter_http()
     db_ok = run_database_checks()
     logs_ok = run_log_checks()
 
@@ -17,6 +17,65 @@ class Settings:
     shelter_pms_token: str | None
     shelter_pms_base_url: str
     shelter_sync_interval: int
+    # Booking widget API (getHotelParams, getVariants, putOrder)
+    shelter_widget_base_url: str = "https://pms.frontdesk24.ru"
+    # Parallel guest lookups per PMS sync (reservations without embedded guests)
+    shelter_sync_concurrency: int = 8
+    # Between full re-imports the sync only applies reservations whose content changed
+    shelter_sync_full_interval: int = 6 * 60 * 60
+    # ByFilter field for "modified since last sync" (empty: the PMS filter is not used)
+    shelter_pms_modified_since_field: str = ""
+    # Guest-triggered PMS syncs (phone shared, in-house menu): wait this long to batch a burst,
+    # and start none if a sync finished within the minimum interval
+    shelter_guest_sync_debounce: float = 2.0
+    shelter_guest_sync_min_interval: float = 60.0
+    # Shared connection pool of the Shelter API clients (services/shelter_http.py)
+    shelter_http_limit: int = 20
+    shelter_http_limit_per_host: int = 10
+    shelter_http_keepalive: float = 30.0
+    shelter_http_dns_ttl: int = 300
+    # Idempotent Shelter calls are retried with jittered exponential backoff on transient errors
+    shelter_retry_attempts: int = 3
+    shelter_retry_base_delay: float = 0.5
+    # Consecutive transient failures that open the circuit, and how long it stays open
+    shelter_breaker_failures: int = 5
+    shelter_breaker_reset: float = 30.0
+    # Cache lifetimes (seconds) of Shelter widget answers; stale hotel params are served while refreshing
+    shelter_hotel_params_ttl: float = 600.0
+    shelter_hotel_params_stale_ttl: float = 3600.0
+    shelter_variants_ttl: float = 60.0
+    # Rolling availability calendar: nights ahead, guest counts searched per night,
+    # parallel getVariants calls and seconds between refreshes
+    shelter_calendar_days: int = 60
+    shelter_calendar_adults: tuple[int, ...] = (2,)
+    shelter_calendar_concurrency: int = 4
+    shelter_calendar_interval: int = 600
+    # Occupancy time series: seconds between samples, and how long raw and hourly points are kept
+    # (daily points are kept forever)
+    occupancy_sample_interval: int = 900
+    occupancy_raw_retention_days: int = 7
+    occupancy_hourly_retention_days: int = 180
+    # SQLite engine profile: "tuned" (WAL, busy timeout, mmap, pooled) or "default" (bare engine)
+    db_profile: str = "tuned"
+    db_busy_timeout_ms: int = 5000
+    db_mmap_size: int = 64 * 1024 * 1024
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    # Closed tickets older than this many days move to the archive tables (0 disables archival)
+    ticket_archive_after_days: int = 90
+    ticket_archive_interval: int = 6 * 60 * 60
+    # How often (seconds) content YAML files are stat()ed for changes
+    content_check_interval: float = 2.0
+    # Locale used when a user's language has no content bundle, and the end of every fallback chain
+    default_locale: str = "ru"
+    # Extra fallbacks before the default locale, e.g. "fi:en" (Finnish falls back to English)
+    content_locale_fallbacks: str = "fi:en"
+    # How often the bot refreshes catalog data (events, menu categories) baked into cached keyboards
+    keyboard_data_ttl: float = 30.0
+    # Statements slower than this are logged with redacted parameters
+    db_slow_query_ms: int = 200
+    # How often the bot logs its per-handler query aggregates
+    db_stats_log_interval: int = 15 * 60
 
 
 def get_settings() -> Settings:
@@ -33,6 +92,45 @@ def get_settings() -> Settings:
     shelter_pms_token = os.getenv("SHELTER_PMS_TOKEN")
     shelter_pms_base_url = os.getenv("SHELTER_PMS_BASE_URL", "https://cloud.shelter.ru/sheltercloudapi")
     shelter_sync_interval = int(os.getenv("SHELTER_SYNC_INTERVAL_SECONDS", "300"))
+    shelter_widget_base_url = os.getenv("SHELTER_WIDGET_BASE_URL", "https://pms.frontdesk24.ru")
+    shelter_sync_concurrency = int(os.getenv("SHELTER_SYNC_CONCURRENCY", "8"))
+    shelter_sync_full_interval = int(os.getenv("SHELTER_SYNC_FULL_INTERVAL_SECONDS", str(6 * 60 * 60)))
+    shelter_pms_modified_since_field = os.getenv("SHELTER_PMS_MODIFIED_SINCE_FIELD", "").strip()
+    shelter_guest_sync_debounce = float(os.getenv("SHELTER_GUEST_SYNC_DEBOUNCE_SECONDS", "2"))
+    shelter_guest_sync_min_interval = float(os.getenv("SHELTER_GUEST_SYNC_MIN_INTERVAL_SECONDS", "60"))
+    shelter_http_limit = int(os.getenv("SHELTER_HTTP_LIMIT", "20"))
+    shelter_http_limit_per_host = int(os.getenv("SHELTER_HTTP_LIMIT_PER_HOST", "10"))
+    shelter_http_keepalive = float(os.getenv("SHELTER_HTTP_KEEPALIVE_SECONDS", "30"))
+    shelter_http_dns_ttl = int(os.getenv("SHELTER_HTTP_DNS_TTL_SECONDS", "300"))
+    shelter_retry_attempts = int(os.getenv("SHELTER_RETRY_ATTEMPTS", "3"))
+    shelter_retry_base_delay = float(os.getenv("SHELTER_RETRY_BASE_DELAY_SECONDS", "0.5"))
+    shelter_breaker_failures = int(os.getenv("SHELTER_BREAKER_FAILURES", "5"))
+    shelter_breaker_reset = float(os.getenv("SHELTER_BREAKER_RESET_SECONDS", "30"))
+    shelter_hotel_params_ttl = float(os.getenv("SHELTER_HOTEL_PARAMS_TTL_SECONDS", "600"))
+    shelter_hotel_params_stale_ttl = float(os.getenv("SHELTER_HOTEL_PARAMS_STALE_SECONDS", "3600"))
+    shelter_variants_ttl = float(os.getenv("SHELTER_VARIANTS_TTL_SECONDS", "60"))
+    shelter_calendar_days = int(os.getenv("SHELTER_CALENDAR_DAYS", "60"))
+    shelter_calendar_adults = tuple(
+        int(value) for value in os.getenv("SHELTER_CALENDAR_ADULTS", "2").split(",") if value.strip()
+    )
+    shelter_calendar_concurrency = int(os.getenv("SHELTER_CALENDAR_CONCURRENCY", "4"))
+    shelter_calendar_interval = int(os.getenv("SHELTER_CALENDAR_INTERVAL_SECONDS", "600"))
+    occupancy_sample_interval = int(os.getenv("OCCUPANCY_SAMPLE_INTERVAL_SECONDS", "900"))
+    occupancy_raw_retention_days = int(os.getenv("OCCUPANCY_RAW_RETENTION_DAYS", "7"))
+    occupancy_hourly_retention_days = int(os.getenv("OCCUPANCY_HOURLY_RETENTION_DAYS", "180"))
+    db_profile = os.getenv("DB_PROFILE", "tuned").strip().lower()
+    db_busy_timeout_ms = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+    db_mmap_size = int(os.getenv("DB_MMAP_SIZE", str(64 * 1024 * 1024)))
+    db_pool_size = int(os.getenv("DB_POOL_SIZE", "5"))
+    db_max_overflow = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    ticket_archive_after_days = int(os.getenv("TICKET_ARCHIVE_AFTER_DAYS", "90"))
+    ticket_archive_interval = int(os.getenv("TICKET_ARCHIVE_INTERVAL_SECONDS", str(6 * 60 * 60)))
+    content_check_interval = float(os.getenv("CONTENT_CHECK_INTERVAL_SECONDS", "2"))
+    default_locale = os.getenv("DEFAULT_LOCALE", "ru").strip().lower()
+    content_locale_fallbacks = os.getenv("CONTENT_LOCALE_FALLBACKS", "fi:en")
+    keyboard_data_ttl = float(os.getenv("KEYBOARD_DATA_TTL_SECONDS", "30"))
+    db_slow_query_ms = int(os.getenv("DB_SLOW_QUERY_MS", "200"))
+    db_stats_log_interval = int(os.getenv("DB_STATS_LOG_INTERVAL_SECONDS", str(15 * 60)))
 
     # Do not log secrets
     logging.basicConfig(level=getattr(logging, log_level.upper(), logging.INFO))
@@ -45,4 +143,41 @@ def get_settings() -> Settings:
         shelter_pms_token=shelter_pms_token,
         shelter_pms_base_url=shelter_pms_base_url,
         shelter_sync_interval=shelter_sync_interval,
+        shelter_widget_base_url=shelter_widget_base_url,
+        shelter_sync_concurrency=shelter_sync_concurrency,
+        shelter_sync_full_interval=shelter_sync_full_interval,
+        shelter_pms_modified_since_field=shelter_pms_modified_since_field,
+        shelter_guest_sync_debounce=shelter_guest_sync_debounce,
+        shelter_guest_sync_min_interval=shelter_guest_sync_min_interval,
+        shelter_http_limit=shelter_http_limit,
+        shelter_http_limit_per_host=shelter_http_limit_per_host,
+        shelter_http_keepalive=shelter_http_keepalive,
+        shelter_http_dns_ttl=shelter_http_dns_ttl,
+        shelter_retry_attempts=shelter_retry_attempts,
+        shelter_retry_base_delay=shelter_retry_base_delay,
+        shelter_breaker_failures=shelter_breaker_failures,
+        shelter_breaker_reset=shelter_breaker_reset,
+        shelter_hotel_params_ttl=shelter_hotel_params_ttl,
+        shelter_hotel_params_stale_ttl=shelter_hotel_params_stale_ttl,
+        shelter_variants_ttl=shelter_variants_ttl,
+        shelter_calendar_days=shelter_calendar_days,
+        shelter_calendar_adults=shelter_calendar_adults,
+        shelter_calendar_concurrency=shelter_calendar_concurrency,
+        shelter_calendar_interval=shelter_calendar_interval,
+        occupancy_sample_interval=occupancy_sample_interval,
+        occupancy_raw_retention_days=occupancy_raw_retention_days,
+        occupancy_hourly_retention_days=occupancy_hourly_retention_days,
+        db_profile=db_profile,
+        db_busy_timeout_ms=db_busy_timeout_ms,
+        db_mmap_size=db_mmap_size,
+        db_pool_size=db_pool_size,
+        db_max_overflow=db_max_overflow,
+        ticket_archive_after_days=ticket_archive_after_days,
+        ticket_archive_interval=ticket_archive_interval,
+        content_check_interval=content_check_interval,
+        default_locale=default_locale,
+        content_locale_fallbacks=content_locale_fallbacks,
+        keyboard_data_ttl=keyboard_data_ttl,
+        db_slow_query_ms=db_slow_query_ms,
+        db_stats_log_interval=db_stats_log_interval,
     )
@@ -0,0 +1,227 @@
+"""Per-route query counting and slow-query logging for SQLAlchemy engines.
+
+:func:`instrument_engine` attaches ``before/after_cursor_execute`` listeners.
+Every statement is charged to the scope opened by :func:`track`: web_admin
+opens one per HTTP request and the bot opens one per aiogram handler call.
+The scope lives in a context variable, so it follows the work into
+``asyncio.to_thread`` and into the aiosqlite greenlet.
+
+When a scope ends, its totals are folded into per-route aggregates, which
+:func:`snapshot` returns. Statements slower than ``DB_SLOW_QUERY_MS`` are
+logged with their parameters redacted. A statement repeated
+``N_PLUS_ONE_THRESHOLD`` times in one scope is reported as a likely N+1.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Iterator
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+logger = logging.getLogger(__name__)
+
+N_PLUS_ONE_THRESHOLD = 10
+UNSCOPED = "<background>"
+_STATEMENT_PREVIEW = 300
+
+
+@dataclass
+class QueryScope:
+    """Queries issued while handling one request/update."""
+
+    name: str
+    started: float = field(default_factory=time.perf_counter)
+    queries: int = 0
+    db_time: float = 0.0
+    statements: Counter = field(default_factory=Counter)
+
+
+@dataclass
+class RouteStats:
+    calls: int = 0
+    queries: int = 0
+    max_queries: int = 0
+    db_time: float = 0.0
+    max_db_time: float = 0.0
+    wall_time: float = 0.0
+    slow_queries: int = 0
+
+    def as_dict(self, name: str) -> dict[str, Any]:
+        calls = self.calls or 1
+        return {
+            "route": name,
+            "calls": self.calls,
+            "queries": self.queries,
+            "avg_queries": round(self.queries / calls, 2),
+            "max_queries": self.max_queries,
+            "db_time_ms": round(self.db_time * 1000, 2),
+            "avg_db_time_ms": round(self.db_time * 1000 / calls, 2),
+            "max_db_time_ms": round(self.max_db_time * 1000, 2),
+            "avg_wall_time_ms": round(self.wall_time * 1000 / calls, 2),
+            "slow_queries": self.slow_queries,
+        }
+
+
+_current_scope: ContextVar[QueryScope | None] = ContextVar("db_query_scope", default=None)
+_stats: dict[str, RouteStats] = {}
+_stats_lock = threading.Lock()
+_slow_query_seconds = 0.2
+
+
+def configure(slow_query_ms: int) -> None:
+    global _slow_query_seconds
+    _slow_query_seconds = max(int(slow_query_ms), 0) / 1000
+
+
+def _redact(value: Any) -> Any:
+    if value is None or isinstance(value, bool):
+        return value
+    if isinstance(value, (list, tuple)):
+        return [_redact(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _redact(item) for key, item in value.items()}
+    if isinstance(value, (str, bytes)):
+        return f"<{type(value).__name__}:{len(value)}>"
+    return f"<{type(value).__name__}>"
+
+
+def redact_parameters(parameters: Any) -> Any:
+    """Keep only the shape of bound parameters: types and lengths, never values."""
+
+    return _redact(parameters)
+
+
+def _record_query(scope: QueryScope | None, statement: str, elapsed: float, slow: bool) -> None:
+    if scope is not None:
+        scope.queries += 1
+        scope.db_time += elapsed
+        scope.statements[statement] += 1
+        if slow:
+            with _stats_lock:
+                _stats.setdefault(scope.name, RouteStats()).slow_queries += 1
+        return
+
+    with _stats_lock:
+        stats = _stats.setdefault(UNSCOPED, RouteStats())
+        stats.queries += 1
+        stats.db_time += elapsed
+        stats.max_db_time = max(stats.max_db_time, elapsed)
+        stats.slow_queries += int(slow)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:  # noqa: ARG001
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:  # noqa: ARG001
+    started = conn.info["query_started"].pop()
+    elapsed = time.perf_counter() - started
+    scope = _current_scope.get()
+    slow = elapsed >= _slow_query_seconds
+    _record_query(scope, statement, elapsed, slow)
+    if slow:
+        logger.warning(
+            "Slow query (%.1f ms) in %s: %s params=%s",
+            elapsed * 1000,
+            scope.name if scope else UNSCOPED,
+            " ".join(statement.split())[:_STATEMENT_PREVIEW],
+            redact_parameters(parameters),
+        )
+
+
+def instrument_engine(engine: Engine) -> Engine:
+    """Attach the timing listeners to ``engine`` (an AsyncEngine's ``sync_engine``)."""
+
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    return engine
+
+
+def _finish(scope: QueryScope) -> None:
+    wall_time = time.perf_counter() - scope.started
+    with _stats_lock:
+        stats = _stats.setdefault(scope.name, RouteStats())
+        stats.calls += 1
+        stats.queries += scope.queries
+        stats.max_queries = max(stats.max_queries, scope.queries)
+        stats.db_time += scope.db_time
+        stats.max_db_time = max(stats.max_db_time, scope.db_time)
+        stats.wall_time += wall_time
+
+    if scope.statements:
+        statement, repeats = scope.statements.most_common(1)[0]
+        if repeats >= N_PLUS_ONE_THRESHOLD:
+            logger.warning(
+                "Possible N+1 in %s: statement ran %s times: %s",
+                scope.name,
+                repeats,
+                " ".join(statement.split())[:_STATEMENT_PREVIEW],
+            )
+
+
+@contextmanager
+def track(name: str) -> Iterator[QueryScope]:
+    """Charge every query issued inside the block to ``name``.
+
+    The name may be changed on the yielded scope before the block exits
+    (web_admin only knows the matched route after the app has run).
+    """
+
+    scope = QueryScope(name=name)
+    token = _current_scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _current_scope.reset(token)
+        _finish(scope)
+
+
+def current_scope() -> QueryScope | None:
+    return _current_scope.get()
+
+
+def snapshot() -> list[dict[str, Any]]:
+    """Per-route aggregates, heaviest total DB time first."""
+
+    with _stats_lock:
+        rows = [stats.as_dict(name) for name, stats in _stats.items()]
+    return sorted(rows, key=lambda row: row["db_time_ms"], reverse=True)
+
+
+def reset() -> None:
+    with _stats_lock:
+        _stats.clear()
+
+
+def log_summary(limit: int = 10) -> None:
+    for row in snapshot()[:limit]:
+        logger.info(
+            "%s: %s calls, %.2f queries/call (max %s), %.2f ms DB/call, %s slow",
+            row["route"],
+            row["calls"],
+            row["avg_queries"],
+            row["max_queries"],
+            row["avg_db_time_ms"],
+            row["slow_queries"],
+        )
+
+
+async def summary_loop(interval_seconds: int) -> None:
+    """Log the per-route aggregates periodically (the bot has no HTTP endpoint for them)."""
+
+    while True:
+        await asyncio.sleep(max(int(interval_seconds), 60))
+        try:
+            log_summary()
+        except Exception as exc:  # pragma: no cover
+            logger.warning("Query stats summary failed: %s", exc)
@@ -0,0 +1,602 @@
+"""Versioned SQLite migrations.
+
+Each migration runs once, in its own transaction, and bumps
+``PRAGMA user_version``. Migrations must stay idempotent because databases
+created by ``init_db()`` already have the current tables and indexes.
+"""
+from __future__ import annotations
+
+import logging
+import sqlite3
+from dataclasses import dataclass
+from typing import Callable
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    apply: Callable[[sqlite3.Cursor], None]
+
+
+@dataclass(frozen=True)
+class HotQuery:
+    name: str
+    sql: str
+    params: tuple
+    expected_index: str
+
+
+def _columns(cursor: sqlite3.Cursor, table: str) -> set[str]:
+    cursor.execute(f"PRAGMA table_info({table})")
+    return {row[1] for row in cursor.fetchall()}
+
+
+def _add_column(cursor: sqlite3.Cursor, table: str, column: str, ddl: str) -> bool:
+    if column in _columns(cursor, table):
+        return False
+    cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}")
+    return True
+
+
+def _legacy_schema(cursor: sqlite3.Cursor) -> None:
+    """Column and table additions that predate versioning (formerly migrate_db.py)."""
+
+    if _add_column(cursor, "ticket_messages", "bot_delivered", "BOOLEAN DEFAULT 0 NOT NULL"):
+        # Don't re-deliver old admin messages.
+        cursor.execute("UPDATE ticket_messages SET bot_delivered = 1 WHERE sender = 'ADMIN'")
+
+    _add_column(cursor, "staff_tasks", "notification_sent", "BOOLEAN DEFAULT 0 NOT NULL")
+    _add_column(cursor, "staff_tasks", "scheduled_for_utc", "DATETIME")
+
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS event_items (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            description TEXT NOT NULL,
+            location_text TEXT,
+            map_url TEXT,
+            image_url TEXT,
+            starts_at DATETIME NOT NULL,
+            ends_at DATETIME NOT NULL,
+            is_active BOOLEAN NOT NULL DEFAULT 1
+        )
+        """
+    )
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_event_items_starts_at ON event_items(starts_at)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_event_items_ends_at ON event_items(ends_at)")
+
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS menu_category_settings (
+            id INTEGER PRIMARY KEY,
+            category TEXT NOT NULL UNIQUE,
+            is_enabled BOOLEAN NOT NULL DEFAULT 0
+        )
+        """
+    )
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_menu_category_settings_category ON menu_category_settings(category)")
+    cursor.execute("INSERT OR IGNORE INTO menu_category_settings (category, is_enabled) VALUES ('breakfast', 1)")
+    cursor.execute("INSERT OR IGNORE INTO menu_category_settings (category, is_enabled) VALUES ('lunch', 0)")
+    cursor.execute("INSERT OR IGNORE INTO menu_category_settings (category, is_enabled) VALUES ('dinner', 0)")
+
+    _add_column(cursor, "tickets", "dialog_open", "BOOLEAN DEFAULT 0 NOT NULL")
+    _add_column(cursor, "tickets", "dialog_expires_at", "DATETIME")
+    _add_column(cursor, "tickets", "dialog_last_activity_at", "DATETIME")
+    _add_column(cursor, "tickets", "admin_last_viewed_at", "DATETIME")
+
+    _add_column(cursor, "event_items", "publish_from", "DATETIME")
+    _add_column(cursor, "event_items", "publish_until", "DATETIME")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_event_items_publish_from ON event_items(publish_from)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_event_items_publish_until ON event_items(publish_until)")
+    # Backfill legacy rows so visibility window defaults to event dates.
+    cursor.execute("UPDATE event_items SET publish_from = starts_at WHERE publish_from IS NULL")
+    cursor.execute("UPDATE event_items SET publish_until = ends_at WHERE publish_until IS NULL")
+
+    _add_column(cursor, "guest_bookings", "checkin_notified", "BOOLEAN DEFAULT 0 NOT NULL")
+    _add_column(cursor, "guest_bookings", "checkout_notified", "BOOLEAN DEFAULT 0 NOT NULL")
+
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_users_phone ON users(phone)")
+
+    _add_column(cursor, "guest_bookings", "shelter_reservation_id", "TEXT")
+    _add_column(cursor, "guest_bookings", "feedback_requested", "BOOLEAN DEFAULT 0 NOT NULL")
+    _add_column(cursor, "guest_bookings", "feedback_requested_at", "DATETIME")
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_guest_bookings_shelter_reservation_id "
+        "ON guest_bookings(shelter_reservation_id)"
+    )
+
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS shelter_sync_state (
+            id INTEGER PRIMARY KEY,
+            last_sync_at DATETIME,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+    cursor.execute(
+        "INSERT OR IGNORE INTO shelter_sync_state (id, last_sync_at, updated_at) "
+        "VALUES (1, NULL, CURRENT_TIMESTAMP)"
+    )
+
+
+def _hot_query_indexes(cursor: sqlite3.Cursor) -> None:
+    """Composite and partial indexes for the most frequent filters.
+
+    Names match ``__table_args__`` in ``db/models.py`` so fresh databases
+    created via ``create_all`` end up with the same schema.
+    """
+
+    statements = (
+        # web_admin ticket list: status filter ordered by updated_at.
+        "CREATE INDEX IF NOT EXISTS ix_tickets_status_updated_at ON tickets(status, updated_at)",
+        # Ticket rate limiter: recent tickets per guest.
+        "CREATE INDEX IF NOT EXISTS ix_tickets_guest_chat_id_created_at ON tickets(guest_chat_id, created_at)",
+        # Open-dialog expiry loop; only a handful of tickets have a dialog open.
+        "CREATE INDEX IF NOT EXISTS ix_tickets_open_dialog_expires_at "
+        "ON tickets(dialog_expires_at) WHERE dialog_open = 1",
+        # bot_api_bridge poll for undelivered admin/system messages.
+        "CREATE INDEX IF NOT EXISTS ix_ticket_messages_sender_bot_delivered ON ticket_messages(sender, bot_delivered)",
+        # Guest check-in / check-out notifications and expiry.
+        "CREATE INDEX IF NOT EXISTS ix_guest_bookings_active_check_in ON guest_bookings(is_active, check_in_date)",
+        "CREATE INDEX IF NOT EXISTS ix_guest_bookings_active_check_out ON guest_bookings(is_active, check_out_date)",
+        # bot_api_bridge poll for staff task notifications.
+        "CREATE INDEX IF NOT EXISTS ix_staff_tasks_notification_status_scheduled "
+        "ON staff_tasks(notification_sent, status, scheduled_for_utc)",
+    )
+    for statement in statements:
+        cursor.execute(statement)
+
+
+def _outbox(cursor: sqlite3.Cursor) -> None:
+    """Single outbox for Telegram deliveries, backfilled from the legacy flags.
+
+    ``ticket_messages.bot_delivered``, ``tickets.payload.guest_notified`` and
+    ``staff_tasks.notification_sent`` are no longer read or written; the
+    columns stay in place so an older build can still start against the file.
+    """
+
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS outbox (
+            id INTEGER PRIMARY KEY,
+            kind VARCHAR(18) NOT NULL,
+            status VARCHAR(7) NOT NULL,
+            available_at DATETIME NOT NULL,
+            created_at DATETIME NOT NULL,
+            sent_at DATETIME,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            last_error TEXT,
+            chat_id VARCHAR(64),
+            ticket_id INTEGER,
+            ticket_message_id INTEGER,
+            staff_task_id INTEGER
+        )
+        """
+    )
+    cursor.execute("CREATE INDEX IF NOT EXISTS ix_outbox_status_available_at ON outbox(status, available_at)")
+
+    cursor.execute(
+        """
+        INSERT INTO outbox (kind, status, available_at, created_at, attempts, chat_id, ticket_id, ticket_message_id)
+        SELECT 'TICKET_MESSAGE', 'PENDING', COALESCE(m.created_at, CURRENT_TIMESTAMP), CURRENT_TIMESTAMP, 0,
+               t.guest_chat_id, t.id, m.id
+        FROM ticket_messages m JOIN tickets t ON t.id = m.ticket_id
+        WHERE m.sender IN ('ADMIN', 'SYSTEM') AND m.bot_delivered = 0
+          AND t.guest_chat_id <> '' AND t.guest_chat_id NOT GLOB '*[^0-9]*'
+        """
+    )
+    cursor.execute(
+        """
+        INSERT INTO outbox (kind, status, available_at, created_at, attempts, chat_id, ticket_id)
+        SELECT 'ORDER_CONFIRMATION', 'PENDING', COALESCE(created_at, CURRENT_TIMESTAMP), CURRENT_TIMESTAMP, 0,
+               guest_chat_id, id
+        FROM tickets
+        WHERE type = 'MENU_ORDER'
+          AND guest_chat_id <> '' AND guest_chat_id NOT GLOB '*[^0-9]*'
+          AND COALESCE(json_extract(payload, '$.guest_notified'), 0) = 0
+        """
+    )
+    cursor.execute(
+        """
+        INSERT INTO outbox (kind, status, available_at, created_at, attempts, staff_task_id)
+        SELECT 'STAFF_TASK', 'PENDING', COALESCE(scheduled_for_utc, created_at, CURRENT_TIMESTAMP), CURRENT_TIMESTAMP, 0, id
+        FROM staff_tasks
+        WHERE notification_sent = 0 AND status = 'PENDING' AND assigned_to IS NOT NULL
+        """
+    )
+
+    # Only the retired flag polls used these.
+    cursor.execute("DROP INDEX IF EXISTS ix_ticket_messages_sender_bot_delivered")
+    cursor.execute("DROP INDEX IF EXISTS ix_staff_tasks_notification_status_scheduled")
+
+
+def _ticket_message_summary(cursor: sqlite3.Cursor) -> None:
+    """Denormalized message summary on tickets, backfilled from ticket_messages."""
+
+    _add_column(cursor, "tickets", "message_count", "INTEGER DEFAULT 0 NOT NULL")
+    _add_column(cursor, "tickets", "last_message_at", "DATETIME")
+    _add_column(cursor, "tickets", "last_admin_message_at", "DATETIME")
+    _add_column(cursor, "tickets", "unread_guest_count", "INTEGER DEFAULT 0 NOT NULL")
+
+    cursor.execute(
+        """
+        UPDATE tickets SET
+            message_count = (SELECT count(*) FROM ticket_messages m WHERE m.ticket_id = tickets.id),
+            last_message_at = (SELECT max(m.created_at) FROM ticket_messages m WHERE m.ticket_id = tickets.id),
+            last_admin_message_at = (
+                SELECT max(m.created_at) FROM ticket_messages m
+                WHERE m.ticket_id = tickets.id AND m.sender = 'ADMIN'
+            )
+        """
+    )
+    # Unread = guest messages after the later of the last admin reply and the
+    # last admin view (same rule the web_admin list used to compute in Python).
+    cursor.execute(
+        """
+        UPDATE tickets SET unread_guest_count = (
+            SELECT count(*) FROM ticket_messages m
+            WHERE m.ticket_id = tickets.id AND m.sender = 'GUEST'
+              AND m.created_at > max(COALESCE(tickets.last_admin_message_at, ''),
+                                     COALESCE(tickets.admin_last_viewed_at, ''))
+        )
+        """
+    )
+    # Unfiltered admin ticket list is ordered by updated_at.
+    cursor.execute("CREATE INDEX IF NOT EXISTS ix_tickets_updated_at ON tickets(updated_at)")
+
+
+def _ticket_archive(cursor: sqlite3.Cursor) -> None:
+    """Cold-storage tables for closed tickets (see services/ticket_archive.py)."""
+
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS tickets_archive (
+            id INTEGER PRIMARY KEY,
+            request_id VARCHAR(64) NOT NULL,
+            created_at DATETIME,
+            updated_at DATETIME,
+            type VARCHAR(12) NOT NULL,
+            status VARCHAR(13) NOT NULL,
+            guest_chat_id VARCHAR(64) NOT NULL,
+            guest_name VARCHAR(255),
+            room_number VARCHAR(32),
+            channel VARCHAR(32) NOT NULL,
+            payload JSON,
+            admin_notes TEXT,
+            dialog_open BOOLEAN NOT NULL DEFAULT 0,
+            dialog_expires_at DATETIME,
+            dialog_last_activity_at DATETIME,
+            admin_last_viewed_at DATETIME,
+            message_count INTEGER NOT NULL DEFAULT 0,
+            last_message_at DATETIME,
+            last_admin_message_at DATETIME,
+            unread_guest_count INTEGER NOT NULL DEFAULT 0,
+            archived_at DATETIME NOT NULL
+        )
+        """
+    )
+    cursor.execute("CREATE INDEX IF NOT EXISTS ix_tickets_archive_guest_chat_id ON tickets_archive(guest_chat_id)")
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS ticket_messages_archive (
+            id INTEGER PRIMARY KEY,
+            request_id VARCHAR(64) NOT NULL,
+            created_at DATETIME,
+            ticket_id INTEGER NOT NULL REFERENCES tickets_archive(id),
+            sender VARCHAR(6) NOT NULL,
+            content TEXT NOT NULL,
+            admin_telegram_id VARCHAR(64),
+            admin_name VARCHAR(255)
+        )
+        """
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS ix_ticket_messages_archive_ticket_id ON ticket_messages_archive(ticket_id)"
+    )
+
+
+def _shelter_sync_timings(cursor: sqlite3.Cursor) -> None:
+    """Per-sync counters and wall time on shelter_sync_state."""
+
+    _add_column(cursor, "shelter_sync_state", "last_sync_duration_ms", "INTEGER")
+    _add_column(cursor, "shelter_sync_state", "last_sync_pages", "INTEGER")
+    _add_column(cursor, "shelter_sync_state", "last_sync_reservations", "INTEGER")
+    _add_column(cursor, "shelter_sync_state", "last_sync_guest_calls", "INTEGER")
+    _add_column(cursor, "shelter_sync_state", "last_sync_matched", "INTEGER")
+
+
+def _shelter_incremental_sync(cursor: sqlite3.Cursor) -> None:
+    """Reservation content hashes and full-reconcile bookkeeping for the PMS sync."""
+
+    _add_column(cursor, "shelter_sync_state", "last_sync_changed", "INTEGER")
+    _add_column(cursor, "shelter_sync_state", "last_full_sync_at", "DATETIME")
+    _add_column(cursor, "shelter_sync_state", "users_fingerprint", "VARCHAR(64)")
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS shelter_reservations (
+            id VARCHAR(64) PRIMARY KEY,
+            content_hash VARCHAR(64) NOT NULL,
+            check_in_date DATE NOT NULL,
+            check_out_date DATE NOT NULL,
+            is_annulled BOOLEAN NOT NULL DEFAULT 0,
+            synced_at DATETIME NOT NULL
+        )
+        """
+    )
+
+
+def _shelter_reservation_mirror(cursor: sqlite3.Cursor) -> None:
+    """Reservation details and guest phones for per-guest lookups without the PMS."""
+
+    _add_column(cursor, "shelter_reservations", "status", "VARCHAR(64)")
+    _add_column(cursor, "shelter_reservations", "room_number", "VARCHAR(32)")
+    _add_column(cursor, "shelter_reservations", "guest_name", "VARCHAR(255)")
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS shelter_reservation_guests (
+            id INTEGER PRIMARY KEY,
+            reservation_id VARCHAR(64) NOT NULL,
+            phone_tail VARCHAR(16) NOT NULL,
+            guest_name VARCHAR(255)
+        )
+        """
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS ix_shelter_reservation_guests_reservation_id "
+        "ON shelter_reservation_guests(reservation_id)"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS ix_shelter_reservation_guests_phone_tail ON shelter_reservation_guests(phone_tail)"
+    )
+    # Rows written before the mirror existed lack guests; a full sync refills them.
+    cursor.execute("DELETE FROM shelter_reservations")
+
+
+def _shelter_availability(cursor: sqlite3.Cursor) -> None:
+    """Rolling per-night availability and prices from getVariants."""
+
+    _add_column(cursor, "shelter_sync_state", "availability_updated_at", "DATETIME")
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS shelter_availability_nights (
+            adults INTEGER NOT NULL,
+            night DATE NOT NULL,
+            fetched_at DATETIME NOT NULL,
+            PRIMARY KEY (adults, night)
+        )
+        """
+    )
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS shelter_availability (
+            adults INTEGER NOT NULL,
+            night DATE NOT NULL,
+            category_id INTEGER NOT NULL,
+            category_name VARCHAR(255) NOT NULL,
+            available_count INTEGER NOT NULL,
+            price FLOAT NOT NULL,
+            capacity INTEGER NOT NULL,
+            rate_name VARCHAR(255),
+            PRIMARY KEY (adults, night, category_id)
+        )
+        """
+    )
+
+
+def _occupancy_points(cursor: sqlite3.Cursor) -> None:
+    """Occupancy time series: raw samples plus hourly and daily rollups."""
+
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS occupancy_points (
+            resolution VARCHAR(8) NOT NULL,
+            bucket DATETIME NOT NULL,
+            samples INTEGER NOT NULL,
+            occupied_sum INTEGER NOT NULL,
+            available_sum INTEGER NOT NULL,
+            total_sum INTEGER NOT NULL,
+            occupied_max INTEGER NOT NULL,
+            PRIMARY KEY (resolution, bucket)
+        )
+        """
+    )
+
+
+def _has_autoincrement(cursor: sqlite3.Cursor, table: str) -> bool:
+    cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table,))
+    row = cursor.fetchone()
+    return bool(row and "AUTOINCREMENT" in (row[0] or "").upper())
+
+
+def _rebuild_with_autoincrement(cursor: sqlite3.Cursor, table: str) -> None:
+    """Recreate ``table`` with ``id INTEGER PRIMARY KEY AUTOINCREMENT``, keeping every
+    column (legacy ones included), foreign key and index."""
+
+    cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL", (table,))
+    indexes = [row[0] for row in cursor.fetchall()]
+    cursor.execute(f"PRAGMA table_info({table})")
+    columns = cursor.fetchall()
+    cursor.execute(f"PRAGMA foreign_key_list({table})")
+    foreign_keys = cursor.fetchall()
+
+    definitions = []
+    for _, name, type_, notnull, default, pk in columns:
+        if pk:
+            definitions.append(f"{name} INTEGER PRIMARY KEY AUTOINCREMENT")
+            continue
+        definition = f"{name} {type_}"
+        if notnull:
+            definition += " NOT NULL"
+        if default is not None:
+            definition += f" DEFAULT {default}"
+        definitions.append(definition)
+    for fk in foreign_keys:
+        definitions.append(f"FOREIGN KEY({fk[3]}) REFERENCES {fk[2]} ({fk[4]})")
+
+    names = ", ".join(column[1] for column in columns)
+    cursor.execute(f"CREATE TABLE {table}__rebuild ({', '.join(definitions)})")
+    cursor.execute(f"INSERT INTO {table}__rebuild ({names}) SELECT {names} FROM {table}")
+    cursor.execute(f"DROP TABLE {table}")
+    cursor.execute(f"ALTER TABLE {table}__rebuild RENAME TO {table}")
+    for statement in indexes:
+        cursor.execute(statement)
+
+
+def _ticket_id_autoincrement(cursor: sqlite3.Cursor) -> None:
+    """Never reuse ticket and message ids.
+
+    With a plain INTEGER PRIMARY KEY SQLite hands out max(id) + 1, so once the
+    newest tickets are archived their ids come back for new tickets, which then
+    collide with the archive. AUTOINCREMENT needs a table rebuild (one copy of
+    both tables, at startup); the sequences then start past every archived id.
+    :func:`apply_migrations` turns foreign key enforcement off for the rebuild.
+    """
+
+    for table, archive in (("tickets", "tickets_archive"), ("ticket_messages", "ticket_messages_archive")):
+        if not _has_autoincrement(cursor, table):
+            _rebuild_with_autoincrement(cursor, table)
+        cursor.execute("DELETE FROM sqlite_sequence WHERE name = ?", (table,))
+        cursor.execute(
+            f"""
+            INSERT INTO sqlite_sequence (name, seq)
+            SELECT ?, max(COALESCE((SELECT max(id) FROM {table}), 0),
+                          COALESCE((SELECT max(id) FROM {archive}), 0))
+            """,
+            (table,),
+        )
+
+
+MIGRATIONS: tuple[Migration, ...] = (
+    Migration(1, "legacy schema", _legacy_schema),
+    Migration(2, "hot query indexes", _hot_query_indexes),
+    Migration(3, "delivery outbox", _outbox),
+    Migration(4, "ticket message summary", _ticket_message_summary),
+    Migration(5, "ticket archive tables", _ticket_archive),
+    Migration(6, "shelter sync timings", _shelter_sync_timings),
+    Migration(7, "incremental shelter sync", _shelter_incremental_sync),
+    Migration(8, "shelter reservation mirror", _shelter_reservation_mirror),
+    Migration(9, "shelter availability calendar", _shelter_availability),
+    Migration(10, "occupancy time series", _occupancy_points),
+    Migration(11, "autoincrement ticket ids", _ticket_id_autoincrement),
+)
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+HOT_QUERIES: tuple[HotQuery, ...] = (
+    HotQuery(
+        "ticket list by status",
+        "SELECT id FROM tickets WHERE status = ? ORDER BY updated_at DESC",
+        ("PENDING_ADMIN",),
+        "ix_tickets_status_updated_at",
+    ),
+    HotQuery(
+        "ticket list",
+        "SELECT id FROM tickets ORDER BY updated_at DESC",
+        (),
+        "ix_tickets_updated_at",
+    ),
+    HotQuery(
+        "archival candidates",
+        "SELECT id FROM tickets WHERE status IN (?, ?, ?) AND updated_at < ? ORDER BY id LIMIT ?",
+        ("COMPLETED", "DECLINED", "CANCELLED", "2000-01-01 00:00:00", 500),
+        "ix_tickets_status_updated_at",
+    ),
+    HotQuery(
+        "ticket rate limiter",
+        "SELECT count(*) FROM tickets WHERE guest_chat_id = ? AND created_at >= ?",
+        ("1", "2000-01-01 00:00:00"),
+        "ix_tickets_guest_chat_id_created_at",
+    ),
+    HotQuery(
+        "expired open dialogs",
+        "SELECT id FROM tickets WHERE dialog_open = 1 "
+        "AND dialog_expires_at IS NOT NULL AND dialog_expires_at <= ?",
+        ("2000-01-01 00:00:00",),
+        "ix_tickets_open_dialog_expires_at",
+    ),
+    HotQuery(
+        "check-in notification candidates",
+        "SELECT id FROM guest_bookings WHERE is_active = 1 AND check_in_date = ? AND checkin_notified = 0",
+        ("2000-01-01",),
+        "ix_guest_bookings_active_check_in",
+    ),
+    HotQuery(
+        "check-out notification candidates",
+        "SELECT id FROM guest_bookings WHERE is_active = 1 AND check_out_date = ? AND checkout_notified = 0",
+        ("2000-01-01",),
+        "ix_guest_bookings_active_check_out",
+    ),
+    HotQuery(
+        "outbox drain page",
+        "SELECT id FROM outbox WHERE status = ? AND available_at <= ? AND kind = ? AND id > ? "
+        "ORDER BY id LIMIT ?",
+        ("PENDING", "2000-01-01 00:00:00", "TICKET_MESSAGE", 0, 100),
+        "ix_outbox_status_available_at",
+    ),
+    HotQuery(
+        "occupancy chart range",
+        "SELECT * FROM occupancy_points WHERE resolution = ? AND bucket >= ? AND bucket < ? ORDER BY bucket LIMIT ?",
+        ("hour", "2000-01-01 00:00:00", "2000-01-08 00:00:00", 1000),
+        "sqlite_autoindex_occupancy_points_1",
+    ),
+)
+
+
+def get_user_version(conn: sqlite3.Connection) -> int:
+    return int(conn.execute("PRAGMA user_version").fetchone()[0])
+
+
+def apply_migrations(conn: sqlite3.Connection, log: Callable[[str], None] = logger.info) -> int:
+    """Apply pending migrations and return the resulting schema version.
+
+    ``CREATE INDEX`` only takes the write lock; with WAL enabled readers keep
+    working, so this is safe to run at startup next to a live web_admin.
+    """
+
+    previous_isolation = conn.isolation_level
+    conn.isolation_level = None  # explicit BEGIN/COMMIT below
+    # Table rebuilds drop a parent table; foreign key enforcement can only be
+    # switched outside a transaction, so it is off for the whole run.
+    foreign_keys = int(conn.execute("PRAGMA foreign_keys").fetchone()[0])
+    conn.execute("PRAGMA foreign_keys = OFF")
+    try:
+        current = get_user_version(conn)
+        for migration in MIGRATIONS:
+            if migration.version <= current:
+                continue
+            log(f"Applying migration {migration.version}: {migration.name}")
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                migration.apply(cursor)
+                cursor.execute(f"PRAGMA user_version = {int(migration.version)}")
+                cursor.execute("COMMIT")
+            except Exception:
+                cursor.execute("ROLLBACK")
+                raise
+            finally:
+                cursor.close()
+            current = migration.version
+        return current
+    finally:
+        conn.execute(f"PRAGMA foreign_keys = {foreign_keys}")
+        conn.isolation_level = previous_isolation
+
+
+def explain_hot_queries(conn: sqlite3.Connection) -> list[tuple[HotQuery, list[str], bool]]:
+    """Return ``(query, plan lines, uses expected index)`` for every hot query."""
+
+    results = []
+    for query in HOT_QUERIES:
+        rows = conn.execute(f"EXPLAIN QUERY PLAN {query.sql}", query.params).fetchall()
+        plan = [str(row[-1]) for row in rows]
+        uses_index = any(query.expected_index in line for line in plan)
+        results.append((query, plan, uses_index))
+    return results
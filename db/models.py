@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import datetime, date
 from enum import Enum
 
-from sqlalchemy import JSON, Column, Date, DateTime, Enum as SAEnum, ForeignKey, Integer, String, Text, Boolean
+from sqlalchemy import JSON, Column, Date, DateTime, Enum as SAEnum, Float, ForeignKey, Index, Integer, String, Text, Boolean, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from db.base import Base
@@ -48,8 +48,30 @@ class TicketMessageSender(str, Enum):
     SYSTEM = "SYSTEM"
 
 
+class OutboxKind(str, Enum):
+    TICKET_MESSAGE = "TICKET_MESSAGE"  # admin/system reply to a guest
+    ORDER_CONFIRMATION = "ORDER_CONFIRMATION"  # Mini App order receipt
+    STAFF_TASK = "STAFF_TASK"  # new task for the assigned staff member
+
+
+class OutboxStatus(str, Enum):
+    PENDING = "PENDING"
+    SENT = "SENT"
+    SKIPPED = "SKIPPED"  # nothing to deliver (no chat id, task closed, ...)
+    FAILED = "FAILED"  # gave up after repeated errors
+
+
 class Ticket(Base):
     __tablename__ = "tickets"
+    # Kept in sync with db/migrations.py (migration 2).
+    __table_args__ = (
+        Index("ix_tickets_status_updated_at", "status", "updated_at"),
+        Index("ix_tickets_updated_at", "updated_at"),
+        Index("ix_tickets_guest_chat_id_created_at", "guest_chat_id", "created_at"),
+        Index("ix_tickets_open_dialog_expires_at", "dialog_expires_at", sqlite_where=text("dialog_open = 1")),
+        # Archived ids must never be handed out again (migration 11).
+        {"sqlite_autoincrement": True},
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     request_id: Mapped[str] = mapped_column(String(64), nullable=False, index=True)
@@ -72,11 +94,19 @@ class Ticket(Base):
     dialog_last_activity_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
     admin_last_viewed_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)  # для сброса "непрочитанных"
 
+    # Message summary maintained by services.tickets.record_ticket_message, so ticket
+    # lists don't need to load messages.
+    message_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False, server_default="0")
+    last_message_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    last_admin_message_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    unread_guest_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False, server_default="0")
+
     messages: Mapped[list["TicketMessage"]] = relationship("TicketMessage", back_populates="ticket", cascade="all, delete-orphan")
 
 
 class TicketMessage(Base):
     __tablename__ = "ticket_messages"
+    __table_args__ = {"sqlite_autoincrement": True}
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     request_id: Mapped[str] = mapped_column(String(64), nullable=False, index=True)
@@ -89,13 +119,57 @@ class TicketMessage(Base):
     # Admin information for messages sent by admins
     admin_telegram_id: Mapped[str | None] = mapped_column(String(64), nullable=True)
     admin_name: Mapped[str | None] = mapped_column(String(255), nullable=True)
-    
-    # Delivery tracking - whether bot has delivered this message to the user
-    bot_delivered: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False, server_default="0")
 
     ticket: Mapped[Ticket] = relationship("Ticket", back_populates="messages")
 
 
+class ArchivedTicket(Base):
+    """Closed ticket moved out of ``tickets`` by services.ticket_archive.
+
+    Same columns as :class:`Ticket` (keep them in sync) plus ``archived_at``.
+    """
+    __tablename__ = "tickets_archive"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    request_id: Mapped[str] = mapped_column(String(64), nullable=False)
+    created_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    updated_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    type: Mapped[TicketType] = mapped_column(SAEnum(TicketType), nullable=False)
+    status: Mapped[TicketStatus] = mapped_column(SAEnum(TicketStatus), nullable=False)
+    guest_chat_id: Mapped[str] = mapped_column(String(64), nullable=False, index=True)
+    guest_name: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    room_number: Mapped[str | None] = mapped_column(String(32), nullable=True)
+    channel: Mapped[str] = mapped_column(String(32), nullable=False)
+    payload: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+    admin_notes: Mapped[str | None] = mapped_column(Text, nullable=True)
+    dialog_open: Mapped[bool] = mapped_column(Boolean, nullable=False, server_default="0")
+    dialog_expires_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    dialog_last_activity_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    admin_last_viewed_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    message_count: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
+    last_message_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    last_admin_message_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    unread_guest_count: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
+    archived_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+    messages: Mapped[list["ArchivedTicketMessage"]] = relationship("ArchivedTicketMessage", back_populates="ticket")
+
+
+class ArchivedTicketMessage(Base):
+    __tablename__ = "ticket_messages_archive"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    request_id: Mapped[str] = mapped_column(String(64), nullable=False)
+    created_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    ticket_id: Mapped[int] = mapped_column(ForeignKey("tickets_archive.id"), nullable=False, index=True)
+    sender: Mapped[TicketMessageSender] = mapped_column(SAEnum(TicketMessageSender), nullable=False)
+    content: Mapped[str] = mapped_column(Text, nullable=False)
+    admin_telegram_id: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    admin_name: Mapped[str | None] = mapped_column(String(255), nullable=True)
+
+    ticket: Mapped[ArchivedTicket] = relationship("ArchivedTicket", back_populates="messages")
+
+
 class User(Base):
     __tablename__ = "users"
 
@@ -168,7 +242,6 @@ class StaffTask(Base):
     description: Mapped[str | None] = mapped_column(Text, nullable=True)
     status: Mapped[str] = mapped_column(String(32), default="PENDING", nullable=False) # 'PENDING', 'IN_PROGRESS', 'COMPLETED'
     assigned_to: Mapped[str | None] = mapped_column(String(64), nullable=True) # Staff identifier (id preferred, telegram_id legacy)
-    notification_sent: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False, server_default="0")
     scheduled_for_utc: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     completed_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
@@ -202,6 +275,10 @@ class Staff(Base):
 class GuestBooking(Base):
     """Track guest bookings locally for cleaning schedule."""
     __tablename__ = "guest_bookings"
+    __table_args__ = (
+        Index("ix_guest_bookings_active_check_in", "is_active", "check_in_date"),
+        Index("ix_guest_bookings_active_check_out", "is_active", "check_out_date"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     telegram_id: Mapped[str] = mapped_column(String(64), nullable=False, index=True)
@@ -224,9 +301,122 @@ class ShelterSyncState(Base):
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     last_sync_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    # Timings of the last completed sync (services/shelter_sync.py)
+    last_sync_duration_ms: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    last_sync_pages: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    last_sync_reservations: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    last_sync_guest_calls: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    last_sync_matched: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    last_sync_changed: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    # Incremental sync: when all reservations were last re-imported, and which users' phones that saw
+    last_full_sync_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    users_fingerprint: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    # Last completed refresh of shelter_availability (services/availability_calendar.py)
+    availability_updated_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 
+class ShelterReservation(Base):
+    """Local mirror of PMS reservations seen by the sync.
+
+    ``content_hash`` lets the sync skip unchanged reservations; the mirror
+    and its guests' phones answer per-guest lookups without calling the PMS.
+    """
+    __tablename__ = "shelter_reservations"
+
+    id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    content_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    check_in_date: Mapped[date] = mapped_column(Date, nullable=False)
+    check_out_date: Mapped[date] = mapped_column(Date, nullable=False)
+    is_annulled: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+    status: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    room_number: Mapped[str | None] = mapped_column(String(32), nullable=True)
+    guest_name: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    synced_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class ShelterReservationGuest(Base):
+    __tablename__ = "shelter_reservation_guests"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    reservation_id: Mapped[str] = mapped_column(String(64), nullable=False, index=True)
+    # Last 10 digits of the normalized phone, as matched against users.phone
+    phone_tail: Mapped[str] = mapped_column(String(16), nullable=False, index=True)
+    guest_name: Mapped[str | None] = mapped_column(String(255), nullable=True)
+
+
+class ShelterAvailabilityNight(Base):
+    """A night searched with getVariants for a number of adults, and when.
+
+    Kept rolling by the availability calendar (services/availability_calendar.py);
+    admin views and the booking flow read it instead of searching Shelter live.
+    A night without :class:`ShelterAvailability` rows is sold out.
+    """
+    __tablename__ = "shelter_availability_nights"
+
+    adults: Mapped[int] = mapped_column(Integer, primary_key=True)
+    night: Mapped[date] = mapped_column(Date, primary_key=True)
+    fetched_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+class ShelterAvailability(Base):
+    """One category offered for a searched night."""
+    __tablename__ = "shelter_availability"
+
+    adults: Mapped[int] = mapped_column(Integer, primary_key=True)
+    night: Mapped[date] = mapped_column(Date, primary_key=True)
+    category_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    category_name: Mapped[str] = mapped_column(String(255), nullable=False)
+    available_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    price: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    capacity: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    rate_name: Mapped[str | None] = mapped_column(String(255), nullable=True)
+
+
+class OccupancyPoint(Base):
+    """One bucket of the occupancy time series (services/occupancy_history.py).
+
+    ``resolution`` is ``raw`` (one sample), ``hour`` or ``day``; hour and day
+    buckets hold the sums of every sample in them, so averages are
+    ``*_sum / samples``. The primary key serves range reads in bucket order.
+    """
+    __tablename__ = "occupancy_points"
+
+    resolution: Mapped[str] = mapped_column(String(8), primary_key=True)
+    bucket: Mapped[datetime] = mapped_column(DateTime, primary_key=True)
+    samples: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    occupied_sum: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    available_sum: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    total_sum: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    occupied_max: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class OutboxMessage(Base):
+    """Pending Telegram delivery, written in the same transaction as its source row.
+
+    Drained by bot_api_bridge through the web_admin API; see services/outbox.py.
+    """
+    __tablename__ = "outbox"
+    __table_args__ = (
+        Index("ix_outbox_status_available_at", "status", "available_at"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    kind: Mapped[OutboxKind] = mapped_column(SAEnum(OutboxKind), nullable=False)
+    status: Mapped[OutboxStatus] = mapped_column(SAEnum(OutboxStatus), default=OutboxStatus.PENDING, nullable=False)
+    available_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    sent_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False, server_default="0")
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+    # Source rows; plain ids (no FK) so deleting a ticket or task never blocks on the outbox.
+    chat_id: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    ticket_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    ticket_message_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    staff_task_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+
+
 class CleaningRequestStatus(str, Enum):
     PENDING = "PENDING"
     CONFIRMED = "CONFIRMED"
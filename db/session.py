@@ -1,23 +1,135 @@
 from __future__ import annotations
 
-from sqlalchemy import create_engine
+from typing import Any
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 
-from config import get_settings
+from config import Settings, get_settings
+from db.instrumentation import configure as configure_instrumentation, instrument_engine
 
 
 settings = get_settings()
 
-engine = create_engine(settings.database_url, future=True)
+
+def _is_sqlite_file(database_url: str) -> bool:
+    if not database_url.startswith("sqlite"):
+        return False
+    return ":memory:" not in database_url and not database_url.rstrip("/").endswith("sqlite:")
+
+
+def _apply_sqlite_pragmas(dbapi_connection: Any, settings: Settings) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        # Only takes effect on a new file; convert older ones with
+        # python -m services.ticket_archive --enable-incremental-vacuum.
+        cursor.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        # WAL lets the bot and web_admin processes read while the other one writes.
+        cursor.execute("PRAGMA journal_mode=WAL")
+        # NORMAL is durable across application crashes in WAL mode and avoids an fsync per commit.
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.db_busy_timeout_ms)}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.db_mmap_size)}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+    finally:
+        cursor.close()
+
+
+def build_engine(settings: Settings, profile: str | None = None) -> Engine:
+    """Create the SQLAlchemy engine for the configured database.
+
+    The ``tuned`` profile is applied to file-backed SQLite databases only;
+    in-memory databases and other backends get a plain engine.
+    """
+
+    profile = (profile or settings.db_profile or "default").lower()
+    if profile != "tuned" or not _is_sqlite_file(settings.database_url):
+        return create_engine(settings.database_url, future=True)
+
+    busy_timeout_seconds = max(settings.db_busy_timeout_ms, 0) / 1000
+    tuned_engine = create_engine(
+        settings.database_url,
+        future=True,
+        poolclass=QueuePool,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_pre_ping=False,
+        connect_args={
+            "timeout": busy_timeout_seconds,
+            "check_same_thread": False,
+        },
+    )
+
+    @event.listens_for(tuned_engine, "connect")
+    def _on_connect(dbapi_connection: Any, connection_record: Any) -> None:  # noqa: ARG001
+        _apply_sqlite_pragmas(dbapi_connection, settings)
+
+    return tuned_engine
+
+
+def _async_database_url(database_url: str) -> str:
+    if database_url.startswith("sqlite:"):
+        return "sqlite+aiosqlite:" + database_url[len("sqlite:"):]
+    return database_url
+
+
+def build_async_engine(settings: Settings, profile: str | None = None) -> AsyncEngine:
+    """Create the asyncio engine (aiosqlite for SQLite) used by bot handlers.
+
+    Mirrors :func:`build_engine`, so both engines share the same profile.
+    """
+
+    profile = (profile or settings.db_profile or "default").lower()
+    database_url = _async_database_url(settings.database_url)
+    if profile != "tuned" or not _is_sqlite_file(settings.database_url):
+        return create_async_engine(database_url, future=True)
+
+    tuned_engine = create_async_engine(
+        database_url,
+        future=True,
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        connect_args={"timeout": max(settings.db_busy_timeout_ms, 0) / 1000},
+    )
+
+    @event.listens_for(tuned_engine.sync_engine, "connect")
+    def _on_connect(dbapi_connection: Any, connection_record: Any) -> None:  # noqa: ARG001
+        _apply_sqlite_pragmas(dbapi_connection, settings)
+
+    return tuned_engine
+
+
+configure_instrumentation(settings.db_slow_query_ms)
+engine = instrument_engine(build_engine(settings))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async counterpart for code running on the aiogram event loop. Objects stay
+# usable after commit because handlers read them once the session is closed.
+async_engine = build_async_engine(settings)
+instrument_engine(async_engine.sync_engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 
 def init_db() -> None:
-    """Create all tables.
+    """Create all tables and apply pending migrations.
 
-    For the MVP we use SQLAlchemy's metadata create_all on startup.
+    For the MVP we use SQLAlchemy's metadata create_all on startup; existing
+    SQLite files are then brought up to date by ``db.migrations``.
     """
 
     from db.models import Base  # noqa: WPS433 - imported for side effects
 
     Base.metadata.create_all(bind=engine)
+
+    if _is_sqlite_file(settings.database_url):
+        from db.migrations import apply_migrations
+
+        raw_connection = engine.raw_connection()
+        try:
+            apply_migrations(raw_connection.driver_connection)
+        finally:
+            raw_connection.close()
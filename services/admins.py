@@ -3,12 +3,11 @@ from __future__ import annotations
 import logging
 
 from aiogram import Bot
-from sqlalchemy.orm import Session
 
 from db.models import Ticket
-from db.session import SessionLocal
+from db.session import AsyncSessionLocal
 from services.content import content_manager
-from services.tickets import list_active_admins
+from services.tickets import list_active_admins_async
 
 
 logger = logging.getLogger(__name__)
@@ -20,9 +19,8 @@ async def notify_admins_about_ticket(bot: Bot, ticket: Ticket, summary: str) ->
     If there are no admins configured, this function silently returns.
     """
 
-    # DB operations here are synchronous; for MVP we accept short blocking calls.
-    with SessionLocal() as session:  # type: Session
-        admins = list_active_admins(session)
+    async with AsyncSessionLocal() as session:
+        admins = await list_active_admins_async(session)
 
     if not admins:
         return
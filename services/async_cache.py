@@ -0,0 +1,160 @@
+"""In-process TTL cache for async loaders with single-flight and stale-while-revalidate.
+
+:meth:`AsyncTTLCache.get_or_load` returns a cached value while it is younger
+than ``ttl``. On a miss the loader runs once per key: concurrent callers for
+the same key await the same in-flight task instead of starting their own.
+With ``stale_ttl`` an expired value is still returned for that much longer
+while one background task refreshes it. Failed loads are never cached.
+
+Keys can be chosen by guests (stay dates), so the cache is bounded: expired
+entries are pruned every ``PRUNE_INTERVAL_SECONDS`` and, past
+``max_entries``, the oldest ones are evicted. :meth:`AsyncTTLCache.invalidate`
+also detaches matching in-flight loads, so a load started before the
+invalidation cannot write its result back afterwards.
+
+Counters (hits, misses, stale hits, coalesced waits, refreshes, errors,
+evictions) are kept per cache name; :meth:`AsyncTTLCache.snapshot` returns them.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import Counter
+from typing import Any, Awaitable, Callable, Hashable
+
+
+logger = logging.getLogger(__name__)
+
+Loader = Callable[[], Awaitable[Any]]
+
+DEFAULT_MAX_ENTRIES = 1024
+PRUNE_INTERVAL_SECONDS = 60.0
+
+
+class AsyncTTLCache:
+    def __init__(
+        self,
+        name: str,
+        clock: Callable[[], float] = time.monotonic,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ) -> None:
+        self.name = name
+        self._clock = clock
+        self.max_entries = max(int(max_entries), 1)
+        # key -> (value, loaded_at, usable until); insertion order is load order
+        self._entries: dict[Hashable, tuple[Any, float, float]] = {}
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+        self._refreshing: set[asyncio.Task] = set()
+        self._next_prune = clock() + PRUNE_INTERVAL_SECONDS
+        self.counters: Counter = Counter()
+
+    def _store(self, key: Hashable, value: Any, lifetime: float) -> None:
+        now = self._clock()
+        self._entries.pop(key, None)
+        self._entries[key] = (value, now, now + lifetime)
+        if now >= self._next_prune or len(self._entries) > self.max_entries:
+            self._next_prune = now + PRUNE_INTERVAL_SECONDS
+            expired = [k for k, (_, _, until) in self._entries.items() if until <= now]
+            for k in expired:
+                del self._entries[k]
+            self.counters["evictions"] += len(expired)
+        while len(self._entries) > self.max_entries:
+            del self._entries[next(iter(self._entries))]
+            self.counters["evictions"] += 1
+
+    def _start(self, key: Hashable, loader: Loader, lifetime: float) -> asyncio.Task:
+        task = self._inflight.get(key)
+        if task is not None and not task.done():
+            return task
+
+        async def load() -> Any:
+            this = asyncio.current_task()
+            try:
+                value = await loader()
+            except BaseException:
+                self.counters["errors"] += 1
+                raise
+            else:
+                # Detached by invalidate(): the value may predate the change, don't keep it.
+                if self._inflight.get(key) is this:
+                    self._store(key, value, lifetime)
+                return value
+            finally:
+                if self._inflight.get(key) is this:
+                    del self._inflight[key]
+
+        task = asyncio.ensure_future(load())
+        self._inflight[key] = task
+        return task
+
+    def _refresh(self, key: Hashable, loader: Loader, lifetime: float) -> None:
+        if key in self._inflight:
+            return
+        self.counters["refreshes"] += 1
+        task = self._start(key, loader, lifetime)
+        self._refreshing.add(task)
+
+        def done(finished: asyncio.Task) -> None:
+            self._refreshing.discard(finished)
+            if not finished.cancelled() and finished.exception() is not None:
+                logger.warning("%s: background refresh of %r failed: %s", self.name, key, finished.exception())
+
+        task.add_done_callback(done)
+
+    async def get_or_load(self, key: Hashable, loader: Loader, ttl: float, stale_ttl: float = 0.0) -> Any:
+        lifetime = ttl + stale_ttl
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, loaded_at, _ = entry
+            age = self._clock() - loaded_at
+            if age < ttl:
+                self.counters["hits"] += 1
+                return value
+            if age < lifetime:
+                self.counters["stale_hits"] += 1
+                self._refresh(key, loader, lifetime)
+                return value
+
+        task = self._inflight.get(key)
+        if task is not None and not task.done():
+            self.counters["coalesced"] += 1
+        else:
+            self.counters["misses"] += 1
+            task = self._start(key, loader, lifetime)
+        # shield: a cancelled caller must not cancel the load other callers await.
+        return await asyncio.shield(task)
+
+    def invalidate(self, predicate: Callable[[Hashable], bool] | None = None) -> int:
+        """Drop every entry (or those whose key matches ``predicate``).
+
+        Matching in-flight loads are detached: callers already waiting still get
+        their result, but it is not cached and the next lookup loads afresh.
+        """
+
+        keys = [key for key in self._entries if predicate is None or predicate(key)]
+        for key in keys:
+            del self._entries[key]
+        for key in [key for key in self._inflight if predicate is None or predicate(key)]:
+            del self._inflight[key]
+        return len(keys)
+
+    def snapshot(self) -> dict[str, Any]:
+        lookups = self.counters["hits"] + self.counters["stale_hits"] + self.counters["misses"] + self.counters["coalesced"]
+        served = lookups - self.counters["misses"]
+        return {
+            "cache": self.name,
+            "entries": len(self._entries),
+            "inflight": len(self._inflight),
+            "hits": self.counters["hits"],
+            "stale_hits": self.counters["stale_hits"],
+            "coalesced": self.counters["coalesced"],
+            "misses": self.counters["misses"],
+            "refreshes": self.counters["refreshes"],
+            "errors": self.counters["errors"],
+            "evictions": self.counters["evictions"],
+            "hit_ratio": round(served / lookups, 3) if lookups else None,
+        }
+
+    def reset_counters(self) -> None:
+        self.counters.clear()
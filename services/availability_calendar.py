@@ -0,0 +1,301 @@
+"""Rolling availability and price calendar built from the widget's getVariants.
+
+Admin views and the booking flow used to search Shelter live on every
+request. :meth:`AvailabilityCalendar.refresh` instead searches each of the
+next ``SHELTER_CALENDAR_DAYS`` nights once per guest count in
+``SHELTER_CALENDAR_ADULTS``, at most ``SHELTER_CALENDAR_CONCURRENCY`` at a
+time, and stores the answers in ``shelter_availability_nights`` /
+``shelter_availability``. A night whose search fails keeps its previous
+values.
+
+Readers use an immutable :class:`CalendarSnapshot` held in memory: a night
+is one dict lookup, a stay one lookup per night, never a Shelter call. Every
+night carries the time it was fetched and the snapshot the time of the last
+completed refresh, so callers can show how fresh the figures are.
+
+The bot runs :meth:`AvailabilityCalendar.refresh_loop`. web_admin is another
+process: :meth:`AvailabilityCalendar.current` reloads the tables when
+``shelter_sync_state.availability_updated_at`` moves, checking at most every
+``RELOAD_CHECK_SECONDS``.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Callable, Sequence
+
+from sqlalchemy import delete, select
+
+from config import get_settings
+from db.models import ShelterAvailability, ShelterAvailabilityNight, ShelterSyncState
+from db.session import AsyncSessionLocal
+from services.guest_context import get_local_now, get_local_today
+from services.shelter import RoomVariant, ShelterClient, get_shelter_client
+
+
+logger = logging.getLogger(__name__)
+
+RELOAD_CHECK_SECONDS = 30.0
+STARTUP_DELAY_SECONDS = 10
+
+
+@dataclass(frozen=True)
+class CalendarCell:
+    category_id: int
+    category_name: str
+    available_count: int
+    price: float
+    capacity: int
+    rate_name: str | None
+
+
+@dataclass(frozen=True)
+class CalendarNight:
+    fetched_at: datetime
+    # category id -> cell; empty when the night is sold out
+    cells: dict[int, CalendarCell]
+
+
+@dataclass(frozen=True)
+class StayOffer:
+    """A category bookable on every night of a stay."""
+
+    category_id: int
+    category_name: str
+    # The fewest rooms left on any night, and the sum of the nightly prices
+    available_count: int
+    price: float
+    capacity: int
+    rate_name: str | None
+    # When the oldest of the nights was fetched
+    fetched_at: datetime
+
+    def as_variant(self) -> RoomVariant:
+        return RoomVariant(
+            signature_id="",
+            category_id=self.category_id,
+            category_name=self.category_name,
+            category_description="",
+            price=self.price,
+            available_count=self.available_count,
+            capacity=self.capacity,
+            images=[],
+            rate_id=0,
+            rate_name=self.rate_name or "",
+        )
+
+
+@dataclass(frozen=True)
+class CalendarSnapshot:
+    nights: dict[tuple[int, date], CalendarNight] = field(default_factory=dict)
+    updated_at: datetime | None = None
+
+    def night(self, night: date, adults: int) -> CalendarNight | None:
+        return self.nights.get((adults, night))
+
+    def stay(self, check_in: date, check_out: date, adults: int) -> list[StayOffer] | None:
+        """Categories offered on every night of the stay; ``None`` if a night is not in the calendar."""
+
+        if check_out <= check_in:
+            return None
+        nights = []
+        for offset in range((check_out - check_in).days):
+            night = self.nights.get((adults, check_in + timedelta(days=offset)))
+            if night is None:
+                return None
+            nights.append(night)
+
+        fetched_at = min(night.fetched_at for night in nights)
+        offers = []
+        for category_id, first in nights[0].cells.items():
+            cells = [night.cells.get(category_id) for night in nights]
+            if any(cell is None for cell in cells):
+                continue
+            offers.append(StayOffer(
+                category_id=category_id,
+                category_name=first.category_name,
+                available_count=min(cell.available_count for cell in cells),
+                price=sum(cell.price for cell in cells),
+                capacity=first.capacity,
+                rate_name=first.rate_name,
+                fetched_at=fetched_at,
+            ))
+        return offers
+
+
+def _now() -> datetime:
+    return get_local_now().replace(tzinfo=None)
+
+
+def _store_nights(
+    db,
+    fetched: dict[tuple[int, date], list[RoomVariant]],
+    fetched_at: datetime,
+    first_night: date,
+) -> None:
+    db.execute(delete(ShelterAvailability).where(ShelterAvailability.night < first_night))
+    db.execute(delete(ShelterAvailabilityNight).where(ShelterAvailabilityNight.night < first_night))
+    for (adults, night), variants in fetched.items():
+        db.execute(delete(ShelterAvailability).where(
+            ShelterAvailability.adults == adults, ShelterAvailability.night == night
+        ))
+        db.merge(ShelterAvailabilityNight(adults=adults, night=night, fetched_at=fetched_at))
+        cells: dict[int, RoomVariant] = {}
+        for variant in variants:
+            # One row per category: the cheapest rate offered for it.
+            known = cells.get(variant.category_id)
+            if known is None or variant.price < known.price:
+                cells[variant.category_id] = variant
+        db.add_all(
+            ShelterAvailability(
+                adults=adults,
+                night=night,
+                category_id=variant.category_id,
+                category_name=variant.category_name,
+                available_count=int(variant.available_count or 0),
+                price=float(variant.price or 0),
+                capacity=int(variant.capacity or 0),
+                rate_name=variant.rate_name or None,
+            )
+            for variant in cells.values()
+        )
+    state = db.get(ShelterSyncState, 1)
+    if state is None:
+        state = ShelterSyncState(id=1)
+        db.add(state)
+    state.availability_updated_at = fetched_at
+
+
+def _load_snapshot(db) -> CalendarSnapshot:
+    state = db.get(ShelterSyncState, 1)
+    nights = {
+        (row.adults, row.night): CalendarNight(fetched_at=row.fetched_at, cells={})
+        for row in db.scalars(select(ShelterAvailabilityNight))
+    }
+    for row in db.scalars(select(ShelterAvailability)):
+        night = nights.get((row.adults, row.night))
+        if night is not None:
+            night.cells[row.category_id] = CalendarCell(
+                category_id=row.category_id,
+                category_name=row.category_name,
+                available_count=row.available_count,
+                price=row.price,
+                capacity=row.capacity,
+                rate_name=row.rate_name,
+            )
+    return CalendarSnapshot(nights=nights, updated_at=state.availability_updated_at if state else None)
+
+
+def _load_updated_at(db) -> datetime | None:
+    return db.scalar(select(ShelterSyncState.availability_updated_at).where(ShelterSyncState.id == 1))
+
+
+class AvailabilityCalendar:
+    def __init__(
+        self,
+        days: int = 60,
+        adults: Sequence[int] = (2,),
+        concurrency: int = 4,
+        interval: float = 600.0,
+        client: Callable[[], ShelterClient] = get_shelter_client,
+    ) -> None:
+        self.days = max(int(days), 1)
+        self.adults = tuple(adults) or (2,)
+        self.concurrency = max(int(concurrency), 1)
+        self.interval = interval
+        self._client = client
+        self._snapshot = CalendarSnapshot()
+        self._checked_at: float | None = None
+        self.refreshes = 0
+        self.failed_nights = 0
+
+    @property
+    def snapshot(self) -> CalendarSnapshot:
+        """The snapshot in memory, without checking the database."""
+
+        return self._snapshot
+
+    async def current(self) -> CalendarSnapshot:
+        """The snapshot, reloaded first if another process refreshed the tables since."""
+
+        if self._checked_at is not None and time.monotonic() - self._checked_at < RELOAD_CHECK_SECONDS:
+            return self._snapshot
+        self._checked_at = time.monotonic()
+        async with AsyncSessionLocal() as db:
+            updated_at = await db.run_sync(_load_updated_at)
+            if updated_at is not None and updated_at != self._snapshot.updated_at:
+                self._snapshot = await db.run_sync(_load_snapshot)
+        return self._snapshot
+
+    async def refresh(self) -> CalendarSnapshot:
+        """Search every night of the window once per guest count and store the answers."""
+
+        started = time.perf_counter()
+        client = self._client()
+        first_night = get_local_today()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        keys = [(adults, first_night + timedelta(days=offset)) for adults in self.adults for offset in range(self.days)]
+
+        async def search(adults: int, night: date) -> list[RoomVariant]:
+            async with semaphore:
+                return await client.get_variants(night, night + timedelta(days=1), adults=adults)
+
+        results = await asyncio.gather(*(search(*key) for key in keys), return_exceptions=True)
+        fetched = {}
+        failures = []
+        for key, result in zip(keys, results):
+            if isinstance(result, BaseException):
+                failures.append(result)
+            else:
+                fetched[key] = result
+        self.failed_nights = len(failures)
+        if failures:
+            logger.warning(
+                "Availability calendar: %s of %s searches failed, keeping their previous values (%s)",
+                len(failures), len(keys), failures[0],
+            )
+        if not fetched:
+            raise failures[0]
+
+        fetched_at = _now()
+        async with AsyncSessionLocal() as db:
+            await db.run_sync(_store_nights, fetched, fetched_at, first_night)
+            await db.commit()
+            self._snapshot = await db.run_sync(_load_snapshot)
+        self._checked_at = time.monotonic()
+        self.refreshes += 1
+        logger.info(
+            "Availability calendar refreshed: %s nights x %s guest counts in %.2fs",
+            self.days, len(self.adults), time.perf_counter() - started,
+        )
+        return self._snapshot
+
+    async def refresh_loop(self) -> None:
+        """Keep the calendar fresh (bot process)."""
+
+        if not self._client().widget_token:
+            logger.warning("Availability calendar disabled: SHELTER_WIDGET_TOKEN is not configured")
+            return
+        await asyncio.sleep(STARTUP_DELAY_SECONDS)
+        while True:
+            try:
+                await self.refresh()
+            except Exception as exc:  # pragma: no cover
+                logger.warning("Availability calendar refresh failed: %s", exc)
+            await asyncio.sleep(max(self.interval, 30))
+
+
+def _build_calendar() -> AvailabilityCalendar:
+    settings = get_settings()
+    return AvailabilityCalendar(
+        days=settings.shelter_calendar_days,
+        adults=settings.shelter_calendar_adults,
+        concurrency=settings.shelter_calendar_concurrency,
+        interval=settings.shelter_calendar_interval,
+    )
+
+
+availability_calendar = _build_calendar()
@@ -1,6 +1,7 @@
 """
 Service for integrating bot with web admin API.
 Handles delivering admin messages to users via Telegram.
+Pending deliveries come from the outbox table (services/outbox.py).
 """
 import asyncio
 import html
@@ -14,6 +15,9 @@ from config import get_settings
 
 logger = logging.getLogger(__name__)
 
+# Entries requested per outbox page; a poll keeps paging while pages are full.
+OUTBOX_PAGE_SIZE = 50
+
 
 def _format_composition(composition: object) -> str:
     """Render menu item composition from either strings or dict objects."""
@@ -80,193 +84,193 @@ class BotAPIBridge:
                     pass
         logger.info("Bot API Bridge stopped")
 
-    async def _poll_staff_task_notifications(self):
-        """Poll and deliver staff task notifications to assigned staff."""
+    async def _drain(self, session: aiohttp.ClientSession, path: str, deliver) -> None:
+        """Page through a pending-delivery endpoint and hand each entry to ``deliver``.
+
+        Entries come from the outbox in id order; ``after_id`` is the cursor,
+        so one poll reads each pending entry at most once.
+        """
+        after_id = 0
+        while self._running:
+            async with session.get(
+                f"{self.api_base}/{path}",
+                params={"after_id": after_id, "limit": OUTBOX_PAGE_SIZE},
+            ) as response:
+                if response.status != 200:
+                    logger.warning(f"{path} poll returned status {response.status}")
+                    return
+                entries = await response.json()
+
+            for entry in entries:
+                after_id = max(after_id, int(entry.get("outbox_id") or 0))
+                await deliver(session, entry)
+
+            if len(entries) < OUTBOX_PAGE_SIZE:
+                return
+
+    async def _ack(self, session: aiohttp.ClientSession, outbox_id: int) -> None:
+        async with session.post(f"{self.api_base}/outbox/{outbox_id}/sent") as response:
+            if response.status != 200:
+                logger.error(f"Failed to mark outbox entry {outbox_id} as sent")
+
+    async def _nack(
+        self,
+        session: aiohttp.ClientSession,
+        outbox_id: int,
+        error: str,
+        retry: bool = True,
+    ) -> None:
+        async with session.post(
+            f"{self.api_base}/outbox/{outbox_id}/failed",
+            json={"error": error, "retry": retry},
+        ) as response:
+            if response.status != 200:
+                logger.error(f"Failed to record delivery failure for outbox entry {outbox_id}")
+
+    async def _poll(self, path: str, deliver, interval: int, label: str) -> None:
         async with aiohttp.ClientSession() as session:
             while self._running:
                 try:
-                    async with session.get(f"{self.api_base}/pending-staff-task-notifications") as response:
-                        if response.status == 200:
-                            notifications = await response.json()
-                            for notif in notifications:
-                                task_id = notif.get("task_id")
-                                telegram_id = notif.get("telegram_id")
-                                if not task_id or not telegram_id or not str(telegram_id).isdigit():
-                                    continue
-
-                                try:
-                                    msg = (
-                                        "🛠 <b>Новое поручение</b>\n\n"
-                                        f"👤 Ответственный: {notif.get('staff_name', 'Сотрудник')}\n"
-                                        f"🏨 Номер: {notif.get('room_number', '-')}\n"
-                                        f"📌 Тип: {notif.get('task_type', '-')}\n"
-                                        f"📝 Описание: {notif.get('description') or '—'}"
-                                    )
-                                    from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-                                    kb = InlineKeyboardMarkup(inline_keyboard=[
-                                        [InlineKeyboardButton(text="✅ Выполнить", callback_data=f"complete_task_{task_id}")]
-                                    ])
-                                    await self.bot.send_message(
-                                        chat_id=int(telegram_id),
-                                        text=msg,
-                                        parse_mode="HTML",
-                                        reply_markup=kb,
-                                    )
-                                    async with session.post(
-                                        f"{self.api_base}/staff/tasks/{task_id}/mark-notified"
-                                    ) as mark_resp:
-                                        if mark_resp.status != 200:
-                                            logger.error(f"Failed to mark staff task {task_id} as notified")
-                                except Exception as e:
-                                    logger.error(f"Failed to send staff task {task_id} notification: {e}")
-
-                    await asyncio.sleep(5)
+                    await self._drain(session, path, deliver)
+                    await asyncio.sleep(interval)
                 except asyncio.CancelledError:
                     raise
                 except Exception as e:
-                    logger.error(f"Error in staff task notification polling: {e}")
+                    logger.error(f"Error in {label} polling: {e}")
                     await asyncio.sleep(10)
-    
+
+    async def _poll_staff_task_notifications(self):
+        """Poll and deliver staff task notifications to assigned staff."""
+        await self._poll("pending-staff-task-notifications", self._deliver_staff_task, 5, "staff task notification")
+
     async def _poll_order_notifications(self):
         """Poll for pending order notifications and send to users."""
-        async with aiohttp.ClientSession() as session:
-            while self._running:
-                try:
-                    async with session.get(f"{self.api_base}/pending-order-notifications") as response:
-                        if response.status == 200:
-                            notifications = await response.json()
-                            
-                            for notif in notifications:
-                                telegram_id = notif.get("telegram_id")
-                                if not telegram_id or not str(telegram_id).isdigit():
-                                    # Mark as sent so it doesn't retry forever
-                                    try:
-                                        async with session.post(
-                                            f"{self.api_base}/mark-notification-sent/{notif['ticket_id']}"
-                                        ) as _:
-                                            pass
-                                    except Exception:
-                                        pass
-                                    continue
-                                
-                                try:
-                                    guest_name = html.escape(str(notif.get("guest_name", "")).strip())
-                                    room_number = html.escape(str(notif.get("room_number", "")).strip())
-                                    # Build confirmation message
-                                    msg = "✅ <b>Заказ оформлен!</b>\n\n"
-                                    msg += f"<b>Заказ #{notif['ticket_id']}</b>\n"
-                                    msg += f"👤 <b>Гость:</b> {guest_name}\n"
-                                    msg += f"🏨 <b>Комната:</b> {room_number}\n\n"
-                                    
-                                    for item in notif.get("items", []):
-                                        item_name = html.escape(str(item.get('name', '')).strip())
-                                        subtotal = item.get('subtotal', 0)
-                                        qty = item.get('qty', 1)
-                                        msg += f"🍽 <b>{item_name}</b> x{qty} = {subtotal}₽\n"
-                                        
-                                        comp_text = _format_composition(item.get("composition"))
-                                        if comp_text:
-                                            msg += f"<i>   ({comp_text})</i>\n"
-                                    
-                                    msg += f"\n<b>💰 Итого: {notif['total']}₽</b>\n"
-                                    
-                                    if notif.get("comment"):
-                                        comment = html.escape(str(notif["comment"]).strip())
-                                        msg += f"\n💬 Комментарий: {comment}\n"
-                                    
-                                    msg += "\nМы свяжемся с вами для уточнения времени доставки."
-                                    
-                                    await self.bot.send_message(
-                                        chat_id=int(telegram_id),
-                                        text=msg,
-                                        parse_mode="HTML"
-                                    )
-                                    logger.info(f"Sent order notification to user {telegram_id}")
-                                    
-                                    # Mark as sent
-                                    async with session.post(
-                                        f"{self.api_base}/mark-notification-sent/{notif['ticket_id']}"
-                                    ) as mark_resp:
-                                        if mark_resp.status != 200:
-                                            logger.error(f"Failed to mark notification as sent")
-                                    
-                                except Exception as e:
-                                    logger.error(f"Failed to send order notification to {telegram_id}: {e}")
-                    
-                    # Check every 3 seconds
-                    await asyncio.sleep(3)
-                    
-                except asyncio.CancelledError:
-                    raise
-                except Exception as e:
-                    logger.error(f"Error in order notification polling: {e}")
-                    await asyncio.sleep(10)
-    
+        await self._poll("pending-order-notifications", self._deliver_order_notification, 3, "order notification")
+
     async def _poll_messages(self):
         """Poll for undelivered admin messages and deliver them to users."""
-        async with aiohttp.ClientSession() as session:
-            while self._running:
-                try:
-                    async with session.get(f"{self.api_base}/undelivered-admin-messages") as response:
-                        if response.status == 200:
-                            messages = await response.json()
-                            
-                            for msg in messages:
-                                message_id = msg.get("message_id")
-                                guest_chat_id = msg.get("guest_chat_id")
-                                sender = str(msg.get("sender") or "ADMIN")
-                                
-                                if not guest_chat_id or not str(guest_chat_id).isdigit():
-                                    # Mark as delivered so it doesn't retry
-                                    async with session.post(
-                                        f"{self.api_base}/mark-message-delivered/{message_id}"
-                                    ) as _:
-                                        pass
-                                    continue
-                                
-                                try:
-                                    ticket_id = msg.get("ticket_id")
-                                    if sender == "SYSTEM":
-                                        message_text = str(msg.get("content") or "")
-                                    else:
-                                        admin_name = msg.get("admin_name", "Администратор")
-                                        message_text = (
-                                            f"\U0001f4ac Ответ от {admin_name} по заявке #{ticket_id}:\n\n"
-                                            f"{msg['content']}"
-                                        )
-                                    
-                                    await self.bot.send_message(
-                                        chat_id=int(guest_chat_id),
-                                        text=message_text
-                                    )
-                                    logger.info(
-                                        f"Delivered {sender.lower()} message {message_id} "
-                                        f"to user {guest_chat_id}"
-                                    )
-                                    
-                                    # Mark as delivered in DB
-                                    async with session.post(
-                                        f"{self.api_base}/mark-message-delivered/{message_id}"
-                                    ) as mark_resp:
-                                        if mark_resp.status != 200:
-                                            logger.error(f"Failed to mark message {message_id} as delivered")
-                                    
-                                except Exception as e:
-                                    logger.error(
-                                        f"Failed to deliver message {message_id} to user "
-                                        f"{guest_chat_id}: {e}"
-                                    )
-                        else:
-                            logger.warning(f"Admin messages poll returned status {response.status}")
-                    
-                    # Check every 5 seconds
-                    await asyncio.sleep(5)
-                    
-                except asyncio.CancelledError:
-                    raise
-                except Exception as e:
-                    logger.error(f"Error in message polling: {e}")
-                    await asyncio.sleep(10)
+        await self._poll("undelivered-admin-messages", self._deliver_message, 5, "message")
+
+    async def _deliver_staff_task(self, session: aiohttp.ClientSession, notif: dict) -> None:
+        outbox_id = notif["outbox_id"]
+        task_id = notif.get("task_id")
+        telegram_id = notif.get("telegram_id")
+        if not task_id or not telegram_id or not str(telegram_id).isdigit():
+            await self._nack(session, outbox_id, "invalid staff telegram id", retry=False)
+            return
+
+        try:
+            msg = (
+                "🛠 <b>Новое поручение</b>\n\n"
+                f"👤 Ответственный: {notif.get('staff_name', 'Сотрудник')}\n"
+                f"🏨 Номер: {notif.get('room_number', '-')}\n"
+                f"📌 Тип: {notif.get('task_type', '-')}\n"
+                f"📝 Описание: {notif.get('description') or '—'}"
+            )
+            from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+            kb = InlineKeyboardMarkup(inline_keyboard=[
+                [InlineKeyboardButton(text="✅ Выполнить", callback_data=f"complete_task_{task_id}")]
+            ])
+            await self.bot.send_message(
+                chat_id=int(telegram_id),
+                text=msg,
+                parse_mode="HTML",
+                reply_markup=kb,
+            )
+        except Exception as e:
+            logger.error(f"Failed to send staff task {task_id} notification: {e}")
+            await self._nack(session, outbox_id, str(e))
+            return
+
+        await self._ack(session, outbox_id)
+
+    async def _deliver_order_notification(self, session: aiohttp.ClientSession, notif: dict) -> None:
+        outbox_id = notif["outbox_id"]
+        telegram_id = notif.get("telegram_id")
+        if not telegram_id or not str(telegram_id).isdigit():
+            # Don't retry forever
+            await self._nack(session, outbox_id, "invalid guest telegram id", retry=False)
+            return
+
+        try:
+            guest_name = html.escape(str(notif.get("guest_name", "")).strip())
+            room_number = html.escape(str(notif.get("room_number", "")).strip())
+            # Build confirmation message
+            msg = "✅ <b>Заказ оформлен!</b>\n\n"
+            msg += f"<b>Заказ #{notif['ticket_id']}</b>\n"
+            msg += f"👤 <b>Гость:</b> {guest_name}\n"
+            msg += f"🏨 <b>Комната:</b> {room_number}\n\n"
+
+            for item in notif.get("items", []):
+                item_name = html.escape(str(item.get('name', '')).strip())
+                subtotal = item.get('subtotal', 0)
+                qty = item.get('qty', 1)
+                msg += f"🍽 <b>{item_name}</b> x{qty} = {subtotal}₽\n"
+
+                comp_text = _format_composition(item.get("composition"))
+                if comp_text:
+                    msg += f"<i>   ({comp_text})</i>\n"
+
+            msg += f"\n<b>💰 Итого: {notif['total']}₽</b>\n"
+
+            if notif.get("comment"):
+                comment = html.escape(str(notif["comment"]).strip())
+                msg += f"\n💬 Комментарий: {comment}\n"
+
+            msg += "\nМы свяжемся с вами для уточнения времени доставки."
+
+            await self.bot.send_message(
+                chat_id=int(telegram_id),
+                text=msg,
+                parse_mode="HTML"
+            )
+            logger.info(f"Sent order notification to user {telegram_id}")
+        except Exception as e:
+            logger.error(f"Failed to send order notification to {telegram_id}: {e}")
+            await self._nack(session, outbox_id, str(e))
+            return
+
+        await self._ack(session, outbox_id)
+
+    async def _deliver_message(self, session: aiohttp.ClientSession, msg: dict) -> None:
+        outbox_id = msg["outbox_id"]
+        message_id = msg.get("message_id")
+        guest_chat_id = msg.get("guest_chat_id")
+        sender = str(msg.get("sender") or "ADMIN")
+
+        if not guest_chat_id or not str(guest_chat_id).isdigit():
+            # Don't retry
+            await self._nack(session, outbox_id, "invalid guest chat id", retry=False)
+            return
+
+        try:
+            ticket_id = msg.get("ticket_id")
+            if sender == "SYSTEM":
+                message_text = str(msg.get("content") or "")
+            else:
+                admin_name = msg.get("admin_name", "Администратор")
+                message_text = (
+                    f"\U0001f4ac Ответ от {admin_name} по заявке #{ticket_id}:\n\n"
+                    f"{msg['content']}"
+                )
+
+            await self.bot.send_message(
+                chat_id=int(guest_chat_id),
+                text=message_text
+            )
+            logger.info(
+                f"Delivered {sender.lower()} message {message_id} "
+                f"to user {guest_chat_id}"
+            )
+        except Exception as e:
+            logger.error(
+                f"Failed to deliver message {message_id} to user "
+                f"{guest_chat_id}: {e}"
+            )
+            await self._nack(session, outbox_id, str(e))
+            return
+
+        await self._ack(session, outbox_id)
 
 
 # Global bridge instance
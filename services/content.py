@@ -1,91 +1,978 @@
 from __future__ import annotations
 
+import hashlib
+import logging
+import marshal
+import os
+import re
+import sys
+import threading
+import time
+import weakref
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any
+from string import Formatter
+from typing import Any, Callable, Iterable, Iterator, Mapping, MutableMapping, Sequence
 
 import yaml
 
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None  # type: ignore[assignment]
+
+from config import get_settings
+
+
+logger = logging.getLogger(__name__)
+
+TEXTS_FILE = "texts.ru.yml"
+MENUS_FILE = "menus.ru.yml"
+TEXTS_PATTERN = "texts.{locale}.yml"
+MENUS_PATTERN = "menus.{locale}.yml"
+# Bump when the cached structure changes; stale caches are then regenerated.
+CACHE_FORMAT = 1
+# Content key paths are namespaced by file: "texts.<key>", "menus.<key>".
+_BUNDLE_FILE = re.compile(r"(texts|menus)\.([a-z]{2,3})\.yml\Z")
+# Content changes remembered for ContentManager.changes_since().
+CHANGE_HISTORY = 64
+
+# Keyword arguments each text is rendered with. A placeholder outside this set
+# would fail at render time, so it is reported when the file is loaded instead.
+TEMPLATE_PLACEHOLDERS: dict[str, frozenset[str]] = {
+    "admin.new_ticket_notification": frozenset({"ticket_id", "summary"}),
+    "breakfast.after_deadline_ticket_summary": frozenset(),
+    "breakfast.confirm_prompt": frozenset({"persons", "price_per_person", "total_price"}),
+    "breakfast.order_final_confirmation": frozenset({"ticket_id", "persons", "total_price"}),
+    "breakfast.ticket_summary": frozenset({"persons", "price_per_person", "total_price"}),
+    "cleaning.time_confirmed": frozenset({"time_slot"}),
+    "guest_booking.booking_saved": frozenset({"check_in", "check_out"}),
+    "notifications.check_in_welcome": frozenset({"room_number"}),
+    "notifications.check_out_reminder": frozenset({"room_number"}),
+    "room_service.cleaning.summary": frozenset({"room_number", "cleaning_time", "comments"}),
+    "room_service.other.summary": frozenset({"text"}),
+    "room_service.pillow_menu.summary": frozenset({"choice"}),
+    "room_service.technical_problem.summary": frozenset({"category", "details"}),
+    "tickets.created_confirmation": frozenset({"ticket_id"}),
+    "tickets.declined": frozenset({"ticket_id"}),
+    "tickets.resolved": frozenset({"ticket_id"}),
+}
+
+_SIMPLE_FIELD = re.compile(r"[A-Za-z_][A-Za-z0-9_]*\Z")
+_FIELD_BASE = re.compile(r"[^.\[]*")
+
+
+@dataclass(frozen=True)
+class TextTemplate:
+    """A text with its ``str.format`` placeholders parsed once at load."""
+
+    key: str
+    source: str
+    fields: frozenset[str]
+    # (literal, field, format_spec, conversion) as produced by string.Formatter.parse
+    parts: tuple[tuple[str, str | None, str, str | None], ...]
+    # False for attribute/index fields or nested specs, which only str.format can fill.
+    simple: bool
+    error: str | None = None
+
+    @classmethod
+    def compile(cls, key: str, source: str) -> "TextTemplate":
+        try:
+            parts = tuple(Formatter().parse(source))
+        except ValueError as exc:
+            return cls(key, source, frozenset(), ((source, None, "", None),), True, str(exc))
+
+        fields = frozenset(_FIELD_BASE.match(name).group(0) for _, name, _, _ in parts if name is not None)
+        simple = all(
+            name is None or (_SIMPLE_FIELD.match(name) and "{" not in (spec or ""))
+            for _, name, spec, _ in parts
+        )
+        error = None
+        if any(name == "" or (name and name[0].isdigit()) for _, name, _, _ in parts):
+            error = "positional placeholders are not supported"
+        return cls(key, source, fields, parts, simple, error)
+
+    def render(self, **values: Any) -> str:
+        """Substitute ``values``; placeholders without a value are left as-is."""
+
+        return self.render_map(values)
+
+    def render_map(self, values: dict[str, Any]) -> str:
+        """``source.format_map(values)``, leaving placeholders without a value in
+        the text (logged). Slower than ``format``, so handlers call
+        ``get_text(key).format(...)`` directly.
+
+        Formatting errors (a format spec that does not fit the value, say) are
+        logged and raised, never replaced with the raw template.
+        """
+
+        if values.keys() >= self.fields and self.error is None:
+            # Placeholders were checked at load, so this is the normal path.
+            try:
+                return self.source.format_map(values)
+            except (KeyError, IndexError, AttributeError, ValueError) as exc:
+                logger.error("Text %r failed to render: %s", self.key, exc)
+                raise
+        missing = sorted(self.fields - values.keys())
+        logger.warning("Text %r rendered without %s", self.key, ", ".join(missing) or self.error)
+        if not self.simple:
+            raise KeyError(f"Text '{self.key}' needs {', '.join(missing)}")
+        chunks: list[str] = []
+        for literal, name, spec, conversion in self.parts:
+            chunks.append(literal)
+            if name is None:
+                continue
+            if name not in values:
+                chunks.append("{" + name + "}")
+                continue
+            value = values[name]
+            if conversion == "r":
+                value = repr(value)
+            elif conversion == "s":
+                value = str(value)
+            elif conversion == "a":
+                value = ascii(value)
+            chunks.append(format(value, spec or ""))
+        return "".join(chunks)
+
+
+def _flatten(node: Any, prefix: str, index: dict[str, Any]) -> None:
+    if not isinstance(node, dict):
+        return
+    for key, value in node.items():
+        path = f"{prefix}.{key}" if prefix else str(key)
+        index[path] = value
+        _flatten(value, path, index)
+
+
+def _changed_paths(old: Any, new: Any, path: str, changed: set[str]) -> None:
+    """Add the deepest mapping paths under which ``old`` and ``new`` differ."""
+
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key in old.keys() | new.keys():
+            child = f"{path}.{key}"
+            if key not in old or key not in new:
+                changed.add(child)
+            else:
+                _changed_paths(old[key], new[key], child, changed)
+    elif old != new:
+        changed.add(path)
+
+
+def keys_affected(keys: Iterable[str], changed: Iterable[str]) -> bool:
+    """True if a content key lies inside, or contains, one of the ``changed`` paths.
+
+    Keys are namespaced by file: ``texts.<text key>`` and ``menus.<menu key>``.
+    """
+
+    changed = tuple(changed)
+    for key in keys:
+        for path in changed:
+            if key == path or key.startswith(path + ".") or path.startswith(key + "."):
+                return True
+    return False
+
+
+_accessed_keys: ContextVar[set[str] | None] = ContextVar("content_accessed_keys", default=None)
+
+
+@contextmanager
+def track_keys() -> Iterator[set[str]]:
+    """Collect the (namespaced) content keys looked up inside the block.
+
+    Caches of derived data use this to learn what to drop when a change
+    touches only part of the content.
+    """
+
+    keys: set[str] = set()
+    token = _accessed_keys.set(keys)
+    try:
+        yield keys
+    finally:
+        _accessed_keys.reset(token)
+
+
+def note_keys(keys: Iterable[str]) -> None:
+    """Charge ``keys`` to the enclosing :func:`track_keys` block, if any."""
+
+    tracked = _accessed_keys.get()
+    if tracked is not None:
+        tracked.update(keys)
+
+
+def path_tokens(path: str) -> list[str | int]:
+    """Split ``a.b[0].label`` into ``["a", "b", 0, "label"]``."""
+
+    tokens: list[str | int] = []
+    key = ""
+    i = 0
+    while i < len(path):
+        ch = path[i]
+        if ch == ".":
+            if key:
+                tokens.append(key)
+                key = ""
+            i += 1
+            continue
+        if ch == "[":
+            if key:
+                tokens.append(key)
+                key = ""
+            j = path.find("]", i)
+            if j == -1:
+                raise ValueError(f"Invalid path: {path}")
+            tokens.append(int(path[i + 1:j]))
+            i = j + 1
+            continue
+        key += ch
+        i += 1
+    if key:
+        tokens.append(key)
+    return tokens
+
+
+def _walk(root: Any, tokens: list[str | int], path: str) -> Any:
+    cur = root
+    for token in tokens:
+        if isinstance(token, int):
+            if not isinstance(cur, list):
+                raise ValueError(f"Expected list at token {token} for path {path}")
+        elif not isinstance(cur, dict):
+            raise ValueError(f"Expected dict at token {token} for path {path}")
+        try:
+            cur = cur[token]
+        except (KeyError, IndexError):
+            raise ValueError(f"Path {path} does not exist") from None
+    return cur
+
+
+def get_value_by_path(root: Any, path: str) -> Any:
+    return _walk(root, path_tokens(path), path)
+
+
+def set_value_by_path(root: Any, path: str, value: Any) -> None:
+    tokens = path_tokens(path)
+    if not tokens:
+        raise ValueError(f"Invalid path: {path}")
+    cur = _walk(root, tokens[:-1], path)
+    last = tokens[-1]
+    if isinstance(last, int):
+        if not isinstance(cur, list):
+            raise ValueError(f"Expected list for final token in path {path}")
+        if not -len(cur) <= last < len(cur):
+            raise ValueError(f"Path {path} does not exist")
+        cur[last] = value
+    else:
+        if not isinstance(cur, dict):
+            raise ValueError(f"Expected dict for final token in path {path}")
+        cur[last] = value
+
+
+def _mapping_path(path: str) -> str:
+    """The part of ``path`` addressable through mappings (``a.b[0].label`` -> ``a.b``)."""
+
+    keys: list[str] = []
+    for token in path_tokens(path):
+        if isinstance(token, int):
+            break
+        keys.append(token)
+    return ".".join(keys)
+
+
+def _intern(node: Any) -> Any:
+    """Return ``node`` with every string interned, so bundles share equal strings."""
+
+    if isinstance(node, str):
+        return sys.intern(node)
+    if isinstance(node, dict):
+        return {_intern(key): _intern(value) for key, value in node.items()}
+    if isinstance(node, list):
+        return [_intern(item) for item in node]
+    return node
+
+
+def compile_texts(
+    texts: dict[str, Any],
+    pool: MutableMapping[tuple[str, str], TextTemplate] | None = None,
+    complete: bool = True,
+) -> tuple[dict[str, TextTemplate], list[str]]:
+    """Build the flat ``key -> TextTemplate`` index and list placeholder problems.
+
+    Templates found in ``pool`` (same key and source, e.g. an untranslated
+    text in another locale) are reused instead of compiled again. With
+    ``complete=False`` (a locale that falls back to another) missing texts
+    are not reported.
+    """
+
+    flat: dict[str, Any] = {}
+    _flatten(texts, "", flat)
+    index: dict[str, TextTemplate] = {}
+    for key, value in flat.items():
+        if not isinstance(value, str):
+            continue
+        template = pool.get((key, value)) if pool is not None else None
+        if template is None:
+            template = TextTemplate.compile(key, value)
+            if pool is not None:
+                pool[(key, value)] = template
+        index[key] = template
+
+    problems: list[str] = []
+    for key, template in index.items():
+        if template.error:
+            problems.append(f"{key}: {template.error}")
+    for key, allowed in TEMPLATE_PLACEHOLDERS.items():
+        template = index.get(key)
+        if template is None:
+            if complete:
+                problems.append(f"{key}: text is missing")
+            continue
+        unknown = sorted(template.fields - allowed)
+        if unknown:
+            expected = ", ".join(sorted(allowed)) or "none"
+            problems.append(f"{key}: unknown placeholder(s) {', '.join(unknown)} (expected: {expected})")
+    return index, problems
+
+
+@dataclass(frozen=True)
+class ContentSnapshot:
+    """Parsed content files as of one load.
+
+    Snapshots are shared by every lookup until the next reload and must be
+    treated as read-only. ``version`` increases on each load, so callers can
+    use it to key anything derived from the content.
+    """
+
+    version: int
+    texts: dict[str, Any]
+    menus: dict[str, Any]
+    texts_mtime: int | None
+    menus_mtime: int | None
+    templates: dict[str, TextTemplate] = field(default_factory=dict)
+    menu_index: dict[str, Any] = field(default_factory=dict)
+    problems: tuple[str, ...] = ()
+
+
+def _cache_path(path: Path) -> Path:
+    return path.with_name(f".{path.name}.cache")
+
+
+def _read_cache(cache_path: Path, digest: str) -> dict[str, Any] | None:
+    """Return the cached parse of a content file if it matches ``digest``."""
+
+    try:
+        header, data = marshal.loads(cache_path.read_bytes())
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if header != (CACHE_FORMAT, tuple(sys.version_info[:2]), digest) or not isinstance(data, dict):
+        return None
+    return data
+
+
+def _write_cache(cache_path: Path, digest: str, data: dict[str, Any]) -> None:
+    """Store ``data`` atomically (write a temp file, then rename over the cache)."""
+
+    try:
+        payload = marshal.dumps(((CACHE_FORMAT, tuple(sys.version_info[:2]), digest), data))
+    except ValueError:
+        # YAML values marshal cannot store (e.g. dates): keep parsing the file.
+        return
+    tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+    try:
+        tmp_path.write_bytes(payload)
+        os.replace(tmp_path, cache_path)
+    except OSError as exc:
+        logger.debug("Cannot write content cache %s: %s", cache_path, exc)
+        tmp_path.unlink(missing_ok=True)
+
+
+def write_atomic(path: Path, data: bytes) -> None:
+    """Replace ``path`` with ``data`` so readers see either the old or the new file."""
+
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(tmp_path, "wb") as handle:
+            handle.write(data)
+            handle.flush()
+            os.fsync(handle.fileno())
+        try:
+            os.chmod(tmp_path, os.stat(path).st_mode & 0o7777)
+        except FileNotFoundError:
+            pass
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+_write_lock = threading.Lock()
+
+
+@contextmanager
+def _locked(path: Path) -> Iterator[None]:
+    """Serialize read-modify-write cycles on ``path`` across threads and processes."""
+
+    with _write_lock, open(path.with_name(f".{path.name}.lock"), "a") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        yield
+
+
+class ContentConflictError(Exception):
+    """The file changed since the editor loaded it."""
+
+    def __init__(self, filename: str, current_sha256: str) -> None:
+        super().__init__(f"{filename} was modified by someone else")
+        self.filename = filename
+        self.current_sha256 = current_sha256
+
+
+def _default_base_path() -> Path:
+    return Path(__file__).resolve().parent.parent / "content"
+
+
+def _mtime_ns(path: Path) -> int | None:
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
 
 class ContentManager:
     """Simple YAML-based content loader.
 
     All user-facing strings and menu structures are loaded from files
-    under the ``content`` directory.
+    under the ``content`` directory. Lookups are served from the current
+    :class:`ContentSnapshot`. The files are stat()ed at most once per
+    ``check_interval`` seconds, or on the next lookup after
+    :meth:`invalidate`.
+
+    Parsed YAML is cached in ``.<file>.cache`` (marshal) next to each file,
+    keyed on the SHA-256 of the file, so unchanged content skips YAML parsing.
+
+    Each reload diffs the new content against the previous snapshot; the
+    changed key paths are logged and served by :meth:`changes_since`, so
+    derived caches can drop only what a change touched.
+
+    One manager holds one locale (``texts.<locale>.yml``/``menus.<locale>.yml``);
+    see :class:`LocalizedContent` for lookups across locales. A bundle that
+    is not ``required`` may lack either file.
     """
 
-    def __init__(self, base_path: Path | None = None) -> None:
+    def __init__(
+        self,
+        base_path: Path | None = None,
+        check_interval: float = 2.0,
+        cache: bool = True,
+        locale: str = "ru",
+        required: bool = True,
+        template_pool: MutableMapping[tuple[str, str], TextTemplate] | None = None,
+    ) -> None:
         if base_path is None:
-            base_path = Path(__file__).resolve().parent.parent / "content"
+            base_path = _default_base_path()
         self._base_path = base_path
-        self._texts: dict[str, Any] | None = None
-        self._menus: dict[str, Any] | None = None
-        self._texts_mtime: float | None = None
-        self._menus_mtime: float | None = None
-
-    def load(self) -> None:
-        texts_path = self._base_path / "texts.ru.yml"
-        menus_path = self._base_path / "menus.ru.yml"
-        self._texts = self._load_yaml("texts.ru.yml")
-        self._menus = self._load_yaml("menus.ru.yml")
-        self._texts_mtime = texts_path.stat().st_mtime if texts_path.exists() else None
-        self._menus_mtime = menus_path.stat().st_mtime if menus_path.exists() else None
+        self.locale = locale
+        self.required = required
+        self._texts_path = base_path / TEXTS_PATTERN.format(locale=locale)
+        self._menus_path = base_path / MENUS_PATTERN.format(locale=locale)
+        self._namespaces = {self._texts_path.name: "texts", self._menus_path.name: "menus"}
+        self._template_pool = template_pool
+        self.check_interval = check_interval
+        self.cache = cache
+        self._snapshot: ContentSnapshot | None = None
+        self._changes: deque[tuple[int, frozenset[str]]] = deque(maxlen=CHANGE_HISTORY)
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+    def load(self) -> ContentSnapshot:
+        with self._lock:
+            previous = self._snapshot
+            # Take mtimes before reading so a write racing the load triggers another reload.
+            texts_mtime = _mtime_ns(self._texts_path)
+            menus_mtime = _mtime_ns(self._menus_path)
+            texts = _intern(self._load_yaml(self._texts_path.name))
+            menus = _intern(self._load_yaml(self._menus_path.name))
+            templates, problems = compile_texts(texts, self._template_pool, complete=self.required)
+            menu_index: dict[str, Any] = {}
+            _flatten(menus, "", menu_index)
+            for problem in problems:
+                logger.warning("Content %s: %s", self._texts_path.name, problem)
+            snapshot = ContentSnapshot(
+                version=(previous.version + 1) if previous else 1,
+                texts=texts,
+                menus=menus,
+                texts_mtime=texts_mtime,
+                menus_mtime=menus_mtime,
+                templates=templates,
+                menu_index=menu_index,
+                problems=tuple(problems),
+            )
+            if previous is not None:
+                changed: set[str] = set()
+                _changed_paths(previous.texts, texts, "texts", changed)
+                _changed_paths(previous.menus, menus, "menus", changed)
+                self._changes.append((snapshot.version, frozenset(changed)))
+                if changed:
+                    logger.info("Content v%s changed: %s", snapshot.version, ", ".join(sorted(changed)))
+            self._snapshot = snapshot
+            self._next_check = time.monotonic() + self.check_interval
+            return snapshot
 
     def reload(self) -> None:
         self.load()
 
-    def _ensure_fresh(self) -> None:
-        texts_path = self._base_path / "texts.ru.yml"
-        menus_path = self._base_path / "menus.ru.yml"
+    def invalidate(self) -> None:
+        """Make the next lookup re-check the files (cheap; nothing is parsed here)."""
 
-        try:
-            current_texts_mtime = texts_path.stat().st_mtime
-        except FileNotFoundError:
-            current_texts_mtime = None
-        try:
-            current_menus_mtime = menus_path.stat().st_mtime
-        except FileNotFoundError:
-            current_menus_mtime = None
+        self._next_check = 0.0
+
+    def changes_since(self, version: int) -> frozenset[str] | None:
+        """Key paths changed after ``version``; None if the history no longer covers it."""
+
+        current = self._ensure_fresh().version
+        if version == current:
+            return frozenset()
+        changes = list(self._changes)
+        if version > current or not changes or changes[0][0] > version + 1:
+            return None
+        return frozenset().union(*(keys for changed_in, keys in changes if changed_in > version))
 
+    @property
+    def snapshot(self) -> ContentSnapshot:
+        return self._ensure_fresh()
+
+    @property
+    def version(self) -> int:
+        return self._ensure_fresh().version
+
+    def _ensure_fresh(self) -> ContentSnapshot:
+        snapshot = self._snapshot
+        now = time.monotonic()
+        if snapshot is not None and now < self._next_check:
+            return snapshot
         if (
-            self._texts is None
-            or self._menus is None
-            or current_texts_mtime != self._texts_mtime
-            or current_menus_mtime != self._menus_mtime
+            snapshot is None
+            or _mtime_ns(self._texts_path) != snapshot.texts_mtime
+            or _mtime_ns(self._menus_path) != snapshot.menus_mtime
         ):
-            self.load()
+            return self.load()
+        self._next_check = now + self.check_interval
+        return snapshot
 
     def _load_yaml(self, filename: str) -> dict[str, Any]:
         path = self._base_path / filename
-        with path.open("r", encoding="utf-8") as f:
-            data = yaml.safe_load(f) or {}
+        try:
+            raw = path.read_bytes()
+        except FileNotFoundError:
+            if self.required:
+                raise
+            return {}
+        return self._parse_yaml(path, raw)
+
+    def _parse_yaml(self, path: Path, raw: bytes) -> dict[str, Any]:
+        digest = hashlib.sha256(raw).hexdigest()
+        if self.cache:
+            cached = _read_cache(_cache_path(path), digest)
+            if cached is not None:
+                return cached
+
+        data = yaml.safe_load(raw.decode("utf-8")) or {}
         if not isinstance(data, dict):
-            raise ValueError(f"Unexpected structure in content file {filename}")
+            raise ValueError(f"Unexpected structure in content file {path.name}")
+        if self.cache:
+            _write_cache(_cache_path(path), digest, data)
         return data
 
+    def _content_path(self, filename: str) -> Path:
+        if filename not in self._namespaces:
+            raise ValueError(f"Unknown content file {filename}")
+        return self._base_path / filename
+
+    def loaded_locales(self) -> tuple[str, ...]:
+        return (self.locale,)
+
+    def write_file(self, filename: str, text: str, base_sha256: str | None = None) -> frozenset[str]:
+        """Replace a content file with ``text`` (already validated) atomically.
+
+        With ``base_sha256`` the write is refused with :class:`ContentConflictError`
+        if the file no longer has that hash. Returns the changed key paths.
+        """
+
+        path = self._content_path(filename)
+        new_data = yaml.safe_load(text) or {}
+        with _locked(path):
+            raw = path.read_bytes()
+            if base_sha256 is not None:
+                current = hashlib.sha256(raw).hexdigest()
+                if current != base_sha256:
+                    raise ContentConflictError(filename, current)
+            old_data = self._parse_yaml(path, raw)
+            write_atomic(path, text.encode("utf-8"))
+        self.invalidate()
+
+        changed: set[str] = set()
+        _changed_paths(old_data, new_data, self._namespaces[filename], changed)
+        return frozenset(changed)
+
+    def patch_file(
+        self,
+        filename: str,
+        updates: Mapping[str, Any],
+        validate: Callable[[dict[str, Any]], None] | None = None,
+    ) -> frozenset[str]:
+        """Set ``path -> value`` entries in a content file and rewrite it atomically.
+
+        The file is re-read under the write lock, so concurrent patches to
+        different keys all persist. ``validate`` may raise to reject the
+        result. Returns the changed key paths (empty if nothing changed, in
+        which case the file is not rewritten).
+        """
+
+        path = self._content_path(filename)
+        namespace = self._namespaces[filename]
+        with _locked(path):
+            data = self._parse_yaml(path, path.read_bytes())
+            changed: set[str] = set()
+            for key_path, value in updates.items():
+                try:
+                    if get_value_by_path(data, key_path) == value:
+                        continue
+                except ValueError:
+                    pass
+                set_value_by_path(data, key_path, value)
+                changed.add(f"{namespace}.{_mapping_path(key_path)}".rstrip("."))
+            if not changed:
+                return frozenset()
+            if validate is not None:
+                validate(data)
+            dumped = yaml.safe_dump(data, allow_unicode=True, sort_keys=False)
+            write_atomic(path, dumped.encode("utf-8"))
+        self.invalidate()
+        return frozenset(changed)
+
+    def get_template(self, key: str) -> TextTemplate:
+        tracked = _accessed_keys.get()
+        if tracked is not None:
+            tracked.add(f"texts.{key}")
+        template = self._ensure_fresh().templates.get(key)
+        if template is None:
+            raise KeyError(f"Text key '{key}' not found or not a string")
+        return template
+
     def get_text(self, key: str) -> str:
-        self._ensure_fresh()
-        assert self._texts is not None
-        value = self._get_nested(self._texts, key)
-        if not isinstance(value, str):
+        return self.get_template(key).source
+
+    def render(self, key: str, **values: Any) -> str:
+        """Return text ``key`` with its placeholders filled from ``values``."""
+
+        tracked = _accessed_keys.get()
+        if tracked is not None:
+            tracked.add(f"texts.{key}")
+        template = self._ensure_fresh().templates.get(key)
+        if template is None:
             raise KeyError(f"Text key '{key}' not found or not a string")
+        return template.render_map(values)
+
+    def get_menu(self, key: str) -> list[dict[str, Any]]:
+        tracked = _accessed_keys.get()
+        if tracked is not None:
+            tracked.add(f"menus.{key}")
+        value = self._ensure_fresh().menu_index.get(key)
+        if not isinstance(value, list):
+            raise KeyError(f"Menu key '{key}' not found or not a list")
         return value
 
+
+_current_locale: ContextVar[str | None] = ContextVar("content_locale", default=None)
+
+
+@contextmanager
+def use_locale(locale: str | None) -> Iterator[None]:
+    """Resolve content lookups inside the block for ``locale`` (one update's user)."""
+
+    token = _current_locale.set(locale)
+    try:
+        yield
+    finally:
+        _current_locale.reset(token)
+
+
+def current_locale() -> str | None:
+    return _current_locale.get()
+
+
+def parse_locale_fallbacks(spec: str) -> dict[str, tuple[str, ...]]:
+    """Parse ``"fi:en,uk:ru"`` into ``{"fi": ("en",), "uk": ("ru",)}``."""
+
+    fallbacks: dict[str, tuple[str, ...]] = {}
+    for item in spec.split(","):
+        locale, _, chain = item.partition(":")
+        locale = locale.strip().lower()
+        targets = tuple(part.strip().lower() for part in chain.split(">") if part.strip())
+        if locale and targets:
+            fallbacks[locale] = targets
+    return fallbacks
+
+
+@dataclass(frozen=True)
+class _ChainIndex:
+    """Lookups for one fallback chain, merged from its bundles' snapshots."""
+
+    versions: tuple[int, ...]
+    templates: dict[str, TextTemplate]
+    menu_index: dict[str, Any]
+
+
+class LocalizedContent:
+    """Content bundles per locale with lazy loading and fallback chains.
+
+    ``texts.<locale>.yml``/``menus.<locale>.yml`` are loaded the first time
+    a user with that language is served. Lookups use the locale bound to the
+    current update (:func:`use_locale`; the bot sets it per update from
+    ``from_user.language_code``) and fall back key by key along the chain
+    ``locale -> configured fallbacks -> default locale``. The merged index
+    of a chain is rebuilt only when one of its bundles reloads.
+
+    Strings are interned and templates with the same key and text are shared
+    between bundles, so a partly translated locale costs little beyond its
+    own dicts. ``version``/``changes_since`` cover every loaded bundle.
+    """
+
+    def __init__(
+        self,
+        base_path: Path | None = None,
+        default_locale: str = "ru",
+        fallbacks: Mapping[str, Sequence[str]] | None = None,
+        check_interval: float = 2.0,
+        cache: bool = True,
+    ) -> None:
+        self._base_path = base_path or _default_base_path()
+        self.default_locale = default_locale
+        self.fallbacks = {locale: tuple(chain) for locale, chain in (fallbacks or {}).items()}
+        self.check_interval = check_interval
+        self.cache = cache
+        self._template_pool: weakref.WeakValueDictionary[tuple[str, str], TextTemplate] = weakref.WeakValueDictionary()
+        self._bundles: dict[str, ContentManager] = {}
+        self._available: frozenset[str] | None = None
+        self._resolved: dict[str | None, str] = {}
+        self._chains: dict[str, tuple[str, ...]] = {}
+        self._indexes: dict[tuple[str, ...], _ChainIndex] = {}
+        self._seen: dict[str, int] = {}
+        self._version = 0
+        self._changes: deque[tuple[int, frozenset[str] | None]] = deque(maxlen=CHANGE_HISTORY)
+        self._lock = threading.RLock()
+
+    # -- locales ---------------------------------------------------------
+
+    def available_locales(self) -> frozenset[str]:
+        """Locales with at least one bundle file (the default always counts)."""
+
+        available = self._available
+        if available is None:
+            found = {self.default_locale}
+            try:
+                for path in self._base_path.iterdir():
+                    match = _BUNDLE_FILE.match(path.name)
+                    if match:
+                        found.add(match.group(2))
+            except FileNotFoundError:
+                pass
+            available = self._available = frozenset(found)
+        return available
+
+    def resolve_locale(self, language_code: str | None) -> str:
+        """Map a Telegram ``language_code`` (``en``, ``en-US``, ``pt_BR``) to a bundle locale."""
+
+        locale = self._resolved.get(language_code)
+        if locale is None:
+            locale = self.default_locale
+            if language_code:
+                language = language_code.replace("_", "-").split("-", 1)[0].lower()
+                if language in self.available_locales():
+                    locale = language
+            if len(self._resolved) < 256:
+                self._resolved[language_code] = locale
+        return locale
+
+    def chain(self, locale: str) -> tuple[str, ...]:
+        chain = self._chains.get(locale)
+        if chain is None:
+            available = self.available_locales()
+            order: list[str] = []
+            pending = [locale]
+            while pending:
+                current = pending.pop(0)
+                if current in order:
+                    continue
+                order.append(current)
+                pending.extend(self.fallbacks.get(current, ()))
+            order.append(self.default_locale)
+            chain = tuple(dict.fromkeys(item for item in order if item in available))
+            self._chains[locale] = chain
+        return chain
+
+    def bundle(self, locale: str) -> ContentManager:
+        manager = self._bundles.get(locale)
+        if manager is None:
+            with self._lock:
+                manager = self._bundles.get(locale)
+                if manager is None:
+                    manager = ContentManager(
+                        self._base_path,
+                        check_interval=self.check_interval,
+                        cache=self.cache,
+                        locale=locale,
+                        required=locale == self.default_locale,
+                        template_pool=self._template_pool,
+                    )
+                    self._bundles[locale] = manager
+                    logger.info("Content bundle '%s' loaded on first use", locale)
+        return manager
+
+    def loaded_locales(self) -> tuple[str, ...]:
+        return tuple(self._bundles)
+
+    # -- versions --------------------------------------------------------
+
+    def _sync(self) -> int:
+        """Fold reloads of any loaded bundle into the combined version."""
+
+        with self._lock:
+            bumped = False
+            changed: set[str] | None = set()
+            for locale, manager in list(self._bundles.items()):
+                version = manager.version
+                seen = self._seen.get(locale)
+                if seen == version:
+                    continue
+                self._seen[locale] = version
+                bumped = True
+                if seen is None:
+                    # A newly loaded locale changes nothing already built for others.
+                    continue
+                bundle_changes = manager.changes_since(seen)
+                if bundle_changes is None or changed is None:
+                    changed = None
+                else:
+                    changed |= bundle_changes
+            if bumped:
+                self._version += 1
+                self._changes.append((self._version, frozenset(changed) if changed is not None else None))
+            return self._version
+
+    @property
+    def version(self) -> int:
+        self.bundle(self.default_locale)
+        return self._sync()
+
+    def changes_since(self, version: int) -> frozenset[str] | None:
+        current = self.version
+        if version == current:
+            return frozenset()
+        changes = list(self._changes)
+        if version > current or not changes or changes[0][0] > version + 1:
+            return None
+        result: set[str] = set()
+        for changed_in, keys in changes:
+            if changed_in <= version:
+                continue
+            if keys is None:
+                return None
+            result |= keys
+        return frozenset(result)
+
+    @property
+    def snapshot(self) -> ContentSnapshot:
+        return self.bundle(self.default_locale).snapshot
+
+    def invalidate(self) -> None:
+        self._available = None
+        self._resolved.clear()
+        self._chains.clear()
+        for manager in list(self._bundles.values()):
+            manager.invalidate()
+
+    def reload(self) -> None:
+        self.invalidate()
+        for manager in list(self._bundles.values()):
+            manager.load()
+
+    # -- lookups ---------------------------------------------------------
+
+    def _index(self) -> _ChainIndex:
+        chain = self.chain(_current_locale.get() or self.default_locale)
+        snapshots = [self.bundle(locale).snapshot for locale in chain]
+        versions = tuple(snapshot.version for snapshot in snapshots)
+        index = self._indexes.get(chain)
+        if index is not None and index.versions == versions:
+            return index
+
+        if len(snapshots) == 1:
+            index = _ChainIndex(versions, snapshots[0].templates, snapshots[0].menu_index)
+        else:
+            templates: dict[str, TextTemplate] = {}
+            menu_index: dict[str, Any] = {}
+            for snapshot in reversed(snapshots):
+                templates.update(snapshot.templates)
+                menu_index.update(snapshot.menu_index)
+            index = _ChainIndex(versions, templates, menu_index)
+        self._indexes[chain] = index
+        return index
+
+    def get_template(self, key: str) -> TextTemplate:
+        tracked = _accessed_keys.get()
+        if tracked is not None:
+            tracked.add(f"texts.{key}")
+        template = self._index().templates.get(key)
+        if template is None:
+            raise KeyError(f"Text key '{key}' not found or not a string")
+        return template
+
+    def get_text(self, key: str) -> str:
+        return self.get_template(key).source
+
+    def render(self, key: str, **values: Any) -> str:
+        """Return text ``key`` in the current locale with its placeholders filled."""
+
+        return self.get_template(key).render_map(values)
+
     def get_menu(self, key: str) -> list[dict[str, Any]]:
-        self._ensure_fresh()
-        assert self._menus is not None
-        value = self._get_nested(self._menus, key)
+        tracked = _accessed_keys.get()
+        if tracked is not None:
+            tracked.add(f"menus.{key}")
+        value = self._index().menu_index.get(key)
         if not isinstance(value, list):
             raise KeyError(f"Menu key '{key}' not found or not a list")
         return value
 
-    def _get_nested(self, data: dict[str, Any], key: str) -> Any:
-        parts = key.split(".")
-        current: Any = data
-        for part in parts:
-            if not isinstance(current, dict) or part not in current:
-                raise KeyError(f"Key '{key}' not found in content")
-            current = current[part]
-        return current
+    # -- writes ----------------------------------------------------------
+
+    def _bundle_for_file(self, filename: str) -> ContentManager:
+        match = _BUNDLE_FILE.match(filename)
+        if match is None:
+            raise ValueError(f"Unknown content file {filename}")
+        return self.bundle(match.group(2))
+
+    def write_file(self, filename: str, text: str, base_sha256: str | None = None) -> frozenset[str]:
+        changed = self._bundle_for_file(filename).write_file(filename, text, base_sha256)
+        self._available = None
+        return changed
+
+    def patch_file(
+        self,
+        filename: str,
+        updates: Mapping[str, Any],
+        validate: Callable[[dict[str, Any]], None] | None = None,
+    ) -> frozenset[str]:
+        return self._bundle_for_file(filename).patch_file(filename, updates, validate)
 
 
-content_manager = ContentManager()
+_settings = get_settings()
+content_manager = LocalizedContent(
+    default_locale=_settings.default_locale,
+    fallbacks=parse_locale_fallbacks(_settings.content_locale_fallbacks),
+    check_interval=_settings.content_check_interval,
+)
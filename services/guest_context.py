@@ -3,8 +3,10 @@ from __future__ import annotations
 from datetime import date, datetime, timedelta, timezone
 from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
+from sqlalchemy import select, update
+
 from db.models import GuestBooking
-from db.session import SessionLocal
+from db.session import AsyncSessionLocal, SessionLocal
 
 try:
     HOTEL_TIMEZONE = ZoneInfo("Europe/Moscow")
@@ -54,3 +56,41 @@ def get_active_room_number(telegram_id: str) -> str | None:
         return None
     room_number = (booking.room_number or "").strip()
     return room_number or None
+
+
+async def deactivate_expired_guest_bookings_async() -> int:
+    """Async version of :func:`deactivate_expired_guest_bookings`."""
+    today = get_local_today()
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            update(GuestBooking)
+            .where(GuestBooking.is_active == True, GuestBooking.check_out_date < today)
+            .values(is_active=False)
+            .execution_options(synchronize_session=False)
+        )
+        updated = int(result.rowcount or 0)
+        if updated:
+            await db.commit()
+        return updated
+
+
+async def get_active_guest_booking_async(telegram_id: str) -> GuestBooking | None:
+    """Async version of :func:`get_active_guest_booking`."""
+    await deactivate_expired_guest_bookings_async()
+    async with AsyncSessionLocal() as db:
+        booking = await db.scalar(
+            select(GuestBooking)
+            .where(GuestBooking.telegram_id == telegram_id, GuestBooking.is_active == True)
+            .limit(1)
+        )
+        if booking:
+            db.expunge(booking)
+        return booking
+
+
+async def get_active_room_number_async(telegram_id: str) -> str | None:
+    booking = await get_active_guest_booking_async(telegram_id)
+    if not booking:
+        return None
+    room_number = (booking.room_number or "").strip()
+    return room_number or None
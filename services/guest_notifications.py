@@ -6,10 +6,12 @@ import logging
 from aiogram import Bot
 from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 
+from sqlalchemy import select, update
+
 from db.models import GuestBooking
-from db.session import SessionLocal
+from db.session import AsyncSessionLocal
 from services.content import content_manager
-from services.guest_context import deactivate_expired_guest_bookings, get_local_now, get_local_today
+from services.guest_context import deactivate_expired_guest_bookings_async, get_local_now, get_local_today
 
 
 logger = logging.getLogger(__name__)
@@ -49,79 +51,74 @@ def _display_room_number(booking: GuestBooking) -> str:
     return room_number or "без указанного номера"
 
 
-def get_checkin_notification_candidates() -> list[GuestBooking]:
-    deactivate_expired_guest_bookings()
-    today = get_local_today()
-    with SessionLocal() as db:
-        bookings = db.query(GuestBooking).filter(
-            GuestBooking.is_active == True,
-            GuestBooking.check_in_date == today,
-            GuestBooking.checkin_notified == False,
-        ).all()
+async def _select_bookings(*criteria) -> list[GuestBooking]:
+    async with AsyncSessionLocal() as db:
+        bookings = list((await db.scalars(select(GuestBooking).where(*criteria))).all())
         return _detach_all(bookings, db)
 
 
-def get_checkout_notification_candidates() -> list[GuestBooking]:
-    deactivate_expired_guest_bookings()
+async def _mark_booking(booking_id: int, flag_column, values: dict) -> None:
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            update(GuestBooking)
+            .where(GuestBooking.id == booking_id, flag_column == False)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount:
+            await db.commit()
+
+
+async def get_checkin_notification_candidates() -> list[GuestBooking]:
+    await deactivate_expired_guest_bookings_async()
     today = get_local_today()
-    with SessionLocal() as db:
-        bookings = db.query(GuestBooking).filter(
-            GuestBooking.is_active == True,
-            GuestBooking.check_out_date == today,
-            GuestBooking.checkout_notified == False,
-        ).all()
-        return _detach_all(bookings, db)
+    return await _select_bookings(
+        GuestBooking.is_active == True,
+        GuestBooking.check_in_date == today,
+        GuestBooking.checkin_notified == False,
+    )
 
 
-def mark_checkin_notified(booking_id: int) -> None:
-    with SessionLocal() as db:
-        updated = db.query(GuestBooking).filter(
-            GuestBooking.id == booking_id,
-            GuestBooking.checkin_notified == False,
-        ).update({"checkin_notified": True}, synchronize_session=False)
-        if updated:
-            db.commit()
+async def get_checkout_notification_candidates() -> list[GuestBooking]:
+    await deactivate_expired_guest_bookings_async()
+    today = get_local_today()
+    return await _select_bookings(
+        GuestBooking.is_active == True,
+        GuestBooking.check_out_date == today,
+        GuestBooking.checkout_notified == False,
+    )
+
 
+async def mark_checkin_notified(booking_id: int) -> None:
+    await _mark_booking(booking_id, GuestBooking.checkin_notified, {"checkin_notified": True})
 
-def mark_checkout_notified(booking_id: int) -> None:
-    with SessionLocal() as db:
-        updated = db.query(GuestBooking).filter(
-            GuestBooking.id == booking_id,
-            GuestBooking.checkout_notified == False,
-        ).update({"checkout_notified": True}, synchronize_session=False)
-        if updated:
-            db.commit()
 
+async def mark_checkout_notified(booking_id: int) -> None:
+    await _mark_booking(booking_id, GuestBooking.checkout_notified, {"checkout_notified": True})
 
-def get_feedback_candidates() -> list[GuestBooking]:
+
+async def get_feedback_candidates() -> list[GuestBooking]:
     today = get_local_today()
-    with SessionLocal() as db:
-        bookings = db.query(GuestBooking).filter(
-            GuestBooking.check_out_date == today,
-            GuestBooking.checkout_notified == True,
-            GuestBooking.feedback_requested == False,
-        ).all()
-        return _detach_all(bookings, db)
+    return await _select_bookings(
+        GuestBooking.check_out_date == today,
+        GuestBooking.checkout_notified == True,
+        GuestBooking.feedback_requested == False,
+    )
 
 
-def mark_feedback_requested(booking_id: int) -> None:
-    with SessionLocal() as db:
-        updated = db.query(GuestBooking).filter(
-            GuestBooking.id == booking_id,
-            GuestBooking.feedback_requested == False,
-        ).update(
-            {
-                "feedback_requested": True,
-                "feedback_requested_at": get_local_now(),
-            },
-            synchronize_session=False,
-        )
-        if updated:
-            db.commit()
+async def mark_feedback_requested(booking_id: int) -> None:
+    await _mark_booking(
+        booking_id,
+        GuestBooking.feedback_requested,
+        {
+            "feedback_requested": True,
+            "feedback_requested_at": get_local_now(),
+        },
+    )
 
 
 async def send_checkin_notifications(bot: Bot) -> int:
-    bookings = get_checkin_notification_candidates()
+    bookings = await get_checkin_notification_candidates()
     if not bookings:
         return 0
 
@@ -132,7 +129,7 @@ async def send_checkin_notifications(bot: Bot) -> int:
                 room_number=_display_room_number(booking)
             )
             await bot.send_message(chat_id=int(booking.telegram_id), text=text)
-            mark_checkin_notified(booking.id)
+            await mark_checkin_notified(booking.id)
             sent += 1
             logger.info("Sent check-in notification for booking %s", booking.id)
         except Exception as exc:  # pragma: no cover
@@ -141,7 +138,7 @@ async def send_checkin_notifications(bot: Bot) -> int:
 
 
 async def send_checkout_notifications(bot: Bot) -> int:
-    bookings = get_checkout_notification_candidates()
+    bookings = await get_checkout_notification_candidates()
     if not bookings:
         return 0
 
@@ -156,7 +153,7 @@ async def send_checkout_notifications(bot: Bot) -> int:
                 text=reminder,
                 reply_markup=build_checkout_keyboard(),
             )
-            mark_checkout_notified(booking.id)
+            await mark_checkout_notified(booking.id)
             sent += 1
             logger.info("Sent check-out notification for booking %s", booking.id)
         except Exception as exc:  # pragma: no cover
@@ -165,7 +162,7 @@ async def send_checkout_notifications(bot: Bot) -> int:
 
 
 async def send_feedback_requests(bot: Bot) -> int:
-    bookings = get_feedback_candidates()
+    bookings = await get_feedback_candidates()
     if not bookings:
         return 0
 
@@ -178,7 +175,7 @@ async def send_feedback_requests(bot: Bot) -> int:
                 text=text,
                 reply_markup=build_feedback_keyboard(),
             )
-            mark_feedback_requested(booking.id)
+            await mark_feedback_requested(booking.id)
             sent += 1
             logger.info("Sent feedback request for booking %s", booking.id)
         except Exception as exc:  # pragma: no cover
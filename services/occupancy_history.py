@@ -0,0 +1,199 @@
+"""Occupancy time series for the admin dashboard.
+
+``ShelterClient.get_hotel_stats`` answers "how full are we now" and forgets
+it. :func:`occupancy_collector_loop` (bot process) samples the hotel every
+``OCCUPANCY_SAMPLE_INTERVAL_SECONDS`` into ``occupancy_points``:
+
+* occupied rooms are the distinct rooms of today's non-annulled reservations
+  in the local PMS mirror (``shelter_reservations``); free rooms are today's
+  ``availableCount`` total from the availability calendar, so the room count
+  is their sum instead of the "10 rooms per category" estimate. Without a
+  mirror (no PMS sync) the sample falls back to ``get_hotel_stats``;
+* every sample is written as a ``raw`` point and added to its ``hour`` and
+  ``day`` buckets, which keep sums and a sample count;
+* after each sample raw points older than ``OCCUPANCY_RAW_RETENTION_DAYS``
+  and hourly ones older than ``OCCUPANCY_HOURLY_RETENTION_DAYS`` are deleted.
+  Their data lives on in the coarser buckets, so this is the compaction.
+
+:func:`load_series` reads one resolution over a time range through the
+table's primary key (resolution, bucket): the cost grows with the points
+returned, not with the history kept. Buckets are hotel-local time.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Any
+
+from sqlalchemy import delete, distinct, func, select
+from sqlalchemy.orm import Session
+
+from config import get_settings
+from db.models import OccupancyPoint, ShelterReservation
+from db.session import AsyncSessionLocal
+from services.guest_context import get_local_now
+from services.shelter import ShelterAPIError, ShelterClient, get_shelter_client
+
+
+logger = logging.getLogger(__name__)
+
+RESOLUTIONS = ("raw", "hour", "day")
+STARTUP_DELAY_SECONDS = 60
+MAX_POINTS = 5000
+
+
+@dataclass(frozen=True)
+class OccupancySample:
+    taken_at: datetime
+    occupied_rooms: int
+    available_rooms: int
+    total_rooms: int
+
+
+def _bucket(resolution: str, at: datetime) -> datetime:
+    if resolution == "hour":
+        return at.replace(minute=0, second=0, microsecond=0)
+    if resolution == "day":
+        return at.replace(hour=0, minute=0, second=0, microsecond=0)
+    return at.replace(microsecond=0)
+
+
+def _count_occupied_rooms(db: Session, today: date) -> int | None:
+    """Rooms with a stay covering tonight per the PMS mirror; ``None`` when the mirror is empty."""
+
+    if db.scalar(select(ShelterReservation.id).limit(1)) is None:
+        return None
+    return db.scalar(
+        select(func.count(distinct(ShelterReservation.room_number))).where(
+            ShelterReservation.is_annulled == False,  # noqa: E712
+            ShelterReservation.room_number.is_not(None),
+            ShelterReservation.check_in_date <= today,
+            ShelterReservation.check_out_date > today,
+        )
+    ) or 0
+
+
+def record_sample(db: Session, sample: OccupancySample) -> None:
+    """Write ``sample`` as a raw point and add it to its hour and day buckets."""
+
+    for resolution in RESOLUTIONS:
+        bucket = _bucket(resolution, sample.taken_at)
+        point = db.get(OccupancyPoint, (resolution, bucket))
+        if point is None:
+            point = OccupancyPoint(
+                resolution=resolution,
+                bucket=bucket,
+                samples=0,
+                occupied_sum=0,
+                available_sum=0,
+                total_sum=0,
+                occupied_max=0,
+            )
+            db.add(point)
+        point.samples += 1
+        point.occupied_sum += sample.occupied_rooms
+        point.available_sum += sample.available_rooms
+        point.total_sum += sample.total_rooms
+        point.occupied_max = max(point.occupied_max, sample.occupied_rooms)
+
+
+def compact(db: Session, now: datetime, raw_retention_days: int, hourly_retention_days: int) -> int:
+    """Delete raw and hourly points past retention; their samples stay in the coarser buckets."""
+
+    deleted = 0
+    for resolution, days in (("raw", raw_retention_days), ("hour", hourly_retention_days)):
+        result = db.execute(
+            delete(OccupancyPoint).where(
+                OccupancyPoint.resolution == resolution,
+                OccupancyPoint.bucket < now - timedelta(days=days),
+            )
+        )
+        deleted += result.rowcount or 0
+    return deleted
+
+
+def _as_dict(point: OccupancyPoint) -> dict[str, Any]:
+    samples = point.samples or 1
+    total = point.total_sum / samples
+    occupied = point.occupied_sum / samples
+    return {
+        "t": point.bucket.isoformat(),
+        "occupied_rooms": round(occupied, 2),
+        "available_rooms": round(point.available_sum / samples, 2),
+        "total_rooms": round(total, 2),
+        "occupancy_rate": round(occupied / total, 4) if total else 0.0,
+        "occupied_max": point.occupied_max,
+        "samples": point.samples,
+    }
+
+
+def load_series(
+    db: Session,
+    resolution: str,
+    start: datetime,
+    end: datetime,
+    limit: int = MAX_POINTS,
+) -> list[dict[str, Any]]:
+    """Points of one resolution with ``start <= bucket < end``, oldest first."""
+
+    if resolution not in RESOLUTIONS:
+        raise ValueError(f"resolution must be one of {', '.join(RESOLUTIONS)}")
+    points = db.scalars(
+        select(OccupancyPoint)
+        .where(
+            OccupancyPoint.resolution == resolution,
+            OccupancyPoint.bucket >= start,
+            OccupancyPoint.bucket < end,
+        )
+        .order_by(OccupancyPoint.bucket)
+        .limit(max(1, min(int(limit), MAX_POINTS)))
+    )
+    return [_as_dict(point) for point in points]
+
+
+async def take_sample(client: ShelterClient | None = None) -> OccupancySample:
+    client = client or get_shelter_client()
+    now = get_local_now().replace(tzinfo=None)
+    async with AsyncSessionLocal() as db:
+        occupied = await db.run_sync(_count_occupied_rooms, now.date())
+    stats = await client.get_hotel_stats()
+    if occupied is None:
+        return OccupancySample(now, stats.occupied_rooms, stats.available_rooms, stats.total_rooms)
+    return OccupancySample(now, occupied, stats.available_rooms, occupied + stats.available_rooms)
+
+
+async def collect_once(client: ShelterClient | None = None) -> OccupancySample:
+    settings = get_settings()
+    sample = await take_sample(client)
+    async with AsyncSessionLocal() as db:
+        await db.run_sync(record_sample, sample)
+        deleted = await db.run_sync(
+            compact,
+            sample.taken_at,
+            settings.occupancy_raw_retention_days,
+            settings.occupancy_hourly_retention_days,
+        )
+        await db.commit()
+    if deleted:
+        logger.info("Occupancy history: compacted %s old points", deleted)
+    return sample
+
+
+async def occupancy_collector_loop(interval_seconds: int | None = None) -> None:
+    """Sample occupancy periodically (bot process)."""
+
+    interval = interval_seconds or get_settings().occupancy_sample_interval
+    if not get_shelter_client().widget_token:
+        logger.warning("Occupancy history disabled: SHELTER_WIDGET_TOKEN is not configured")
+        return
+    await asyncio.sleep(STARTUP_DELAY_SECONDS)
+    while True:
+        try:
+            await collect_once()
+        except ShelterAPIError as exc:  # pragma: no cover
+            logger.warning("Occupancy sample failed: %s", exc.message or exc)
+        except Exception as exc:  # pragma: no cover
+            logger.warning("Unexpected occupancy sample error: %s", exc)
+        await asyncio.sleep(max(int(interval), 60))
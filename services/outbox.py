@@ -0,0 +1,174 @@
+"""Transactional outbox for Telegram deliveries.
+
+Rows are added with :func:`enqueue` in the same session (and therefore the
+same commit) as the ticket, message or task they announce. web_admin
+exposes the pending rows page by page, and bot_api_bridge acknowledges
+each one after sending it. Every poll is an index range scan over pending
+rows only, so its cost does not grow with delivery history.
+"""
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from db.models import OutboxKind, OutboxMessage, OutboxStatus
+
+
+DEFAULT_PAGE_SIZE = 100
+MAX_ATTEMPTS = 5
+RETRY_BASE_SECONDS = 30
+# A row whose sender delivers it directly after the commit is held back this
+# long, so bot_api_bridge only picks it up if that send never completes. The
+# direct send is bounded by DIRECT_SEND_TIMEOUT_SECONDS, well inside the hold.
+DIRECT_SEND_HOLD_SECONDS = 120
+DIRECT_SEND_TIMEOUT_SECONDS = 30
+
+
+def is_telegram_chat_id(chat_id: str | None) -> bool:
+    return bool(chat_id) and str(chat_id).strip().isdigit()
+
+
+def enqueue(
+    session: Session | AsyncSession,
+    kind: OutboxKind,
+    *,
+    chat_id: str | None = None,
+    ticket_id: int | None = None,
+    ticket_message_id: int | None = None,
+    staff_task_id: int | None = None,
+    available_at: datetime | None = None,
+) -> OutboxMessage:
+    """Add a pending delivery to ``session``; the caller commits it."""
+
+    now = datetime.utcnow()
+    entry = OutboxMessage(
+        kind=kind,
+        status=OutboxStatus.PENDING,
+        available_at=available_at or now,
+        created_at=now,
+        chat_id=chat_id,
+        ticket_id=ticket_id,
+        ticket_message_id=ticket_message_id,
+        staff_task_id=staff_task_id,
+    )
+    session.add(entry)
+    return entry
+
+
+def _pending_query(kind: OutboxKind, after_id: int, limit: int, now: datetime):
+    return (
+        select(OutboxMessage)
+        .where(
+            OutboxMessage.status == OutboxStatus.PENDING,
+            OutboxMessage.available_at <= now,
+            OutboxMessage.kind == kind,
+            OutboxMessage.id > after_id,
+        )
+        .order_by(OutboxMessage.id)
+        .limit(limit)
+    )
+
+
+def fetch_pending(
+    session: Session,
+    kind: OutboxKind,
+    after_id: int = 0,
+    limit: int = DEFAULT_PAGE_SIZE,
+) -> list[OutboxMessage]:
+    """Return the next page of due deliveries with ``id > after_id``."""
+
+    limit = max(1, min(int(limit), 500))
+    return list(session.scalars(_pending_query(kind, after_id, limit, datetime.utcnow())).all())
+
+
+def _sent_statement(outbox_id: int, status: OutboxStatus):
+    return (
+        update(OutboxMessage)
+        .where(OutboxMessage.id == outbox_id, OutboxMessage.status == OutboxStatus.PENDING)
+        .values(status=status, sent_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+
+
+def mark_sent(session: Session, outbox_id: int) -> bool:
+    return bool(session.execute(_sent_statement(outbox_id, OutboxStatus.SENT)).rowcount)
+
+
+async def mark_sent_async(session: AsyncSession, outbox_id: int) -> bool:
+    return bool((await session.execute(_sent_statement(outbox_id, OutboxStatus.SENT))).rowcount)
+
+
+def mark_sent_for(session: Session, kind: OutboxKind, **match: int) -> int:
+    """Mark the pending ``kind`` entries whose columns equal ``match`` as sent.
+
+    For the deprecated acknowledgement endpoints, which name the ticket,
+    message or task rather than the outbox entry.
+    """
+
+    statement = (
+        update(OutboxMessage)
+        .where(
+            OutboxMessage.kind == kind,
+            OutboxMessage.status == OutboxStatus.PENDING,
+            *(getattr(OutboxMessage, column) == value for column, value in match.items()),
+        )
+        .values(status=OutboxStatus.SENT, sent_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    return session.execute(statement).rowcount
+
+
+def _release_statement(outbox_id: int):
+    return (
+        update(OutboxMessage)
+        .where(OutboxMessage.id == outbox_id, OutboxMessage.status == OutboxStatus.PENDING)
+        .values(available_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+
+
+def release(session: Session, outbox_id: int) -> bool:
+    """Make a held-back entry due now, e.g. after its direct send failed."""
+
+    return bool(session.execute(_release_statement(outbox_id)).rowcount)
+
+
+async def release_async(session: AsyncSession, outbox_id: int) -> bool:
+    return bool((await session.execute(_release_statement(outbox_id))).rowcount)
+
+
+def mark_skipped(session: Session, outbox_id: int) -> bool:
+    return bool(session.execute(_sent_statement(outbox_id, OutboxStatus.SKIPPED)).rowcount)
+
+
+def mark_skipped_many(session: Session, outbox_ids: list[int]) -> int:
+    """Skip several pending entries with a single UPDATE."""
+
+    if not outbox_ids:
+        return 0
+    statement = (
+        update(OutboxMessage)
+        .where(OutboxMessage.id.in_(outbox_ids), OutboxMessage.status == OutboxStatus.PENDING)
+        .values(status=OutboxStatus.SKIPPED, sent_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    return session.execute(statement).rowcount
+
+
+def mark_failed(session: Session, outbox_id: int, error: str | None = None, retry: bool = True) -> bool:
+    """Record a failed attempt; retries back off exponentially up to MAX_ATTEMPTS."""
+
+    entry = session.get(OutboxMessage, outbox_id)
+    if entry is None or entry.status != OutboxStatus.PENDING:
+        return False
+    entry.attempts = (entry.attempts or 0) + 1
+    entry.last_error = (error or "")[:1000] or None
+    if not retry or entry.attempts >= MAX_ATTEMPTS:
+        entry.status = OutboxStatus.FAILED
+    else:
+        delay = RETRY_BASE_SECONDS * (2 ** (entry.attempts - 1))
+        entry.available_at = datetime.utcnow() + timedelta(seconds=delay)
+    return True
@@ -2,15 +2,23 @@
 Shelter Cloud PMS API Integration
 Provides hotel room availability and booking data
 """
+import asyncio
 import os
 import logging
 import json
-from typing import Dict, List, Optional, Any
+from typing import TYPE_CHECKING, Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
 from datetime import datetime, date, time, timedelta
 from dataclasses import dataclass
+from functools import lru_cache
 import aiohttp
 
 from config import get_settings
+from services.async_cache import AsyncTTLCache
+from services.guest_context import get_local_today
+from services.shelter_http import CircuitOpenError, shelter_http
+
+if TYPE_CHECKING:
+    from services.availability_calendar import AvailabilityCalendar, CalendarNight
 
 logger = logging.getLogger(__name__)
 
@@ -47,6 +55,8 @@ class RoomAvailability:
     is_available: bool
     price: Optional[float]
     capacity: Optional[int]
+    # When the figures were fetched from Shelter
+    updated_at: Optional[datetime] = None
 
 
 @dataclass
@@ -55,6 +65,24 @@ class ShelterAPIError(Exception):
     code: Optional[str] = None
     message: Optional[str] = None
     description: Optional[str] = None
+    # Network error, timeout, 429 or 5xx: worth retrying, and counts against the circuit breaker
+    transient: bool = False
+
+
+def _is_transient_status(status: int) -> bool:
+    return status == 429 or status >= 500
+
+
+async def _call_with_breaker(api: str, attempt, idempotent: bool) -> Any:
+    try:
+        return await shelter_http.call(api, attempt, idempotent=idempotent)
+    except CircuitOpenError as exc:
+        raise ShelterAPIError(
+            code="circuit_open",
+            message="Shelter API temporarily unavailable",
+            description=str(exc),
+            transient=True,
+        ) from exc
 
 
 @dataclass
@@ -106,6 +134,18 @@ def _parse_date_value(value: Any) -> date | None:
     text = str(value).strip()
     if not text:
         return None
+    return _parse_date_text(text)
+
+
+@lru_cache(maxsize=4096)
+def _parse_date_text(text: str) -> date | None:
+    # Fast path for "YYYY-MM-DD" optionally followed by a time: the slow path
+    # below ends up with the same date prefix for every such string.
+    if len(text) >= 10 and text[4] == "-" and text[7] == "-" and (len(text) == 10 or text[10] in "T "):
+        try:
+            return date.fromisoformat(text[:10])
+        except ValueError:
+            pass
 
     normalized = text.replace("Z", "+00:00")
     for candidate in (normalized, normalized.split("T")[0], normalized.split(" ")[0]):
@@ -139,32 +179,134 @@ def _extract_items(payload: Any) -> list[dict[str, Any]]:
     return [payload]
 
 
-def _extract_room_number(item: dict[str, Any]) -> str | None:
-    direct = _coerce_str(
-        item.get("roomNumber")
-        or item.get("roomNo")
-        or item.get("room_number")
-        or item.get("number")
-    )
+def _extract_guest_items(item: dict[str, Any]) -> list[dict[str, Any]]:
+    raw_guests = item.get("guests")
+    if isinstance(raw_guests, list):
+        return [guest for guest in raw_guests if isinstance(guest, dict)]
+    return []
+
+
+# Alternative keys per field, in priority order. The PMS has returned all of
+# these spellings across versions; one payload uses one shape throughout.
+RESERVATION_KEYS: dict[str, tuple[str, ...]] = {
+    "id": ("id", "reservationId", "reservation_id", "Id"),
+    "check_in": ("checkIn", "check_in", "arrivalDate", "from", "livedFrom", "beginDate"),
+    "check_out": ("checkOut", "check_out", "departureDate", "until", "livedTo", "endDate"),
+    "status": ("status", "reservationStatus", "state"),
+    "guest_name": ("guestName", "customerName", "fullName", "name"),
+    "annulled": ("isAnnul", "is_annul", "annulled", "isCanceled", "cancelled"),
+    "room_number": ("roomNumber", "roomNo", "room_number", "number"),
+    "room": ("room",),
+    "guests": ("guests",),
+}
+ROOM_KEYS: dict[str, tuple[str, ...]] = {
+    "room_number": ("roomNumber", "roomNo", "number", "name"),
+}
+GUEST_KEYS: dict[str, tuple[str, ...]] = {
+    "id": ("id", "guestId", "guest_id", "Id"),
+    "first_name": ("firstName", "first_name", "name"),
+    "last_name": ("lastName", "last_name", "surname"),
+    "phone": ("phone", "phoneNumber", "mobilePhone"),
+    "email": ("email", "emailAddress"),
+}
+
+
+class ShapeCache:
+    """Resolve which alternative keys a payload shape has, once per shape.
+
+    The shape is the item's key sequence. Its plan keeps, per field, only the
+    candidate keys present in that shape, so :meth:`lookup` does direct
+    ``item[key]`` reads instead of trying every spelling. Lookup semantics
+    match ``item.get(a) or item.get(b) or ...``: the first truthy value, else
+    the last candidate's value when that key is present, else ``None``.
+    """
+
+    def __init__(self, fields: dict[str, tuple[str, ...]], max_shapes: int = 256) -> None:
+        self.fields = fields
+        self.max_shapes = max_shapes
+        self._plans: dict[tuple[str, ...], dict[str, tuple[tuple[str, ...], bool]]] = {}
+        self.learned = 0
+
+    def plan(self, item: dict[str, Any]) -> dict[str, tuple[tuple[str, ...], bool]]:
+        shape = tuple(item)
+        plan = self._plans.get(shape)
+        if plan is None:
+            present = set(shape)
+            plan = {}
+            for field, candidates in self.fields.items():
+                keys = tuple(key for key in candidates if key in present)
+                plan[field] = (keys, bool(keys) and keys[-1] == candidates[-1])
+            if len(self._plans) >= self.max_shapes:
+                self._plans.clear()
+            self._plans[shape] = plan
+            self.learned += 1
+        return plan
+
+    @staticmethod
+    def lookup(item: dict[str, Any], entry: tuple[tuple[str, ...], bool]) -> Any:
+        keys, ends_with_last = entry
+        value = None
+        for key in keys:
+            value = item[key]
+            if value:
+                return value
+        return value if ends_with_last else None
+
+
+_reservation_shapes = ShapeCache(RESERVATION_KEYS)
+_room_shapes = ShapeCache(ROOM_KEYS)
+_guest_shapes = ShapeCache(GUEST_KEYS)
+
+
+def _extract_room_number(item: dict[str, Any], plan: dict[str, tuple[tuple[str, ...], bool]] | None = None) -> str | None:
+    plan = plan or _reservation_shapes.plan(item)
+    lookup = ShapeCache.lookup
+    direct = _coerce_str(lookup(item, plan["room_number"]))
     if direct:
         return direct
 
-    room_data = item.get("room")
+    room_data = lookup(item, plan["room"])
     if isinstance(room_data, dict):
-        return _coerce_str(
-            room_data.get("roomNumber")
-            or room_data.get("roomNo")
-            or room_data.get("number")
-            or room_data.get("name")
-        )
+        return _coerce_str(lookup(room_data, _room_shapes.plan(room_data)["room_number"]))
     return _coerce_str(room_data)
 
 
-def _extract_guest_items(item: dict[str, Any]) -> list[dict[str, Any]]:
-    raw_guests = item.get("guests")
-    if isinstance(raw_guests, list):
-        return [guest for guest in raw_guests if isinstance(guest, dict)]
-    return []
+def parse_reservation(item: dict[str, Any]) -> PMSReservation | None:
+    plan = _reservation_shapes.plan(item)
+    lookup = ShapeCache.lookup
+    reservation_id = _coerce_str(lookup(item, plan["id"]))
+    check_in = _parse_date_value(lookup(item, plan["check_in"]))
+    check_out = _parse_date_value(lookup(item, plan["check_out"]))
+    if not reservation_id or not check_in or not check_out:
+        return None
+
+    status = _coerce_str(lookup(item, plan["status"])) or "UNKNOWN"
+    is_annulled = _coerce_bool(lookup(item, plan["annulled"])) or any(
+        token in status.lower() for token in ("annul", "cancel")
+    )
+    raw_guests = lookup(item, plan["guests"])
+    return PMSReservation(
+        id=reservation_id,
+        status=status,
+        check_in=check_in,
+        check_out=check_out,
+        room_number=_extract_room_number(item, plan),
+        guest_name=_coerce_str(lookup(item, plan["guest_name"])),
+        is_annulled=is_annulled,
+        guests=[guest for guest in raw_guests if isinstance(guest, dict)] if isinstance(raw_guests, list) else [],
+    )
+
+
+def parse_guest(item: dict[str, Any]) -> PMSGuest:
+    plan = _guest_shapes.plan(item)
+    lookup = ShapeCache.lookup
+    return PMSGuest(
+        id=_coerce_str(lookup(item, plan["id"])) or "unknown",
+        first_name=_coerce_str(lookup(item, plan["first_name"])),
+        last_name=_coerce_str(lookup(item, plan["last_name"])),
+        phone=_coerce_str(lookup(item, plan["phone"])),
+        email=_coerce_str(lookup(item, plan["email"])),
+    )
 
 
 class ShelterClient:
@@ -175,12 +317,21 @@ class ShelterClient:
     
     def __init__(
         self,
-        base_url: str = "https://pms.frontdesk24.ru",
+        base_url: Optional[str] = None,
         widget_token: Optional[str] = None,
+        calendar: Optional["AvailabilityCalendar"] = None,
     ):
-        self.base_url = base_url
+        settings = get_settings()
+        self.base_url = (base_url or settings.shelter_widget_base_url).rstrip("/")
+        # Rolling getVariants calendar that stats, availability and stay searches answer from
+        self.calendar = calendar
         self.widget_token = widget_token or os.getenv("SHELTER_WIDGET_TOKEN")
         self._timeout = aiohttp.ClientTimeout(total=8, connect=4, sock_read=6)
+        # getHotelParams / getVariants answers, shared by the bot and web_admin callers
+        self.cache = AsyncTTLCache("shelter_widget")
+        self.hotel_params_ttl = settings.shelter_hotel_params_ttl
+        self.hotel_params_stale_ttl = settings.shelter_hotel_params_stale_ttl
+        self.variants_ttl = settings.shelter_variants_ttl
         
         if not self.widget_token:
             logger.warning("No Shelter Widget API token configured. API calls will fail.")
@@ -190,8 +341,24 @@ class ShelterClient:
         endpoint: str,
         method: str = "POST",
         data: Optional[Dict] = None,
+        idempotent: bool = False,
+    ) -> Any:
+        """Make HTTP request to Shelter API
+
+        Read-only calls pass ``idempotent=True`` and are retried on transient errors.
+        """
+        return await _call_with_breaker(
+            "widget",
+            lambda: self._request_once(endpoint, method, data),
+            idempotent,
+        )
+
+    async def _request_once(
+        self,
+        endpoint: str,
+        method: str = "POST",
+        data: Optional[Dict] = None,
     ) -> Any:
-        """Make HTTP request to Shelter API"""
         url = f"{self.base_url}{endpoint}"
         
         if not self.widget_token:
@@ -215,61 +382,64 @@ class ShelterClient:
         }
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.request(
-                    method,
-                    url,
-                    headers=headers,
-                    json=request_data,
-                    params=params,
-                    timeout=self._timeout
-                ) as response:
-                    raw_body = await response.text()
-                    content_type = response.headers.get("Content-Type", "")
-                    result: Any = None
-
-                    if "application/json" in content_type.lower():
+            async with shelter_http.request(
+                method,
+                url,
+                endpoint,
+                headers=headers,
+                json=request_data,
+                params=params,
+                timeout=self._timeout,
+            ) as response:
+                raw_body = await response.text()
+                content_type = response.headers.get("Content-Type", "")
+                result: Any = None
+
+                if "application/json" in content_type.lower():
+                    try:
+                        result = json.loads(raw_body)
+                    except json.JSONDecodeError:
+                        result = None
+                else:
+                    # Some Shelter endpoints may return JSON with incorrect MIME type.
+                    stripped = raw_body.lstrip()
+                    if stripped.startswith("{") or stripped.startswith("["):
                         try:
                             result = json.loads(raw_body)
                         except json.JSONDecodeError:
                             result = None
-                    else:
-                        # Some Shelter endpoints may return JSON with incorrect MIME type.
-                        stripped = raw_body.lstrip()
-                        if stripped.startswith("{") or stripped.startswith("["):
-                            try:
-                                result = json.loads(raw_body)
-                            except json.JSONDecodeError:
-                                result = None
-                    
-                    if response.status != 200:
-                        error_data = result.get("error", {}) if isinstance(result, dict) else {}
-                        snippet = (raw_body or "").strip().replace("\n", " ")[:300]
-                        if response.status == 401:
-                            raise ShelterAPIError(
-                                code="401",
-                                message="Ошибка авторизации Shelter API (401). Проверьте SHELTER_WIDGET_TOKEN.",
-                                description=snippet or "Unauthorized"
-                            )
+                
+                if response.status != 200:
+                    error_data = result.get("error", {}) if isinstance(result, dict) else {}
+                    snippet = (raw_body or "").strip().replace("\n", " ")[:300]
+                    if response.status == 401:
                         raise ShelterAPIError(
-                            code=str(error_data.get("code", response.status)),
-                            message=error_data.get("message", f"API Error ({response.status})"),
-                            description=error_data.get("description") or snippet
+                            code="401",
+                            message="Ошибка авторизации Shelter API (401). Проверьте SHELTER_WIDGET_TOKEN.",
+                            description=snippet or "Unauthorized"
                         )
+                    raise ShelterAPIError(
+                        code=str(error_data.get("code", response.status)),
+                        message=error_data.get("message", f"API Error ({response.status})"),
+                        description=error_data.get("description") or snippet,
+                        transient=_is_transient_status(response.status),
+                    )
+                
+                if isinstance(result, dict) and "error" in result:
+                    error_data = result["error"]
+                    raise ShelterAPIError(
+                        code=str(error_data.get("code", "0")),
+                        message=error_data.get("message", "Unknown API error"),
+                        description=error_data.get("description")
+                    )
                     
-                    if isinstance(result, dict) and "error" in result:
-                        error_data = result["error"]
-                        raise ShelterAPIError(
-                            code=str(error_data.get("code", "0")),
-                            message=error_data.get("message", "Unknown API error"),
-                            description=error_data.get("description")
-                        )
-                        
-                    # Fallback to raw text if API returns non-JSON successful body.
-                    return result if result is not None else raw_body
+                # Fallback to raw text if API returns non-JSON successful body.
+                return result if result is not None else raw_body
         
         except aiohttp.ClientError as e:
-            raise ShelterAPIError(message=f"Network error: {str(e)}")
+            raise ShelterAPIError(message=f"Network error: {str(e)}", transient=True)
+        except asyncio.TimeoutError:
+            raise ShelterAPIError(message="Network error: request timed out", transient=True)
         except Exception as e:
             if isinstance(e, ShelterAPIError):
                 raise
@@ -287,8 +457,19 @@ class ShelterClient:
         """
         Get hotel parameters and settings (getHotelParams)
         Returns categories, rates, payment options, settings, etc.
+
+        Cached for ``hotel_params_ttl``; for ``hotel_params_stale_ttl`` after
+        that the cached value is still returned while it is refreshed.
         """
-        result = await self._make_request("/api/online/getHotelParams")
+        return await self.cache.get_or_load(
+            ("hotel_params",),
+            self._fetch_hotel_params,
+            ttl=self.hotel_params_ttl,
+            stale_ttl=self.hotel_params_stale_ttl,
+        )
+
+    async def _fetch_hotel_params(self) -> Dict[str, Any]:
+        result = await self._make_request("/api/online/getHotelParams", idempotent=True)
         
         # Structure the data for easier consumption
         if result and result.get("data") and isinstance(result["data"], list):
@@ -313,7 +494,23 @@ class ShelterClient:
     ) -> List[RoomVariant]:
         """
         Search for available room variants (getVariants)
+
+        Identical searches within ``variants_ttl`` share one request.
         """
+        key = ("variants", check_in, check_out, adults, tuple(children_ages or ()))
+
+        async def load() -> List[RoomVariant]:
+            return await self._fetch_variants(check_in, check_out, adults, children_ages)
+
+        return list(await self.cache.get_or_load(key, load, ttl=self.variants_ttl))
+
+    async def _fetch_variants(
+        self,
+        check_in: date,
+        check_out: date,
+        adults: int,
+        children_ages: Optional[List[int]],
+    ) -> List[RoomVariant]:
         data = {
             "checkIn": check_in.strftime("%Y-%m-%d"),
             "checkOut": check_out.strftime("%Y-%m-%d"),
@@ -321,7 +518,7 @@ class ShelterClient:
             "childrenAges": children_ages or []
         }
         
-        result = await self._make_request("/api/online/getVariants", data=data)
+        result = await self._make_request("/api/online/getVariants", data=data, idempotent=True)
         
         variants = []
         
@@ -356,7 +553,7 @@ class ShelterClient:
         Get available payment options for a specific variant (getPaymentOptions)
         """
         data = {"signatureId": signature_id}
-        return await self._make_request("/api/online/getPaymentOptions", data=data)
+        return await self._make_request("/api/online/getPaymentOptions", data=data, idempotent=True)
 
     async def put_order(
         self,
@@ -376,14 +573,16 @@ class ShelterClient:
             "guests": guests,
             "comment": comment or ""
         }
-        return await self._make_request("/api/online/putOrder", data=data)
+        result = await self._make_request("/api/online/putOrder", data=data)
+        self._invalidate_variants()
+        return result
 
     async def get_order(self, order_token: str) -> Dict[str, Any]:
         """
         Get order details (getOrder)
         """
         data = {"orderToken": order_token}
-        return await self._make_request("/api/online/getOrder", data=data)
+        return await self._make_request("/api/online/getOrder", data=data, idempotent=True)
 
     async def annul_order(self, order_token: str, reason: Optional[str] = None) -> Dict[str, Any]:
         """
@@ -393,7 +592,46 @@ class ShelterClient:
             "orderToken": order_token,
             "reason": reason or "Cancelled via Telegram Bot"
         }
-        return await self._make_request("/OnlineWidget3/online/v3/annulOrder", data=data)
+        result = await self._make_request("/OnlineWidget3/online/v3/annulOrder", data=data)
+        self._invalidate_variants()
+        return result
+
+    def _invalidate_variants(self) -> None:
+        """Availability changed: drop cached searches so the next one hits Shelter."""
+        self.cache.invalidate(lambda key: key[0] == "variants")
+
+    async def _calendar_snapshot(self):
+        if self.calendar is None:
+            return None
+        try:
+            return await self.calendar.current()
+        except Exception as exc:
+            logger.warning("Availability calendar unavailable, searching Shelter live: %s", exc)
+            return None
+
+    async def _calendar_night(self, night: date, adults: int) -> Optional["CalendarNight"]:
+        snapshot = await self._calendar_snapshot()
+        return snapshot.night(night, adults) if snapshot is not None else None
+
+    async def search_stay(
+        self,
+        check_in: date,
+        check_out: date,
+        adults: int = 1,
+    ) -> tuple[List[RoomVariant], Optional[datetime]]:
+        """Variants for a stay and when they were fetched.
+
+        Answered from the availability calendar when it covers every night
+        for ``adults`` (prices are the sum of the nightly prices and
+        ``signature_id`` is empty); otherwise a live :meth:`get_variants`,
+        with ``None`` as the time.
+        """
+        snapshot = await self._calendar_snapshot()
+        offers = snapshot.stay(check_in, check_out, adults) if snapshot is not None else None
+        if offers is not None:
+            fetched_at = min((offer.fetched_at for offer in offers), default=snapshot.updated_at)
+            return [offer.as_variant() for offer in offers], fetched_at
+        return await self.get_variants(check_in, check_out, adults), None
 
     async def get_hotel_stats(self) -> HotelStats:
         """
@@ -403,7 +641,20 @@ class ShelterClient:
         # we will fetch hotel params to get total categories and make a sample search
         # to estimate availability. This is a BEST EFFORT implementation.
         
-        params = await self.get_hotel_params()
+        check_in = get_local_today()
+        check_out = check_in + timedelta(days=1)
+        night = await self._calendar_night(check_in, adults=2)
+        if night is not None:
+            params = await self.get_hotel_params()
+            available_rooms = sum(cell.available_count for cell in night.cells.values())
+            last_updated = night.fetched_at
+        else:
+            params, variants = await asyncio.gather(
+                self.get_hotel_params(),
+                self.get_variants(check_in, check_out, adults=2),
+            )
+            available_rooms = sum(v.available_count for v in variants)
+            last_updated = datetime.now()
         categories = params.get("categories", [])
         
         # Estimate total rooms (Widget API doesn't give total count per category, assume 10 per cat for mockup/estimation if missing)
@@ -411,12 +662,6 @@ class ShelterClient:
         # We will use the count of categories as a proxy or fixed number if not available.
         total_rooms = len(categories) * 10 if categories else 50
         
-        # Check availability for TOMORROW
-        check_in = date.today()
-        check_out = check_in + timedelta(days=1)
-        variants = await self.get_variants(check_in, check_out, adults=2)
-        
-        available_rooms = sum(v.available_count for v in variants)
         occupied_rooms = max(0, total_rooms - available_rooms)
         occupancy_rate = occupied_rooms / total_rooms if total_rooms > 0 else 0.0
         
@@ -425,23 +670,33 @@ class ShelterClient:
             occupied_rooms=occupied_rooms,
             available_rooms=available_rooms,
             occupancy_rate=occupancy_rate,
-            last_updated=datetime.now()
+            last_updated=last_updated
         )
 
     async def get_room_availability(self) -> List[RoomAvailability]:
         """
         Get availability by category
         """
-        check_in = date.today()
+        check_in = get_local_today()
         check_out = check_in + timedelta(days=1)
-        variants = await self.get_variants(check_in, check_out, adults=2)
+        night = await self._calendar_night(check_in, adults=2)
+        if night is not None:
+            params = await self.get_hotel_params()
+            # Calendar cells carry the same fields as variants
+            variant_map = {cell.category_name: cell for cell in night.cells.values()}
+            updated_at = night.fetched_at
+        else:
+            # Availability for tomorrow plus all categories to show even those with 0 availability
+            variants, params = await asyncio.gather(
+                self.get_variants(check_in, check_out, adults=2),
+                self.get_hotel_params(),
+            )
+            # Create a map of updated availability from search
+            variant_map = {v.category_name: v for v in variants}
+            updated_at = datetime.now()
         
         availability_list = []
-        # Create a map of updated availability from search
-        variant_map = {v.category_name: v for v in variants}
         
-        # Get all categories to show even those with 0 availability
-        params = await self.get_hotel_params()
         categories = params.get("categories", [])
         
         for cat in categories:
@@ -461,7 +716,8 @@ class ShelterClient:
                 room_name=name,
                 is_available=is_available,
                 price=price,
-                capacity=capacity
+                capacity=capacity,
+                updated_at=updated_at,
             ))
             
         return availability_list
@@ -479,6 +735,8 @@ class ShelterPMSClient:
         settings = get_settings()
         self.base_url = (base_url or settings.shelter_pms_base_url).rstrip("/")
         self.pms_token = pms_token or settings.shelter_pms_token
+        # ByFilter field taking a "modified since" timestamp; empty when the PMS has none
+        self.modified_since_field = settings.shelter_pms_modified_since_field
         self._timeout = aiohttp.ClientTimeout(total=15, connect=5, sock_read=10)
 
         if not self.pms_token:
@@ -489,6 +747,20 @@ class ShelterPMSClient:
         endpoint: str,
         method: str = "GET",
         data: Optional[dict[str, Any]] = None,
+        idempotent: bool | None = None,
+    ) -> Any:
+        """PMS API call; GETs (and reads passing ``idempotent=True``) are retried on transient errors."""
+        return await _call_with_breaker(
+            "pms",
+            lambda: self._pms_request_once(endpoint, method, data),
+            method == "GET" if idempotent is None else idempotent,
+        )
+
+    async def _pms_request_once(
+        self,
+        endpoint: str,
+        method: str = "GET",
+        data: Optional[dict[str, Any]] = None,
     ) -> Any:
         if not self.pms_token:
             raise ShelterAPIError(message="No Shelter PMS token configured")
@@ -505,126 +777,82 @@ class ShelterPMSClient:
             candidate_endpoints.append(endpoint[4:])
 
         try:
-            async with aiohttp.ClientSession(timeout=self._timeout) as session:
-                last_error: ShelterAPIError | None = None
-                for candidate in candidate_endpoints:
-                    url = f"{self.base_url}{candidate}"
-                    async with session.request(
-                        method,
-                        url,
-                        headers=headers,
-                        json=data,
-                    ) as response:
-                        raw_body = await response.text()
-                        parsed: Any = None
-                        if raw_body.strip():
-                            try:
-                                parsed = json.loads(raw_body)
-                            except json.JSONDecodeError:
-                                parsed = raw_body
-
-                        if response.status == 404 and candidate != candidate_endpoints[-1]:
-                            continue
-
-                        if response.status >= 400:
-                            snippet = (raw_body or "").strip().replace("\n", " ")[:300]
-                            last_error = ShelterAPIError(
-                                code=str(response.status),
-                                message=f"Shelter PMS API error ({response.status})",
-                                description=snippet or None,
-                            )
-                            break
-
-                        return parsed
-
-                if last_error is not None:
-                    raise last_error
+            last_error: ShelterAPIError | None = None
+            for candidate in candidate_endpoints:
+                url = f"{self.base_url}{candidate}"
+                async with shelter_http.request(
+                    method,
+                    url,
+                    endpoint,
+                    headers=headers,
+                    json=data,
+                    timeout=self._timeout,
+                ) as response:
+                    # Decode JSON straight from the bytes: large ByFilter pages
+                    # are not held a second time as a decoded str.
+                    body = await response.read()
+                    parsed: Any = None
+                    if body.strip():
+                        try:
+                            parsed = json.loads(body)
+                        except ValueError:
+                            parsed = body.decode("utf-8", errors="replace")
+                    del body
+
+                    if response.status == 404 and candidate != candidate_endpoints[-1]:
+                        continue
+
+                    if response.status >= 400:
+                        raw_body = parsed if isinstance(parsed, str) else json.dumps(parsed, ensure_ascii=False)
+                        snippet = ("" if parsed is None else raw_body).strip().replace("\n", " ")[:300]
+                        last_error = ShelterAPIError(
+                            code=str(response.status),
+                            message=f"Shelter PMS API error ({response.status})",
+                            description=snippet or None,
+                            transient=_is_transient_status(response.status),
+                        )
+                        break
+
+                    return parsed
+
+            if last_error is not None:
+                raise last_error
         except aiohttp.ClientError as exc:
-            raise ShelterAPIError(message=f"PMS network error: {exc}") from exc
+            raise ShelterAPIError(message=f"PMS network error: {exc}", transient=True) from exc
+        except asyncio.TimeoutError as exc:
+            raise ShelterAPIError(message="PMS network error: request timed out", transient=True) from exc
 
     def _parse_reservation(self, item: dict[str, Any]) -> PMSReservation | None:
-        reservation_id = _coerce_str(
-            item.get("id")
-            or item.get("reservationId")
-            or item.get("reservation_id")
-            or item.get("Id")
-        )
-        check_in = _parse_date_value(
-            item.get("checkIn")
-            or item.get("check_in")
-            or item.get("arrivalDate")
-            or item.get("from")
-            or item.get("livedFrom")
-            or item.get("beginDate")
-        )
-        check_out = _parse_date_value(
-            item.get("checkOut")
-            or item.get("check_out")
-            or item.get("departureDate")
-            or item.get("until")
-            or item.get("livedTo")
-            or item.get("endDate")
-        )
-        if not reservation_id or not check_in or not check_out:
-            return None
-
-        status = _coerce_str(
-            item.get("status")
-            or item.get("reservationStatus")
-            or item.get("state")
-        ) or "UNKNOWN"
-        guest_name = _coerce_str(
-            item.get("guestName")
-            or item.get("customerName")
-            or item.get("fullName")
-            or item.get("name")
-        )
-        is_annulled = _coerce_bool(
-            item.get("isAnnul")
-            or item.get("is_annul")
-            or item.get("annulled")
-            or item.get("isCanceled")
-            or item.get("cancelled")
-        ) or any(token in status.lower() for token in ("annul", "cancel"))
-
-        return PMSReservation(
-            id=reservation_id,
-            status=status,
-            check_in=check_in,
-            check_out=check_out,
-            room_number=_extract_room_number(item),
-            guest_name=guest_name,
-            is_annulled=is_annulled,
-            guests=_extract_guest_items(item),
-        )
+        return parse_reservation(item)
 
     def _parse_guest(self, item: dict[str, Any]) -> PMSGuest | None:
-        guest_id = _coerce_str(
-            item.get("id")
-            or item.get("guestId")
-            or item.get("guest_id")
-            or item.get("Id")
-        ) or "unknown"
-        return PMSGuest(
-            id=guest_id,
-            first_name=_coerce_str(item.get("firstName") or item.get("first_name") or item.get("name")),
-            last_name=_coerce_str(item.get("lastName") or item.get("last_name") or item.get("surname")),
-            phone=_coerce_str(item.get("phone") or item.get("phoneNumber") or item.get("mobilePhone")),
-            email=_coerce_str(item.get("email") or item.get("emailAddress")),
-        )
+        return parse_guest(item)
 
-    async def get_reservations_by_filter(
+    async def iter_reservations_by_filter(
         self,
         lived_from: date,
         lived_to: date,
         is_annul: bool = False,
-    ) -> list[PMSReservation]:
+        on_page: Callable[[int], None] | None = None,
+        modified_since: datetime | None = None,
+        prefetch: bool = True,
+    ) -> AsyncIterator[PMSReservation]:
+        """Stream reservations living in the window, page by page.
+
+        As soon as a page arrives the request for the next one is started
+        (``prefetch``), so the network wait overlaps parsing and whatever the
+        consumer does with the yielded reservations. At most two pages are
+        held at a time. With ``prefetch=False`` the next page is requested only
+        once the current one has been consumed, holding a single page.
+        ``on_page(item_count)`` is called per page fetched.
+
+        ``modified_since`` narrows the result to reservations changed after it,
+        if ``modified_since_field`` is configured; otherwise it is ignored.
+        """
         lived_from_dt = datetime.combine(lived_from, time.min).isoformat()
         lived_to_dt = datetime.combine(lived_to, time.max.replace(microsecond=0)).isoformat()
-        reservations: list[PMSReservation] = []
-        offset = 0
 
-        while True:
+        def fetch(offset: int) -> Awaitable[Any]:
             payload = {
                 "livedFrom": lived_from_dt,
                 "livedTo": lived_to_dt,
@@ -634,23 +862,61 @@ class ShelterPMSClient:
                     "count": self.PAGE_SIZE,
                 },
             }
-            result = await self._pms_request("/api/Reservations/ByFilter", method="POST", data=payload)
-            items = _extract_items(result)
-            for item in items:
-                reservation = self._parse_reservation(item)
-                if reservation:
-                    reservations.append(reservation)
-
-            total_count = result.get("count") if isinstance(result, dict) else None
-            if not items:
-                break
-            offset += len(items)
-            if isinstance(total_count, int) and offset >= total_count:
-                break
-            if len(items) < self.PAGE_SIZE:
-                break
-
-        return reservations
+            if modified_since is not None and self.modified_since_field:
+                payload[self.modified_since_field] = modified_since.replace(microsecond=0).isoformat()
+            return self._pms_request("/api/Reservations/ByFilter", method="POST", data=payload, idempotent=True)
+
+        offset = 0
+        pending: asyncio.Future | None = asyncio.ensure_future(fetch(offset))
+        try:
+            while pending is not None:
+                result = await pending
+                pending = None
+                items = _extract_items(result)
+                if on_page is not None:
+                    on_page(len(items))
+
+                total_count = result.get("count") if isinstance(result, dict) else None
+                offset += len(items)
+                has_more = bool(items) and len(items) >= self.PAGE_SIZE and not (
+                    isinstance(total_count, int) and offset >= total_count
+                )
+                if has_more and prefetch:
+                    pending = asyncio.ensure_future(fetch(offset))
+                del result
+
+                for item in items:
+                    reservation = self._parse_reservation(item)
+                    if reservation:
+                        yield reservation
+                del items
+                if has_more and not prefetch:
+                    pending = asyncio.ensure_future(fetch(offset))
+        finally:
+            # The consumer stopped early or a page failed: drop the prefetch.
+            if pending is not None:
+                if pending.done():
+                    if not pending.cancelled():
+                        pending.exception()
+                else:
+                    pending.cancel()
+
+    async def get_reservations_by_filter(
+        self,
+        lived_from: date,
+        lived_to: date,
+        is_annul: bool = False,
+        on_page: Callable[[int], None] | None = None,
+        modified_since: datetime | None = None,
+    ) -> list[PMSReservation]:
+        """All of :meth:`iter_reservations_by_filter` as a list."""
+
+        return [
+            reservation
+            async for reservation in self.iter_reservations_by_filter(
+                lived_from, lived_to, is_annul=is_annul, on_page=on_page, modified_since=modified_since
+            )
+        ]
 
     async def get_reservation_guests(self, reservation_id: str) -> list[PMSGuest]:
         try:
@@ -692,7 +958,10 @@ def get_shelter_client() -> ShelterClient:
     """Get Shelter API client instance"""
     global _shelter_client
     if _shelter_client is None:
-        _shelter_client = ShelterClient()
+        # Imported here: the calendar is built on top of this module.
+        from services.availability_calendar import availability_calendar
+
+        _shelter_client = ShelterClient(calendar=availability_calendar)
     return _shelter_client
 
 
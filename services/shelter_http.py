@@ -0,0 +1,357 @@
+"""Shared HTTP connection pool and latency stats for the Shelter clients.
+
+``ShelterClient`` (booking widget API) and ``ShelterPMSClient`` (PMS API)
+used to open a new ``aiohttp.ClientSession`` per call, paying DNS, TCP and
+TLS setup on every request. Both now borrow the session of one
+:class:`ShelterHTTPPool`: a single ``TCPConnector`` with keep-alive, a DNS
+cache and connection limits from ``SHELTER_HTTP_*`` settings. Each client
+still passes its own timeout per request.
+
+Every request is timed per endpoint (path segments holding ids are folded
+into ``{id}``). Connection events are counted through an aiohttp trace, so
+:func:`snapshot` also shows how many connections were opened versus reused.
+The bot and web_admin call :func:`close_shelter_http` on shutdown.
+
+:meth:`ShelterHTTPPool.call` adds resilience around one logical call: a
+:class:`CircuitBreaker` per API fails fast while Shelter is down, and
+idempotent calls are retried with jittered exponential backoff. Only errors
+flagged ``transient`` (network errors, timeouts, 429 and 5xx) are retried
+or count against the breaker; a 4xx means Shelter is up.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import re
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, TypeVar
+
+import aiohttp
+
+from config import get_settings
+
+
+logger = logging.getLogger(__name__)
+
+_ID_SEGMENT = re.compile(r"/[^/]*\d[^/]*(?=/|$)")
+# Latency samples kept per endpoint for percentiles
+LATENCY_WINDOW = 512
+
+T = TypeVar("T")
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling Shelter while the breaker is open."""
+
+    def __init__(self, name: str, retry_in: float) -> None:
+        super().__init__(f"{name} circuit open, retry in {retry_in:.0f}s")
+        self.name = name
+        self.retry_in = retry_in
+
+
+def is_transient(exc: BaseException) -> bool:
+    return bool(getattr(exc, "transient", False))
+
+
+def endpoint_key(endpoint: str) -> str:
+    """``/api/Reservations/123/Guests`` -> ``/api/Reservations/{id}/Guests``."""
+
+    return _ID_SEGMENT.sub("/{id}", endpoint.split("?", 1)[0])
+
+
+def _percentile(ordered: list[float], fraction: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+@dataclass
+class EndpointStats:
+    calls: int = 0
+    errors: int = 0
+    total_time: float = 0.0
+    max_time: float = 0.0
+    last_time: float = 0.0
+    recent: deque = field(default_factory=lambda: deque(maxlen=LATENCY_WINDOW))
+
+    def as_dict(self, name: str) -> dict[str, Any]:
+        calls = self.calls or 1
+        ordered = sorted(self.recent)
+        return {
+            "endpoint": name,
+            "calls": self.calls,
+            "errors": self.errors,
+            "error_rate": round(self.errors / calls, 4),
+            "avg_ms": round(self.total_time * 1000 / calls, 2),
+            "p50_ms": round(_percentile(ordered, 0.50) * 1000, 2),
+            "p95_ms": round(_percentile(ordered, 0.95) * 1000, 2),
+            "p99_ms": round(_percentile(ordered, 0.99) * 1000, 2),
+            "max_ms": round(self.max_time * 1000, 2),
+            "last_ms": round(self.last_time * 1000, 2),
+        }
+
+
+class CircuitBreaker:
+    """closed -> open after ``failure_threshold`` consecutive transient failures;
+    open -> half-open after ``reset_timeout``, where one trial call decides."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self.name = name
+        self.failure_threshold = max(int(failure_threshold), 1)
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at: float | None = None
+        self.times_opened = 0
+        self.rejected = 0
+        self._trial_running = False
+
+    def before_call(self) -> None:
+        if self.state == self.CLOSED:
+            return
+        if self.state == self.OPEN:
+            elapsed = self._clock() - (self.opened_at or 0.0)
+            if elapsed < self.reset_timeout:
+                self.rejected += 1
+                raise CircuitOpenError(self.name, self.reset_timeout - elapsed)
+            self.state = self.HALF_OPEN
+            self._trial_running = False
+        if self._trial_running:
+            self.rejected += 1
+            raise CircuitOpenError(self.name, 0.0)
+        self._trial_running = True
+
+    def release_trial(self) -> None:
+        """Let another call try a half-open circuit, e.g. after the trial was cancelled."""
+
+        self._trial_running = False
+
+    def record_success(self) -> None:
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+
+    def record_failure(self) -> None:
+        self._trial_running = False
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.times_opened += 1
+                logger.warning("Shelter %s circuit opened after %s failures", self.name, self.failures)
+            self.state = self.OPEN
+            self.opened_at = self._clock()
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+            "open_for_s": round(self._clock() - self.opened_at, 1) if self.opened_at is not None else None,
+        }
+
+
+class ShelterHTTPPool:
+    def __init__(
+        self,
+        limit: int = 20,
+        limit_per_host: int = 10,
+        keepalive_timeout: float = 30.0,
+        dns_cache_ttl: int = 300,
+        retry_attempts: int = 3,
+        retry_base_delay: float = 0.5,
+        retry_max_delay: float = 5.0,
+        breaker_failures: int = 5,
+        breaker_reset: float = 30.0,
+    ) -> None:
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        self.retry_attempts = max(int(retry_attempts), 1)
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.breaker_failures = breaker_failures
+        self.breaker_reset = breaker_reset
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self.retries = 0
+        self._session: aiohttp.ClientSession | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._stats: dict[str, EndpointStats] = {}
+        self._lock = threading.Lock()
+        self.connections_created = 0
+        self.connections_reused = 0
+        self.sessions_created = 0
+
+    def _trace_config(self) -> aiohttp.TraceConfig:
+        trace = aiohttp.TraceConfig()
+
+        async def on_create(session, context, params) -> None:  # noqa: ARG001
+            self.connections_created += 1
+
+        async def on_reuse(session, context, params) -> None:  # noqa: ARG001
+            self.connections_reused += 1
+
+        trace.on_connection_create_end.append(on_create)
+        trace.on_connection_reuseconn.append(on_reuse)
+        return trace
+
+    def session(self) -> aiohttp.ClientSession:
+        """The pooled session, created on first use in the running event loop."""
+
+        loop = asyncio.get_running_loop()
+        if self._session is not None and not self._session.closed and self._loop is loop:
+            return self._session
+        if self._session is not None and not self._session.closed and self._loop is not None and not self._loop.is_closed():
+            # Sessions are bound to their loop; one-off scripts call asyncio.run() repeatedly.
+            logger.warning("Shelter HTTP session reused from another event loop; opening a new one")
+        connector = aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            keepalive_timeout=self.keepalive_timeout,
+            ttl_dns_cache=self.dns_cache_ttl,
+        )
+        self._session = aiohttp.ClientSession(connector=connector, trace_configs=[self._trace_config()])
+        self._loop = loop
+        self.sessions_created += 1
+        return self._session
+
+    @asynccontextmanager
+    async def request(self, method: str, url: str, endpoint: str, **kwargs: Any) -> AsyncIterator[aiohttp.ClientResponse]:
+        """``session.request`` on the pooled session, timed under ``endpoint``.
+
+        The time covers the whole block, so reading the body inside it counts.
+        Raised exceptions and HTTP statuses >= 500 are counted as errors.
+        """
+
+        started = time.perf_counter()
+        failed = True
+        try:
+            async with self.session().request(method, url, **kwargs) as response:
+                yield response
+                failed = response.status >= 500
+        finally:
+            self._record(endpoint_key(endpoint), time.perf_counter() - started, failed)
+
+    def _record(self, name: str, elapsed: float, failed: bool) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(name, EndpointStats())
+            stats.calls += 1
+            stats.errors += int(failed)
+            stats.total_time += elapsed
+            stats.max_time = max(stats.max_time, elapsed)
+            stats.last_time = elapsed
+            stats.recent.append(elapsed)
+
+    def breaker(self, name: str) -> CircuitBreaker:
+        breaker = self._breakers.get(name)
+        if breaker is None:
+            breaker = self._breakers[name] = CircuitBreaker(name, self.breaker_failures, self.breaker_reset)
+        return breaker
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential delay before retry number ``attempt`` (1-based)."""
+
+        return random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * 2 ** (attempt - 1)))
+
+    async def call(self, api: str, attempt: Callable[[], Awaitable[T]], idempotent: bool) -> T:
+        """Run ``attempt`` behind the ``api`` circuit breaker, retrying transient errors if ``idempotent``.
+
+        Raises :class:`CircuitOpenError` without calling Shelter while the breaker is open.
+        """
+
+        breaker = self.breaker(api)
+        attempts = self.retry_attempts if idempotent else 1
+        for number in range(1, attempts + 1):
+            breaker.before_call()
+            try:
+                result = await attempt()
+            except Exception as exc:
+                if not is_transient(exc):
+                    breaker.record_success()
+                    raise
+                breaker.record_failure()
+                if number >= attempts or breaker.state == CircuitBreaker.OPEN:
+                    raise
+                self.retries += 1
+                delay = self.backoff(number)
+                logger.info("Shelter %s call failed (%s), retry %s/%s in %.2fs", api, exc, number, attempts - 1, delay)
+                await asyncio.sleep(delay)
+            except BaseException:
+                # Cancelled: no verdict on Shelter, but the half-open trial must not stay taken.
+                breaker.release_trial()
+                raise
+            else:
+                breaker.record_success()
+                return result
+        raise AssertionError("unreachable")  # pragma: no cover
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            endpoints = [stats.as_dict(name) for name, stats in self._stats.items()]
+        return {
+            "limit": self.limit,
+            "limit_per_host": self.limit_per_host,
+            "sessions_created": self.sessions_created,
+            "connections_created": self.connections_created,
+            "connections_reused": self.connections_reused,
+            "retries": self.retries,
+            "breakers": {name: breaker.as_dict() for name, breaker in self._breakers.items()},
+            "endpoints": sorted(endpoints, key=lambda row: row["calls"], reverse=True),
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+            self.connections_created = 0
+            self.connections_reused = 0
+            self.retries = 0
+
+    async def close(self) -> None:
+        session, self._session = self._session, None
+        self._loop = None
+        if session is not None and not session.closed:
+            await session.close()
+
+
+def _build_pool() -> ShelterHTTPPool:
+    settings = get_settings()
+    return ShelterHTTPPool(
+        limit=settings.shelter_http_limit,
+        limit_per_host=settings.shelter_http_limit_per_host,
+        keepalive_timeout=settings.shelter_http_keepalive,
+        dns_cache_ttl=settings.shelter_http_dns_ttl,
+        retry_attempts=settings.shelter_retry_attempts,
+        retry_base_delay=settings.shelter_retry_base_delay,
+        breaker_failures=settings.shelter_breaker_failures,
+        breaker_reset=settings.shelter_breaker_reset,
+    )
+
+
+shelter_http = _build_pool()
+
+
+def snapshot() -> dict[str, Any]:
+    return shelter_http.snapshot()
+
+
+def reset() -> None:
+    shelter_http.reset()
+
+
+async def close_shelter_http() -> None:
+    """Close the pooled session (bot and web_admin shutdown)."""
+
+    await shelter_http.close()
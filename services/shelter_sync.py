@@ -1,14 +1,19 @@
 from __future__ import annotations
 
 import asyncio
+import hashlib
+import json
 import logging
-from datetime import timedelta
+import time
+from dataclasses import asdict, dataclass
+from datetime import date, datetime, timedelta
+from typing import AsyncIterable, AsyncIterator, Awaitable, Callable, Sequence
 
 from aiogram import Bot
 
 from config import get_settings
-from db.models import GuestBooking, ShelterSyncState, User
-from db.session import SessionLocal
+from db.models import GuestBooking, ShelterReservation, ShelterReservationGuest, ShelterSyncState, User
+from db.session import AsyncSessionLocal
 from services.guest_context import get_local_now, get_local_today
 from services.phone_utils import normalize_phone
 from services.shelter import PMSGuest, PMSReservation, ShelterAPIError, ShelterPMSClient, get_shelter_pms_client
@@ -19,6 +24,22 @@ logger = logging.getLogger(__name__)
 SYNC_WINDOW_PAST_DAYS = 1
 SYNC_WINDOW_FUTURE_DAYS = 30
 STARTUP_DELAY_SECONDS = 30
+# Bound parameters per IN (...) when matching phone tails against the mirror
+_MIRROR_LOOKUP_CHUNK = 500
+
+
+@dataclass
+class SyncTimings:
+    pages: int = 0
+    reservations: int = 0
+    changed: int = 0
+    guest_calls: int = 0
+    matched: int = 0
+    wall_time: float = 0.0
+    full: bool = True
+
+    def count_page(self, items: int) -> None:  # noqa: ARG002 - on_page callback
+        self.pages += 1
 
 
 def _phone_tail(phone: str | None) -> str:
@@ -28,14 +49,13 @@ def _phone_tail(phone: str | None) -> str:
     return normalized
 
 
-def _get_users_with_phones() -> dict[str, str]:
+def _get_users_with_phones(db) -> dict[str, str]:
     mapping: dict[str, str] = {}
-    with SessionLocal() as db:
-        users = db.query(User).filter(User.phone.isnot(None)).all()
-        for user in users:
-            tail = _phone_tail(user.phone)
-            if tail:
-                mapping[tail] = user.telegram_id
+    users = db.query(User).filter(User.phone.isnot(None)).all()
+    for user in users:
+        tail = _phone_tail(user.phone)
+        if tail:
+            mapping[tail] = user.telegram_id
     return mapping
 
 
@@ -48,9 +68,209 @@ def _get_or_create_sync_state(db) -> ShelterSyncState:
     return state
 
 
-def _set_last_sync_at(db) -> None:
+def _set_last_sync_at(db, synced_at: datetime | None = None) -> None:
     state = _get_or_create_sync_state(db)
-    state.last_sync_at = get_local_now()
+    state.last_sync_at = synced_at or get_local_now()
+
+
+def _naive(value: datetime | None) -> datetime | None:
+    return value.replace(tzinfo=None) if value is not None else None
+
+
+def _users_fingerprint(users_by_phone: dict[str, str]) -> str:
+    return hashlib.sha256(json.dumps(sorted(users_by_phone.items())).encode("utf-8")).hexdigest()
+
+
+def reservation_hash(reservation: PMSReservation) -> str:
+    """Content hash of a reservation, including whether it is active today.
+
+    The active flag makes a stay that starts (or ends) today count as changed,
+    so its booking is updated even though the PMS record itself is unchanged.
+    """
+
+    payload = asdict(reservation)
+    payload["active_today"] = _reservation_is_active(reservation)
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class SyncPlan:
+    """What the previous syncs left behind, read before fetching."""
+
+    users_by_phone: dict[str, str]
+    hashes: dict[str, str]
+    last_sync_at: datetime | None
+    last_full_sync_at: datetime | None
+    users_fingerprint: str | None
+
+
+def _load_sync_plan(db) -> SyncPlan:
+    state = _get_or_create_sync_state(db)
+    return SyncPlan(
+        users_by_phone=_get_users_with_phones(db),
+        hashes=dict(db.query(ShelterReservation.id, ShelterReservation.content_hash).all()),
+        last_sync_at=state.last_sync_at,
+        last_full_sync_at=state.last_full_sync_at,
+        users_fingerprint=state.users_fingerprint,
+    )
+
+
+def _store_mirror(
+    db,
+    guests_by_reservation: list[tuple[PMSReservation, list[PMSGuest]]],
+    hashes: dict[str, str],
+) -> None:
+    """Upsert the applied reservations and replace their guests' phones in the local mirror."""
+
+    if not guests_by_reservation:
+        return
+    now = datetime.utcnow()
+    reservation_ids = [reservation.id for reservation, _guests in guests_by_reservation]
+    db.query(ShelterReservationGuest).filter(
+        ShelterReservationGuest.reservation_id.in_(reservation_ids)
+    ).delete(synchronize_session=False)
+    for reservation, guests in guests_by_reservation:
+        db.merge(
+            ShelterReservation(
+                id=reservation.id,
+                content_hash=hashes[reservation.id],
+                check_in_date=reservation.check_in,
+                check_out_date=reservation.check_out,
+                is_annulled=reservation.is_annulled,
+                status=reservation.status,
+                room_number=reservation.room_number,
+                guest_name=reservation.guest_name,
+                synced_at=now,
+            )
+        )
+        tails = {_phone_tail(guest.phone): _build_guest_name(reservation, guest) for guest in guests}
+        db.add_all(
+            ShelterReservationGuest(reservation_id=reservation.id, phone_tail=tail, guest_name=name)
+            for tail, name in tails.items()
+            if tail
+        )
+
+
+def _prune_mirror(db, before: date) -> int:
+    """Drop mirrored reservations that checked out before ``before``."""
+
+    stale = db.query(ShelterReservation.id).filter(ShelterReservation.check_out_date < before)
+    db.query(ShelterReservationGuest).filter(
+        ShelterReservationGuest.reservation_id.in_(stale.scalar_subquery())
+    ).delete(synchronize_session=False)
+    return db.query(ShelterReservation).filter(
+        ShelterReservation.check_out_date < before
+    ).delete(synchronize_session=False)
+
+
+def _drop_vanished(db, seen: set[str], lived_from: date, lived_to: date) -> int:
+    """Reconcile the mirror after a full sync of ``lived_from..lived_to``.
+
+    A mirrored reservation whose stay overlaps the window but that ByFilter no
+    longer returned was deleted in the PMS or moved out of the window. Its row
+    and guests are dropped, so it is neither matched to new guests nor used to
+    re-activate bookings, and the bookings linked to it are deactivated. A
+    reservation that comes back is linked to the same booking again.
+    """
+
+    in_window = db.query(ShelterReservation.id).filter(
+        ShelterReservation.check_in_date <= lived_to,
+        ShelterReservation.check_out_date >= lived_from,
+    )
+    vanished = [reservation_id for (reservation_id,) in in_window if reservation_id not in seen]
+    for start in range(0, len(vanished), _MIRROR_LOOKUP_CHUNK):
+        chunk = vanished[start:start + _MIRROR_LOOKUP_CHUNK]
+        db.query(GuestBooking).filter(
+            GuestBooking.shelter_reservation_id.in_(chunk),
+            GuestBooking.is_active == True,  # noqa: E712
+        ).update({"is_active": False}, synchronize_session=False)
+        db.query(ShelterReservationGuest).filter(
+            ShelterReservationGuest.reservation_id.in_(chunk)
+        ).delete(synchronize_session=False)
+        db.query(ShelterReservation).filter(ShelterReservation.id.in_(chunk)).delete(synchronize_session=False)
+    if vanished:
+        logger.info("PMS sync: %s mirrored reservations no longer returned by the PMS, dropped", len(vanished))
+    return len(vanished)
+
+
+def _mirrored_reservation(row: ShelterReservation) -> PMSReservation:
+    return PMSReservation(
+        id=row.id,
+        status=row.status or "",
+        check_in=row.check_in_date,
+        check_out=row.check_out_date,
+        room_number=row.room_number,
+        guest_name=row.guest_name,
+        is_annulled=row.is_annulled,
+        guests=[],
+    )
+
+
+def _match_from_mirror(db, users_by_phone: dict[str, str]) -> tuple[int, int]:
+    """Link users to mirrored reservations carrying their phone.
+
+    Returns ``(found, created)``: live mirrored reservations for these
+    phones, and bookings created or updated because the user was not yet
+    linked to one of them.
+    """
+
+    tails = list(users_by_phone)
+    since = get_local_today() - timedelta(days=SYNC_WINDOW_PAST_DAYS)
+    rows: list[tuple[ShelterReservationGuest, ShelterReservation]] = []
+    for start in range(0, len(tails), _MIRROR_LOOKUP_CHUNK):
+        rows.extend(
+            db.query(ShelterReservationGuest, ShelterReservation)
+            .join(ShelterReservation, ShelterReservation.id == ShelterReservationGuest.reservation_id)
+            .filter(
+                ShelterReservationGuest.phone_tail.in_(tails[start:start + _MIRROR_LOOKUP_CHUNK]),
+                ShelterReservation.is_annulled == False,  # noqa: E712
+                ShelterReservation.check_out_date >= since,
+            )
+            .all()
+        )
+    if not rows:
+        return 0, 0
+
+    reservation_ids = {reservation.id for _guest, reservation in rows}
+    linked = set(
+        db.query(GuestBooking.telegram_id, GuestBooking.shelter_reservation_id)
+        .filter(GuestBooking.shelter_reservation_id.in_(reservation_ids))
+        .all()
+    )
+    created = 0
+    for guest, reservation in rows:
+        telegram_id = users_by_phone[guest.phone_tail]
+        if (telegram_id, reservation.id) in linked:
+            continue
+        linked.add((telegram_id, reservation.id))
+        if _create_or_update_guest_booking(
+            db=db,
+            telegram_id=telegram_id,
+            reservation=_mirrored_reservation(reservation),
+            guest_name=guest.guest_name,
+        ):
+            created += 1
+    return len(reservation_ids), created
+
+
+def _refresh_active_flags(db, today: date) -> int:
+    """Flip ``is_active`` of synced bookings whose stay started or ended, touching only those rows."""
+
+    live = db.query(ShelterReservation.id).filter(ShelterReservation.is_annulled == False)  # noqa: E712
+    linked = GuestBooking.shelter_reservation_id.in_(live.scalar_subquery())
+    activated = db.query(GuestBooking).filter(
+        linked,
+        GuestBooking.is_active == False,  # noqa: E712
+        GuestBooking.check_in_date <= today,
+        GuestBooking.check_out_date >= today,
+    ).update({"is_active": True}, synchronize_session=False)
+    deactivated = db.query(GuestBooking).filter(
+        linked,
+        GuestBooking.is_active == True,  # noqa: E712
+        (GuestBooking.check_in_date > today) | (GuestBooking.check_out_date < today),
+    ).update({"is_active": False}, synchronize_session=False)
+    return activated + deactivated
 
 
 def _reservation_is_active(reservation: PMSReservation) -> bool:
@@ -140,61 +360,307 @@ def _create_or_update_guest_booking(
     return True
 
 
-async def sync_reservations_once() -> int:
-    users_by_phone = _get_users_with_phones()
-    with SessionLocal() as db:
-        _set_last_sync_at(db)
-        db.commit()
+def _store_timings(db, timings: SyncTimings) -> None:
+    state = _get_or_create_sync_state(db)
+    state.last_sync_duration_ms = int(timings.wall_time * 1000)
+    state.last_sync_pages = timings.pages
+    state.last_sync_reservations = timings.reservations
+    state.last_sync_guest_calls = timings.guest_calls
+    state.last_sync_matched = timings.matched
+    state.last_sync_changed = timings.changed
+
 
+def _apply_reservations(
+    db,
+    users_by_phone: dict[str, str],
+    annulled_reservations: list[PMSReservation],
+    guests_by_reservation: list[tuple[PMSReservation, list[PMSGuest]]],
+    timings: SyncTimings | None = None,
+    hashes: dict[str, str] | None = None,
+    synced_at: datetime | None = None,
+    users_fingerprint: str | None = None,
+    users_changed: bool = False,
+    window: tuple[date, date] | None = None,
+) -> int:
+    """Apply fetched reservations; with ``hashes`` also record them in the local mirror.
+
+    ``users_changed`` (incremental syncs only) additionally matches every
+    user against the mirror, for phones added since unchanged reservations
+    were last applied. On a full sync, ``window`` is the fetched
+    ``(lived_from, lived_to)``: mirrored reservations in it that were not
+    fetched (``hashes`` holds every one that was) are dropped.
+    """
+    matched = 0
+    seen_pairs: set[tuple[str, str]] = set()
+    for reservation in annulled_reservations:
+        _deactivate_annulled_booking(db, reservation.id)
+
+    for reservation, guests in guests_by_reservation:
+        for guest in guests:
+            tail = _phone_tail(guest.phone)
+            if not tail:
+                continue
+            telegram_id = users_by_phone.get(tail)
+            if not telegram_id:
+                continue
+            pair = (telegram_id, reservation.id)
+            if pair in seen_pairs:
+                continue
+            seen_pairs.add(pair)
+
+            if _create_or_update_guest_booking(
+                db=db,
+                telegram_id=telegram_id,
+                reservation=reservation,
+                guest_name=_build_guest_name(reservation, guest),
+            ):
+                matched += 1
+
+    if hashes is not None:
+        _store_mirror(db, guests_by_reservation, hashes)
+        if window is not None and timings is not None and timings.full:
+            db.flush()
+            _drop_vanished(db, set(hashes), *window)
+        if users_changed:
+            db.flush()
+            matched += _match_from_mirror(db, users_by_phone)[1]
+        _refresh_active_flags(db, get_local_today())
+    _set_last_sync_at(db, synced_at)
+    state = _get_or_create_sync_state(db)
+    state.users_fingerprint = users_fingerprint
+    if timings is not None and timings.full:
+        state.last_full_sync_at = synced_at or get_local_now()
+        _prune_mirror(db, get_local_today() - timedelta(days=SYNC_WINDOW_PAST_DAYS))
+    if timings is not None:
+        timings.matched = matched
+        _store_timings(db, timings)
+    return matched
+
+
+async def _fetch_guests(
+    client: ShelterPMSClient,
+    streams: Sequence[AsyncIterable[PMSReservation]],
+    concurrency: int,
+    timings: SyncTimings,
+) -> list[tuple[PMSReservation, list[PMSGuest]]]:
+    """Guests of every streamed reservation, in stream order.
+
+    The streams are consumed concurrently and each reservation's lookup starts
+    as soon as it arrives, while later pages are still being fetched. Lookups
+    for reservations without embedded guests run at most ``concurrency`` at a time.
+    """
+
+    semaphore = asyncio.Semaphore(max(int(concurrency), 1))
+    lookups: list[list[tuple[PMSReservation, asyncio.Task]]] = [[] for _ in streams]
+
+    async def guests_of(reservation: PMSReservation) -> list[PMSGuest]:
+        guests = _parse_embedded_guests(client, reservation)
+        if guests:
+            return guests
+        async with semaphore:
+            timings.guest_calls += 1
+            return await client.get_reservation_guests(reservation.id)
+
+    async def consume(index: int) -> None:
+        async for reservation in streams[index]:
+            lookups[index].append((reservation, asyncio.ensure_future(guests_of(reservation))))
+
+    consumed = await asyncio.gather(*(consume(index) for index in range(len(streams))), return_exceptions=True)
+    tasks = [task for stream_lookups in lookups for _, task in stream_lookups]
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    for result in [*consumed, *results]:
+        if isinstance(result, BaseException):
+            raise result
+    return [(reservation, task.result()) for stream_lookups in lookups for reservation, task in stream_lookups]
+
+
+def _needs_full_sync(plan: SyncPlan, now: datetime, full_interval: int) -> bool:
+    if plan.last_full_sync_at is None or plan.last_sync_at is None:
+        return True
+    return _naive(now) - _naive(plan.last_full_sync_at) >= timedelta(seconds=full_interval)
+
+
+async def sync_reservations_once(concurrency: int | None = None, full: bool | None = None) -> int:
+    """Import PMS reservations into guest bookings.
+
+    Only reservations whose content hash changed since the last sync are
+    looked up and applied, unless this is a full re-import: forced with
+    ``full=True``, or due every ``SHELTER_SYNC_FULL_INTERVAL_SECONDS``.
+    When the set of users with phones changed, they are also matched
+    against the local reservation mirror. Reservations are streamed page by
+    page; only changed ones are kept in memory.
+    """
+
+    # The ORM helpers above are synchronous; ``run_sync`` executes them on the
+    # aiosqlite connection so the event loop is not blocked by SQLite I/O.
+    started = time.perf_counter()
+    synced_at = get_local_now()
+    settings = get_settings()
+    timings = SyncTimings()
+    if concurrency is None:
+        concurrency = settings.shelter_sync_concurrency
+    async with AsyncSessionLocal() as db:
+        plan = await db.run_sync(_load_sync_plan)
+
+    users_by_phone = plan.users_by_phone
     if not users_by_phone:
+        async with AsyncSessionLocal() as db:
+            await db.run_sync(_set_last_sync_at)
+            await db.commit()
         logger.info("PMS sync: matched 0 bookings (no users with phones)")
         return 0
 
+    fingerprint = _users_fingerprint(users_by_phone)
+    if full is None:
+        full = _needs_full_sync(plan, synced_at, settings.shelter_sync_full_interval)
+    timings.full = full
+
     today = get_local_today()
     lived_from = today - timedelta(days=SYNC_WINDOW_PAST_DAYS)
     lived_to = today + timedelta(days=SYNC_WINDOW_FUTURE_DAYS)
     client = get_shelter_pms_client()
+    modified_since = None if full else plan.last_sync_at
 
-    reservations = await client.get_reservations_by_filter(lived_from, lived_to, is_annul=False)
-    annulled_reservations = await client.get_reservations_by_filter(lived_from, lived_to, is_annul=True)
+    hashes: dict[str, str] = {}
+    annulled_reservations: list[PMSReservation] = []
 
-    matched = 0
-    seen_pairs: set[tuple[str, str]] = set()
-    with SessionLocal() as db:
-        for reservation in annulled_reservations:
-            _deactivate_annulled_booking(db, reservation.id)
-
-        for reservation in [*reservations, *annulled_reservations]:
-            guests = _parse_embedded_guests(client, reservation)
-            if not guests:
-                guests = await client.get_reservation_guests(reservation.id)
-            for guest in guests:
-                tail = _phone_tail(guest.phone)
-                if not tail:
-                    continue
-                telegram_id = users_by_phone.get(tail)
-                if not telegram_id:
-                    continue
-                pair = (telegram_id, reservation.id)
-                if pair in seen_pairs:
-                    continue
-                seen_pairs.add(pair)
-
-                if _create_or_update_guest_booking(
-                    db=db,
-                    telegram_id=telegram_id,
-                    reservation=reservation,
-                    guest_name=_build_guest_name(reservation, guest),
-                ):
-                    matched += 1
-
-        _set_last_sync_at(db)
-        db.commit()
-
-    logger.info("PMS sync: matched %s bookings", matched)
+    async def changed(is_annul: bool) -> AsyncIterator[PMSReservation]:
+        # Unchanged reservations are dropped here, keeping only their hash.
+        stream = client.iter_reservations_by_filter(
+            lived_from, lived_to, is_annul=is_annul, on_page=timings.count_page, modified_since=modified_since
+        )
+        async for reservation in stream:
+            timings.reservations += 1
+            digest = hashes[reservation.id] = reservation_hash(reservation)
+            if full or plan.hashes.get(reservation.id) != digest:
+                timings.changed += 1
+                if is_annul:
+                    annulled_reservations.append(reservation)
+                yield reservation
+
+    guests_by_reservation = await _fetch_guests(client, [changed(False), changed(True)], concurrency, timings)
+    timings.wall_time = time.perf_counter() - started
+
+    async with AsyncSessionLocal() as db:
+        matched = await db.run_sync(
+            _apply_reservations,
+            users_by_phone,
+            annulled_reservations,
+            guests_by_reservation,
+            timings,
+            hashes,
+            synced_at,
+            fingerprint,
+            not full and fingerprint != plan.users_fingerprint,
+            (lived_from, lived_to),
+        )
+        await db.commit()
+
+    logger.info(
+        "PMS sync (%s): matched %s bookings (%s of %s reservations changed, %s pages, %s guest calls, %.2fs)",
+        "full" if full else "incremental",
+        matched,
+        timings.changed,
+        timings.reservations,
+        timings.pages,
+        timings.guest_calls,
+        timings.wall_time,
+    )
     return matched
 
 
+class SyncCoalescer:
+    """At most one sync in flight; on-demand requests are debounced and rate limited.
+
+    :meth:`request` waits ``debounce`` seconds before starting, so a burst of
+    guests joins one sync, and starts nothing if a sync finished less than
+    ``min_interval`` seconds ago. :meth:`run_now` (the periodic loop) skips
+    the debounce and the interval but still joins a sync already running.
+    """
+
+    def __init__(self, sync: Callable[[], Awaitable[int]], debounce: float, min_interval: float) -> None:
+        self._sync = sync
+        self.debounce = debounce
+        self.min_interval = min_interval
+        self._task: asyncio.Task | None = None
+        self._finished_at: float | None = None
+        self.started = 0
+        self.coalesced = 0
+        self.skipped = 0
+
+    async def _run(self, delay: float) -> int:
+        if delay > 0:
+            await asyncio.sleep(delay)
+        self.started += 1
+        try:
+            return await self._sync()
+        finally:
+            self._finished_at = time.monotonic()
+
+    async def _join_or_start(self, delay: float) -> int:
+        if self._task is not None and not self._task.done():
+            self.coalesced += 1
+        else:
+            self._task = asyncio.ensure_future(self._run(delay))
+        return await asyncio.shield(self._task)
+
+    async def request(self) -> int | None:
+        """Join or schedule a sync; ``None`` if one ran within ``min_interval``."""
+
+        running = self._task is not None and not self._task.done()
+        if not running and self._finished_at is not None and time.monotonic() - self._finished_at < self.min_interval:
+            self.skipped += 1
+            return None
+        return await self._join_or_start(self.debounce)
+
+    async def run_now(self) -> int:
+        return await self._join_or_start(0)
+
+
+def _build_coalescer() -> SyncCoalescer:
+    settings = get_settings()
+    return SyncCoalescer(
+        lambda: sync_reservations_once(),
+        debounce=settings.shelter_guest_sync_debounce,
+        min_interval=settings.shelter_guest_sync_min_interval,
+    )
+
+
+sync_coalescer = _build_coalescer()
+
+
+def _load_phone_tail(db, telegram_id: str) -> str:
+    phone = db.query(User.phone).filter(User.telegram_id == telegram_id).scalar()
+    return _phone_tail(phone)
+
+
+async def sync_guest_booking(telegram_id: str) -> bool:
+    """Link one guest to their PMS reservations by phone.
+
+    Answers from the local reservation mirror first. Only when the mirror has
+    no live reservation for the phone is a PMS sync requested, through
+    :data:`sync_coalescer`, so concurrent guests share one sync. Returns
+    whether a live reservation with the guest's phone is known.
+    """
+
+    async with AsyncSessionLocal() as db:
+        tail = await db.run_sync(_load_phone_tail, telegram_id)
+        if not tail:
+            return False
+        found, _created = await db.run_sync(_match_from_mirror, {tail: telegram_id})
+        await db.commit()
+    if found:
+        return True
+
+    if await sync_coalescer.request() is None:
+        return False
+    # The sync matched new phones against the refreshed mirror already.
+    async with AsyncSessionLocal() as db:
+        found, _created = await db.run_sync(_match_from_mirror, {tail: telegram_id})
+        await db.commit()
+    return bool(found)
+
+
 async def shelter_sync_loop(bot: Bot, interval_seconds: int | None = None) -> None:
     """Periodically sync Shelter PMS reservations to local guest bookings."""
     del bot  # reserved for future bot-side sync notifications
@@ -210,7 +676,7 @@ async def shelter_sync_loop(bot: Bot, interval_seconds: int | None = None) -> No
 
     while True:
         try:
-            await sync_reservations_once()
+            await sync_coalescer.run_now()
         except ShelterAPIError as exc:  # pragma: no cover
             logger.warning("Shelter PMS sync failed: %s", exc.message or exc)
         except Exception as exc:  # pragma: no cover
@@ -0,0 +1,194 @@
+"""Move closed tickets and their messages into cold-storage tables.
+
+``tickets`` and ``ticket_messages`` only keep open and recently closed
+tickets. Older COMPLETED/DECLINED/CANCELLED tickets are copied to
+``tickets_archive`` / ``ticket_messages_archive`` in small batches, each
+batch in its own short write transaction. Ids are never reused (migration
+11), so a plain INSERT into the archive fails loudly instead of overwriting
+an archived ticket. Freed pages are then returned to the filesystem with
+``PRAGMA incremental_vacuum``.
+
+Run once by hand with ``python -m services.ticket_archive``. Databases
+created before archival existed use ``auto_vacuum=NONE``; convert them during
+a maintenance window, with the bot and web_admin stopped, using
+``python -m services.ticket_archive --enable-incremental-vacuum``.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+from datetime import datetime, timedelta
+
+from sqlalchemy import DateTime, bindparam, text
+from sqlalchemy.engine import Engine
+
+from config import get_settings
+from db.models import ArchivedTicket, ArchivedTicketMessage, TicketStatus
+from db.session import engine as default_engine
+
+
+logger = logging.getLogger(__name__)
+
+CLOSED_STATUSES = (TicketStatus.COMPLETED, TicketStatus.DECLINED, TicketStatus.CANCELLED)
+BATCH_SIZE = 500
+STARTUP_DELAY_SECONDS = 120
+
+_TICKET_COLUMNS = ", ".join(
+    column.name for column in ArchivedTicket.__table__.columns if column.name != "archived_at"
+)
+_MESSAGE_COLUMNS = ", ".join(column.name for column in ArchivedTicketMessage.__table__.columns)
+
+_SELECT_BATCH = text(
+    """
+    SELECT id FROM tickets
+    WHERE status IN :statuses AND updated_at < :cutoff
+      AND NOT EXISTS (SELECT 1 FROM outbox o WHERE o.ticket_id = tickets.id AND o.status = 'PENDING')
+    ORDER BY id
+    LIMIT :limit
+    """
+).bindparams(bindparam("statuses", expanding=True), bindparam("cutoff", type_=DateTime))
+_COPY_TICKETS = text(
+    f"INSERT INTO tickets_archive ({_TICKET_COLUMNS}, archived_at) "
+    f"SELECT {_TICKET_COLUMNS}, :archived_at FROM tickets WHERE id IN :ids"
+).bindparams(bindparam("ids", expanding=True), bindparam("archived_at", type_=DateTime))
+_COPY_MESSAGES = text(
+    f"INSERT INTO ticket_messages_archive ({_MESSAGE_COLUMNS}) "
+    f"SELECT {_MESSAGE_COLUMNS} FROM ticket_messages WHERE ticket_id IN :ids"
+).bindparams(bindparam("ids", expanding=True))
+_DELETE_MESSAGES = text("DELETE FROM ticket_messages WHERE ticket_id IN :ids").bindparams(
+    bindparam("ids", expanding=True)
+)
+_DELETE_TICKETS = text("DELETE FROM tickets WHERE id IN :ids").bindparams(bindparam("ids", expanding=True))
+# Delivered/abandoned outbox rows are only useful for a short while.
+_PURGE_OUTBOX = text("DELETE FROM outbox WHERE status != 'PENDING' AND created_at < :cutoff").bindparams(
+    bindparam("cutoff", type_=DateTime)
+)
+
+
+def _archive_batch(bind: Engine, cutoff: datetime, batch_size: int) -> int:
+    with bind.begin() as conn:
+        ids = list(
+            conn.execute(
+                _SELECT_BATCH,
+                {
+                    "statuses": [status.name for status in CLOSED_STATUSES],
+                    "cutoff": cutoff,
+                    "limit": batch_size,
+                },
+            ).scalars()
+        )
+        if not ids:
+            return 0
+        conn.execute(_COPY_TICKETS, {"ids": ids, "archived_at": datetime.utcnow()})
+        conn.execute(_COPY_MESSAGES, {"ids": ids})
+        conn.execute(_DELETE_MESSAGES, {"ids": ids})
+        conn.execute(_DELETE_TICKETS, {"ids": ids})
+        return len(ids)
+
+
+def incremental_vacuum(bind: Engine) -> int:
+    """Release free pages to the filesystem; returns the number of pages freed.
+
+    Does nothing on files still using ``auto_vacuum=NONE`` (see
+    :func:`enable_incremental_vacuum`).
+    """
+
+    with bind.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        if int(conn.exec_driver_sql("PRAGMA auto_vacuum").scalar() or 0) != 2:
+            logger.info(
+                "auto_vacuum is not INCREMENTAL, freed pages stay in the file; "
+                "run python -m services.ticket_archive --enable-incremental-vacuum during maintenance"
+            )
+            return 0
+        free_pages = int(conn.exec_driver_sql("PRAGMA freelist_count").scalar() or 0)
+        if free_pages:
+            conn.exec_driver_sql("PRAGMA incremental_vacuum").fetchall()
+        return free_pages
+
+
+def enable_incremental_vacuum(bind: Engine) -> bool:
+    """Switch an existing file to ``auto_vacuum=INCREMENTAL``; returns False if it already was.
+
+    Needs a full VACUUM, which rewrites the file under the write lock: run it
+    with the bot and web_admin stopped.
+    """
+
+    with bind.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        if int(conn.exec_driver_sql("PRAGMA auto_vacuum").scalar() or 0) == 2:
+            return False
+        conn.exec_driver_sql("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.exec_driver_sql("VACUUM")
+        return True
+
+
+def archive_closed_tickets(
+    older_than_days: int | None = None,
+    *,
+    bind: Engine | None = None,
+    batch_size: int = BATCH_SIZE,
+    vacuum: bool = True,
+) -> int:
+    """Archive closed tickets last updated more than ``older_than_days`` ago.
+
+    Returns the number of tickets moved.
+    """
+
+    bind = bind or default_engine
+    days = get_settings().ticket_archive_after_days if older_than_days is None else older_than_days
+    if days <= 0:
+        return 0
+
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    archived = 0
+    while True:
+        moved = _archive_batch(bind, cutoff, batch_size)
+        archived += moved
+        if moved < batch_size:
+            break
+
+    with bind.begin() as conn:
+        conn.execute(_PURGE_OUTBOX, {"cutoff": cutoff})
+
+    if vacuum and bind.dialect.name == "sqlite" and bind.url.database not in (None, "", ":memory:"):
+        incremental_vacuum(bind)
+    if archived:
+        logger.info("Archived %s closed tickets older than %s days", archived, days)
+    return archived
+
+
+async def ticket_archive_loop(interval_seconds: int | None = None) -> None:
+    """Periodically archive closed tickets without blocking the event loop."""
+
+    settings = get_settings()
+    interval = interval_seconds or settings.ticket_archive_interval
+    if settings.ticket_archive_after_days <= 0:
+        logger.info("Ticket archival disabled: TICKET_ARCHIVE_AFTER_DAYS is 0")
+        return
+
+    await asyncio.sleep(STARTUP_DELAY_SECONDS)
+    while True:
+        try:
+            await asyncio.to_thread(archive_closed_tickets)
+        except Exception as exc:  # pragma: no cover
+            logger.warning("Ticket archival failed: %s", exc)
+        await asyncio.sleep(max(int(interval), 60))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--enable-incremental-vacuum",
+        action="store_true",
+        help="convert the database to auto_vacuum=INCREMENTAL (full VACUUM; stop the bot and web_admin first)",
+    )
+    args = parser.parse_args()
+    if args.enable_incremental_vacuum:
+        converted = enable_incremental_vacuum(default_engine)
+        print("Converted to auto_vacuum=INCREMENTAL" if converted else "Already auto_vacuum=INCREMENTAL")
+        return
+    print(f"Archived {archive_closed_tickets()} tickets")
+
+
+if __name__ == "__main__":
+    main()
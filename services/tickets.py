@@ -4,11 +4,13 @@ from datetime import datetime, timedelta
 import logging
 from typing import Any
 
-from sqlalchemy import or_
-from sqlalchemy.orm import Session
+from sqlalchemy import func, inspect, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.sql import ClauseElement
 
 from db.models import AdminUser, Ticket, TicketMessage, TicketMessageSender, TicketStatus, TicketType
-from db.session import SessionLocal
+from db.session import AsyncSessionLocal, SessionLocal
 
 
 logger = logging.getLogger(__name__)
@@ -22,6 +24,51 @@ class TicketRateLimitExceededError(Exception):
     """Raised when a user creates too many tickets in a short period of time."""
 
 
+def _increment(ticket: Ticket, column: Any) -> None:
+    """Add one to a counter column of ``ticket`` without reading it first.
+
+    A stored ticket gets ``column + 1`` as a SQL expression, so two sessions
+    appending to the same ticket both land instead of the later flush
+    overwriting the other's count. Calls before the flush stack on the
+    pending expression.
+    """
+
+    state = inspect(ticket)
+    if state.key is None:
+        # Not in the database yet: nobody else can be updating it.
+        setattr(ticket, column.key, (getattr(ticket, column.key) or 0) + 1)
+        return
+    pending = state.dict.get(column.key)
+    setattr(ticket, column.key, (pending if isinstance(pending, ClauseElement) else column) + 1)
+
+
+def record_ticket_message(ticket: Ticket, message: TicketMessage) -> None:
+    """Keep the denormalized message summary on ``ticket`` in step with a new ``message``.
+
+    Must be called wherever a message is added so ticket lists never need to
+    load message rows. The counters are written as SQL expressions, so they
+    read back only after the session flushes (or commits and refreshes).
+    """
+
+    if message.created_at is None:
+        message.created_at = datetime.utcnow()
+    created_at = message.created_at
+    _increment(ticket, Ticket.message_count)
+    if ticket.last_message_at is None or created_at > ticket.last_message_at:
+        ticket.last_message_at = created_at
+    if message.sender == TicketMessageSender.ADMIN:
+        # An admin reply counts as reading everything the guest wrote before it.
+        ticket.last_admin_message_at = created_at
+        ticket.unread_guest_count = 0
+    elif message.sender == TicketMessageSender.GUEST:
+        _increment(ticket, Ticket.unread_guest_count)
+
+
+def mark_ticket_viewed(ticket: Ticket) -> None:
+    ticket.admin_last_viewed_at = datetime.utcnow()
+    ticket.unread_guest_count = 0
+
+
 def create_ticket(
     *,
     type_: TicketType,
@@ -89,6 +136,7 @@ def create_ticket(
             request_id=request_id,
         )
         session.add(message)
+        record_ticket_message(ticket, message)
         session.commit()
         session.refresh(ticket)
         logger.info("Created ticket id=%s type=%s request_id=%s", ticket.id, ticket.type, ticket.request_id)
@@ -127,6 +175,7 @@ def append_guest_message_to_ticket(
             request_id=ticket.request_id,
         )
         session.add(message)
+        record_ticket_message(ticket, message)
         ticket.updated_at = datetime.utcnow()
         if ticket.dialog_open:
             ticket.dialog_last_activity_at = datetime.utcnow()
@@ -136,20 +185,6 @@ def append_guest_message_to_ticket(
         return ticket
 
 
-def mark_order_guest_notified(ticket_id: int) -> bool:
-    """Пометить заказ как уведомлённый, чтобы bridge не слал дубликат."""
-    with SessionLocal() as session:
-        ticket = session.query(Ticket).filter(Ticket.id == ticket_id).first()
-        if not ticket or ticket.type != TicketType.MENU_ORDER:
-            return False
-        payload = dict(ticket.payload or {})
-        payload["guest_notified"] = True
-        ticket.payload = payload
-        ticket.updated_at = datetime.utcnow()
-        session.commit()
-        return True
-
-
 def close_dialog_ticket(ticket_id: int) -> bool:
     with SessionLocal() as session:
         ticket = session.query(Ticket).filter(Ticket.id == ticket_id).first()
@@ -234,3 +269,227 @@ def is_user_admin(session: Session, telegram_id: str) -> bool:
         AdminUser.is_active == 1
     ).first()
     return admin is not None
+
+
+# --- Async variants -------------------------------------------------------
+#
+# Bot handlers run on the aiogram event loop and must not block it with
+# synchronous DB I/O. These functions mirror the synchronous API above on top
+# of ``AsyncSessionLocal``; the synchronous versions remain for web_admin,
+# scripts and tests.
+
+
+def _open_dialog_ticket_query(guest_chat_id: str):
+    now = datetime.utcnow()
+    return (
+        select(Ticket)
+        .where(
+            Ticket.guest_chat_id == guest_chat_id,
+            Ticket.dialog_open == True,
+            Ticket.status.in_([TicketStatus.NEW, TicketStatus.PENDING_ADMIN]),
+            or_(Ticket.dialog_expires_at.is_(None), Ticket.dialog_expires_at > now),
+        )
+        .order_by(Ticket.updated_at.desc())
+        .limit(1)
+    )
+
+
+async def create_ticket_async(
+    *,
+    type_: TicketType,
+    guest_chat_id: str,
+    guest_name: str | None,
+    room_number: str | None,
+    payload: dict[str, Any] | None,
+    initial_message: str,
+    rate_limit: bool = True,
+    dialog_open: bool = False,
+    dialog_timeout_seconds: int | None = None,
+) -> Ticket:
+    """Async version of :func:`create_ticket`."""
+
+    from uuid import uuid4
+
+    request_id = str(uuid4())
+
+    async with AsyncSessionLocal() as session:
+        if rate_limit:
+            window_start = datetime.utcnow() - timedelta(seconds=RATE_LIMIT_WINDOW_SECONDS)
+            recent_count = await session.scalar(
+                select(func.count(Ticket.id)).where(
+                    Ticket.guest_chat_id == guest_chat_id,
+                    Ticket.created_at >= window_start,
+                )
+            )
+            if (recent_count or 0) >= RATE_LIMIT_MAX_TICKETS:
+                logger.warning(
+                    "Rate limit exceeded for user %s: %s tickets in the last %s seconds",
+                    guest_chat_id,
+                    recent_count,
+                    RATE_LIMIT_WINDOW_SECONDS,
+                )
+                raise TicketRateLimitExceededError("Too many tickets created in a short period of time")
+
+        ticket = Ticket(
+            type=type_,
+            status=TicketStatus.PENDING_ADMIN,
+            guest_chat_id=guest_chat_id,
+            guest_name=guest_name,
+            room_number=room_number,
+            payload=payload,
+            request_id=request_id,
+            dialog_open=dialog_open,
+            dialog_expires_at=(
+                datetime.utcnow() + timedelta(seconds=(dialog_timeout_seconds or DIALOG_TIMEOUT_SECONDS_DEFAULT))
+                if dialog_open
+                else None
+            ),
+            dialog_last_activity_at=datetime.utcnow() if dialog_open else None,
+        )
+        session.add(ticket)
+        await session.flush()
+
+        message = TicketMessage(
+            ticket_id=ticket.id,
+            sender=TicketMessageSender.GUEST,
+            content=initial_message,
+            request_id=request_id,
+        )
+        session.add(message)
+        record_ticket_message(ticket, message)
+        await session.commit()
+        await session.refresh(ticket)
+        logger.info("Created ticket id=%s type=%s request_id=%s", ticket.id, ticket.type, ticket.request_id)
+        return ticket
+
+
+async def get_open_dialog_ticket_for_guest_async(session: AsyncSession, guest_chat_id: str) -> Ticket | None:
+    return await session.scalar(_open_dialog_ticket_query(guest_chat_id))
+
+
+async def append_guest_message_to_ticket_async(
+    *,
+    ticket_id: int,
+    content: str,
+    dialog_timeout_seconds: int = DIALOG_TIMEOUT_SECONDS_DEFAULT,
+) -> Ticket | None:
+    """Async version of :func:`append_guest_message_to_ticket`."""
+    async with AsyncSessionLocal() as session:
+        ticket = await session.get(Ticket, ticket_id)
+        if not ticket:
+            return None
+        message = TicketMessage(
+            ticket_id=ticket.id,
+            sender=TicketMessageSender.GUEST,
+            content=content,
+            request_id=ticket.request_id,
+        )
+        session.add(message)
+        record_ticket_message(ticket, message)
+        ticket.updated_at = datetime.utcnow()
+        if ticket.dialog_open:
+            ticket.dialog_last_activity_at = datetime.utcnow()
+            ticket.dialog_expires_at = datetime.utcnow() + timedelta(seconds=dialog_timeout_seconds)
+        await session.commit()
+        await session.refresh(ticket)
+        return ticket
+
+
+async def close_dialog_ticket_async(ticket_id: int) -> bool:
+    """Async version of :func:`close_dialog_ticket`."""
+    async with AsyncSessionLocal() as session:
+        ticket = await session.get(Ticket, ticket_id)
+        if not ticket:
+            return False
+        ticket.dialog_open = False
+        ticket.dialog_expires_at = None
+        ticket.updated_at = datetime.utcnow()
+        await session.commit()
+        return True
+
+
+async def close_expired_open_dialogs_async() -> int:
+    """Async version of :func:`close_expired_open_dialogs`."""
+    now = datetime.utcnow()
+    async with AsyncSessionLocal() as session:
+        expired = (
+            await session.scalars(
+                select(Ticket).where(
+                    Ticket.dialog_open == True,
+                    Ticket.dialog_expires_at.is_not(None),
+                    Ticket.dialog_expires_at <= now,
+                )
+            )
+        ).all()
+        if not expired:
+            return 0
+        for ticket in expired:
+            ticket.dialog_open = False
+            ticket.dialog_expires_at = None
+            ticket.updated_at = now
+        await session.commit()
+        return len(expired)
+
+
+async def list_active_admins_async(session: AsyncSession) -> list[AdminUser]:
+    result = await session.scalars(select(AdminUser).where(AdminUser.is_active == 1))
+    return list(result.all())
+
+
+async def get_pending_tickets_async(session: AsyncSession) -> list[Ticket]:
+    """Async version of :func:`get_pending_tickets`."""
+    result = await session.scalars(
+        select(Ticket)
+        .where(Ticket.status.in_([TicketStatus.PENDING_ADMIN, TicketStatus.NEW]))
+        .order_by(Ticket.created_at.desc())
+    )
+    return list(result.all())
+
+
+async def get_all_active_tickets_async(session: AsyncSession) -> list[Ticket]:
+    """Async version of :func:`get_all_active_tickets`."""
+    result = await session.scalars(
+        select(Ticket)
+        .where(Ticket.status.in_([TicketStatus.PENDING_ADMIN, TicketStatus.NEW]))
+        .order_by(Ticket.created_at.desc())
+    )
+    return list(result.all())
+
+
+async def count_active_tickets_async(session: AsyncSession) -> int:
+    """Count NEW/PENDING_ADMIN tickets without loading them."""
+    count = await session.scalar(
+        select(func.count(Ticket.id)).where(Ticket.status.in_([TicketStatus.PENDING_ADMIN, TicketStatus.NEW]))
+    )
+    return int(count or 0)
+
+
+async def get_ticket_by_id_async(session: AsyncSession, ticket_id: int) -> Ticket | None:
+    """Get ticket by ID with its messages eagerly loaded (no lazy I/O on the loop)."""
+    return await session.scalar(
+        select(Ticket).options(selectinload(Ticket.messages)).where(Ticket.id == ticket_id)
+    )
+
+
+async def update_ticket_status_async(session: AsyncSession, ticket_id: int, new_status: TicketStatus) -> bool:
+    """Async version of :func:`update_ticket_status`."""
+    ticket = await session.get(Ticket, ticket_id)
+    if ticket:
+        ticket.status = new_status
+        if new_status in {TicketStatus.COMPLETED, TicketStatus.DECLINED, TicketStatus.CANCELLED}:
+            ticket.dialog_open = False
+            ticket.dialog_expires_at = None
+        ticket.updated_at = datetime.utcnow()
+        await session.commit()
+        return True
+    return False
+
+
+async def is_user_admin_async(session: AsyncSession, telegram_id: str) -> bool:
+    """Async version of :func:`is_user_admin`."""
+    admin_id = await session.scalar(
+        select(AdminUser.id)
+        .where(AdminUser.telegram_id == telegram_id, AdminUser.is_active == 1)
+        .limit(1)
+    )
+    return admin_id is not None
@@ -0,0 +1,139 @@
+import asyncio
+from datetime import date
+
+from services.async_cache import AsyncTTLCache
+from services.shelter import ShelterClient
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_concurrent_misses_share_one_load() -> None:
+    cache = AsyncTTLCache("test")
+    calls = 0
+
+    async def loader() -> int:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return calls
+
+    async def scenario() -> list[int]:
+        return await asyncio.gather(*(cache.get_or_load("k", loader, ttl=60) for _ in range(5)))
+
+    assert asyncio.run(scenario()) == [1] * 5
+    assert calls == 1
+    stats = cache.snapshot()
+    assert (stats["misses"], stats["coalesced"]) == (1, 4)
+
+
+def test_ttl_expiry_stale_while_revalidate_and_errors() -> None:
+    clock = _Clock()
+    cache = AsyncTTLCache("test", clock=clock)
+    values = iter([1, 2])
+    fail = False
+
+    async def loader() -> int:
+        if fail:
+            raise RuntimeError("down")
+        return next(values)
+
+    async def scenario() -> None:
+        nonlocal fail
+        assert await cache.get_or_load("k", loader, ttl=10, stale_ttl=100) == 1
+        clock.now = 5
+        assert await cache.get_or_load("k", loader, ttl=10, stale_ttl=100) == 1
+        clock.now = 50
+        # Stale: old value now, refresh in the background.
+        assert await cache.get_or_load("k", loader, ttl=10, stale_ttl=100) == 1
+        await asyncio.sleep(0)
+        assert await cache.get_or_load("k", loader, ttl=10, stale_ttl=100) == 2
+
+        fail = True
+        try:
+            await cache.get_or_load("other", loader, ttl=10)
+        except RuntimeError:
+            pass
+        else:
+            raise AssertionError("loader error was swallowed")
+        assert cache.invalidate(lambda key: key == "k") == 1
+
+    asyncio.run(scenario())
+    stats = cache.snapshot()
+    assert stats["hits"] == 2
+    assert stats["stale_hits"] == 1
+    assert stats["refreshes"] == 1
+    assert stats["errors"] == 1
+    assert stats["entries"] == 0
+
+
+def test_entries_are_bounded_and_expired_ones_pruned() -> None:
+    clock = _Clock()
+    cache = AsyncTTLCache("test", clock=clock, max_entries=3)
+
+    async def scenario() -> None:
+        for key in range(5):
+            await cache.get_or_load(key, lambda key=key: asyncio.sleep(0, result=key), ttl=10)
+        assert cache.snapshot()["entries"] == 3
+        clock.now = 100  # all expired, and past the prune interval
+        await cache.get_or_load("fresh", lambda: asyncio.sleep(0, result="v"), ttl=10)
+        assert cache.snapshot()["entries"] == 1
+
+    asyncio.run(scenario())
+    assert cache.snapshot()["evictions"] == 5
+
+
+def test_invalidate_detaches_inflight_loads() -> None:
+    cache = AsyncTTLCache("test")
+    versions = iter(["stale", "fresh"])
+
+    async def scenario() -> None:
+        gate = asyncio.Event()
+
+        async def slow_loader() -> str:
+            value = next(versions)
+            await gate.wait()
+            return value
+
+        started = asyncio.create_task(cache.get_or_load("k", slow_loader, ttl=60))
+        await asyncio.sleep(0)
+        cache.invalidate()  # e.g. putOrder while the search is running
+        gate.set()
+        assert await started == "stale"
+        # The stale result was not cached: the next lookup loads again.
+        assert await cache.get_or_load("k", slow_loader, ttl=60) == "fresh"
+
+    asyncio.run(scenario())
+    assert cache.snapshot()["misses"] == 2
+
+
+def test_shelter_client_coalesces_variants_and_invalidates_on_order(monkeypatch) -> None:
+    client = ShelterClient(widget_token="token")
+    requests: list[str] = []
+
+    async def fake_request(endpoint, method="POST", data=None, idempotent=False):
+        requests.append(endpoint)
+        await asyncio.sleep(0.01)
+        if endpoint.endswith("getVariants"):
+            return {"data": [{"categoryName": "Lux", "availableCount": 2, "price": 100}]}
+        if endpoint.endswith("getHotelParams"):
+            return {"data": [[{}], [], [], [], [], [], [{"name": "Lux"}], [{}]]}
+        return {"ok": True}
+
+    monkeypatch.setattr(client, "_make_request", fake_request)
+
+    async def scenario() -> None:
+        results = await asyncio.gather(*(client.get_room_availability() for _ in range(3)))
+        assert all(result[0].is_available for result in results)
+        await client.get_variants(date.today(), date.today(), adults=2)
+        await client.put_order("sig", 1, {}, [])
+        await client.get_room_availability()
+
+    asyncio.run(scenario())
+    assert requests.count("/api/online/getHotelParams") == 1
+    assert requests.count("/api/online/getVariants") == 3
@@ -0,0 +1,80 @@
+import asyncio
+from dataclasses import replace
+from datetime import timedelta
+from pathlib import Path
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from benchmarks.shelter_simulator import ShelterSimulator, SimulatorConfig
+from config import get_settings
+from db.base import Base
+from db.session import build_async_engine, build_engine
+from services import availability_calendar as calendar_module
+from services.availability_calendar import AvailabilityCalendar
+from services.guest_context import get_local_today
+from services.shelter import ShelterAPIError, ShelterClient
+from services.shelter_http import ShelterHTTPPool
+
+
+def test_calendar_answers_stays_and_admin_views_without_shelter(tmp_path: Path, monkeypatch) -> None:
+    settings = replace(get_settings(), database_url=f"sqlite:///{tmp_path / 'calendar.db'}")
+    engine = build_engine(settings, profile="default")
+    Base.metadata.create_all(bind=engine)
+    async_engine = build_async_engine(settings, profile="default")
+    monkeypatch.setattr(calendar_module, "AsyncSessionLocal", async_sessionmaker(async_engine, expire_on_commit=False))
+    pool = ShelterHTTPPool(retry_attempts=1, breaker_failures=100)
+    monkeypatch.setattr("services.shelter.shelter_http", pool)
+    today = get_local_today()
+    simulator = ShelterSimulator(SimulatorConfig(reservations=200, categories=3), today=today)
+
+    async def scenario() -> None:
+        runner, base_url = await simulator.start()
+        try:
+            widget = ShelterClient(base_url=base_url, widget_token="sim")
+            calendar = AvailabilityCalendar(days=5, adults=(2,), concurrency=2, client=lambda: widget)
+            widget.calendar = calendar
+
+            snapshot = await calendar.refresh()
+            assert len(snapshot.nights) == 5
+            assert simulator.requests["/api/online/getVariants"] == 5
+            night = snapshot.night(today, 2)
+            assert night.fetched_at == snapshot.updated_at
+
+            # Stays, stats and availability are answered from the calendar.
+            variants, fetched_at = await widget.search_stay(today, today + timedelta(days=3), adults=2)
+            assert fetched_at == snapshot.updated_at
+            live = await widget.get_variants(today, today + timedelta(days=3), adults=2)
+            assert {v.category_name: v.available_count for v in variants} == {v.category_name: v.available_count for v in live}
+            assert sum(v.price for v in variants) == pytest.approx(sum(v.price for v in live))
+            requests = simulator.requests["/api/online/getVariants"]
+            await widget.get_room_availability()
+            stats = await widget.get_hotel_stats()
+            assert stats.last_updated == night.fetched_at
+            assert stats.available_rooms == sum(cell.available_count for cell in night.cells.values())
+            assert simulator.requests["/api/online/getVariants"] == requests
+
+            # Beyond the calendar: a live search.
+            _, fetched_at = await widget.search_stay(today + timedelta(days=4), today + timedelta(days=7), adults=2)
+            assert fetched_at is None
+
+            # Another process picks the stored calendar up from the database.
+            reader = AvailabilityCalendar(days=5, client=lambda: widget)
+            assert (await reader.current()).nights == snapshot.nights
+
+            # Shelter down: the previous values stay.
+            simulator.config.error_rate = 1.0
+            widget.cache.invalidate()
+            with pytest.raises(ShelterAPIError):
+                await calendar.refresh()
+            assert calendar.failed_nights == 5
+            assert calendar.snapshot is snapshot
+            await pool.close()
+        finally:
+            await runner.cleanup()
+
+    try:
+        asyncio.run(scenario())
+        asyncio.run(async_engine.dispose())
+    finally:
+        engine.dispose()
@@ -1,5 +1,9 @@
+import logging
+import os
 from pathlib import Path
 
+import pytest
+
 from services.content import ContentManager
 
 
@@ -20,3 +24,174 @@ def test_content_loader_reads_texts_and_menus(tmp_path: Path) -> None:
     menu = manager.get_menu("segment_menu")
     assert isinstance(menu, list)
     assert menu[0]["label"] == "Test"
+
+
+def test_content_snapshot_is_rechecked_only_after_interval_or_invalidate(tmp_path: Path) -> None:
+    base = tmp_path / "content"
+    base.mkdir()
+    texts = base / "texts.ru.yml"
+    texts.write_text("greeting:\n  start: 'v1'\n", encoding="utf-8")
+    (base / "menus.ru.yml").write_text("segment_menu: []\n", encoding="utf-8")
+
+    manager = ContentManager(base_path=base, check_interval=3600)
+    first = manager.snapshot
+    assert manager.get_text("greeting.start") == "v1"
+
+    texts.write_text("greeting:\n  start: 'v2'\n", encoding="utf-8")
+    os.utime(texts, ns=(first.texts_mtime + 1_000_000, first.texts_mtime + 1_000_000))
+    assert manager.get_text("greeting.start") == "v1"
+    assert manager.snapshot is first
+
+    manager.invalidate()
+    assert manager.get_text("greeting.start") == "v2"
+    assert manager.version == first.version + 1
+
+
+def test_templates_are_compiled_and_placeholders_checked_at_load(tmp_path: Path, caplog) -> None:
+    base = tmp_path / "content"
+    base.mkdir()
+    (base / "texts.ru.yml").write_text(
+        "tickets:\n"
+        "  resolved: 'Заявка №{ticket_id} решена {{ok}}'\n"
+        "  declined: 'Заявка №{ticket} отклонена'\n"
+        "  created: 'Заявка №{ticket_id:d}'\n",
+        encoding="utf-8",
+    )
+    (base / "menus.ru.yml").write_text("segment_menu: []\n", encoding="utf-8")
+
+    manager = ContentManager(base_path=base)
+    with caplog.at_level(logging.WARNING, logger="services.content"):
+        snapshot = manager.load()
+
+    assert "tickets.declined: unknown placeholder(s) ticket" in caplog.text
+    assert any(problem.startswith("tickets.declined") for problem in snapshot.problems)
+    assert manager.get_template("tickets.resolved").fields == {"ticket_id"}
+    assert manager.render("tickets.resolved", ticket_id=7) == "Заявка №7 решена {ok}"
+    # A broken text renders with the placeholder left in instead of raising in a handler.
+    assert manager.render("tickets.declined", ticket_id=7) == "Заявка №{ticket} отклонена"
+    # A value the format spec cannot take is an error, logged rather than hidden.
+    with caplog.at_level(logging.ERROR, logger="services.content"), pytest.raises(ValueError):
+        manager.render("tickets.created", ticket_id="seven")
+    assert "tickets.created" in caplog.text
+
+
+def test_parsed_content_cache_is_keyed_on_file_hash(tmp_path: Path, monkeypatch) -> None:
+    base = tmp_path / "content"
+    base.mkdir()
+    texts = base / "texts.ru.yml"
+    texts.write_text("greeting:\n  start: 'v1'\n", encoding="utf-8")
+    (base / "menus.ru.yml").write_text("segment_menu: []\n", encoding="utf-8")
+    cache_file = base / ".texts.ru.yml.cache"
+
+    ContentManager(base_path=base).load()
+    assert cache_file.exists()
+
+    def _fail(*_args, **_kwargs):
+        raise AssertionError("YAML should not be parsed when the cache is valid")
+
+    with monkeypatch.context() as patched:
+        patched.setattr("services.content.yaml.safe_load", _fail)
+        assert ContentManager(base_path=base).get_text("greeting.start") == "v1"
+
+    texts.write_text("greeting:\n  start: 'v2'\n", encoding="utf-8")
+    assert ContentManager(base_path=base).get_text("greeting.start") == "v2"
+
+    cache_file.write_bytes(b"garbage")
+    assert ContentManager(base_path=base).get_text("greeting.start") == "v2"
+    assert ContentManager(base_path=base, cache=False).get_text("greeting.start") == "v2"
+
+
+def _content_dir(tmp_path: Path) -> Path:
+    base = tmp_path / "content"
+    base.mkdir()
+    (base / "texts.ru.yml").write_text("greeting:\n  start: 'v1'\n  help: 'h'\n", encoding="utf-8")
+    (base / "menus.ru.yml").write_text(
+        "reply_keyboards:\n"
+        "  main:\n"
+        "    - - label: 'A'\n"
+        "  segment:\n"
+        "    - - label: 'S'\n",
+        encoding="utf-8",
+    )
+    return base
+
+
+def test_reload_reports_changed_key_paths(tmp_path: Path) -> None:
+    base = _content_dir(tmp_path)
+    manager = ContentManager(base_path=base, check_interval=3600)
+    first = manager.load()
+
+    assert manager.changes_since(first.version) == frozenset()
+    manager.load()
+    assert manager.changes_since(first.version) == frozenset()
+
+    (base / "menus.ru.yml").write_text(
+        "reply_keyboards:\n"
+        "  main:\n"
+        "    - - label: 'B'\n"
+        "  segment:\n"
+        "    - - label: 'S'\n",
+        encoding="utf-8",
+    )
+    manager.load()
+    assert manager.changes_since(first.version) == {"menus.reply_keyboards.main"}
+    assert manager.changes_since(0) is None
+
+
+def test_patch_file_rewrites_atomically_and_returns_changed_paths(tmp_path: Path) -> None:
+    base = _content_dir(tmp_path)
+    manager = ContentManager(base_path=base, check_interval=3600)
+    manager.load()
+
+    changed = manager.patch_file("menus.ru.yml", {"reply_keyboards.main[0][0].label": "B"})
+    assert changed == {"menus.reply_keyboards.main"}
+    assert manager.patch_file("menus.ru.yml", {"reply_keyboards.main[0][0].label": "B"}) == frozenset()
+    assert manager.get_menu("reply_keyboards.main")[0][0]["label"] == "B"
+    assert manager.get_menu("reply_keyboards.segment")[0][0]["label"] == "S"
+    assert not list(base.glob("*.tmp"))
+
+    try:
+        manager.patch_file("menus.ru.yml", {"reply_keyboards.missing[0].label": "X"})
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("patching a missing list should fail")
+
+
+def test_concurrent_patches_all_persist(tmp_path: Path) -> None:
+    from concurrent.futures import ThreadPoolExecutor
+
+    base = _content_dir(tmp_path)
+    manager = ContentManager(base_path=base, check_interval=3600)
+
+    def patch(index: int) -> None:
+        manager.patch_file("texts.ru.yml", {f"greeting.key_{index}": f"value {index}"})
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(patch, range(40)))
+
+    manager.invalidate()
+    for index in range(40):
+        assert manager.get_text(f"greeting.key_{index}") == f"value {index}"
+    assert manager.get_text("greeting.start") == "v1"
+
+
+def test_write_file_refuses_stale_base_hash(tmp_path: Path) -> None:
+    import hashlib
+
+    from services.content import ContentConflictError
+
+    base = _content_dir(tmp_path)
+    manager = ContentManager(base_path=base, check_interval=3600)
+    texts = base / "texts.ru.yml"
+    base_sha = hashlib.sha256(texts.read_bytes()).hexdigest()
+
+    changed = manager.write_file("texts.ru.yml", "greeting:\n  start: 'v2'\n  help: 'h'\n", base_sha)
+    assert changed == {"texts.greeting.start"}
+    try:
+        manager.write_file("texts.ru.yml", "greeting:\n  start: 'v3'\n", base_sha)
+    except ContentConflictError as exc:
+        assert exc.current_sha256 == hashlib.sha256(texts.read_bytes()).hexdigest()
+    else:
+        raise AssertionError("stale write should be refused")
+    assert manager.get_text("greeting.start") == "v2"
@@ -0,0 +1,98 @@
+import asyncio
+from datetime import datetime
+from pathlib import Path
+
+from aiogram import Bot, Dispatcher, Router
+from aiogram.types import Chat, Message, Update, User
+
+from bot.middleware import LocaleMiddleware
+from services.content import LocalizedContent, use_locale
+
+
+def _bundles(tmp_path: Path) -> Path:
+    base = tmp_path / "content"
+    base.mkdir()
+    (base / "texts.ru.yml").write_text(
+        "greeting:\n  start: 'Здравствуйте'\n  bye: 'До свидания'\nsystem:\n  ok: 'OK'\n",
+        encoding="utf-8",
+    )
+    (base / "menus.ru.yml").write_text("main:\n  - label: 'Меню'\n", encoding="utf-8")
+    (base / "texts.en.yml").write_text(
+        "greeting:\n  start: 'Hello'\n  bye: 'Goodbye'\nsystem:\n  ok: 'OK'\n",
+        encoding="utf-8",
+    )
+    (base / "menus.en.yml").write_text("main:\n  - label: 'Menu'\n", encoding="utf-8")
+    (base / "texts.fi.yml").write_text("greeting:\n  start: 'Hei'\n", encoding="utf-8")
+    return base
+
+
+def test_bundles_load_lazily_and_fall_back_key_by_key(tmp_path: Path) -> None:
+    content = LocalizedContent(_bundles(tmp_path), fallbacks={"fi": ("en",)}, check_interval=3600)
+
+    assert content.resolve_locale("en-US") == "en"
+    assert content.resolve_locale("pt_BR") == "ru"
+    assert content.resolve_locale(None) == "ru"
+    assert content.chain("fi") == ("fi", "en", "ru")
+
+    assert content.get_text("greeting.start") == "Здравствуйте"
+    assert content.loaded_locales() == ("ru",)
+
+    with use_locale("fi"):
+        assert content.get_text("greeting.start") == "Hei"
+        assert content.get_text("greeting.bye") == "Goodbye"
+        # fi has no menus file: the English menu is used.
+        assert content.get_menu("main")[0]["label"] == "Menu"
+    assert set(content.loaded_locales()) == {"ru", "fi", "en"}
+    assert content.get_text("greeting.bye") == "До свидания"
+
+
+def test_untranslated_templates_are_shared_between_bundles(tmp_path: Path) -> None:
+    content = LocalizedContent(_bundles(tmp_path), check_interval=3600)
+
+    ru_ok = content.get_template("system.ok")
+    with use_locale("en"):
+        en_ok = content.get_template("system.ok")
+        assert content.get_template("greeting.start").source == "Hello"
+    assert en_ok is ru_ok
+
+
+def test_loading_a_locale_bumps_version_without_invalidating_keys(tmp_path: Path) -> None:
+    content = LocalizedContent(_bundles(tmp_path), check_interval=3600)
+    before = content.version
+
+    with use_locale("en"):
+        content.get_text("greeting.start")
+    assert content.version == before + 1
+    assert content.changes_since(before) == frozenset()
+
+    content.patch_file("texts.en.yml", {"greeting.start": "Hi"})
+    assert content.changes_since(before) == {"texts.greeting.start"}
+    with use_locale("en"):
+        assert content.get_text("greeting.start") == "Hi"
+
+
+def test_locale_middleware_binds_user_language_for_the_update(tmp_path: Path) -> None:
+    content = LocalizedContent(_bundles(tmp_path), check_interval=3600)
+    seen = []
+    router = Router()
+
+    @router.message()
+    async def handler(message: Message, locale: str) -> None:
+        seen.append((locale, content.get_text("greeting.start")))
+
+    dp = Dispatcher()
+    dp.update.outer_middleware(LocaleMiddleware(content))
+    dp.include_router(router)
+    bot = Bot("123456:TEST")
+
+    def update(language_code: str | None) -> Update:
+        user = User(id=1, is_bot=False, first_name="Guest", language_code=language_code)
+        message = Message(message_id=1, date=datetime.now(), chat=Chat(id=1, type="private"), from_user=user, text="hi")
+        return Update(update_id=1, message=message)
+
+    async def feed() -> None:
+        await dp.feed_update(bot, update("en"))
+        await dp.feed_update(bot, update("de"))
+
+    asyncio.run(feed())
+    assert seen == [("en", "Hello"), ("ru", "Здравствуйте")]
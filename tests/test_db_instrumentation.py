@@ -0,0 +1,44 @@
+import logging
+
+from sqlalchemy import create_engine, text
+
+from db import instrumentation
+
+
+def test_queries_are_charged_to_the_active_scope(caplog) -> None:
+    engine = instrumentation.instrument_engine(create_engine("sqlite://"))
+    instrumentation.reset()
+    try:
+        with caplog.at_level(logging.WARNING, logger="db.instrumentation"):
+            for _ in range(2):
+                with instrumentation.track("GET /api/things"), engine.connect() as conn:
+                    for value in range(instrumentation.N_PLUS_ONE_THRESHOLD):
+                        conn.execute(text("SELECT :value"), {"value": value})
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+
+        stats = {row["route"]: row for row in instrumentation.snapshot()}
+        route = stats["GET /api/things"]
+        assert route["calls"] == 2
+        assert route["queries"] == 2 * instrumentation.N_PLUS_ONE_THRESHOLD
+        assert route["max_queries"] == instrumentation.N_PLUS_ONE_THRESHOLD
+        assert stats[instrumentation.UNSCOPED]["queries"] == 1
+        assert "Possible N+1 in GET /api/things" in caplog.text
+    finally:
+        instrumentation.reset()
+        engine.dispose()
+
+
+def test_slow_query_log_redacts_parameters(caplog) -> None:
+    engine = instrumentation.instrument_engine(create_engine("sqlite://"))
+    instrumentation.configure(0)
+    try:
+        with caplog.at_level(logging.WARNING, logger="db.instrumentation"), engine.connect() as conn:
+            conn.execute(text("SELECT :phone, :room"), {"phone": "+79990001122", "room": 12})
+        assert "+79990001122" not in caplog.text
+        assert "Slow query" in caplog.text
+        assert "<str:12>" in caplog.text and "<int>" in caplog.text
+    finally:
+        instrumentation.configure(200)
+        instrumentation.reset()
+        engine.dispose()
@@ -0,0 +1,35 @@
+from dataclasses import replace
+from pathlib import Path
+
+from sqlalchemy import text
+
+from config import get_settings
+from db.session import build_engine
+
+
+def test_tuned_profile_applies_sqlite_pragmas(tmp_path: Path) -> None:
+    settings = replace(get_settings(), database_url=f"sqlite:///{tmp_path / 'tuned.db'}", db_busy_timeout_ms=1234)
+    engine = build_engine(settings, profile="tuned")
+    try:
+        with engine.connect() as conn:
+            assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+            assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+            assert conn.execute(text("PRAGMA busy_timeout")).scalar() == 1234
+            # Foreign key enforcement stays at SQLite's default (off), as before tuning.
+            assert conn.execute(text("PRAGMA foreign_keys")).scalar() == 0
+    finally:
+        engine.dispose()
+
+
+def test_default_profile_and_memory_db_use_bare_engine(tmp_path: Path) -> None:
+    settings = replace(get_settings(), database_url=f"sqlite:///{tmp_path / 'bare.db'}")
+    engine = build_engine(settings, profile="default")
+    memory_engine = build_engine(replace(settings, database_url="sqlite:///:memory:"), profile="tuned")
+    try:
+        with engine.connect() as conn:
+            assert conn.execute(text("PRAGMA journal_mode")).scalar() == "delete"
+        with memory_engine.connect() as conn:
+            assert conn.execute(text("PRAGMA journal_mode")).scalar() == "memory"
+    finally:
+        engine.dispose()
+        memory_engine.dispose()
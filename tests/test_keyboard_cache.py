@@ -0,0 +1,147 @@
+import asyncio
+from dataclasses import replace
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+
+from bot.keyboards import cache as keyboard_cache_module
+from bot.keyboards.cache import CatalogState, KeyboardCache, load_catalog_state
+from config import get_settings
+from db.base import Base
+from db.models import EventItem, MenuCategorySetting, MenuItem
+from db.session import build_async_engine, build_engine
+
+
+def _event(name: str, **kwargs) -> EventItem:
+    now = datetime.utcnow()
+    return EventItem(
+        name=name,
+        description="",
+        starts_at=now,
+        ends_at=now + timedelta(hours=2),
+        is_active=True,
+        **kwargs,
+    )
+
+
+def test_markups_are_reused_until_catalog_state_changes() -> None:
+    cache = KeyboardCache(data_ttl=3600)
+    cache._set_state(CatalogState(has_active_events=False, visible_categories=frozenset()))
+    builds = []
+
+    def build() -> object:
+        builds.append(1)
+        return object()
+
+    first = cache.get_or_build(("menu", ()), build)
+    assert cache.get_or_build(("menu", ()), build) is first
+    assert len(builds) == 1
+
+    # Same state again: still cached.
+    cache._set_state(CatalogState(has_active_events=False, visible_categories=frozenset()))
+    assert cache.get_or_build(("menu", ()), build) is first
+
+    cache._set_state(CatalogState(has_active_events=True, visible_categories=frozenset()))
+    assert cache.get_or_build(("menu", ()), build) is not first
+    assert len(builds) == 2
+
+
+def test_load_catalog_state_reads_events_and_visible_categories(tmp_path: Path) -> None:
+    engine = build_engine(replace(get_settings(), database_url=f"sqlite:///{tmp_path / 'catalog.db'}"))
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    try:
+        with Session() as db:
+            assert load_catalog_state(db) == CatalogState(False, frozenset())
+
+            db.add_all(
+                [
+                    _event("Past", publish_until=datetime.utcnow() - timedelta(days=1)),
+                    MenuItem(name="Омлет", price=300, category="breakfast", is_available=True),
+                    MenuItem(name="Суп", price=400, category="lunch", is_available=True),
+                    MenuItem(name="Стейк", price=900, category="dinner", is_available=True),
+                    MenuCategorySetting(category="dinner", is_enabled=True),
+                ]
+            )
+            db.commit()
+            assert load_catalog_state(db) == CatalogState(False, frozenset({"breakfast", "dinner"}))
+
+            db.add(_event("Live"))
+            db.commit()
+            assert load_catalog_state(db).has_active_events
+    finally:
+        engine.dispose()
+
+
+def test_content_change_drops_only_markups_that_read_changed_keys(tmp_path: Path) -> None:
+    from services.content import ContentManager
+
+    base = tmp_path / "content"
+    base.mkdir()
+    (base / "texts.ru.yml").write_text("greeting:\n  start: 'hi'\n", encoding="utf-8")
+    (base / "menus.ru.yml").write_text("main:\n  - label: 'A'\nother:\n  - label: 'B'\n", encoding="utf-8")
+    content = ContentManager(base_path=base, check_interval=3600)
+    cache = KeyboardCache(data_ttl=3600, content=content)
+    cache._set_state(CatalogState(has_active_events=False, visible_categories=frozenset()))
+
+    def build(key: str):
+        return lambda: [item["label"] for item in content.get_menu(key)]
+
+    main = cache.get_or_build(("main",), build("main"))
+    other = cache.get_or_build(("other",), build("other"))
+    # An outer builder reusing a cached inner one inherits its content keys.
+    outer = cache.get_or_build(("outer",), lambda: [cache.get_or_build(("main",), build("main"))])
+
+    content.patch_file("menus.ru.yml", {"main[0].label": "C"})
+
+    assert cache.get_or_build(("other",), build("other")) is other
+    assert cache.get_or_build(("main",), build("main")) == ["C"] != main
+    assert cache.get_or_build(("outer",), lambda: ["rebuilt"]) is not outer
+
+
+def test_invalidation_refreshes_in_the_background_after_commit(tmp_path: Path, monkeypatch) -> None:
+    settings = replace(get_settings(), database_url=f"sqlite:///{tmp_path / 'catalog.db'}")
+    engine = build_engine(settings)
+    Base.metadata.create_all(bind=engine)
+    async_engine = build_async_engine(settings)
+    Session = async_sessionmaker(async_engine, expire_on_commit=False)
+    monkeypatch.setattr(keyboard_cache_module, "AsyncSessionLocal", Session)
+    cache = KeyboardCache(data_ttl=3600)
+    monkeypatch.setattr(keyboard_cache_module, "keyboard_cache", cache)
+    sync_loads = []
+
+    def sync_session():
+        sync_loads.append(1)
+        return sessionmaker(bind=engine)()
+
+    monkeypatch.setattr(keyboard_cache_module, "SessionLocal", sync_session)
+
+    async def scenario() -> None:
+        # Startup: no state yet, so the one synchronous load.
+        assert cache.catalog_state() == CatalogState(False, frozenset())
+        assert len(sync_loads) == 1
+
+        async with Session() as db:
+            db.add(_event("Live"))
+            await db.flush()
+            assert cache._refresh_task is None  # flushed, not committed
+            await db.commit()
+
+        # The stale state is served until the scheduled refresh lands.
+        assert cache.catalog_state() == CatalogState(False, frozenset())
+        await cache._refresh_task
+        assert cache.catalog_state() == CatalogState(True, frozenset())
+
+        # Past the TTL, a build also schedules a refresh instead of loading inline.
+        cache._data_expires = 0.0
+        assert cache.catalog_state().has_active_events
+        await cache._refresh_task
+        assert len(sync_loads) == 1
+        await async_engine.dispose()
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        engine.dispose()
@@ -0,0 +1,93 @@
+import asyncio
+from pathlib import Path
+
+from bot.handlers import start
+from bot.label_router import LabelRouter
+from services.content import ContentManager
+
+
+async def _first(message, state) -> None:
+    return None
+
+
+async def _second(message, state) -> None:
+    return None
+
+
+def test_first_route_wins_and_only_changed_routes_are_recompiled(tmp_path: Path) -> None:
+    base = tmp_path / "content"
+    base.mkdir()
+    (base / "texts.ru.yml").write_text("greeting:\n  start: 'hi'\n", encoding="utf-8")
+    menus = base / "menus.ru.yml"
+    menus.write_text("main:\n  - label: 'A'\nother:\n  - label: 'C'\n", encoding="utf-8")
+    content = ContentManager(base_path=base, check_interval=3600)
+    router = LabelRouter(content)
+    calls = {"main": 0, "other": 0}
+
+    def labels_of(key: str):
+        def labels() -> set[str]:
+            calls[key] += 1
+            return {item["label"] for item in content.get_menu(key)} | {"B"}
+
+        return labels
+
+    router.route(labels_of("main"))(_first)
+    router.route(labels_of("other"))(_second)
+
+    assert router.resolve("A") is _first
+    assert router.resolve("B") is _first
+    assert router.resolve("C") is _second
+    assert router.resolve("D") is None
+    assert router.resolve(None) is None
+    assert calls == {"main": 1, "other": 1}
+
+    content.patch_file("menus.ru.yml", {"main[0].label": "D"})
+    assert router.resolve("D") is _first
+    assert router.resolve("A") is None
+    assert calls == {"main": 2, "other": 1}
+
+
+def test_start_labels_keep_handler_precedence() -> None:
+    resolve = start.labels.resolve
+
+    assert resolve("🏠 Главное меню") is start.reply_main_menu
+    assert resolve("🏠 Гость") is start.reply_admin_type_selection
+    assert resolve("🧹 Уборка номера") is start.reply_room_service_selection
+    # Claimed by the in-house menu before the main-menu admin button.
+    assert resolve("📞 Администратор") is start.reply_in_house_menu_selection
+    assert resolve("🍳 Завтрак") is start.reply_menu_selection
+    assert resolve("🏨 Забронировать номер") is start.reply_book_room
+    assert resolve("❓ Вопросы") is start.reply_pre_arrival_selection
+    assert resolve("📞 Администратор (до заезда)") is start.reply_pre_arrival_selection
+    assert resolve("🛎 Рум-сервис") is start.reply_room_service
+    assert resolve("Привет") is None
+
+
+def test_match_passes_handler_to_dispatch() -> None:
+    class _Message:
+        text = "Пропустить"
+
+    assert asyncio.run(start.labels.match(_Message())) == {"label_handler": start.skip_phone_share}
+    _Message.text = None
+    assert asyncio.run(start.labels.match(_Message())) is False
+
+
+def test_labels_of_every_loaded_locale_are_routed(tmp_path: Path) -> None:
+    from services.content import LocalizedContent, use_locale
+
+    base = tmp_path / "content"
+    base.mkdir()
+    (base / "texts.ru.yml").write_text("greeting:\n  start: 'hi'\n", encoding="utf-8")
+    (base / "menus.ru.yml").write_text("main:\n  - label: 'Меню'\n", encoding="utf-8")
+    (base / "menus.en.yml").write_text("main:\n  - label: 'Menu'\n", encoding="utf-8")
+    content = LocalizedContent(base, check_interval=3600)
+    router = LabelRouter(content)
+    router.route(lambda: {item["label"] for item in content.get_menu("main")})(_first)
+
+    assert router.resolve("Меню") is _first
+    assert router.resolve("Menu") is None
+
+    with use_locale("en"):
+        content.get_menu("main")
+    assert router.resolve("Menu") is _first
+    assert router.resolve("Меню") is _first
@@ -0,0 +1,159 @@
+import sqlite3
+from dataclasses import replace
+from pathlib import Path
+
+from config import get_settings
+from db.base import Base
+from db.migrations import LATEST_VERSION, apply_migrations, explain_hot_queries, get_user_version
+from db.session import build_engine
+
+
+def _create_schema(db_path: Path) -> None:
+    import db.models  # noqa: F401 - registers tables on Base
+
+    engine = build_engine(replace(get_settings(), database_url=f"sqlite:///{db_path}"), profile="default")
+    try:
+        Base.metadata.create_all(bind=engine)
+    finally:
+        engine.dispose()
+
+
+def test_migrations_are_versioned_and_idempotent(tmp_path: Path) -> None:
+    db_path = tmp_path / "migrate.db"
+    _create_schema(db_path)
+
+    conn = sqlite3.connect(db_path)
+    try:
+        assert get_user_version(conn) == 0
+        assert apply_migrations(conn, log=lambda _: None) == LATEST_VERSION
+        applied: list[str] = []
+        assert apply_migrations(conn, log=applied.append) == LATEST_VERSION
+        assert applied == []
+    finally:
+        conn.close()
+
+
+def test_hot_queries_use_expected_indexes(tmp_path: Path) -> None:
+    db_path = tmp_path / "plans.db"
+    _create_schema(db_path)
+
+    conn = sqlite3.connect(db_path)
+    try:
+        apply_migrations(conn, log=lambda _: None)
+        misses = [query.name for query, _, uses_index in explain_hot_queries(conn) if not uses_index]
+        assert misses == []
+    finally:
+        conn.close()
+
+
+def test_outbox_migration_backfills_pending_deliveries(tmp_path: Path) -> None:
+    db_path = tmp_path / "legacy.db"
+    _create_schema(db_path)
+
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute("PRAGMA user_version = 2")
+        conn.execute("DROP TABLE outbox")
+        conn.execute("ALTER TABLE ticket_messages ADD COLUMN bot_delivered BOOLEAN DEFAULT 0 NOT NULL")
+        conn.execute("ALTER TABLE staff_tasks ADD COLUMN notification_sent BOOLEAN DEFAULT 0 NOT NULL")
+        conn.executescript(
+            """
+            INSERT INTO tickets (id, request_id, created_at, updated_at, type, status, guest_chat_id, channel, payload, dialog_open)
+            VALUES (1, 'r1', '2026-01-01', '2026-01-01', 'MENU_ORDER', 'PENDING_ADMIN', '111', 'TELEGRAM', '{"guest_notified": true}', 0),
+                   (2, 'r2', '2026-01-01', '2026-01-01', 'MENU_ORDER', 'PENDING_ADMIN', '222', 'TELEGRAM', '{}', 0),
+                   (3, 'r3', '2026-01-01', '2026-01-01', 'MENU_ORDER', 'PENDING_ADMIN', 'mini_app', 'TELEGRAM', '{}', 0);
+            INSERT INTO ticket_messages (id, request_id, created_at, ticket_id, sender, content, bot_delivered)
+            VALUES (1, 'm1', '2026-01-01', 1, 'ADMIN', 'delivered', 1),
+                   (2, 'm2', '2026-01-01', 2, 'SYSTEM', 'pending', 0),
+                   (3, 'm3', '2026-01-01', 2, 'GUEST', 'guest text', 0);
+            INSERT INTO staff_tasks (id, created_at, room_number, task_type, status, assigned_to, notification_sent)
+            VALUES (1, '2026-01-01', '101', 'cleaning', 'PENDING', '7', 0),
+                   (2, '2026-01-01', '102', 'cleaning', 'PENDING', '7', 1);
+            """
+        )
+        conn.commit()
+
+        assert apply_migrations(conn, log=lambda _: None) == LATEST_VERSION
+        rows = conn.execute(
+            "SELECT kind, status, ticket_id, ticket_message_id, staff_task_id FROM outbox ORDER BY kind, id"
+        ).fetchall()
+        assert rows == [
+            ("ORDER_CONFIRMATION", "PENDING", 2, None, None),
+            ("STAFF_TASK", "PENDING", None, None, 1),
+            ("TICKET_MESSAGE", "PENDING", 2, 2, None),
+        ]
+    finally:
+        conn.close()
+
+
+def test_ticket_summary_migration_backfills_counts(tmp_path: Path) -> None:
+    db_path = tmp_path / "summary.db"
+    _create_schema(db_path)
+
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute("PRAGMA user_version = 3")
+        conn.executescript(
+            """
+            INSERT INTO tickets (id, request_id, created_at, updated_at, type, status, guest_chat_id, channel,
+                                 dialog_open, admin_last_viewed_at)
+            VALUES (1, 'r1', '2026-01-01 10:00:00', '2026-01-01 10:00:00', 'OTHER', 'PENDING_ADMIN', '1',
+                    'TELEGRAM', 0, '2026-01-01 10:30:00');
+            INSERT INTO ticket_messages (request_id, created_at, ticket_id, sender, content)
+            VALUES ('m', '2026-01-01 10:00:00', 1, 'GUEST', 'hello'),
+                   ('m', '2026-01-01 10:20:00', 1, 'ADMIN', 'reply'),
+                   ('m', '2026-01-01 10:40:00', 1, 'GUEST', 'unread 1'),
+                   ('m', '2026-01-01 10:50:00', 1, 'GUEST', 'unread 2');
+            """
+        )
+        conn.commit()
+
+        apply_migrations(conn, log=lambda _: None)
+        row = conn.execute(
+            "SELECT message_count, last_message_at, last_admin_message_at, unread_guest_count FROM tickets"
+        ).fetchone()
+        assert row == (4, "2026-01-01 10:50:00", "2026-01-01 10:20:00", 2)
+    finally:
+        conn.close()
+
+
+def test_ticket_ids_migration_rebuilds_tables_with_autoincrement(tmp_path: Path) -> None:
+    db_path = tmp_path / "ids.db"
+    _create_schema(db_path)
+
+    conn = sqlite3.connect(db_path)
+    try:
+        # Recreate the pre-migration tables: plain INTEGER PRIMARY KEY, plus a legacy column.
+        for table in ("ticket_messages", "tickets"):
+            sql = conn.execute("SELECT sql FROM sqlite_master WHERE name = ?", (table,)).fetchone()[0]
+            conn.execute(f"DROP TABLE {table}")
+            conn.execute(sql.replace(" AUTOINCREMENT", ""))
+        conn.execute("ALTER TABLE ticket_messages ADD COLUMN bot_delivered BOOLEAN DEFAULT 0 NOT NULL")
+        conn.execute("CREATE INDEX ix_ticket_messages_ticket_id ON ticket_messages (ticket_id)")
+        conn.execute("PRAGMA user_version = 10")
+        conn.executescript(
+            """
+            INSERT INTO tickets (id, request_id, created_at, updated_at, type, status, guest_chat_id, channel)
+            VALUES (3, 'live', '2026-01-01', '2026-01-01', 'OTHER', 'PENDING_ADMIN', '1', 'TELEGRAM');
+            INSERT INTO ticket_messages (id, request_id, created_at, ticket_id, sender, content, bot_delivered)
+            VALUES (1, 'm', '2026-01-01', 3, 'GUEST', 'hello', 1);
+            INSERT INTO tickets_archive (id, request_id, type, status, guest_chat_id, channel, archived_at)
+            VALUES (7, 'old', 'OTHER', 'COMPLETED', '1', 'TELEGRAM', '2026-01-02');
+            """
+        )
+        conn.commit()
+
+        assert apply_migrations(conn, log=lambda _: None) == LATEST_VERSION
+        for table in ("tickets", "ticket_messages"):
+            sql = conn.execute("SELECT sql FROM sqlite_master WHERE name = ?", (table,)).fetchone()[0]
+            assert "AUTOINCREMENT" in sql
+        assert conn.execute("SELECT bot_delivered, content FROM ticket_messages").fetchone() == (1, "hello")
+        assert conn.execute("SELECT name FROM sqlite_master WHERE name = 'ix_ticket_messages_ticket_id'").fetchone()
+        assert conn.execute("PRAGMA foreign_key_list(ticket_messages)").fetchone()[2] == "tickets"
+        conn.execute(
+            "INSERT INTO tickets (request_id, created_at, updated_at, type, status, guest_chat_id, channel) "
+            "VALUES ('new', '2026-01-03', '2026-01-03', 'OTHER', 'PENDING_ADMIN', '1', 'TELEGRAM')"
+        )
+        assert conn.execute("SELECT id FROM tickets WHERE request_id = 'new'").fetchone() == (8,)
+    finally:
+        conn.close()
@@ -0,0 +1,113 @@
+import asyncio
+from dataclasses import replace
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+
+from config import get_settings
+from db.base import Base
+from db.models import OccupancyPoint, ShelterReservation
+from db.session import build_async_engine, build_engine
+from services import occupancy_history
+from services.guest_context import get_local_now
+from services.occupancy_history import OccupancySample, compact, load_series, record_sample
+from services.shelter import HotelStats
+
+
+def test_samples_roll_up_and_old_points_are_compacted(tmp_path: Path) -> None:
+    settings = replace(get_settings(), database_url=f"sqlite:///{tmp_path / 'occupancy.db'}")
+    engine = build_engine(settings, profile="default")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    start = datetime(2026, 3, 1, 0, 0)
+
+    with Session() as db:
+        # Every 15 minutes for 3 days: 4 per hour, 96 per day.
+        for step in range(3 * 96):
+            occupied = 10 + step % 4
+            record_sample(db, OccupancySample(start + timedelta(minutes=15 * step), occupied, 40 - occupied, 40))
+        db.commit()
+
+        hours = load_series(db, "hour", start, start + timedelta(hours=2))
+        assert [point["t"] for point in hours] == ["2026-03-01T00:00:00", "2026-03-01T01:00:00"]
+        assert hours[0]["samples"] == 4
+        assert hours[0]["occupied_rooms"] == pytest.approx(11.5)
+        assert hours[0]["occupied_max"] == 13
+        assert hours[0]["occupancy_rate"] == pytest.approx(11.5 / 40)
+        days = load_series(db, "day", start, start + timedelta(days=30))
+        assert [point["samples"] for point in days] == [96, 96, 96]
+        assert len(load_series(db, "raw", start, start + timedelta(days=1), limit=10)) == 10
+        with pytest.raises(ValueError):
+            load_series(db, "week", start, start + timedelta(days=1))
+
+        # Raw points past 1 day and hourly ones past 2 days go; days stay.
+        deleted = compact(db, start + timedelta(days=3), raw_retention_days=1, hourly_retention_days=2)
+        db.commit()
+        assert deleted == 2 * 96 + 24
+        counts = dict(db.execute(
+            select(OccupancyPoint.resolution, func.count()).group_by(OccupancyPoint.resolution)
+        ).all())
+        assert counts == {"raw": 96, "hour": 48, "day": 3}
+        assert [point["samples"] for point in load_series(db, "day", start, start + timedelta(days=30))] == [96, 96, 96]
+
+    engine.dispose()
+
+
+class _StatsClient:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def get_hotel_stats(self) -> HotelStats:
+        self.calls += 1
+        return HotelStats(total_rooms=60, occupied_rooms=30, available_rooms=12, occupancy_rate=0.5, last_updated=datetime.now())
+
+
+def test_collect_once_counts_occupied_rooms_from_the_mirror(tmp_path: Path, monkeypatch) -> None:
+    settings = replace(get_settings(), database_url=f"sqlite:///{tmp_path / 'occupancy.db'}")
+    engine = build_engine(settings, profile="default")
+    Base.metadata.create_all(bind=engine)
+    async_engine = build_async_engine(settings, profile="default")
+    monkeypatch.setattr(occupancy_history, "AsyncSessionLocal", async_sessionmaker(async_engine, expire_on_commit=False))
+    client = _StatsClient()
+    today = get_local_now().date()
+
+    async def scenario() -> None:
+        # No mirror yet: the sample is get_hotel_stats as is.
+        sample = await occupancy_history.collect_once(client)
+        assert (sample.occupied_rooms, sample.available_rooms, sample.total_rooms) == (30, 12, 60)
+
+        with sessionmaker(bind=engine)() as db:
+            def reservation(rid: str, room: str | None, check_in_offset: int, nights: int, annulled: bool = False):
+                check_in = today + timedelta(days=check_in_offset)
+                return ShelterReservation(
+                    id=rid, content_hash=rid, room_number=room, is_annulled=annulled,
+                    check_in_date=check_in, check_out_date=check_in + timedelta(days=nights),
+                )
+
+            db.add_all([
+                reservation("1", "101", -1, 3),
+                reservation("2", "101", 0, 1),  # same room
+                reservation("3", "102", 0, 2),
+                reservation("4", "103", 0, 2, annulled=True),
+                reservation("5", "104", -2, 2),  # checked out this morning
+                reservation("6", None, 0, 1),
+            ])
+            db.commit()
+
+        sample = await occupancy_history.collect_once(client)
+        assert (sample.occupied_rooms, sample.available_rooms, sample.total_rooms) == (2, 12, 14)
+        assert client.calls == 2
+
+        async with occupancy_history.AsyncSessionLocal() as db:
+            start = sample.taken_at - timedelta(days=1)
+            raw = await db.run_sync(load_series, "raw", start, sample.taken_at + timedelta(seconds=1))
+        # Raw buckets are whole seconds, so both samples may share one.
+        assert sum(point["samples"] for point in raw) == 2
+        await async_engine.dispose()
+
+    asyncio.run(scenario())
+    engine.dispose()
@@ -0,0 +1,33 @@
+from datetime import date
+
+from benchmarks.bench_pms_parsing import legacy_parse_reservation, synthetic_page
+from services.shelter import ShapeCache, parse_guest, parse_reservation
+
+
+def test_shape_cached_parser_matches_or_chains() -> None:
+    items = synthetic_page(40) + [
+        {"id": "1", "checkIn": "2026-03-01", "checkOut": "2026-03-04Z", "room": {"name": "Lux 2"}},
+        # Falsy early candidates fall through to later keys, as with `or`.
+        {"id": "", "Id": 7, "checkIn": None, "arrivalDate": "2026-03-01 10:00", "departureDate": "2026-03-02T00:00:00+03:00",
+         "roomNumber": "", "number": 0, "room": "12", "cancelled": "true", "status": ""},
+        {"id": "2", "from": "not a date", "until": "2026-03-02"},
+        {"reservation_id": "3", "beginDate": "20260301", "endDate": "2026-03-05", "isCanceled": 0, "guests": [{"id": 1}, "x"]},
+    ]
+    for item in items:
+        assert parse_reservation(item) == legacy_parse_reservation(item), item
+
+    reservation = parse_reservation(items[-4])
+    assert reservation.room_number == "Lux 2"
+    assert reservation.check_out == date(2026, 3, 4)
+
+
+def test_guest_parsing_and_shape_plans_are_reused() -> None:
+    cache = ShapeCache({"phone": ("phone", "phoneNumber", "mobilePhone")})
+    first = {"id": 1, "mobilePhone": "+7999"}
+    assert ShapeCache.lookup(first, cache.plan(first)["phone"]) == "+7999"
+    assert ShapeCache.lookup({"id": 2, "mobilePhone": ""}, cache.plan({"id": 2, "mobilePhone": ""})["phone"]) == ""
+    assert cache.learned == 1
+
+    guest = parse_guest({"guestId": 5, "name": "Ann", "surname": "Lee", "phoneNumber": "+7", "emailAddress": None})
+    assert (guest.id, guest.first_name, guest.last_name, guest.phone, guest.email) == ("5", "Ann", "Lee", "+7", None)
+    assert parse_guest({"phone": ""}).id == "unknown"
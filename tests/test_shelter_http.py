@@ -0,0 +1,220 @@
+import asyncio
+from datetime import date
+
+import pytest
+from aiohttp import web
+
+from services.shelter import ShelterAPIError, ShelterPMSClient
+from services.shelter_http import CircuitBreaker, CircuitOpenError, ShelterHTTPPool, endpoint_key
+
+
+async def _guests(request: web.Request) -> web.Response:
+    return web.json_response([{"id": request.match_info["rid"], "phone": "+79990000000"}])
+
+
+async def _start_server() -> tuple[web.AppRunner, str]:
+    app = web.Application()
+    app.router.add_get("/api/Reservations/{rid}/Guests", _guests)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+def test_endpoint_key_folds_ids() -> None:
+    assert endpoint_key("/api/Reservations/123/Guests") == "/api/Reservations/{id}/Guests"
+    assert endpoint_key("/api/online/getVariants?x=1") == "/api/online/getVariants"
+
+
+def test_pms_requests_reuse_one_pooled_connection(monkeypatch) -> None:
+    pool = ShelterHTTPPool(limit=4, limit_per_host=2)
+    monkeypatch.setattr("services.shelter.shelter_http", pool)
+
+    async def scenario() -> None:
+        runner, base_url = await _start_server()
+        try:
+            client = ShelterPMSClient(base_url=base_url, pms_token="token")
+            for reservation_id in ("1", "2", "3"):
+                guests = await client.get_reservation_guests(reservation_id)
+                assert guests[0].id == reservation_id
+            session = pool.session()
+            await pool.close()
+            assert session.closed
+        finally:
+            await runner.cleanup()
+
+    asyncio.run(scenario())
+
+    stats = pool.snapshot()
+    assert stats["sessions_created"] == 1
+    assert stats["connections_created"] == 1
+    assert stats["connections_reused"] == 2
+    [row] = stats["endpoints"]
+    assert row["endpoint"] == "/api/Reservations/{id}/Guests"
+    assert row["calls"] == 3
+    assert row["errors"] == 0
+
+
+def test_circuit_breaker_opens_fails_fast_and_recovers() -> None:
+    now = [0.0]
+    breaker = CircuitBreaker("pms", failure_threshold=2, reset_timeout=10, clock=lambda: now[0])
+
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    now[0] = 11
+    breaker.before_call()  # half-open trial
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()  # only one trial at a time
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.as_dict()["rejected"] == 2
+
+
+def test_cancelled_half_open_trial_releases_the_circuit() -> None:
+    pool = ShelterHTTPPool(retry_attempts=1, breaker_failures=1, breaker_reset=0)
+    breaker = pool.breaker("pms")
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    async def hang() -> None:
+        await asyncio.sleep(10)
+
+    async def ok() -> str:
+        return "ok"
+
+    async def scenario() -> None:
+        trial = asyncio.create_task(pool.call("pms", hang, idempotent=True))
+        await asyncio.sleep(0)
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        trial.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await trial
+        assert await pool.call("pms", ok, idempotent=True) == "ok"
+
+    asyncio.run(scenario())
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.rejected == 0
+
+
+def test_transient_errors_are_retried_for_idempotent_calls_only(monkeypatch) -> None:
+    pool = ShelterHTTPPool(retry_attempts=3, retry_base_delay=0, breaker_failures=10)
+    monkeypatch.setattr("services.shelter.shelter_http", pool)
+    hits = {"get": 0, "post": 0}
+
+    async def flaky_get(request: web.Request) -> web.Response:
+        hits["get"] += 1
+        if hits["get"] < 3:
+            return web.Response(status=502, text="bad gateway")
+        return web.json_response({"id": "1"})
+
+    async def flaky_post(request: web.Request) -> web.Response:
+        hits["post"] += 1
+        return web.Response(status=503, text="unavailable")
+
+    async def scenario() -> None:
+        app = web.Application()
+        app.router.add_get("/api/Reservations/1", flaky_get)
+        app.router.add_post("/api/Orders", flaky_post)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        base_url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+        try:
+            client = ShelterPMSClient(base_url=base_url, pms_token="token")
+            assert await client._pms_request("/api/Reservations/1") == {"id": "1"}
+            with pytest.raises(ShelterAPIError) as error:
+                await client._pms_request("/api/Orders", method="POST", data={})
+            assert error.value.transient
+            await pool.close()
+        finally:
+            await runner.cleanup()
+
+    asyncio.run(scenario())
+    assert hits == {"get": 3, "post": 1}
+    stats = pool.snapshot()
+    assert stats["retries"] == 2
+    assert stats["breakers"]["pms"]["state"] == CircuitBreaker.CLOSED
+    rows = {row["endpoint"]: row for row in stats["endpoints"]}
+    assert rows["/api/Reservations/{id}"]["errors"] == 2
+    assert rows["/api/Reservations/{id}"]["p95_ms"] >= rows["/api/Reservations/{id}"]["p50_ms"]
+
+
+def test_open_circuit_surfaces_as_shelter_error(monkeypatch) -> None:
+    pool = ShelterHTTPPool(retry_attempts=1, breaker_failures=1, breaker_reset=60)
+    monkeypatch.setattr("services.shelter.shelter_http", pool)
+    client = ShelterPMSClient(base_url="http://127.0.0.1:9", pms_token="token")
+
+    async def scenario() -> None:
+        with pytest.raises(ShelterAPIError) as first:
+            await client._pms_request("/api/Reservations/1")
+        assert first.value.transient
+        with pytest.raises(ShelterAPIError) as second:
+            await client._pms_request("/api/Reservations/1")
+        assert second.value.code == "circuit_open"
+        await pool.close()
+
+    asyncio.run(scenario())
+
+
+def test_reservation_pages_are_prefetched_and_streamed(monkeypatch) -> None:
+    pool = ShelterHTTPPool()
+    monkeypatch.setattr("services.shelter.shelter_http", pool)
+    monkeypatch.setattr(ShelterPMSClient, "PAGE_SIZE", 2)
+    offsets: list[int] = []
+
+    async def by_filter(request: web.Request) -> web.Response:
+        payload = await request.json()
+        offset = payload["pagination"]["from"]
+        offsets.append(offset)
+        await asyncio.sleep(0.02)
+        items = [
+            {"id": str(index), "checkIn": "2026-03-01", "checkOut": "2026-03-02"}
+            for index in range(offset, min(offset + 2, 5))
+        ]
+        return web.json_response({"items": items, "count": 5})
+
+    async def scenario() -> None:
+        app = web.Application()
+        app.router.add_post("/api/Reservations/ByFilter", by_filter)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        base_url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+        try:
+            client = ShelterPMSClient(base_url=base_url, pms_token="token")
+            seen: list[str] = []
+            async for reservation in client.iter_reservations_by_filter(date(2026, 3, 1), date(2026, 3, 2)):
+                # The next page is already requested while this one is consumed.
+                await asyncio.sleep(0.03)
+                seen.append(reservation.id)
+            assert seen == ["0", "1", "2", "3", "4"]
+            assert offsets == [0, 2, 4]
+
+            stream = client.iter_reservations_by_filter(date(2026, 3, 1), date(2026, 3, 2))
+            assert (await stream.__anext__()).id == "0"
+            await stream.aclose()  # cancels the prefetched page
+
+            # Without prefetch the next page is only requested once this one is consumed.
+            offsets.clear()
+            stream = client.iter_reservations_by_filter(date(2026, 3, 1), date(2026, 3, 2), prefetch=False)
+            assert [(await stream.__anext__()).id for _ in range(2)] == ["0", "1"]
+            await asyncio.sleep(0.05)
+            assert offsets == [0]
+            assert (await stream.__anext__()).id == "2"
+            assert offsets == [0, 2]
+            await stream.aclose()
+            await pool.close()
+        finally:
+            await runner.cleanup()
+
+    asyncio.run(scenario())
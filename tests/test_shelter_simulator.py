@@ -0,0 +1,61 @@
+import asyncio
+from datetime import date, timedelta
+
+import pytest
+
+from benchmarks.shelter_simulator import ShelterSimulator, SimulatorConfig, guest_phone
+from services.shelter import ShelterAPIError, ShelterClient, ShelterPMSClient
+from services.shelter_http import ShelterHTTPPool
+
+
+def test_clients_read_reservations_guests_and_variants_from_simulator(monkeypatch) -> None:
+    pool = ShelterHTTPPool()
+    monkeypatch.setattr("services.shelter.shelter_http", pool)
+    today = date(2026, 3, 1)
+    simulator = ShelterSimulator(SimulatorConfig(reservations=120, annulled_ratio=0.1), today=today)
+
+    async def scenario() -> None:
+        runner, base_url = await simulator.start()
+        try:
+            pms = ShelterPMSClient(base_url=base_url, pms_token="sim")
+            window = (today - timedelta(days=60), today + timedelta(days=120))
+            active = await pms.get_reservations_by_filter(*window)
+            annulled = await pms.get_reservations_by_filter(*window, is_annul=True)
+            assert len(active) + len(annulled) == 120
+            assert annulled and all(reservation.is_annulled for reservation in annulled)
+            guests = await pms.get_reservation_guests(active[0].id)
+            assert guests[0].phone == guest_phone(int(active[0].id) - 100000)
+
+            widget = ShelterClient(base_url=base_url, widget_token="sim")
+            variants = await widget.get_variants(today, today + timedelta(days=2), adults=2)
+            assert len(variants) == 6
+            assert all(0 <= variant.available_count <= 40 for variant in variants)
+            availability = await widget.get_room_availability()
+            assert [row.room_name for row in availability][:2] == ["Category 1", "Category 2"]
+            await pool.close()
+        finally:
+            await runner.cleanup()
+
+    asyncio.run(scenario())
+    # ~108 active reservations in three pages, the annulled ones in one
+    assert simulator.requests["/api/Reservations/ByFilter"] == 4
+
+
+def test_simulator_injects_errors(monkeypatch) -> None:
+    pool = ShelterHTTPPool(retry_attempts=2, retry_base_delay=0, breaker_failures=10)
+    monkeypatch.setattr("services.shelter.shelter_http", pool)
+    simulator = ShelterSimulator(SimulatorConfig(reservations=5, error_rate=1.0))
+
+    async def scenario() -> None:
+        runner, base_url = await simulator.start()
+        try:
+            pms = ShelterPMSClient(base_url=base_url, pms_token="sim")
+            with pytest.raises(ShelterAPIError) as error:
+                await pms.get_reservation_guests("100000")
+            assert error.value.transient
+            await pool.close()
+        finally:
+            await runner.cleanup()
+
+    asyncio.run(scenario())
+    assert simulator.errors == 2
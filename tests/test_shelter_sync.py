@@ -0,0 +1,222 @@
+import asyncio
+from dataclasses import replace
+from datetime import timedelta
+from pathlib import Path
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+
+from config import get_settings
+from db.base import Base
+from db.models import GuestBooking, ShelterReservation, ShelterReservationGuest, ShelterSyncState, User
+from db.session import build_async_engine, build_engine
+from services import shelter_sync
+from services.guest_context import get_local_today
+from services.shelter import PMSGuest, PMSReservation, ShelterPMSClient
+
+
+class FakePMSClient(ShelterPMSClient):
+    def __init__(self, reservations: int, delay: float = 0.01) -> None:
+        super().__init__(base_url="http://pms.invalid", pms_token="token")
+        today = get_local_today()
+        self.reservations = [
+            PMSReservation(
+                id=str(index),
+                status="active",
+                check_in=today,
+                check_out=today + timedelta(days=2),
+                room_number=str(100 + index),
+                guest_name=None,
+                is_annulled=False,
+                guests=[],
+            )
+            for index in range(reservations)
+        ]
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.guest_calls = 0
+        self.modified_since = []
+
+    async def iter_reservations_by_filter(self, lived_from, lived_to, is_annul=False, on_page=None, modified_since=None, prefetch=True):
+        self.modified_since.append(modified_since)
+        if on_page is not None:
+            on_page(0 if is_annul else len(self.reservations))
+        for reservation in [] if is_annul else list(self.reservations):
+            yield reservation
+
+    async def get_reservation_guests(self, reservation_id: str) -> list[PMSGuest]:
+        self.guest_calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+        return [PMSGuest(id=f"g{reservation_id}", first_name="Guest", last_name=reservation_id, phone=f"+7999000{int(reservation_id):04d}", email=None)]
+
+
+def _databases(tmp_path: Path, monkeypatch):
+    settings = replace(get_settings(), database_url=f"sqlite:///{tmp_path / 'sync.db'}")
+    engine = build_engine(settings, profile="default")
+    Base.metadata.create_all(bind=engine)
+    async_engine = build_async_engine(settings, profile="default")
+    monkeypatch.setattr(shelter_sync, "AsyncSessionLocal", async_sessionmaker(async_engine, expire_on_commit=False))
+    return engine, async_engine, sessionmaker(bind=engine)
+
+
+def test_guest_lookups_run_concurrently_and_timings_are_stored(tmp_path: Path, monkeypatch) -> None:
+    engine, async_engine, Session = _databases(tmp_path, monkeypatch)
+    client = FakePMSClient(reservations=20)
+    monkeypatch.setattr(shelter_sync, "get_shelter_pms_client", lambda: client)
+    try:
+        with Session() as db:
+            db.add_all(User(telegram_id=str(index), phone=f"+7999000{index:04d}") for index in range(0, 20, 2))
+            db.commit()
+
+        matched = asyncio.run(shelter_sync.sync_reservations_once(concurrency=4))
+        asyncio.run(async_engine.dispose())
+
+        assert matched == 10
+        assert client.max_in_flight == 4
+        with Session() as db:
+            assert db.query(GuestBooking).count() == 10
+            state = db.get(ShelterSyncState, 1)
+            assert state.last_sync_pages == 2
+            assert state.last_sync_reservations == 20
+            assert state.last_sync_guest_calls == 20
+            assert state.last_sync_matched == 10
+            assert state.last_sync_duration_ms is not None
+    finally:
+        engine.dispose()
+
+
+def test_incremental_sync_only_applies_changed_reservations(tmp_path: Path, monkeypatch) -> None:
+    engine, async_engine, Session = _databases(tmp_path, monkeypatch)
+    client = FakePMSClient(reservations=6, delay=0)
+    monkeypatch.setattr(shelter_sync, "get_shelter_pms_client", lambda: client)
+
+    async def sync(**kwargs) -> int:
+        return await shelter_sync.sync_reservations_once(**kwargs)
+
+    try:
+        with Session() as db:
+            db.add_all(User(telegram_id=str(index), phone=f"+7999000{index:04d}") for index in range(5))
+            db.commit()
+
+        assert asyncio.run(sync()) == 5
+        assert client.guest_calls == 6
+
+        # Nothing changed: no guest lookups, no booking writes.
+        assert asyncio.run(sync()) == 0
+        assert client.guest_calls == 6
+        assert client.modified_since[-1] is not None
+        with Session() as db:
+            assert db.get(ShelterSyncState, 1).last_sync_changed == 0
+
+        client.reservations[2].room_number = "999"
+        asyncio.run(sync())
+        assert client.guest_calls == 7
+        with Session() as db:
+            assert db.query(GuestBooking).filter(GuestBooking.shelter_reservation_id == "2").one().room_number == "999"
+
+        # A new phone number is matched against the local mirror, not re-imported.
+        with Session() as db:
+            db.add(User(telegram_id="5", phone="+79990000005"))
+            db.commit()
+        assert asyncio.run(sync()) == 1
+        assert client.guest_calls == 7
+        with Session() as db:
+            assert db.query(GuestBooking).filter(GuestBooking.telegram_id == "5").one().shelter_reservation_id == "5"
+
+        assert asyncio.run(sync(full=True)) == 6
+        assert client.guest_calls == 13
+        assert client.modified_since[-1] is None
+        asyncio.run(async_engine.dispose())
+    finally:
+        engine.dispose()
+
+
+def test_guest_lookup_uses_mirror_and_coalesces_pms_syncs(tmp_path: Path, monkeypatch) -> None:
+    engine, async_engine, Session = _databases(tmp_path, monkeypatch)
+    client = FakePMSClient(reservations=3, delay=0)
+    monkeypatch.setattr(shelter_sync, "get_shelter_pms_client", lambda: client)
+    syncs = 0
+
+    async def counting_sync() -> int:
+        nonlocal syncs
+        syncs += 1
+        return await shelter_sync.sync_reservations_once()
+
+    coalescer = shelter_sync.SyncCoalescer(counting_sync, debounce=0.01, min_interval=60)
+    monkeypatch.setattr(shelter_sync, "sync_coalescer", coalescer)
+    try:
+        with Session() as db:
+            db.add_all(User(telegram_id=str(index), phone=f"+7999000{index:04d}") for index in range(3))
+            db.add(User(telegram_id="nobody", phone="+70000000000"))
+            db.commit()
+
+        async def burst() -> list[bool]:
+            return await asyncio.gather(*(shelter_sync.sync_guest_booking(str(index)) for index in range(3)))
+
+        # Empty mirror: three guests share one PMS sync.
+        assert asyncio.run(burst()) == [True, True, True]
+        assert syncs == 1
+        assert coalescer.coalesced == 2
+
+        # Mirror hit: no PMS sync at all.
+        assert asyncio.run(shelter_sync.sync_guest_booking("1")) is True
+        # Unknown phone right after a sync: rate limited, not another sync.
+        assert asyncio.run(shelter_sync.sync_guest_booking("nobody")) is False
+        assert syncs == 1
+        assert coalescer.skipped == 1
+        with Session() as db:
+            assert db.query(GuestBooking).count() == 3
+        asyncio.run(async_engine.dispose())
+    finally:
+        engine.dispose()
+
+
+def test_full_sync_drops_reservations_the_pms_no_longer_returns(tmp_path: Path, monkeypatch) -> None:
+    engine, async_engine, Session = _databases(tmp_path, monkeypatch)
+    client = FakePMSClient(reservations=3, delay=0)
+    monkeypatch.setattr(shelter_sync, "get_shelter_pms_client", lambda: client)
+
+    async def scenario() -> None:
+        await shelter_sync.sync_reservations_once(full=True)
+        # Reservation 1 is deleted in the PMS (or moved beyond the window).
+        del client.reservations[1]
+        await shelter_sync.sync_reservations_once(full=True)
+        # A later guest with its phone is not linked to it from the mirror.
+        with Session() as db:
+            db.query(User).filter(User.telegram_id == "10").update({"phone": None})
+            db.add(User(telegram_id="1", phone="+79990000001"))
+            db.commit()
+        await shelter_sync.sync_reservations_once()
+        await async_engine.dispose()
+
+    try:
+        with Session() as db:
+            db.add_all(User(telegram_id=str(index), phone=f"+7999000{index:04d}") for index in (0, 2))
+            db.add(User(telegram_id="10", phone="+79990000001"))
+            db.commit()
+
+        asyncio.run(scenario())
+
+        with Session() as db:
+            assert sorted(row.id for row in db.query(ShelterReservation)) == ["0", "2"]
+            assert db.query(ShelterReservationGuest).filter(ShelterReservationGuest.reservation_id == "1").count() == 0
+            gone = db.query(GuestBooking).filter(GuestBooking.shelter_reservation_id == "1").one()
+            assert gone.telegram_id == "10"
+            assert not gone.is_active
+            assert db.query(GuestBooking).filter(GuestBooking.telegram_id == "1").count() == 0
+            assert all(
+                booking.is_active
+                for booking in db.query(GuestBooking).filter(GuestBooking.shelter_reservation_id.in_(["0", "2"]))
+            )
+            # The active-flag refresh does not bring the vanished stay back.
+            shelter_sync._refresh_active_flags(db, get_local_today())
+            db.commit()
+            assert not db.get(GuestBooking, gone.id).is_active
+    finally:
+        engine.dispose()
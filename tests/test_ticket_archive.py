@@ -0,0 +1,111 @@
+from dataclasses import replace
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy.orm import sessionmaker
+
+from config import get_settings
+from db.base import Base
+from db.models import (
+    ArchivedTicket,
+    OutboxKind,
+    Ticket,
+    TicketMessage,
+    TicketMessageSender,
+    TicketStatus,
+    TicketType,
+)
+from db.session import build_engine
+from services import outbox
+from services.ticket_archive import archive_closed_tickets, enable_incremental_vacuum
+
+
+def _ticket(request_id: str, status: TicketStatus, updated_at: datetime) -> Ticket:
+    ticket = Ticket(
+        request_id=request_id,
+        type=TicketType.ROOM_SERVICE,
+        status=status,
+        guest_chat_id="100",
+        created_at=updated_at,
+        updated_at=updated_at,
+    )
+    ticket.messages.append(
+        TicketMessage(
+            request_id=request_id,
+            sender=TicketMessageSender.GUEST,
+            content=f"message for {request_id}",
+            created_at=updated_at,
+        )
+    )
+    return ticket
+
+
+def test_archive_moves_only_old_closed_tickets(tmp_path: Path) -> None:
+    # No tuned pragmas: the file starts with auto_vacuum=NONE, like a pre-archive database.
+    engine = build_engine(replace(get_settings(), database_url=f"sqlite:///{tmp_path / 'archive.db'}"), profile="default")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    old = datetime.utcnow() - timedelta(days=120)
+    try:
+        with Session() as db:
+            db.add_all(
+                [
+                    _ticket("old-closed", TicketStatus.COMPLETED, old),
+                    _ticket("old-open", TicketStatus.PENDING_ADMIN, old),
+                    _ticket("recent-closed", TicketStatus.DECLINED, datetime.utcnow()),
+                ]
+            )
+            pending = _ticket("old-undelivered", TicketStatus.CANCELLED, old)
+            db.add(pending)
+            db.flush()
+            outbox.enqueue(db, OutboxKind.TICKET_MESSAGE, chat_id="100", ticket_id=pending.id)
+            db.commit()
+
+        assert archive_closed_tickets(30, bind=engine, batch_size=1) == 1
+
+        with Session() as db:
+            assert sorted(ticket.request_id for ticket in db.query(Ticket)) == [
+                "old-open",
+                "old-undelivered",
+                "recent-closed",
+            ]
+            archived = db.query(ArchivedTicket).one()
+            assert archived.request_id == "old-closed"
+            assert archived.archived_at is not None
+            assert [message.content for message in archived.messages] == ["message for old-closed"]
+            assert db.query(TicketMessage).count() == 3
+
+        assert archive_closed_tickets(30, bind=engine) == 0
+        # The periodic job never rewrites the file; conversion is an explicit step.
+        with engine.connect() as conn:
+            assert conn.exec_driver_sql("PRAGMA auto_vacuum").scalar() == 0
+        assert enable_incremental_vacuum(engine)
+        assert not enable_incremental_vacuum(engine)
+        with engine.connect() as conn:
+            assert conn.exec_driver_sql("PRAGMA auto_vacuum").scalar() == 2
+    finally:
+        engine.dispose()
+
+
+def test_archived_ids_are_not_reused(tmp_path: Path) -> None:
+    engine = build_engine(replace(get_settings(), database_url=f"sqlite:///{tmp_path / 'archive.db'}"))
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    old = datetime.utcnow() - timedelta(days=120)
+    try:
+        with Session() as db:
+            db.add(_ticket("first", TicketStatus.COMPLETED, old))
+            db.commit()
+        assert archive_closed_tickets(30, bind=engine, vacuum=False) == 1
+
+        with Session() as db:
+            db.add(_ticket("second", TicketStatus.COMPLETED, old))
+            db.commit()
+        assert archive_closed_tickets(30, bind=engine, vacuum=False) == 1
+
+        with Session() as db:
+            archived = {ticket.id: ticket.request_id for ticket in db.query(ArchivedTicket)}
+            assert sorted(archived.values()) == ["first", "second"]
+            assert len(archived) == 2
+    finally:
+        engine.dispose()
@@ -1,17 +1,34 @@
-import os
+import asyncio
+from dataclasses import replace
 
 import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import sessionmaker
 
+from config import get_settings
+from db import session as db_session
 from db.models import Ticket, TicketMessage, TicketMessageSender, TicketStatus, TicketType
-from db.session import SessionLocal, engine
-from db.base import Base
-from services.tickets import create_ticket
+from db.session import build_async_engine, build_engine, init_db
+from services import tickets
+from services.tickets import append_guest_message_to_ticket, create_ticket, create_ticket_async, record_ticket_message
 
 
 @pytest.fixture(scope="module", autouse=True)
-def setup_database() -> None:
-    os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
-    Base.metadata.create_all(bind=engine)
+def setup_database(tmp_path_factory):
+    """Run init_db() (create_all + migrations) against a temporary file, never ./gora_bot.db."""
+
+    settings = replace(get_settings(), database_url=f"sqlite:///{tmp_path_factory.mktemp('db') / 'tickets.db'}")
+    engine = build_engine(settings)
+    async_engine = build_async_engine(settings)
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(db_session, "settings", settings)
+        patch.setattr(db_session, "engine", engine)
+        patch.setattr(tickets, "SessionLocal", sessionmaker(autocommit=False, autoflush=False, bind=engine))
+        patch.setattr(tickets, "AsyncSessionLocal", async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False))
+        init_db()
+        yield
+    asyncio.run(async_engine.dispose())
+    engine.dispose()
 
 
 def test_create_ticket_persists_ticket_and_message() -> None:
@@ -24,7 +41,7 @@ def test_create_ticket_persists_ticket_and_message() -> None:
         initial_message="Тестовая заявка",
     )
 
-    with SessionLocal() as session:
+    with tickets.SessionLocal() as session:
         db_ticket = session.get(Ticket, ticket.id)
         assert db_ticket is not None
         assert db_ticket.status == TicketStatus.PENDING_ADMIN
@@ -34,3 +51,86 @@ def test_create_ticket_persists_ticket_and_message() -> None:
         assert len(messages) == 1
         assert messages[0].sender == TicketMessageSender.GUEST
         assert messages[0].content == "Тестовая заявка"
+
+
+def test_create_ticket_async_persists_ticket_and_message() -> None:
+    ticket = asyncio.run(
+        create_ticket_async(
+            type_=TicketType.ROOM_SERVICE,
+            guest_chat_id="54321",
+            guest_name="Async User",
+            room_number="202",
+            payload={"branch": "technical_problem"},
+            initial_message="Асинхронная заявка",
+        )
+    )
+
+    with tickets.SessionLocal() as session:
+        db_ticket = session.get(Ticket, ticket.id)
+        assert db_ticket is not None
+        assert db_ticket.status == TicketStatus.PENDING_ADMIN
+
+        messages = session.query(TicketMessage).filter(TicketMessage.ticket_id == ticket.id).all()
+        assert [message.content for message in messages] == ["Асинхронная заявка"]
+
+
+def test_ticket_message_summary_tracks_appends() -> None:
+    ticket = create_ticket(
+        type_=TicketType.ROOM_SERVICE,
+        guest_chat_id="777",
+        guest_name="Summary User",
+        room_number="303",
+        payload=None,
+        initial_message="Первое сообщение",
+        rate_limit=False,
+    )
+    assert ticket.message_count == 1
+    assert ticket.unread_guest_count == 1
+
+    with tickets.SessionLocal() as session:
+        db_ticket = session.get(Ticket, ticket.id)
+        record_ticket_message(
+            db_ticket,
+            TicketMessage(ticket_id=ticket.id, sender=TicketMessageSender.ADMIN, content="Ответ", request_id="r"),
+        )
+        session.commit()
+        assert db_ticket.message_count == 2
+        assert db_ticket.unread_guest_count == 0
+        assert db_ticket.last_admin_message_at == db_ticket.last_message_at
+
+    updated = append_guest_message_to_ticket(ticket_id=ticket.id, content="Ещё вопрос")
+    assert updated.message_count == 3
+    assert updated.unread_guest_count == 1
+
+
+def test_ticket_counters_survive_interleaved_sessions() -> None:
+    ticket = create_ticket(
+        type_=TicketType.ROOM_SERVICE,
+        guest_chat_id="888",
+        guest_name="Race User",
+        room_number="404",
+        payload=None,
+        initial_message="Первое сообщение",
+        rate_limit=False,
+    )
+
+    # Both sessions load the ticket at message_count=1 before either writes.
+    with tickets.SessionLocal() as first, tickets.SessionLocal() as second:
+        first_ticket = first.get(Ticket, ticket.id)
+        second_ticket = second.get(Ticket, ticket.id)
+        assert first_ticket.message_count == second_ticket.message_count == 1
+        for session, db_ticket, content in ((first, first_ticket, "Раз"), (second, second_ticket, "Два")):
+            message = TicketMessage(ticket_id=ticket.id, sender=TicketMessageSender.GUEST, content=content, request_id="r")
+            session.add(message)
+            record_ticket_message(db_ticket, message)
+        # Two appends in one flush stack too.
+        extra = TicketMessage(ticket_id=ticket.id, sender=TicketMessageSender.GUEST, content="Три", request_id="r")
+        second.add(extra)
+        record_ticket_message(second_ticket, extra)
+        first.commit()
+        second.commit()
+
+    with tickets.SessionLocal() as session:
+        db_ticket = session.get(Ticket, ticket.id)
+        assert db_ticket.message_count == 4
+        assert db_ticket.unread_guest_count == 4
@@ -2,14 +2,16 @@
 FastAPI web admin panel for managing hotel tickets.
 """
 import logging
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
 from typing import Any, List, Optional
 
-from fastapi import FastAPI, HTTPException, Depends, UploadFile, File
+from fastapi import FastAPI, HTTPException, Depends, Request, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse, FileResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
+import hashlib
 import os
 import subprocess
 import asyncio
@@ -36,14 +38,36 @@ from db.models import (
     MenuCategory,
     MenuCategorySetting,
     AdminUser,
+    ArchivedTicket,
+    OutboxKind,
 )
+from db import instrumentation
 from db.session import SessionLocal
+from services import outbox
+from services import occupancy_history
+from services import shelter_http
+from services.guest_context import get_local_now
 from services.shelter import get_shelter_client, ShelterAPIError
-from services.content import content_manager
+from services.content import (
+    MENUS_FILE,
+    TEXTS_FILE,
+    ContentConflictError,
+    compile_texts,
+    content_manager,
+)
+from services.tickets import mark_ticket_viewed, record_ticket_message
 
 
 logger = logging.getLogger(__name__)
-app = FastAPI(title="GORA Hotel Admin API", version="1.0.0")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    await shelter_http.close_shelter_http()
+
+
+app = FastAPI(title="GORA Hotel Admin API", version="1.0.0", lifespan=lifespan)
 
 # CORS configuration
 app.add_middleware(
@@ -55,6 +79,16 @@ app.add_middleware(
 )
 
 
+@app.middleware("http")
+async def track_db_queries(request: Request, call_next):
+    """Charge the request's SQL statements to its route template."""
+    with instrumentation.track(request.method) as scope:
+        response = await call_next(request)
+        route = request.scope.get("route")
+        scope.name = f"{request.method} {getattr(route, 'path', None) or '<unmatched>'}"
+    return response
+
+
 # Database dependency
 def get_db():
     db = SessionLocal()
@@ -121,6 +155,17 @@ class StatisticsResponse(BaseModel):
 
 class ContentUpdateRequest(BaseModel):
     content: str
+    # sha256 returned by the GET endpoint; the write is refused if the file changed since.
+    base_sha256: Optional[str] = None
+
+
+class ContentPatchItem(BaseModel):
+    path: str
+    value: Any
+
+
+class ContentPatchRequest(BaseModel):
+    updates: List[ContentPatchItem]
 
 
 class ButtonLabelUpdateItem(BaseModel):
@@ -168,58 +213,32 @@ def _collect_button_labels(node: Any, prefix: str = "") -> list[dict[str, Any]]:
     return items
 
 
-def _path_tokens(path: str) -> list[str | int]:
-    tokens: list[str | int] = []
-    key = ""
-    i = 0
-    while i < len(path):
-        ch = path[i]
-        if ch == ".":
-            if key:
-                tokens.append(key)
-                key = ""
-            i += 1
-            continue
-        if ch == "[":
-            if key:
-                tokens.append(key)
-                key = ""
-            j = path.find("]", i)
-            if j == -1:
-                raise ValueError(f"Invalid path: {path}")
-            tokens.append(int(path[i + 1:j]))
-            i = j + 1
-            continue
-        key += ch
-        i += 1
-    if key:
-        tokens.append(key)
-    return tokens
-
-
-def _set_value_by_path(root: Any, path: str, value: Any) -> None:
-    tokens = _path_tokens(path)
-    if not tokens:
-        raise ValueError(f"Invalid path: {path}")
-    cur = root
-    for token in tokens[:-1]:
-        if isinstance(token, int):
-            if not isinstance(cur, list):
-                raise ValueError(f"Expected list at token {token} for path {path}")
-            cur = cur[token]
-        else:
-            if not isinstance(cur, dict):
-                raise ValueError(f"Expected dict at token {token} for path {path}")
-            cur = cur[token]
-    last = tokens[-1]
-    if isinstance(last, int):
-        if not isinstance(cur, list):
-            raise ValueError(f"Expected list for final token in path {path}")
-        cur[last] = value
-    else:
-        if not isinstance(cur, dict):
-            raise ValueError(f"Expected dict for final token in path {path}")
-        cur[last] = value
+def _check_text_placeholders(texts: dict[str, Any]) -> None:
+    """Reject edits that would break rendering of a text in the bot."""
+    _, problems = compile_texts(texts)
+    if problems:
+        raise HTTPException(status_code=400, detail="Placeholder errors: " + "; ".join(problems))
+
+
+async def _apply_content_change(write, *args: Any, **kwargs: Any) -> list[str]:
+    """Run a content write off the event loop and return the changed key paths."""
+    try:
+        changed = await asyncio.to_thread(write, *args, **kwargs)
+    except ContentConflictError as e:
+        raise HTTPException(status_code=409, detail={"message": str(e), "sha256": e.current_sha256})
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=f"{os.path.basename(e.filename or '')} not found")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if changed:
+        logger.info("Content updated: %s", ", ".join(sorted(changed)))
+    return sorted(changed)
+
+
+def _read_raw_content(path: str) -> dict[str, str]:
+    with open(path, "rb") as f:
+        raw = f.read()
+    return {"content": raw.decode("utf-8"), "sha256": hashlib.sha256(raw).hexdigest()}
 
 
 def _sorted_ticket_messages(ticket: Ticket) -> list[TicketMessage]:
@@ -230,31 +249,12 @@ def _new_guest_messages_count(ticket: Ticket) -> int:
     """Количество непрочитанных сообщений гостя (показываем значок 🔔 только при наличии)."""
     if ticket.status not in {TicketStatus.NEW, TicketStatus.PENDING_ADMIN}:
         return 0
-
-    messages = _sorted_ticket_messages(ticket)
-    # Берём максимальную из: последний ответ админа или момент просмотра заявки админом
-    last_admin_at = max(
-        (message.created_at for message in messages if message.sender == TicketMessageSender.ADMIN),
-        default=None,
-    )
-    read_threshold = last_admin_at
-    if getattr(ticket, "admin_last_viewed_at", None) is not None:
-        read_threshold = max(read_threshold or datetime.min, ticket.admin_last_viewed_at)
-
-    count = 0
-    for message in messages:
-        if message.sender != TicketMessageSender.GUEST:
-            continue
-        if read_threshold is None or message.created_at > read_threshold:
-            count += 1
-    return count
+    # Счётчик сбрасывается ответом админа или просмотром заявки (services.tickets).
+    return ticket.unread_guest_count or 0
 
 
 def _last_message_at(ticket: Ticket) -> datetime:
-    messages = _sorted_ticket_messages(ticket)
-    if messages:
-        return messages[-1].created_at
-    return ticket.updated_at
+    return ticket.last_message_at or ticket.updated_at
 
 
 def _serialize_message(message: TicketMessage) -> MessageResponse:
@@ -302,13 +302,42 @@ async def root_api():
     return {"message": "GORA Hotel Admin API", "version": "1.0.0"}
 
 
+@app.get("/api/diagnostics/db-stats")
+async def get_db_stats(reset: bool = False):
+    """Query count and DB time per route since startup (or the last reset)."""
+    stats = instrumentation.snapshot()
+    if reset:
+        instrumentation.reset()
+    return stats
+
+
+@app.get("/api/diagnostics/shelter-http")
+async def get_shelter_http_stats(reset: bool = False):
+    """Shelter API latency per endpoint and connection reuse of the shared pool."""
+    stats = shelter_http.snapshot()
+    if reset:
+        shelter_http.reset()
+    return stats
+
+
+@app.get("/api/diagnostics/shelter-cache")
+async def get_shelter_cache_stats(reset: bool = False):
+    """Hit/miss counters of the getHotelParams / getVariants cache."""
+    cache = get_shelter_client().cache
+    stats = cache.snapshot()
+    if reset:
+        cache.reset_counters()
+    return stats
+
+
 @app.get("/api/tickets", response_model=List[TicketResponse])
 async def get_all_tickets(
     status: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
     """Get all tickets, optionally filtered by status."""
-    query = db.query(Ticket).options(selectinload(Ticket.messages))
+    # Summary columns on Ticket make this a single indexed query without messages.
+    query = db.query(Ticket)
     
     if status:
         try:
@@ -332,10 +361,19 @@ async def get_ticket_detail(ticket_id: int, db: Session = Depends(get_db)):
     )
     
     if not ticket:
-        raise HTTPException(status_code=404, detail="Ticket not found")
+        # Closed tickets move to cold storage after TICKET_ARCHIVE_AFTER_DAYS.
+        archived = (
+            db.query(ArchivedTicket)
+            .options(selectinload(ArchivedTicket.messages))
+            .filter(ArchivedTicket.id == ticket_id)
+            .first()
+        )
+        if not archived:
+            raise HTTPException(status_code=404, detail="Ticket not found")
+        return _serialize_ticket_detail(archived)
 
     # Админ открыл заявку — сбрасываем значок непрочитанных
-    ticket.admin_last_viewed_at = datetime.utcnow()
+    mark_ticket_viewed(ticket)
     db.commit()
     
     return _serialize_ticket_detail(ticket)
@@ -365,10 +403,20 @@ async def send_message_to_ticket(
     )
     
     db.add(message)
+    record_ticket_message(ticket, message)
     ticket.updated_at = datetime.utcnow()
     if ticket.dialog_open:
         ticket.dialog_last_activity_at = datetime.utcnow()
         ticket.dialog_expires_at = datetime.utcnow() + timedelta(hours=1)
+    if outbox.is_telegram_chat_id(ticket.guest_chat_id):
+        db.flush()
+        outbox.enqueue(
+            db,
+            OutboxKind.TICKET_MESSAGE,
+            chat_id=ticket.guest_chat_id,
+            ticket_id=ticket.id,
+            ticket_message_id=message.id,
+        )
     db.commit()
     db.refresh(message)
     
@@ -423,15 +471,23 @@ async def update_ticket_status(
         if (
             notification_text
             and previous_status != new_status
-            and bool((ticket.guest_chat_id or "").strip())
+            and outbox.is_telegram_chat_id(ticket.guest_chat_id)
         ):
-            db.add(
-                TicketMessage(
-                    ticket_id=ticket.id,
-                    sender=TicketMessageSender.SYSTEM,
-                    content=notification_text,
-                    request_id=str(uuid4()),
-                )
+            system_message = TicketMessage(
+                ticket_id=ticket.id,
+                sender=TicketMessageSender.SYSTEM,
+                content=notification_text,
+                request_id=str(uuid4()),
+            )
+            db.add(system_message)
+            record_ticket_message(ticket, system_message)
+            db.flush()
+            outbox.enqueue(
+                db,
+                OutboxKind.TICKET_MESSAGE,
+                chat_id=ticket.guest_chat_id,
+                ticket_id=ticket.id,
+                ticket_message_id=system_message.id,
             )
     except Exception as e:
         logger.error(f"Failed to queue ticket status notification: {e}")
@@ -516,21 +572,44 @@ async def get_shelter_availability(
     check_out: str,
     adults: int = 1
 ):
-    """Get room availability for specific dates."""
+    """Get room availability for specific dates; every row carries when it was fetched."""
     try:
         from datetime import datetime
         from dataclasses import asdict
         ci = datetime.strptime(check_in, "%Y-%m-%d").date()
         co = datetime.strptime(check_out, "%Y-%m-%d").date()
         shelter = get_shelter_client()
-        variants = await shelter.get_variants(ci, co, adults)
+        # From the availability calendar when it covers the stay, else a live search
+        variants, fetched_at = await shelter.search_stay(ci, co, adults)
+        updated_at = (fetched_at or datetime.now()).isoformat()
         # Ensure we return a list of dicts
-        return [asdict(v) if hasattr(v, '__dataclass_fields__') else v for v in variants]
+        return [{**asdict(v), "updated_at": updated_at} for v in variants]
     except Exception as e:
         logger.error(f"Availability error: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
 
 
+@app.get("/api/occupancy")
+async def get_occupancy_series(
+    resolution: str = "hour",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: int = occupancy_history.MAX_POINTS,
+    db: Session = Depends(get_db),
+):
+    """Occupancy chart points (hotel-local buckets) from the stored time series; never calls Shelter.
+
+    Defaults to the last 7 days; ``resolution`` is raw, hour or day.
+    """
+    end = end or get_local_now().replace(tzinfo=None)
+    start = start or end - timedelta(days=7)
+    try:
+        points = occupancy_history.load_series(db, resolution, start, end, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"resolution": resolution, "start": start.isoformat(), "end": end.isoformat(), "points": points}
+
+
 # --- Content Management Endpoints ---
 
 @app.get("/api/content/menus-ru")
@@ -539,8 +618,7 @@ async def get_menus_ru_content():
     menus_path = _menus_file_path()
     if not os.path.exists(menus_path):
         raise HTTPException(status_code=404, detail="menus.ru.yml not found")
-    with open(menus_path, "r", encoding="utf-8") as f:
-        return {"content": f.read()}
+    return _read_raw_content(menus_path)
 
 
 @app.put("/api/content/menus-ru")
@@ -554,12 +632,10 @@ async def update_menus_ru_content(payload: ContentUpdateRequest):
     if not isinstance(parsed, dict):
         raise HTTPException(status_code=400, detail="Root YAML node must be a mapping/object")
 
-    menus_path = _menus_file_path()
-    with open(menus_path, "w", encoding="utf-8") as f:
-        f.write(payload.content)
-    content_manager.reload()
-
-    return {"success": True}
+    changed = await _apply_content_change(
+        content_manager.write_file, MENUS_FILE, payload.content, payload.base_sha256
+    )
+    return {"success": True, "changed": changed}
 
 
 class TextUpdateByPathRequest(BaseModel):
@@ -583,23 +659,13 @@ async def get_texts_ru_json():
 @app.put("/api/content/texts-ru/json")
 async def update_texts_ru_json(payload: TextUpdateByPathRequest):
     """Update a specific text value in texts.ru.yml by path."""
-    texts_path = _texts_file_path()
-    if not os.path.exists(texts_path):
-        raise HTTPException(status_code=404, detail="texts.ru.yml not found")
-
-    with open(texts_path, "r", encoding="utf-8") as f:
-        parsed = yaml.safe_load(f) or {}
-
-    try:
-        _set_value_by_path(parsed, payload.path, payload.value)
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Invalid path {payload.path}: {e}")
-
-    with open(texts_path, "w", encoding="utf-8") as f:
-        yaml.safe_dump(parsed, f, allow_unicode=True, sort_keys=False)
-    content_manager.reload()
-
-    return {"success": True}
+    changed = await _apply_content_change(
+        content_manager.patch_file,
+        TEXTS_FILE,
+        {payload.path: payload.value},
+        validate=_check_text_placeholders,
+    )
+    return {"success": True, "changed": changed}
 
 
 @app.get("/api/content/menus-ru/json")
@@ -621,8 +687,7 @@ async def get_texts_ru_content():
     texts_path = _texts_file_path()
     if not os.path.exists(texts_path):
         raise HTTPException(status_code=404, detail="texts.ru.yml not found")
-    with open(texts_path, "r", encoding="utf-8") as f:
-        return {"content": f.read()}
+    return _read_raw_content(texts_path)
 
 
 @app.put("/api/content/texts-ru")
@@ -635,13 +700,12 @@ async def update_texts_ru_content(payload: ContentUpdateRequest):
 
     if not isinstance(parsed, dict):
         raise HTTPException(status_code=400, detail="Root YAML node must be a mapping/object")
+    _check_text_placeholders(parsed)
 
-    texts_path = _texts_file_path()
-    with open(texts_path, "w", encoding="utf-8") as f:
-        f.write(payload.content)
-    content_manager.reload()
-
-    return {"success": True}
+    changed = await _apply_content_change(
+        content_manager.write_file, TEXTS_FILE, payload.content, payload.base_sha256
+    )
+    return {"success": True, "changed": changed}
 
 
 @app.get("/api/content/button-labels")
@@ -662,29 +726,38 @@ async def get_button_labels():
 @app.put("/api/content/button-labels")
 async def update_button_labels(payload: ButtonLabelsUpdateRequest):
     """Update only labels of buttons while preserving callback/web_app values."""
-    menus_path = _menus_file_path()
-    if not os.path.exists(menus_path):
-        raise HTTPException(status_code=404, detail="menus.ru.yml not found")
-
-    with open(menus_path, "r", encoding="utf-8") as f:
-        parsed = yaml.safe_load(f) or {}
-    if not isinstance(parsed, dict):
-        raise HTTPException(status_code=400, detail="Invalid menus.ru.yml structure")
-
+    updates: dict[str, str] = {}
     for item in payload.updates:
         label = (item.label or "").strip()
         if not label:
             raise HTTPException(status_code=400, detail=f"Label cannot be empty: {item.path}")
-        try:
-            _set_value_by_path(parsed, item.path, label)
-        except Exception as e:
-            raise HTTPException(status_code=400, detail=f"Invalid path {item.path}: {e}")
+        updates[item.path] = label
+
+    changed = await _apply_content_change(content_manager.patch_file, MENUS_FILE, updates)
+    return {"success": True, "updated": len(payload.updates), "changed": changed}
+
+
+@app.patch("/api/content/texts-ru")
+async def patch_texts_ru_content(payload: ContentPatchRequest):
+    """Set only the given paths in texts.ru.yml; other keys are left untouched."""
+    changed = await _apply_content_change(
+        content_manager.patch_file,
+        TEXTS_FILE,
+        {item.path: item.value for item in payload.updates},
+        validate=_check_text_placeholders,
+    )
+    return {"success": True, "changed": changed}
 
-    with open(menus_path, "w", encoding="utf-8") as f:
-        yaml.safe_dump(parsed, f, allow_unicode=True, sort_keys=False)
-    content_manager.reload()
 
-    return {"success": True, "updated": len(payload.updates)}
+@app.patch("/api/content/menus-ru")
+async def patch_menus_ru_content(payload: ContentPatchRequest):
+    """Set only the given paths in menus.ru.yml; other keys are left untouched."""
+    changed = await _apply_content_change(
+        content_manager.patch_file,
+        MENUS_FILE,
+        {item.path: item.value for item in payload.updates},
+    )
+    return {"success": True, "changed": changed}
 
 @app.get("/api/menu")
 async def get_menu(db: Session = Depends(get_db)):
@@ -989,7 +1062,7 @@ async def create_staff_task(task: dict, db: Session = Depends(get_db)):
             raise HTTPException(status_code=400, detail="Неверный формат времени. Используйте HH:MM")
 
     assigned_to = task.get("assigned_to")
-    notification_sent = False
+    notify_staff = False
 
     # Preferred assignment format is staff id from admin panel.
     if assigned_to:
@@ -1006,15 +1079,23 @@ async def create_staff_task(task: dict, db: Session = Depends(get_db)):
 
         # Persist staff id for stable mapping even if telegram id changes later.
         task["assigned_to"] = str(staff.id)
-        # If staff has no Telegram ID, don't keep retrying notifications forever.
-        notification_sent = not bool(staff.telegram_id)
-    else:
-        notification_sent = True
+        # If staff has no Telegram ID, there is nobody to notify.
+        notify_staff = bool(staff.telegram_id)
 
-    task["notification_sent"] = task.get("notification_sent", notification_sent)
+    # Legacy clients may still send notification_sent=true to suppress the message.
+    if task.pop("notification_sent", False):
+        notify_staff = False
     task["scheduled_for_utc"] = scheduled_for_utc
     new_task = StaffTask(**task)
     db.add(new_task)
+    if notify_staff:
+        db.flush()
+        outbox.enqueue(
+            db,
+            OutboxKind.STAFF_TASK,
+            staff_task_id=new_task.id,
+            available_at=scheduled_for_utc,
+        )
     db.commit()
     db.refresh(new_task)
     return new_task
@@ -1043,37 +1124,48 @@ async def delete_staff_task(task_id: int, db: Session = Depends(get_db)):
 
 
 @app.get("/api/pending-staff-task-notifications")
-async def get_pending_staff_task_notifications(db: Session = Depends(get_db)):
+async def get_pending_staff_task_notifications(after_id: int = 0, limit: int = outbox.DEFAULT_PAGE_SIZE, db: Session = Depends(get_db)):
     """Get staff tasks that need Telegram notification to assigned staff."""
-    now_utc = datetime.utcnow()
-    pending = db.query(StaffTask).filter(
-        StaffTask.notification_sent == False,
-        StaffTask.status == "PENDING",
-        StaffTask.assigned_to.isnot(None),
-        or_(StaffTask.scheduled_for_utc.is_(None), StaffTask.scheduled_for_utc <= now_utc),
-    ).order_by(StaffTask.created_at.asc()).all()
+    entries = outbox.fetch_pending(db, OutboxKind.STAFF_TASK, after_id, limit)
+    task_ids = [entry.staff_task_id for entry in entries if entry.staff_task_id]
+    tasks = {task.id: task for task in db.query(StaffTask).filter(StaffTask.id.in_(task_ids)).all()} if task_ids else {}
+
+    # Resolve all assignees in one query; assigned_to holds either Staff.id or a telegram_id.
+    assignees = {(task.assigned_to or "").strip() for task in tasks.values()} - {""}
+    staff_ids = [int(value) for value in assignees if value.isdigit()]
+    staff_by_id: dict[int, Staff] = {}
+    staff_by_telegram: dict[str, Staff] = {}
+    if assignees:
+        for member in db.query(Staff).filter(
+            Staff.is_active == True,
+            or_(Staff.id.in_(staff_ids), Staff.telegram_id.in_(assignees)),
+        ):
+            staff_by_id[member.id] = member
+            if member.telegram_id:
+                staff_by_telegram[member.telegram_id] = member
 
     notifications = []
-    for task in pending:
-        staff = None
-        assigned_raw = (task.assigned_to or "").strip()
+    skipped = []
+    for entry in entries:
+        task = tasks.get(entry.staff_task_id)
+        if not task or task.status != "PENDING":
+            skipped.append(entry.id)
+            continue
 
+        assigned_raw = (task.assigned_to or "").strip()
         if assigned_raw.isdigit():
-            staff = db.query(Staff).filter(Staff.id == int(assigned_raw), Staff.is_active == True).first()
-        elif assigned_raw:
-            staff = db.query(Staff).filter(Staff.telegram_id == assigned_raw, Staff.is_active == True).first()
-
-        if not staff:
-            # No valid assignee left -> mark as processed to avoid endless polling.
-            task.notification_sent = True
-            continue
+            staff = staff_by_id.get(int(assigned_raw))
+        else:
+            staff = staff_by_telegram.get(assigned_raw)
 
-        if not staff.telegram_id or not staff.telegram_id.isdigit():
-            task.notification_sent = True
+        # No valid assignee left -> nothing to deliver.
+        if not staff or not outbox.is_telegram_chat_id(staff.telegram_id):
+            skipped.append(entry.id)
             continue
 
         notifications.append(
             {
+                "outbox_id": entry.id,
                 "task_id": task.id,
                 "telegram_id": staff.telegram_id,
                 "staff_name": staff.full_name,
@@ -1083,19 +1175,10 @@ async def get_pending_staff_task_notifications(db: Session = Depends(get_db)):
             }
         )
 
+    outbox.mark_skipped_many(db, skipped)
     db.commit()
     return notifications
 
-
-@app.post("/api/staff/tasks/{task_id}/mark-notified")
-async def mark_staff_task_notified(task_id: int, db: Session = Depends(get_db)):
-    task = db.query(StaffTask).filter(StaffTask.id == task_id).first()
-    if not task:
-        raise HTTPException(status_code=404, detail="Staff task not found")
-    task.notification_sent = True
-    db.commit()
-    return {"success": True}
-
 # --- Staff Management Endpoints ---
 
 @app.get("/api/staff")
@@ -1286,8 +1369,7 @@ async def create_guest_order(order: GuestOrderRequest, db: Session = Depends(get
     )
     
     db.add(ticket)
-    db.commit()
-    db.refresh(ticket)
+    db.flush()
     
     # Add initial message
     message = TicketMessage(
@@ -1297,7 +1379,12 @@ async def create_guest_order(order: GuestOrderRequest, db: Session = Depends(get
         content=summary,
     )
     db.add(message)
+    record_ticket_message(ticket, message)
+    # Confirmation for the guest goes out with the ticket in one commit.
+    if outbox.is_telegram_chat_id(ticket.guest_chat_id):
+        outbox.enqueue(db, OutboxKind.ORDER_CONFIRMATION, chat_id=ticket.guest_chat_id, ticket_id=ticket.id)
     db.commit()
+    db.refresh(ticket)
     
     # Build response with composition
     response_items = []
@@ -1330,97 +1417,132 @@ async def create_guest_order(order: GuestOrderRequest, db: Session = Depends(get
     }
 
 
-# --- Pending Order Notifications ---
+# --- Outbox: pending Telegram deliveries ---
+#
+# bot_api_bridge pages through these endpoints with ``after_id`` (the last
+# ``outbox_id`` it saw) and acknowledges each entry via /api/outbox/{id}/sent.
+
+class OutboxFailureRequest(BaseModel):
+    error: Optional[str] = None
+    retry: bool = True
+
 
 @app.get("/api/pending-order-notifications")
-async def get_pending_order_notifications(db: Session = Depends(get_db)):
+async def get_pending_order_notifications(after_id: int = 0, limit: int = outbox.DEFAULT_PAGE_SIZE, db: Session = Depends(get_db)):
     """Get orders that need Telegram notification to guest."""
-    # Find ALL unnotified MENU_ORDER tickets with telegram_id (no time window!)
-    tickets = db.query(Ticket).filter(
-        Ticket.type == TicketType.MENU_ORDER,
-        Ticket.guest_chat_id != "mini_app",  # Has telegram_id
-    ).all()
-    
+    entries = outbox.fetch_pending(db, OutboxKind.ORDER_CONFIRMATION, after_id, limit)
+    ticket_ids = [entry.ticket_id for entry in entries if entry.ticket_id]
+    tickets = {ticket.id: ticket for ticket in db.query(Ticket).filter(Ticket.id.in_(ticket_ids)).all()} if ticket_ids else {}
+
     notifications = []
-    for ticket in tickets:
-        # Check if notification was already sent (tracked in payload)
-        payload = ticket.payload or {}
-        if payload.get("guest_notified"):
+    skipped = []
+    for entry in entries:
+        ticket = tickets.get(entry.ticket_id)
+        if not ticket:
+            skipped.append(entry.id)
             continue
-        
-        # Build notification data
-        items_data = payload.get("items", [])
-        total = payload.get("total", 0)
-        
+
+        payload = ticket.payload or {}
         notifications.append({
+            "outbox_id": entry.id,
             "ticket_id": ticket.id,
-            "telegram_id": ticket.guest_chat_id,
+            "telegram_id": entry.chat_id or ticket.guest_chat_id,
             "guest_name": ticket.guest_name,
             "room_number": ticket.room_number,
-            "items": items_data,
-            "total": total,
+            "items": payload.get("items", []),
+            "total": payload.get("total", 0),
             "comment": payload.get("guest_comment", "")
         })
-    
-    return notifications
 
-
-@app.post("/api/mark-notification-sent/{ticket_id}")
-async def mark_notification_sent(ticket_id: int, db: Session = Depends(get_db)):
-    """Mark order notification as sent to guest."""
-    ticket = db.query(Ticket).filter(Ticket.id == ticket_id).first()
-    if not ticket:
-        raise HTTPException(status_code=404, detail="Ticket not found")
-    
-    # Update payload to mark as notified - reassign entire dict for SQLAlchemy change detection
-    payload = dict(ticket.payload or {})
-    payload["guest_notified"] = True
-    ticket.payload = payload
-    from sqlalchemy.orm.attributes import flag_modified
-    flag_modified(ticket, "payload")
+    outbox.mark_skipped_many(db, skipped)
     db.commit()
-    
-    return {"success": True}
-
+    return notifications
 
-# --- Undelivered Admin Messages ---
 
 @app.get("/api/undelivered-admin-messages")
-async def get_undelivered_admin_messages(db: Session = Depends(get_db)):
+async def get_undelivered_admin_messages(after_id: int = 0, limit: int = outbox.DEFAULT_PAGE_SIZE, db: Session = Depends(get_db)):
     """Get outbound ticket messages that haven't been delivered to users via bot."""
-    messages = db.query(TicketMessage).filter(
-        TicketMessage.sender.in_([TicketMessageSender.ADMIN, TicketMessageSender.SYSTEM]),
-        TicketMessage.bot_delivered == False,
-    ).all()
-    
+    entries = outbox.fetch_pending(db, OutboxKind.TICKET_MESSAGE, after_id, limit)
+    message_ids = [entry.ticket_message_id for entry in entries if entry.ticket_message_id]
+    messages = (
+        {msg.id: msg for msg in db.query(TicketMessage).filter(TicketMessage.id.in_(message_ids)).all()}
+        if message_ids
+        else {}
+    )
+
     result = []
-    for msg in messages:
-        ticket = db.query(Ticket).filter(Ticket.id == msg.ticket_id).first()
-        if not ticket or not ticket.guest_chat_id:
+    skipped = []
+    for entry in entries:
+        msg = messages.get(entry.ticket_message_id)
+        if not msg or not entry.chat_id:
+            skipped.append(entry.id)
             continue
-        
+
         result.append({
+            "outbox_id": entry.id,
             "message_id": msg.id,
-            "ticket_id": ticket.id,
-            "guest_chat_id": ticket.guest_chat_id,
+            "ticket_id": msg.ticket_id,
+            "guest_chat_id": entry.chat_id,
             "content": msg.content,
             "admin_name": msg.admin_name or "Администратор",
             "sender": msg.sender.value if hasattr(msg.sender, "value") else str(msg.sender),
         })
-    
+
+    outbox.mark_skipped_many(db, skipped)
+    db.commit()
     return result
 
 
-@app.post("/api/mark-message-delivered/{message_id}")
+@app.post("/api/outbox/{outbox_id}/sent")
+async def mark_outbox_sent(outbox_id: int, db: Session = Depends(get_db)):
+    """Acknowledge a delivered outbox entry."""
+    if not outbox.mark_sent(db, outbox_id):
+        raise HTTPException(status_code=404, detail="Pending outbox entry not found")
+    db.commit()
+    return {"success": True}
+
+
+@app.post("/api/outbox/{outbox_id}/failed")
+async def mark_outbox_failed(outbox_id: int, failure: OutboxFailureRequest, db: Session = Depends(get_db)):
+    """Record a failed delivery attempt; the entry is retried later unless retry is false."""
+    if not outbox.mark_failed(db, outbox_id, failure.error, failure.retry):
+        raise HTTPException(status_code=404, detail="Pending outbox entry not found")
+    db.commit()
+    return {"success": True}
+
+
+# Deprecated: acknowledgements keyed by ticket / message / task, as used by
+# bot_api_bridge before the outbox. Kept for one release so an older bridge
+# does not deliver everything twice; they mark the matching pending outbox
+# entry as sent. Remove in the next release.
+
+@app.post("/api/mark-notification-sent/{ticket_id}", deprecated=True)
+async def mark_notification_sent(ticket_id: int, db: Session = Depends(get_db)):
+    """Mark order notification as sent to guest (use /api/outbox/{id}/sent)."""
+    if db.get(Ticket, ticket_id) is None:
+        raise HTTPException(status_code=404, detail="Ticket not found")
+    outbox.mark_sent_for(db, OutboxKind.ORDER_CONFIRMATION, ticket_id=ticket_id)
+    db.commit()
+    return {"success": True}
+
+
+@app.post("/api/mark-message-delivered/{message_id}", deprecated=True)
 async def mark_message_delivered(message_id: int, db: Session = Depends(get_db)):
-    """Mark an admin message as delivered to user via bot."""
-    msg = db.query(TicketMessage).filter(TicketMessage.id == message_id).first()
-    if not msg:
+    """Mark an admin message as delivered to user via bot (use /api/outbox/{id}/sent)."""
+    if db.get(TicketMessage, message_id) is None:
         raise HTTPException(status_code=404, detail="Message not found")
-    
-    msg.bot_delivered = True
+    outbox.mark_sent_for(db, OutboxKind.TICKET_MESSAGE, ticket_message_id=message_id)
+    db.commit()
+    return {"success": True}
+
+
+@app.post("/api/staff/tasks/{task_id}/mark-notified", deprecated=True)
+async def mark_staff_task_notified(task_id: int, db: Session = Depends(get_db)):
+    """Mark a staff task notification as sent (use /api/outbox/{id}/sent)."""
+    if db.get(StaffTask, task_id) is None:
+        raise HTTPException(status_code=404, detail="Staff task not found")
+    outbox.mark_sent_for(db, OutboxKind.STAFF_TASK, staff_task_id=task_id)
     db.commit()
-    
     return {"success": True}
 
 